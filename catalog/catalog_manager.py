@@ -26,6 +26,8 @@ class CatalogManager:
     def __init__(self, catalog_file: str = "system_catalog.json"):
         self.catalog_file = catalog_file
         self.catalog_data = self._load_catalog()
+        # 表结构版本号：每次DDL加一，存储引擎据此使schema缓存失效
+        self.schema_version = 0
         self.indexes = {}  # 索引信息: index_name -> index_info
         self.table_indexes = {}  # 表索引映射: table_name -> [index_names]
         # 添加视图相关的属性
@@ -399,6 +401,7 @@ class CatalogManager:
         }
 
         self.catalog_data["tables"][table_name] = table_info
+        self.schema_version += 1
         self._save_catalog()
         return True
 
@@ -414,6 +417,7 @@ class CatalogManager:
                 self.drop_index(index_name)
 
         del self.catalog_data["tables"][table_name]
+        self.schema_version += 1
         self._save_catalog()
         return True
 
@@ -575,6 +579,7 @@ class CatalogManager:
     def clear_all_tables(self):
         """清空所有表（用于测试）"""
         self.catalog_data["tables"] = {}
+        self.schema_version += 1
         self._save_catalog()
 
     def print_catalog_info(self):
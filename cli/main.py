@@ -55,6 +55,7 @@ class SimpleDB:
 
     def shutdown(self):
         """关闭数据库，确保所有数据持久化"""
+        self.table_storage.shutdown()
         self.storage_manager.shutdown()
 
 
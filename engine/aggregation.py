@@ -0,0 +1,344 @@
+# engine/aggregation.py
+"""
+流式哈希聚合。
+
+每个 (分组, 聚合函数) 只保留常数大小的累加器状态（计数、和、最小值、最大值，
+AVG 保存和与计数），输入行逐个累加后即可丢弃。DISTINCT 聚合额外保存已见值的集合。
+分组数超过内存预算时，新分组的输入按分组键哈希分区溢出到临时文件（与外部排序
+一样放在临时表空间目录），内存中的分组输出完毕后再逐个分区聚合。
+"""
+import os
+import pickle
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 内存中最多保留的分组数，超过后新分组溢出到磁盘
+DEFAULT_MAX_GROUPS = 100000
+
+# 溢出时的分区数
+DEFAULT_SPILL_PARTITIONS = 16
+
+# 分区仍然超出预算时最多再分区的层数
+MAX_SPILL_DEPTH = 4
+
+
+class Accumulator(ABC):
+    """聚合累加器基类"""
+
+    __slots__ = ()
+
+    @abstractmethod
+    def add(self, value: Any):
+        """累加一个值"""
+        pass
+
+    def add_values(self, values: Iterable[Any]):
+        """批量累加"""
+        for value in values:
+            self.add(value)
+
+    def add_numeric(self, values: Any):
+        """批量累加没有NULL的数值列（array/ndarray）"""
+        self.add_values(values)
+
+    @abstractmethod
+    def result(self) -> Any:
+        """聚合结果"""
+        pass
+
+
+class CountStarAccumulator(Accumulator):
+    """COUNT(*)：统计行数"""
+
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value: Any):
+        self.count += 1
+
+    def add_values(self, values: Iterable[Any]):
+        self.count += sum(1 for _ in values)
+
+    def add_numeric(self, values: Any):
+        self.count += len(values)
+
+    def result(self) -> Any:
+        return self.count
+
+
+class CountAccumulator(Accumulator):
+    """COUNT(column)：统计非NULL值"""
+
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value: Any):
+        if value is not None:
+            self.count += 1
+
+    def add_numeric(self, values: Any):
+        self.count += len(values)
+
+    def result(self) -> Any:
+        return self.count
+
+
+class SumAccumulator(Accumulator):
+    """SUM(column)：只累加数值，没有数值时为0"""
+
+    __slots__ = ('total',)
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, value: Any):
+        if value is not None and isinstance(value, (int, float)):
+            self.total += value
+
+    def add_numeric(self, values: Any):
+        self.total += _sum_numeric(values)
+
+    def result(self) -> Any:
+        return self.total
+
+
+class AvgAccumulator(Accumulator):
+    """AVG(column)：保存和与计数，没有数值时为NULL"""
+
+    __slots__ = ('total', 'count')
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def add(self, value: Any):
+        if value is not None and isinstance(value, (int, float)):
+            self.total += value
+            self.count += 1
+
+    def add_numeric(self, values: Any):
+        self.total += _sum_numeric(values)
+        self.count += len(values)
+
+    def result(self) -> Any:
+        return self.total / self.count if self.count else None
+
+
+class MinAccumulator(Accumulator):
+    """MIN(column)：只比较数值"""
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None
+
+    def add(self, value: Any):
+        if value is not None and isinstance(value, (int, float)) and (self.value is None or value < self.value):
+            self.value = value
+
+    def add_numeric(self, values: Any):
+        if len(values):
+            self.add(_python_scalar(values.min() if hasattr(values, 'dtype') else min(values)))
+
+    def result(self) -> Any:
+        return self.value
+
+
+class MaxAccumulator(Accumulator):
+    """MAX(column)：只比较数值"""
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None
+
+    def add(self, value: Any):
+        if value is not None and isinstance(value, (int, float)) and (self.value is None or value > self.value):
+            self.value = value
+
+    def add_numeric(self, values: Any):
+        if len(values):
+            self.add(_python_scalar(values.max() if hasattr(values, 'dtype') else max(values)))
+
+    def result(self) -> Any:
+        return self.value
+
+
+class DistinctAccumulator(Accumulator):
+    """DISTINCT 聚合：每个非NULL值只交给内部累加器一次"""
+
+    __slots__ = ('inner', 'seen')
+
+    def __init__(self, inner: Accumulator):
+        self.inner = inner
+        self.seen = set()
+
+    def add(self, value: Any):
+        if value is not None and value not in self.seen:
+            self.seen.add(value)
+            self.inner.add(value)
+
+    def add_numeric(self, values: Any):
+        self.add_values(values.tolist() if hasattr(values, 'tolist') else values)
+
+    def result(self) -> Any:
+        return self.inner.result()
+
+
+ACCUMULATORS = {
+    'COUNT': CountAccumulator,
+    'SUM': SumAccumulator,
+    'AVG': AvgAccumulator,
+    'MAX': MaxAccumulator,
+    'MIN': MinAccumulator,
+}
+
+
+def _sum_numeric(values: Any) -> Any:
+    if hasattr(values, 'dtype') and values.dtype.kind == 'i':
+        return int(values.sum())
+    # 浮点按顺序累加，保证与逐行累加的结果一致
+    return sum(values.tolist() if hasattr(values, 'tolist') else values)
+
+
+def _python_scalar(value: Any) -> Any:
+    return value.item() if hasattr(value, 'item') else value
+
+
+def parse_aggregate(func_name: str, column_name: str) -> Tuple[str, str, bool]:
+    """拆分聚合定义，返回 (函数名, 列名, 是否DISTINCT)"""
+    func_name = func_name.upper()
+    column_name = column_name.strip()
+    if column_name.upper().startswith('DISTINCT '):
+        return func_name, column_name[len('DISTINCT '):].strip(), True
+    return func_name, column_name, False
+
+
+class AggregateSpec:
+    """一个聚合函数的定义：输出列名、输入列名和累加器工厂"""
+
+    __slots__ = ('label', 'column', 'func_name', 'distinct')
+
+    def __init__(self, func_name: str, column_name: str):
+        self.func_name, self.column, self.distinct = parse_aggregate(func_name, column_name)
+        # 与投影中的列名保持一致，例如 COUNT(*)、SUM(amount)、COUNT(DISTINCT name)
+        self.label = f"{func_name.upper()}({column_name.strip()})"
+
+    @property
+    def counts_rows(self) -> bool:
+        return self.column == '*' and self.func_name == 'COUNT'
+
+    def create(self) -> Accumulator:
+        if self.counts_rows:
+            return CountStarAccumulator()
+        accumulator = ACCUMULATORS[self.func_name]()
+        return DistinctAccumulator(accumulator) if self.distinct else accumulator
+
+
+class HashAggregator:
+    """哈希聚合：分组键 -> 累加器列表，超过分组预算时按哈希分区溢出"""
+
+    def __init__(self, group_columns: List[str], aggregate_functions: List[tuple],
+                 max_groups: int = DEFAULT_MAX_GROUPS, spill_partitions: int = DEFAULT_SPILL_PARTITIONS,
+                 temp_dir: Optional[str] = None, depth: int = 0):
+        self.group_columns = list(group_columns)
+        self.aggregate_functions = aggregate_functions
+        # 不认识的聚合函数与以前一样直接忽略
+        self.specs = [AggregateSpec(func_name, column_name) for func_name, column_name in aggregate_functions
+                      if func_name.upper() in ACCUMULATORS]
+        self.value_columns = [None if spec.counts_rows else spec.column for spec in self.specs]
+        self.max_groups = max_groups
+        self.spill_partitions = spill_partitions
+        self.temp_dir = temp_dir
+        self.depth = depth
+
+        self.groups: Dict[tuple, List[Accumulator]] = {}
+        self.partitions: Optional[List[Any]] = None
+        self.spilled_rows = 0
+
+    def add_row(self, row: Dict):
+        """累加一行输入"""
+        self.add(tuple(row.get(col, None) for col in self.group_columns),
+                 [row.get(col) if col is not None else None for col in self.value_columns])
+
+    def add(self, group_key: tuple, values: List[Any]):
+        """累加一个分组键和对应的聚合输入值"""
+        accumulators = self.groups.get(group_key)
+        if accumulators is None:
+            if len(self.groups) >= self.max_groups and self.depth < MAX_SPILL_DEPTH:
+                self._spill(group_key, values)
+                return
+            accumulators = self.groups[group_key] = [spec.create() for spec in self.specs]
+
+        for accumulator, value in zip(accumulators, values):
+            accumulator.add(value)
+
+    def accumulators_for(self, group_key: tuple) -> List[Accumulator]:
+        """获取分组的累加器（供批量累加使用，不会溢出）"""
+        accumulators = self.groups.get(group_key)
+        if accumulators is None:
+            accumulators = self.groups[group_key] = [spec.create() for spec in self.specs]
+        return accumulators
+
+    @property
+    def group_count(self) -> int:
+        return len(self.groups)
+
+    def results(self) -> Iterator[Dict]:
+        """产出聚合结果行：先输出内存中的分组（按首次出现的顺序），再逐个处理溢出分区"""
+        groups, self.groups = self.groups, {}
+        for group_key, accumulators in groups.items():
+            yield self._result_row(group_key, accumulators)
+        del groups
+
+        if self.partitions is None:
+            return
+
+        partitions, self.partitions = self.partitions, None
+        try:
+            for partition in partitions:
+                if not partition.tell():
+                    continue
+                partition.seek(0)
+                aggregator = HashAggregator(self.group_columns, self.aggregate_functions, self.max_groups,
+                                            self.spill_partitions, self.temp_dir, self.depth + 1)
+                for group_key, values in _read_spilled(partition):
+                    aggregator.add(group_key, values)
+                partition.close()
+                yield from aggregator.results()
+        finally:
+            for partition in partitions:
+                if not partition.closed:
+                    partition.close()
+
+    def _result_row(self, group_key: tuple, accumulators: List[Accumulator]) -> Dict:
+        result_row = {}
+        for i, col in enumerate(self.group_columns):
+            result_row[col] = group_key[i]
+        for spec, accumulator in zip(self.specs, accumulators):
+            result_row[spec.label] = accumulator.result()
+        return result_row
+
+    def _spill(self, group_key: tuple, values: List[Any]):
+        if self.partitions is None:
+            if self.temp_dir:
+                os.makedirs(self.temp_dir, exist_ok=True)
+            self.partitions = [tempfile.TemporaryFile(prefix='groupby_spill_', dir=self.temp_dir)
+                               for _ in range(self.spill_partitions)]
+        # 每一层使用不同的哈希，避免再分区时所有行落到同一个分区
+        partition = self.partitions[hash((self.depth, group_key)) % self.spill_partitions]
+        pickle.dump((group_key, values), partition, pickle.HIGHEST_PROTOCOL)
+        self.spilled_rows += 1
+
+
+def _read_spilled(partition: Any) -> Iterator[Tuple[tuple, List[Any]]]:
+    while True:
+        try:
+            yield pickle.load(partition)
+        except EOFError:
+            return
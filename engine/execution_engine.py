@@ -1,21 +1,51 @@
 # engine/execution_engine.py
-from typing import List, Dict, Any, Optional, Tuple
-from engine.storage_engine import StorageEngine
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterator
+from engine.storage_engine import StorageEngine, StoredRow
 from catalog.catalog_manager import CatalogManager
 from sql_compiler.codegen.operators import (Operator, CreateTableOp, InsertOp, SeqScanOp, FilterOp, ProjectOp, UpdateOp, \
     DeleteOp, OptimizedSeqScanOp, GroupByOp, OrderByOp, JoinOp, FilteredSeqScanOp, IndexScanOp, IndexOnlyScanOp, CreateIndexOp,
     DropIndexOp, BeginTransactionOp, CommitTransactionOp, RollbackTransactionOp, CreateViewOp, DropViewOp, ShowViewsOp,
-    DescribeViewOp, ViewScanOp, ShowIndexesOp)
+    DescribeViewOp, ViewScanOp, ShowIndexesOp, NestedLoopJoinOp, SortMergeJoinOp, BTreeIndexScanOp, SetTraceOp,
+    ShowTraceOp, ExternalSortOp, LimitOp, TopNOp)
 from sql_compiler.exceptions.compiler_errors import SemanticError
 from sql_compiler.semantic.symbol_table import SymbolTable
 from sql_compiler.semantic.type_checker import TypeChecker
 from storage.core.transaction_manager import TransactionManager, IsolationLevel  # 添加事务管理器导入
 from sql_compiler.parser.ast_nodes import TableRef
+from sql_compiler.codegen.join_keys import join_alias, extract_equi_join_keys, is_ordered_on
+from sql_compiler.codegen.column_usage import input_columns, expression_columns, union_columns
+from engine.expression_compiler import ExpressionCompiler
+from engine.tracing import Tracer
+from engine.vectorized import BatchExecutor
+from engine.aggregation import HashAggregator, DEFAULT_MAX_GROUPS
+from engine.external_sort import ExternalSorter, DEFAULT_WORK_MEM
+import heapq
+import itertools
 import logging
 
 # 添加日志记录器
 logger = logging.getLogger("execution_engine")
 
+# 走迭代器（Volcano）流水线执行的查询算子
+QUERY_OPERATORS = (ViewScanOp, SeqScanOp, OptimizedSeqScanOp, FilterOp, GroupByOp, ProjectOp, OrderByOp,
+                   JoinOp, FilteredSeqScanOp, IndexScanOp, LimitOp, TopNOp)
+
+
+class _Descending:
+    """ORDER BY DESC 的排序键：反转比较，适用于字符串等不能取负的值"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other) -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other) -> bool:
+        return other.value < self.value
+
+
 class ExecutionEngine:
     def __init__(self, storage_engine: StorageEngine, catalog_manager: CatalogManager):
         self.storage_engine = storage_engine
@@ -35,6 +65,37 @@ class ExecutionEngine:
         # 添加日志记录器实例
         self.logger = logging.getLogger("execution_engine")
 
+        # 跟踪器：与存储引擎共享，默认关闭，SET TRACE 按会话打开
+        tracer = getattr(storage_engine, 'tracer', None)
+        self.tracer = tracer if isinstance(tracer, Tracer) else Tracer()
+
+        # 表达式编译器：条件在算子开始执行时编译一次，而不是逐行解释
+        self.expression_compiler = ExpressionCompiler(self)
+
+        # 流式执行模式：开启后查询直接返回行生成器，而不是物化后的列表
+        self.streaming_mode = False
+
+        # 批处理执行模式：开启后扫描、过滤、投影和聚合按列批执行
+        self.batch_mode = False
+        self.batch_executor = BatchExecutor(self)
+
+        # 哈希聚合在内存中最多保留的分组数，超过后溢出到磁盘
+        self.aggregate_max_groups = DEFAULT_MAX_GROUPS
+
+        # 排序可用的内存（字节），超过后使用外部归并排序
+        self.work_mem = DEFAULT_WORK_MEM
+
+        # UPDATE/DELETE 收集目标行时，扫描该表附带 (页号, 槽位号) 行标识
+        self.row_id_table = None
+
+    def set_streaming_mode(self, enabled: bool):
+        """设置流式执行模式"""
+        self.streaming_mode = enabled
+
+    def set_batch_mode(self, enabled: bool):
+        """设置批处理（向量化）执行模式"""
+        self.batch_mode = enabled
+
     def set_transaction_manager(self, transaction_manager: TransactionManager):
         """设置事务管理器"""
         self.transaction_manager = transaction_manager
@@ -192,54 +253,20 @@ class ExecutionEngine:
                 return self.execute_show_views(plan.pattern, plan.database)
             elif isinstance(plan, DescribeViewOp):
                 return self.execute_describe_view(plan.view_name)
-            elif isinstance(plan, ViewScanOp):
-                return self.execute_view_scan(plan.underlying_plan)
+
+            # 查询算子统一走迭代器流水线，非流式模式下在顶层物化为列表
+            if isinstance(plan, QUERY_OPERATORS):
+                rows = self.iterate_plan(plan)
+                return rows if self.streaming_mode else list(rows)
 
             if isinstance(plan, CreateTableOp):
                 return self.execute_create_table(plan.table_name, plan.columns)
             elif isinstance(plan, InsertOp):
-                return self.execute_insert(plan.table_name, plan.columns, plan.values)
-            # 在 execute_plan 方法中添加对 SeqScanOp 的特殊处理
-            elif isinstance(plan, SeqScanOp):
-                # 检查是否是视图
-                if plan.table_name in self.views:
-                    view_info = self.views[plan.table_name]
-                    if 'plan' in view_info:
-                        # 执行视图的SELECT计划
-                        return self.execute_plan(view_info['plan'])
-                    else:
-                        # 回退到直接使用视图定义
-                        return view_info.get('definition', [])
-                else:
-                    return self.execute_seq_scan(plan.table_name)
-            elif isinstance(plan, OptimizedSeqScanOp):
-                return self.execute_optimized_seq_scan(plan.table_name, plan.selected_columns)
-            elif isinstance(plan, FilterOp):
-                # 处理过滤操作
-                child_results = self.execute_plan(plan.children[0])
-                return [row for row in child_results if self.evaluate_condition(row, plan.condition)]
-            elif isinstance(plan, GroupByOp):
-                # 🔑 使用独立的execute_group_by方法，传入正确的参数
-                return self.execute_group_by(
-                    group_columns=plan.group_columns,
-                    having_condition=plan.having_condition,
-                    child_plan=plan.children[0],  # 传入子计划而不是执行结果
-                    aggregate_functions=plan.aggregate_functions
-                )
-            elif isinstance(plan, ProjectOp):
-                return self.execute_project(plan.columns, plan.children[0])
+                return self.execute_insert(plan.table_name, plan.columns, plan.values, plan.rows)
             elif isinstance(plan, UpdateOp):
                 return self.execute_update(plan.table_name, plan.assignments, plan.children[0])
             elif isinstance(plan, DeleteOp):
                 return self.execute_delete(plan.table_name, plan.children[0])
-            elif isinstance(plan, OrderByOp):
-                return self.execute_order_by(plan.order_columns, plan.children[0])
-            elif isinstance(plan, JoinOp):
-                return self.execute_join(plan.join_type, plan.on_condition, plan.children)
-            elif isinstance(plan, FilteredSeqScanOp):
-                return self.execute_filtered_seq_scan(plan.table_name, plan.condition)
-            elif isinstance(plan, IndexScanOp):
-                return self.execute_index_scan(plan.table_name, plan.index_name, plan.scan_condition)
             elif isinstance(plan, IndexOnlyScanOp):
                 return self.execute_index_only_scan(plan.table_name, plan.index_name, plan.scan_condition)
             elif isinstance(plan, CreateIndexOp):
@@ -249,6 +276,10 @@ class ExecutionEngine:
                 return self.execute_drop_index(plan.index_name)
             elif isinstance(plan, ShowIndexesOp):
                 return self.execute_show_indexes(plan.table_name)
+            elif isinstance(plan, SetTraceOp):
+                return self.execute_set_trace(plan.settings)
+            elif isinstance(plan, ShowTraceOp):
+                return self.execute_show_trace(plan.component)
             else:
                 raise SemanticError(f"不支持的执行计划类型: {type(plan).__name__}")
         except Exception as e:
@@ -261,6 +292,73 @@ class ExecutionEngine:
                     pass  # 忽略回滚过程中的错误
             raise SemanticError(f"执行错误: {str(e)}")
 
+    def execute_set_trace(self, settings: List[Tuple[str, str]]) -> str:
+        """执行SET TRACE语句，只影响当前会话"""
+        try:
+            applied = self.tracer.configure(settings)
+            return f"Trace settings updated: {', '.join(applied)}"
+        except ValueError as e:
+            raise SemanticError(f"跟踪设置错误: {str(e)}")
+
+    def execute_show_trace(self, component: Optional[str] = None) -> List[Dict]:
+        """执行SHOW TRACE语句，返回环形缓冲区中的事件"""
+        return self.tracer.get_events(component.lower() if component else None)
+
+    def iterate_plan(self, plan: Operator, fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """以迭代器（Volcano模型）方式执行查询计划
+
+        每个查询算子返回生成器，行从扫描算子逐个向上拉取；只有排序、
+        连接的构建侧和聚合这类阻塞算子才会缓存输入。批处理模式下，
+        支持批处理的子树整体交给 BatchExecutor，只在子树顶端转换回行。
+
+        fetch_columns 是上层会读取的列（None 表示所有列）。每个算子把自己用到的列
+        并入后传给输入，扫描只沿溢出页链读取这些列，其他列保留为 ToastPointer。
+        """
+        if self.batch_mode and self.row_id_table is None and self.batch_executor.supports(plan):
+            return self.batch_executor.iterate_rows(plan, fetch_columns)
+
+        columns = input_columns(plan, fetch_columns)
+        if isinstance(plan, ViewScanOp):
+            return self.execute_view_scan(plan.underlying_plan)
+        elif isinstance(plan, SeqScanOp):
+            return self.execute_seq_scan(plan.table_name, columns)
+        elif isinstance(plan, OptimizedSeqScanOp):
+            return self.execute_optimized_seq_scan(plan.table_name, plan.selected_columns, columns)
+        elif isinstance(plan, FilterOp):
+            return self.execute_filter(plan.condition, plan.children[0], columns)
+        elif isinstance(plan, GroupByOp):
+            return self.execute_group_by(
+                group_columns=plan.group_columns,
+                having_condition=plan.having_condition,
+                child_plan=plan.children[0],
+                aggregate_functions=plan.aggregate_functions,
+                fetch_columns=columns
+            )
+        elif isinstance(plan, ProjectOp):
+            return self.execute_project(plan.columns, plan.children[0], columns)
+        elif isinstance(plan, TopNOp):
+            return self.execute_top_n(plan.order_columns, plan.limit, plan.offset, plan.children[0], columns)
+        elif isinstance(plan, LimitOp):
+            return self.execute_limit(plan.limit, plan.offset, plan.children[0], columns)
+        elif isinstance(plan, OrderByOp):
+            # ExternalSortOp 自带内存限制，其余排序使用会话的 work_mem
+            work_mem = plan.memory_limit if isinstance(plan, ExternalSortOp) else None
+            return self.execute_order_by(plan.order_columns, plan.children[0], work_mem, columns)
+        elif isinstance(plan, SortMergeJoinOp):
+            return self.execute_sort_merge_join(plan.join_type, plan.on_condition, plan.children, columns)
+        elif isinstance(plan, JoinOp):
+            # 优化器显式选择嵌套循环时不改用哈希连接
+            return self.execute_join(plan.join_type, plan.on_condition, plan.children,
+                                     allow_hash_join=not isinstance(plan, NestedLoopJoinOp), fetch_columns=columns)
+        elif isinstance(plan, FilteredSeqScanOp):
+            return self.execute_filtered_seq_scan(plan.table_name, plan.condition, columns)
+        elif isinstance(plan, IndexScanOp):
+            return iter(self.execute_index_scan(plan.table_name, plan.index_name, plan.scan_condition))
+
+        # 非查询算子：执行后把结果包装成迭代器
+        result = self.execute_plan(plan)
+        return iter(result) if isinstance(result, list) else iter([result])
+
     # 修改execute_drop_view方法
     # execution_engine.py 修改部分
 
@@ -627,11 +725,11 @@ class ExecutionEngine:
         except Exception as e:
             raise SemanticError(f"描述视图错误: {str(e)}")
 
-    def execute_view_scan(self, underlying_plan: Operator) -> List[Dict]:
+    def execute_view_scan(self, underlying_plan: Operator) -> Iterator[Dict]:
         """执行视图扫描操作"""
         try:
             # 执行底层查询计划
-            return self.execute_plan(underlying_plan)
+            yield from self.iterate_plan(underlying_plan)
         except Exception as e:
             raise SemanticError(f"视图扫描错误: {str(e)}")
 
@@ -652,19 +750,20 @@ class ExecutionEngine:
         """执行CREATE TABLE语句"""
         try:
             # 添加调试信息
-            print(f"DEBUG: Creating table {table_name}")
-            print(f"DEBUG: Columns received: {columns}")
+            self.tracer.debug('executor', "Creating table %s", table_name)
+            self.tracer.debug('executor', "Columns received: %s", columns)
 
             # 检查columns参数的结构
             for i, col_tuple in enumerate(columns):
-                print(f"DEBUG: Column {i}: {col_tuple}, type: {type(col_tuple)}, length: {len(col_tuple)}")
+                self.tracer.debug('executor', "Column %s: %s, type: %s, length: %s",
+                                  i, col_tuple, type(col_tuple), len(col_tuple))
 
             # 添加到符号表
             self.symbol_table.add_table(table_name, columns)
 
             # 添加到catalog - 确保传递正确的参数格式（元组列表）
             success = self.catalog.create_table(table_name, columns)
-            print(f"DEBUG: Catalog create_table result: {success}")
+            self.tracer.debug('executor', "Catalog create_table result: %s", success)
 
             # 将columns格式从tuple列表转换为dict列表（用于存储引擎）
             column_dicts = []
@@ -676,7 +775,7 @@ class ExecutionEngine:
                         'constraints': col_tuple[2] if len(col_tuple) > 2 else None
                     }
                     column_dicts.append(col_dict)
-                    print(f"DEBUG: Column tuple: {col_tuple} -> Column dict: {col_dict}")
+                    self.tracer.debug('executor', "Column tuple: %s -> Column dict: %s", col_tuple, col_dict)
 
             # 添加到存储引擎
             self.storage_engine.create_table(table_name, column_dicts)
@@ -685,8 +784,9 @@ class ExecutionEngine:
             raise SemanticError(f"创建表错误: {str(e)}")
 
     # execution_engine.py 中的 execute_insert 方法
-    def execute_insert(self, table_name: str, columns: List[str], values: List[Any]) -> str:
-        """执行INSERT语句"""
+    def execute_insert(self, table_name: str, columns: List[str], values: List[Any],
+                       rows: Optional[List[List[Any]]] = None) -> str:
+        """执行INSERT语句（支持多行 VALUES，整批交给存储引擎一次写入）"""
         try:
             # 获取表schema
             schema = self.catalog.get_table_schema(table_name)
@@ -694,84 +794,62 @@ class ExecutionEngine:
                 raise SemanticError(f"Table '{table_name}' schema not found")
 
             # 调试信息：打印schema信息
-            print(f"DEBUG: Table schema from catalog: {schema}")
+            self.tracer.debug('executor', "Table schema from catalog: %s", schema)
 
-            # 构建行数据字典
-            row_data = {}
             column_names = [col_info[0] for col_info in schema]  # 从 tuple 中提取列名
 
-            if columns:  # 指定了列名
-                for i, col_name in enumerate(columns):
-                    if i < len(values):
-                        value = self._extract_value(values[i], table_name)
-                        # 从catalog获取类型信息
-                        col_info = self.catalog.get_column_info(table_name, col_name)
-                        print(f"DEBUG: Column info for '{col_name}': {col_info}")
-
-                        if col_info:
-                            expected_type = col_info.get('type')
-                            print(
-                                f"DEBUG: Column '{col_name}' - expected: {expected_type}, actual: {type(value).__name__}")
-
-                            # 进行类型检查
-                            if expected_type and not self._is_type_compatible(type(value).__name__, expected_type):
-                                # 添加更详细的错误信息
-                                raise SemanticError(
-                                    f"列 '{col_name}' 类型不兼容: 期望 {expected_type}, 得到 {type(value).__name__}。"
-                                    f"值: {value} (类型: {type(value).__name__})")
-
-                        row_data[col_name] = value
-            else:  # 未指定列名，按顺序插入所有值
-                for i, value_expr in enumerate(values):
-                    if i < len(column_names):
-                        col_name = column_names[i]
-                        value = self._extract_value(value_expr, table_name)
-                        # 从catalog获取类型信息
-                        col_info = self.catalog.get_column_info(table_name, col_name)
-                        if col_info:
-                            expected_type = col_info.get('type')
-                            print(
-                                f"DEBUG: Column '{col_name}' (index {i}) - expected: {expected_type}, actual: {type(value).__name__}")
-
-                            # 进行类型检查
-                            if expected_type and not self._is_type_compatible(type(value).__name__, expected_type):
-                                # 添加更详细的错误信息
-                                raise SemanticError(
-                                    f"列 '{col_name}' 类型不兼容: 期望 {expected_type}, 得到 {type(value).__name__}。"
-                                    f"值: {value} (类型: {type(value).__name__})")
-
-                        row_data[col_name] = value
-
-            # 确保所有字段都有值，缺失的字段设为None
-            values_list = []
-            for col_name in column_names:
-                if col_name in row_data:
-                    values_list.append(row_data[col_name])
-                else:
-                    values_list.append(None)  # 设置默认值
+            # 目标列及其期望类型只查一次catalog
+            target_columns = columns if columns else column_names
+            expected_types = {}
+            for col_name in target_columns:
+                col_info = self.catalog.get_column_info(table_name, col_name)
+                self.tracer.debug('executor', "Column info for '%s': %s", col_name, col_info)
+                expected_types[col_name] = col_info.get('type') if col_info else None
 
-            # 添加调试信息
-            print(f"DEBUG: Final values list for insertion: {values_list}")
-            print(f"DEBUG: Column names: {column_names}")
+            rows_to_insert = [self._build_insert_values(table_name, target_columns, row_values,
+                                                        column_names, expected_types)
+                              for row_values in (rows or [values])]
 
             # 添加事务支持
             if self.current_transaction_id is not None and self.transaction_manager is not None:
                 # 在事务中执行插入
-                success = self.storage_engine.insert_row_transactional(
-                    table_name, values_list, self.current_transaction_id
+                inserted = self.storage_engine.insert_rows_transactional(
+                    table_name, rows_to_insert, self.current_transaction_id
                 )
-                if not success:
-                    raise SemanticError("Failed to insert row in transaction")
             else:
-                # 非事务插入
-                self.storage_engine.insert_row(table_name, values_list)
+                # 非事务插入：整批在一个事务中提交
+                inserted = self.storage_engine.insert_rows(table_name, rows_to_insert)
 
-            return "1 row inserted"
+            return "1 row inserted" if inserted == 1 else f"{inserted} rows inserted"
         except Exception as e:
             raise SemanticError(f"插入行错误: {str(e)}")
 
+    def _build_insert_values(self, table_name: str, target_columns: List[str], values: List[Any],
+                             column_names: List[str], expected_types: Dict[str, Optional[str]]) -> List[Any]:
+        """把一行VALUES按schema列顺序转换为值列表，缺失的列为None"""
+        row_data = {}
+        for i, col_name in enumerate(target_columns):
+            if i >= len(values):
+                break
+            value = self._extract_value(values[i], table_name)
+
+            # 进行类型检查
+            expected_type = expected_types.get(col_name)
+            if expected_type and not self._is_type_compatible(type(value).__name__, expected_type):
+                # 添加更详细的错误信息
+                raise SemanticError(
+                    f"列 '{col_name}' 类型不兼容: 期望 {expected_type}, 得到 {type(value).__name__}。"
+                    f"值: {value} (类型: {type(value).__name__})")
+
+            row_data[col_name] = value
+
+        # 确保所有字段都有值，缺失的字段设为None
+        values_list = [row_data.get(col_name) for col_name in column_names]
+        self.tracer.debug('executor', "Final values list for insertion: %s", values_list)
+        return values_list
+
     # execution_engine.py 中的 execute_seq_scan 方法
-    def execute_seq_scan(self, table_name: str) -> List[Dict]:
+    def execute_seq_scan(self, table_name: str, fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
         """执行顺序扫描 - 添加视图支持"""
         try:
             # 首先检查是否是视图
@@ -780,27 +858,26 @@ class ExecutionEngine:
                 view_info = self.views[table_name]
                 if 'plan' in view_info:
                     # 执行视图的SELECT计划
-                    results = list(self.execute_plan(view_info['plan']))
+                    results = self.iterate_plan(view_info['plan'])
                     # 处理列映射（如果有）
                     if view_info.get('columns'):
-                        mapped_results = []
                         for row in results:
                             mapped_row = {}
+                            original_keys = list(row.keys())
                             for i, col_name in enumerate(view_info['columns']):
-                                if i < len(row):
-                                    original_keys = list(row.keys())
-                                    if i < len(original_keys):
-                                        mapped_row[col_name] = row[original_keys[i]]
-                            mapped_results.append(mapped_row)
-                        return mapped_results
-                    return results
+                                if i < len(original_keys):
+                                    mapped_row[col_name] = row[original_keys[i]]
+                            yield mapped_row
+                    else:
+                        yield from results
                 else:
                     # 回退到直接使用视图定义（如果有）
-                    return view_info.get('definition', [])
+                    yield from view_info.get('definition', [])
             else:
-                # 普通表，从存储引擎获取数据
+                # 普通表，从存储引擎逐页获取数据
+                with_row_ids = table_name == self.row_id_table
                 try:
-                    return self.storage_engine.get_all_rows(table_name)
+                    yield from self.storage_engine.scan_rows(table_name, with_row_ids, fetch_columns)
                 except Exception as e:
                     # 如果表不存在，检查是否是大小写问题
                     if "not found" in str(e).lower():
@@ -812,44 +889,38 @@ class ExecutionEngine:
                             # 使用正确大小写的表名重试
                             correct_name = matching_tables[0]
                             self.logger.warning(f"Table '{table_name}' not found, using '{correct_name}' instead")
-                            return self.storage_engine.get_all_rows(correct_name)
+                            yield from self.storage_engine.scan_rows(correct_name, with_row_ids, fetch_columns)
+                            return
 
                     # 如果还是失败，重新抛出异常
                     raise SemanticError(f"扫描表 {table_name} 错误: {str(e)}")
         except Exception as e:
             raise SemanticError(f"扫描表/视图 {table_name} 错误: {str(e)}")
 
-    def execute_filter(self, condition: Any, child_plan: Operator) -> List[Dict]:
+    def execute_filter(self, condition: Any, child_plan: Operator,
+                       fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
         """执行过滤操作"""
         try:
-            # 先执行子计划
-            child_results = list(self.execute_plan(child_plan))
-
-            # 应用过滤条件
-            filtered_results = []
-            for row in child_results:
-                if self.evaluate_condition(row, condition):
-                    filtered_results.append(row)
+            predicate = self.compile_condition(condition)
 
-            return filtered_results
+            # 逐行从子计划拉取并应用过滤条件
+            for row in self.iterate_plan(child_plan, fetch_columns):
+                if predicate(row):
+                    yield row
         except Exception as e:
             raise SemanticError(f"应用过滤条件错误: {str(e)}")
 
-    def execute_project(self, columns: List[str], child_plan: Operator) -> List[Dict]:
+    def execute_project(self, columns: List[str], child_plan: Operator,
+                        fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
         """执行投影操作"""
         try:
-            # 先执行子计划
-            child_results = list(self.execute_plan(child_plan))
-            print(f"DEBUG: Project - Input rows: {len(child_results)}")
-            print(f"DEBUG: Project - Columns to select: {columns}")
-
-            if child_results:
-                print(f"DEBUG: Project - First input row keys: {list(child_results[0].keys())}")
-                print(f"DEBUG: Project - First input row values: {child_results[0]}")
+            # 热路径只检查预先计算好的开关
+            trace = self.tracer.is_enabled('executor')
+            self.tracer.debug('executor', "Project - Columns to select: %s", columns)
 
             # 应用投影
-            projected_results = []
-            for row in child_results:
+            output_count = 0
+            for row in self.iterate_plan(child_plan, fetch_columns):
                 projected_row = {}
                 for col in columns:
                     # 处理聚合函数列（如 COUNT(*), SUM(age) 等）
@@ -893,14 +964,15 @@ class ExecutionEngine:
                         else:
                             projected_row[col] = None
 
-                projected_results.append(projected_row)
-                print(f"DEBUG: Project - Output row: {projected_row}")
+                if trace:
+                    self.tracer.debug('executor', "Project - Output row: %s", projected_row)
+                output_count += 1
+                yield projected_row
 
-            print(f"DEBUG: Project - Final results: {len(projected_results)} rows")
-            return projected_results
+            self.tracer.debug('executor', "Project - Final results: %s rows", output_count)
 
         except Exception as e:
-            print(f"DEBUG: Project - Error: {e}")
+            self.tracer.debug('executor', "Project - Error: %s", e)
             raise SemanticError(f"应用投影错误: {str(e)}")
 
     def execute_update(self, table_name: str, assignments: List[tuple], child_plan: Operator) -> str:
@@ -917,20 +989,26 @@ class ExecutionEngine:
             # 设置类型检查器的上下文表
             self.type_checker.set_context_table(table_name)
 
-            # 先执行子计划获取要更新的行
-            rows_to_update = list(self.execute_plan(child_plan))
+            # 先执行子计划获取要更新的行（顺序扫描会附带行标识）；只读取 SET 表达式用到的行外存储列，
+            # 其余列保留 ToastPointer，更新时原样写回
+            fetch_columns = union_columns(*(expression_columns(value_expr) for _, value_expr in assignments))
+            rows_to_update = self._collect_target_rows(table_name, child_plan, fetch_columns)
             self.logger.debug(f"Found {len(rows_to_update)} rows to update")
 
-            # 应用更新操作
-            updated_count = 0
+            # SET 子句的表达式只编译一次
+            compiled_assignments = [(col_name, value_expr, self.compile_expression(value_expr))
+                                    for col_name, value_expr in assignments]
+
+            # 计算每行的新值
+            updates = []
             for i, row in enumerate(rows_to_update):
                 self.logger.debug(f"Processing row {i}: {row}")
 
                 # 构建更新数据
                 update_data = {}
-                for col_name, value_expr in assignments:
+                for col_name, value_expr, evaluate_value in compiled_assignments:
                     # 计算表达式的值（需要传入当前行的上下文）
-                    value = self._evaluate_expression(value_expr, row, table_name)
+                    value = evaluate_value(row)
                     self.logger.debug(f"Assignment {col_name} = {value} (from expression {value_expr})")
 
                     # 类型检查
@@ -941,9 +1019,24 @@ class ExecutionEngine:
                     update_data[col_name] = value
 
                 self.logger.debug(f"Update data: {update_data}")
+                updates.append((row, update_data))
 
-                # 添加事务支持
-                if self.current_transaction_id is not None and self.transaction_manager is not None:
+            in_transaction = self.current_transaction_id is not None and self.transaction_manager is not None
+            txn_id = self.current_transaction_id if in_transaction else None
+
+            # 带行标识的行按页批量更新
+            identified = [(row, update_data) for row, update_data in updates if isinstance(row, StoredRow)]
+            updated_count = 0
+            if identified:
+                updated_count += self.storage_engine.update_rows(
+                    table_name, [row for row, _ in identified], [update_data for _, update_data in identified],
+                    txn_id)
+
+            # 其余的行（例如来自索引扫描）按列值匹配更新
+            for row, update_data in updates:
+                if isinstance(row, StoredRow):
+                    continue
+                if in_transaction:
                     # 在事务中执行更新
                     success = self.storage_engine.update_row_transactional(
                         table_name, row, update_data, self.current_transaction_id
@@ -967,14 +1060,23 @@ class ExecutionEngine:
     def execute_delete(self, table_name: str, child_plan: Operator) -> str:
         """执行DELETE语句"""
         try:
-            # 先执行子计划获取要删除的行
-            rows_to_delete = list(self.execute_plan(child_plan))
+            # 先执行子计划获取要删除的行（顺序扫描会附带行标识），不需要读取行外存储的值
+            rows_to_delete = self._collect_target_rows(table_name, child_plan, set())
+
+            in_transaction = self.current_transaction_id is not None and self.transaction_manager is not None
 
-            # 执行删除操作
+            # 带行标识的行按页批量删除
+            identified = [row for row in rows_to_delete if isinstance(row, StoredRow)]
             deleted_count = 0
+            if identified:
+                deleted_count += self.storage_engine.delete_rows(
+                    table_name, identified, self.current_transaction_id if in_transaction else None)
+
+            # 其余的行（例如来自索引扫描）按列值匹配删除
             for row in rows_to_delete:
-                # 添加事务支持
-                if self.current_transaction_id is not None and self.transaction_manager is not None:
+                if isinstance(row, StoredRow):
+                    continue
+                if in_transaction:
                     # 在事务中执行删除
                     success = self.storage_engine.delete_row_transactional(
                         table_name, row, self.current_transaction_id
@@ -990,273 +1092,34 @@ class ExecutionEngine:
         except Exception as e:
             raise SemanticError(f"删除数据错误: {str(e)}")
 
-    def evaluate_condition(self, row: Dict, condition: Any) -> bool:
-        """评估WHERE条件"""
-        # 添加调试信息
-        print(f"DEBUG: Evaluating condition: {condition} on row: {row}")
-
-        # 对于HAVING条件，需要特殊处理聚合函数
-        if hasattr(condition, 'to_dict'):
-            condition_dict = condition.to_dict()
-            print(f"DEBUG: Condition dict: {condition_dict}")
-
-            # 检查是否是HAVING条件（包含聚合函数）
-            if self._is_having_condition(condition_dict):
-                result = self._evaluate_having_condition(row, condition_dict)
-                print(f"DEBUG: HAVING condition evaluation result: {result}")
-                return result
-            else:
-                result = self._evaluate_condition_from_dict(row, condition_dict)
-                print(f"DEBUG: Condition evaluation result: {result}")
-                return result
-        elif isinstance(condition, dict):
-            print(f"DEBUG: Condition dict: {condition}")
-            if self._is_having_condition(condition):
-                result = self._evaluate_having_condition(row, condition)
-                print(f"DEBUG: HAVING condition evaluation result: {result}")
-                return result
-            else:
-                result = self._evaluate_condition_from_dict(row, condition)
-                print(f"DEBUG: Condition evaluation result: {result}")
-                return result
-        else:
-            # 默认返回True，实际应该根据条件类型进行解析
-            print(f"DEBUG: Unknown condition type, returning True")
-            return True
-
-    def _is_having_condition(self, condition_dict: Dict) -> bool:
-        """检查条件是否包含聚合函数（HAVING条件）"""
-        if not condition_dict:
-            return False
-
-        # 检查是否包含聚合函数
-        def _contains_aggregate(expr):
-            if not isinstance(expr, dict):
-                return False
-
-            if expr.get('type') == 'FunctionExpr':
-                func_name = expr.get('function_name', '').upper()
-                if func_name in ['AVG', 'SUM', 'COUNT', 'MAX', 'MIN']:
-                    return True
-
-            # 递归检查子表达式
-            for key, value in expr.items():
-                if isinstance(value, dict):
-                    if _contains_aggregate(value):
-                        return True
-                elif isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, dict) and _contains_aggregate(item):
-                            return True
-
-            return False
-
-        return _contains_aggregate(condition_dict)
-
-    def _evaluate_having_condition(self, row: Dict, condition: Dict) -> bool:
-        """专门处理HAVING条件（包含聚合函数）"""
-        # HAVING条件应该在分组结果中直接使用已经计算好的聚合值
-        # 而不是重新计算聚合函数
-
-        condition_type = condition.get('type')
-
-        if condition_type == 'BinaryExpr':
-            left = condition.get('left', {})
-            right = condition.get('right', {})
-            operator = condition.get('operator', '')
-
-            # 对于HAVING条件，直接获取左右表达式的值（而不是重新计算）
-            left_value = self._get_value_for_having(row, left)
-            right_value = self._get_value_for_having(row, right)
-
-            # 处理None值
-            if left_value is None or right_value is None:
-                return False
-
-            # 添加调试信息
-            print(
-                f"DEBUG: HAVING BinaryExpr - left_value: {left_value}, right_value: {right_value}, operator: {operator}")
-
-            if operator == '=':
-                return left_value == right_value
-            elif operator == '!=' or operator == '<>':
-                return left_value != right_value
-            elif operator == '>':
-                return left_value > right_value
-            elif operator == '>=':
-                return left_value >= right_value
-            elif operator == '<':
-                return left_value < right_value
-            elif operator == '<=':
-                return left_value <= right_value
-
-        # 对于其他类型的条件，使用普通的评估逻辑
-        return self._evaluate_condition_from_dict(row, condition)
-
-    def _get_value_for_having(self, row: Dict, expr: Dict) -> Any:
-        """为HAVING条件获取值（优先使用分组结果中的值）"""
-        expr_type = expr.get('type')
-
-        if expr_type == 'FunctionExpr':
-            # 对于聚合函数，尝试从结果行中查找对应的列
-            func_name = expr.get('function_name', '').upper()
-            args = expr.get('arguments', [])
-
-            # 构建聚合函数列名（与分组结果中的列名格式一致）
-            if args and len(args) == 1 and args[0].get('type') == 'LiteralExpr' and args[0].get('value') == '*':
-                column_name = f"{func_name}(*)"
-            elif args:
-                # 处理有参数的函数
-                arg_values = []
-                for arg in args:
-                    if arg.get('type') == 'IdentifierExpr':
-                        arg_values.append(arg.get('name'))
-                    elif arg.get('type') == 'LiteralExpr':
-                        arg_values.append(str(arg.get('value')))
-                    else:
-                        arg_values.append('?')
-                column_name = f"{func_name}({', '.join(arg_values)})"
-            else:
-                column_name = f"{func_name}()"
-
-            # 首先尝试从结果行中获取已经计算好的聚合值
-            if column_name in row:
-                return row[column_name]
-
-            # 如果找不到，尝试其他可能的列名格式
-            possible_keys = [key for key in row.keys() if key.startswith(func_name + '(')]
-            if possible_keys:
-                return row[possible_keys[0]]
-
-            # 如果还是找不到，回退到普通计算（但这种情况不应该发生）
-            return self._evaluate_function(func_name, args, row)
-
-        elif expr_type == 'LiteralExpr':
-            return expr.get('value')
-
-        elif expr_type == 'IdentifierExpr':
-            column_name = expr.get('name')
-            # 直接使用分组结果中的值
-            return row.get(column_name)
-
-        # 其他类型的表达式使用普通逻辑
-        return self._get_value_from_condition(row, expr)
-
-    def _evaluate_condition_from_dict(self, row: Dict, condition: Dict) -> bool:
-        """从字典形式评估条件"""
-        condition_type = condition.get('type')
-
-        if condition_type == 'BinaryExpr':
-            left = condition.get('left', {})
-            right = condition.get('right', {})
-            operator = condition.get('operator', '')
-
-            if operator in ['AND', 'OR']:
-                left_result = self._evaluate_condition_from_dict(row, left)
-                right_result = self._evaluate_condition_from_dict(row, right)
-
-                if operator == 'AND':
-                    return left_result and right_result
-                elif operator == 'OR':
-                    return left_result or right_result
-            else:
-                # 对于比较操作符，需要获取实际值进行比较
-                left_value = self._get_value_from_condition(row, left)
-                right_value = self._get_value_from_condition(row, right)
-
-                # 处理None值
-                if left_value is None or right_value is None:
-                    return False
-
-                # 添加调试信息
-                print(f"DEBUG: BinaryExpr - left_value: {left_value}, right_value: {right_value}, operator: {operator}")
-
-                if operator == '=':
-                    return left_value == right_value
-                elif operator == '!=' or operator == '<>':
-                    return left_value != right_value
-                elif operator == '>':
-                    return left_value > right_value
-                elif operator == '>=':
-                    return left_value >= right_value
-                elif operator == '<':
-                    return left_value < right_value
-                elif operator == '<=':
-                    return left_value <= right_value
-
-        elif condition_type == 'IdentifierExpr':
-            column_name = condition.get('name')
-            table_name = condition.get('table_name')
-
-            # 处理聚合函数列名（如 "AVG(age)"）
-            if '(' in column_name and ')' in column_name:
-                # 这是聚合函数列，直接从结果行中获取
-                if column_name in row:
-                    return bool(row[column_name])
-                return False
-
-            # 如果指定了表名，检查格式是否为 table.column
-            if table_name:
-                full_column_name = f"{table_name}.{column_name}"
-                if full_column_name in row:
-                    return bool(row[full_column_name])
-                return False
-
-            # 直接使用列名
-            if column_name in row:
-                return bool(row[column_name])
-            return False
+    def _collect_target_rows(self, table_name: str, child_plan: Operator,
+                             fetch_columns: Optional[Set[str]] = None) -> List[Dict]:
+        """物化 UPDATE/DELETE 的目标行，期间对目标表的顺序扫描附带行标识"""
+        previous, self.row_id_table = self.row_id_table, table_name
+        try:
+            return list(self.iterate_plan(child_plan, fetch_columns))
+        finally:
+            self.row_id_table = previous
 
-        elif condition_type == 'LiteralExpr':
-            value = condition.get('value')
-            return bool(value)
+    def compile_condition(self, condition: Any):
+        """把条件编译为 row -> 真值 的函数，每个算子只在开始执行时编译一次"""
+        return self.expression_compiler.compile_condition(condition)
 
-        elif condition_type == 'UnaryExpr':
-            operator = condition.get('operator')
-            operand = condition.get('operand', {})
-            operand_value = self._evaluate_condition_from_dict(row, operand)
+    def compile_expression(self, expr: Any):
+        """把值表达式编译为 row -> 值 的函数"""
+        return self.expression_compiler.compile_expression(expr)
 
-            if operator == 'NOT':
-                return not operand_value
+    def evaluate_condition(self, row: Dict, condition: Any) -> bool:
+        """评估WHERE条件（单次求值；逐行过滤请先用 compile_condition 编译）"""
+        # 添加调试信息
+        self.tracer.debug('executor', "Evaluating condition: %s on row: %s", condition, row)
 
-        elif condition_type == 'FunctionExpr':
-            # 处理函数表达式
-            func_name = condition.get('function_name', '').upper()
-            args = condition.get('arguments', [])
-            return self._evaluate_function(func_name, args, row)
-
-        elif condition_type == 'InExpr':
-            # 处理IN表达式
-            left_expr = condition.get('left_expr', {})
-            right_expr = condition.get('right_expr', {})
-            is_not = condition.get('is_not', False)
-
-            left_value = self._get_value_from_condition(row, left_expr)
-            right_value = self._get_value_from_condition(row, right_expr)
-
-            # 处理子查询结果（应该是列表）
-            if isinstance(right_value, list):
-                result = left_value in right_value
-                return not result if is_not else result
-            elif isinstance(right_value, (str, int, float, bool)):
-                # 处理字面值比较
-                result = left_value == right_value
-                return not result if is_not else result
-            return False
-
-        elif condition_type == 'SubqueryExpr':
-            # 处理子查询表达式
-            subquery_result = self._evaluate_subquery_expression(row, condition)
-            # 子查询应该返回一个值列表，用于IN操作
-            return bool(subquery_result)
-
-        return True
-
-    def _evaluate_function(self, func_name: str, args: List[Dict], row: Dict) -> Any:
-        """评估函数调用"""
-        # 提取参数值
-        arg_values = [self._get_value_from_condition(row, arg) for arg in args]
+        result = self.compile_condition(condition)(row)
+        self.tracer.debug('executor', "Condition evaluation result: %s", result)
+        return result
 
+    def _apply_function(self, func_name: str, arg_values: List[Any]) -> Any:
+        """对已经求值的参数应用函数"""
         if func_name == 'COUNT':
             return len([v for v in arg_values if v is not None])
         elif func_name == 'SUM':
@@ -1273,77 +1136,6 @@ class ExecutionEngine:
         else:
             return None
 
-    def _get_value_from_condition(self, row: Dict, condition: Dict) -> Any:
-        """从条件字典中获取实际值"""
-        condition_type = condition.get('type')
-
-        if condition_type == 'IdentifierExpr':
-            column_name = condition.get('name')
-            table_name = condition.get('table_name')
-
-            # 处理带表别名的情况
-            if table_name:
-                full_column_name = f"{table_name}.{column_name}"
-
-                # 首先尝试查找带表别名的列
-                if full_column_name in row:
-                    return row[full_column_name]
-
-                # 如果找不到带表别名的列，尝试只用列名
-                # 这在JOIN后的结果中是常见的，因为列名可能会被合并
-                if column_name in row:
-                    return row[column_name]
-
-                return None
-
-            # 直接使用列名（没有表别名的情况）
-            return row.get(column_name)
-
-        elif condition_type == 'LiteralExpr':
-            return condition.get('value')
-
-        elif condition_type == 'BinaryExpr':
-            # 对于二元表达式，递归计算值
-            left = self._get_value_from_condition(row, condition.get('left', {}))
-            right = self._get_value_from_condition(row, condition.get('right', {}))
-            operator = condition.get('operator', '')
-
-            # 更精确的 NULL 值处理
-            # 只有当一个操作数是 NULL 时才返回 NULL
-            if left is None or right is None:
-                # 对于算术运算，如果任一操作数为 NULL，结果为 NULL
-                if operator in ['+', '-', '*', '/']:
-                    return None
-                # 对于比较运算，需要特殊处理（但这里主要是处理算术运算）
-                return None
-
-            if operator == '+':
-                return left + right
-            elif operator == '-':
-                return left - right
-            elif operator == '*':
-                return left * right
-            elif operator == '/':
-                return left / right if right != 0 else None  # 除零也返回 None
-
-        elif condition_type == 'FunctionExpr':
-            # 处理函数表达式
-            func_name = condition.get('function_name', '').upper()
-            args = condition.get('arguments', [])
-            return self._evaluate_function(func_name, args, row)
-
-        elif condition_type == 'ValueListExpr':
-            # 处理值列表
-            values = condition.get('values', [])
-            return [self._get_value_from_condition(row, val) for val in values]
-
-        elif condition_type == 'SubqueryExpr':
-            # 处理子查询表达式
-            return self._evaluate_subquery_expression(row, condition)
-
-        # 默认返回None
-        return None
-
     # execution_engine.py 中的 _extract_value 方法
     def _extract_value(self, value_expr: Any, context_table: str = None) -> Any:
         """从表达式节点中提取值"""
@@ -1352,37 +1144,38 @@ class ExecutionEngine:
             self.type_checker.set_context_table(context_table)
 
         # 添加详细的调试信息
-        print(f"DEBUG: Extracting value from: {value_expr}, type: {type(value_expr)}")
+        self.tracer.debug('executor', "Extracting value from: %s, type: %s", value_expr, type(value_expr))
 
         # 检查是否是字面量表达式节点
         if hasattr(value_expr, 'to_dict'):
             expr_dict = value_expr.to_dict()
-            print(f"DEBUG: Expression dict: {expr_dict}")
+            self.tracer.debug('executor', "Expression dict: %s", expr_dict)
 
             # 如果是字面量表达式，直接返回value
             if expr_dict.get('type') == 'LiteralExpr':
                 value = expr_dict.get('value')
-                print(f"DEBUG: Extracted literal value: {value}, type: {type(value).__name__}")
+                self.tracer.debug('executor', "Extracted literal value: %s, type: %s", value, type(value).__name__)
                 return value
 
         # 如果是基本数据类型，直接返回
         elif isinstance(value_expr, (int, float, str, bool)):
-            print(f"DEBUG: Extracted basic value: {value_expr}, type: {type(value_expr).__name__}")
+            self.tracer.debug('executor', "Extracted basic value: %s, type: %s", value_expr, type(value_expr).__name__)
             return value_expr
 
         # 添加更多调试信息
         elif hasattr(value_expr, 'value'):
             value = value_expr.value
-            print(f"DEBUG: Extracted value from .value attribute: {value}, type: {type(value).__name__}")
+            self.tracer.debug('executor', "Extracted value from .value attribute: %s, type: %s",
+                              value, type(value).__name__)
             return value
 
         else:
-            print(f"DEBUG: Unknown value_expr type: {type(value_expr)}, repr: {repr(value_expr)}")
+            self.tracer.debug('executor', "Unknown value_expr type: %s, repr: %s", type(value_expr), repr(value_expr))
             # 尝试直接访问可能的值属性
             for attr in ['value', 'val', 'data']:
                 if hasattr(value_expr, attr):
                     value = getattr(value_expr, attr)
-                    print(f"DEBUG: Found value in {attr}: {value}")
+                    self.tracer.debug('executor', "Found value in %s: %s", attr, value)
                     return value
 
         return None
@@ -1432,7 +1225,8 @@ class ExecutionEngine:
 
         return None
 
-    def execute_optimized_seq_scan(self, table_name: str, selected_columns: List[str]) -> List[Dict]:
+    def execute_optimized_seq_scan(self, table_name: str, selected_columns: List[str],
+                                   fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
         """执行优化的顺序扫描（包含投影下推）- 添加视图支持"""
         try:
             # 首先检查是否是视图
@@ -1441,76 +1235,28 @@ class ExecutionEngine:
                 view_info = self.views[table_name]
                 if 'plan' in view_info:
                     # 执行视图的SELECT计划
-                    view_results = list(self.execute_plan(view_info['plan']))
-
-                    # 应用投影：只选择指定的列
-                    projected_rows = []
-                    for row in view_results:
-                        projected_row = {}
-                        for col in selected_columns:
-                            if col in row:
-                                projected_row[col] = row[col]
-                            # 处理通配符 *
-                            elif col == '*':
-                                projected_row = row.copy()
-                                break
-                        projected_rows.append(projected_row)
-
-                    return projected_rows
+                    source_rows = self.iterate_plan(view_info['plan'])
                 else:
                     # 回退到直接使用视图定义（如果有）
-                    view_data = view_info.get('definition', [])
-
-                    # 应用投影
-                    projected_rows = []
-                    for row in view_data:
-                        projected_row = {}
-                        for col in selected_columns:
-                            if col in row:
-                                projected_row[col] = row[col]
-                            elif col == '*':
-                                projected_row = row.copy()
-                                break
-                        projected_rows.append(projected_row)
-
-                    return projected_rows
+                    source_rows = view_info.get('definition', [])
             else:
-                # 普通表，从存储引擎获取数据
-                all_rows = self.storage_engine.get_all_rows(table_name)
-
-                # 应用投影：只选择指定的列
-                projected_rows = []
-                for row in all_rows:
-                    projected_row = {}
-                    for col in selected_columns:
-                        if col in row:
-                            projected_row[col] = row[col]
-                        # 处理通配符 *
-                        elif col == '*':
-                            projected_row = row.copy()
-                            break
-                    projected_rows.append(projected_row)
+                # 普通表，从存储引擎逐页获取数据
+                source_rows = self.storage_engine.scan_rows(table_name, fetch_columns=fetch_columns)
 
-                return projected_rows
+            # 应用投影：只选择指定的列
+            for row in source_rows:
+                projected_row = {}
+                for col in selected_columns:
+                    if col in row:
+                        projected_row[col] = row[col]
+                    # 处理通配符 *
+                    elif col == '*':
+                        projected_row = row.copy()
+                        break
+                yield projected_row
         except Exception as e:
             raise SemanticError(f"扫描表/视图 {table_name} 错误: {str(e)}")
 
-    def execute_delete(self, table_name: str, child_plan: Operator) -> str:
-        """执行DELETE语句"""
-        try:
-            # 先执行子计划获取要删除的行
-            rows_to_delete = list(self.execute_plan(child_plan))
-
-            # 执行删除操作
-            deleted_count = 0
-            for row in rows_to_delete:
-                self.storage_engine.delete_row(table_name, row)
-                deleted_count += 1
-
-            return f"{deleted_count} rows deleted"
-        except Exception as e:
-            raise SemanticError(f"删除数据错误: {str(e)}")
-
     def _is_type_compatible(self, actual_python_type: str, expected_sql_type: str) -> bool:
         """检查类型是否兼容"""
         # 首先清理 expected_sql_type，移除长度信息
@@ -1554,219 +1300,142 @@ class ExecutionEngine:
 
         return False
 
-    def _evaluate_expression(self, expr: Any, row: Dict, context_table: str = None) -> Any:
-        """计算表达式的值（考虑当前行的上下文）"""
-        # 设置类型检查器的上下文表
-        if context_table:
-            self.type_checker.set_context_table(context_table)
-
-        print(f"DEBUG: _evaluate_expression - expr: {expr}, row: {row}")
+    def execute_order_by(self, order_columns: List[Tuple[str, str]], child_plan: Operator,
+                         work_mem: Optional[int] = None, fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """执行排序操作（阻塞算子）
 
-        # 如果表达式有 to_dict 方法，转换为字典形式
-        if hasattr(expr, 'to_dict'):
-            expr_dict = expr.to_dict()
-            result = self._get_value_from_condition(row, expr_dict)
-            print(f"DEBUG: _evaluate_expression result: {result}")
-            return result
+        输入超过 work_mem 时按外部归并排序，有序段写入临时表空间目录。
+        """
+        try:
+            # 没有排序条件时直接流式透传
+            if not order_columns:
+                yield from self.iterate_plan(child_plan, fetch_columns)
+                return
 
-        # 如果是字典形式，直接使用
-        elif isinstance(expr, dict):
-            result = self._get_value_from_condition(row, expr)
-            print(f"DEBUG: _evaluate_expression result: {result}")
-            return result
+            sorter = ExternalSorter(self._make_sort_key(order_columns), work_mem=work_mem or self.work_mem,
+                                    temp_dir=self.storage_engine.get_temp_directory())
+            yield from sorter.sort(self.iterate_plan(child_plan, fetch_columns))
 
-        # 如果是基本数据类型，直接返回
-        elif isinstance(expr, (int, float, str, bool)):
-            print(f"DEBUG: _evaluate_expression result: {expr}")
-            return expr
+            if sorter.runs_written:
+                self.tracer.debug('executor', "OrderBy - External sort: %s runs, %s merge passes",
+                                  sorter.runs_written, sorter.merge_passes)
 
-        # 其他情况尝试提取值
-        else:
-            result = self._extract_value(expr, context_table)
-            print(f"DEBUG: _evaluate_expression result: {result}")
-            return result
+        except Exception as e:
+            raise SemanticError(f"排序操作错误: {str(e)}")
 
-    def execute_order_by(self, order_columns: List[Tuple[str, str]], child_plan: Operator) -> List[Dict]:
-        """执行排序操作"""
+    def execute_top_n(self, order_columns: List[Tuple[str, str]], limit: int, offset: int,
+                      child_plan: Operator, fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """执行 ORDER BY + LIMIT：只保留前 offset+limit 行的有界堆，O(n log k)"""
         try:
-            # 先执行子计划获取数据
-            child_results = list(self.execute_plan(child_plan))
-
-            # 如果没有结果或没有排序条件，直接返回
-            if not child_results or not order_columns:
-                return child_results
-
-            # 构建排序键函数
-            def get_sort_key(row):
-                sort_key = []
-                for column, direction in order_columns:
-                    # 处理可能的 table.column 格式
-                    if '.' in column:
-                        # 如果列名包含表名，尝试直接查找
-                        if column in row:
-                            value = row[column]
-                        else:
-                            # 尝试分割表名和列名
-                            table_name, col_name = column.split('.', 1)
-                            full_key = f"{table_name}.{col_name}"
-                            value = row.get(full_key, row.get(col_name, None))
-                    else:
-                        value = row.get(column, None)
-
-                    # 处理排序方向
-                    sort_key.append((value, direction.lower() == 'desc'))
-                return sort_key
-
-            # 排序函数
-            def sort_rows(row):
-                sort_key = get_sort_key(row)
-                key_values = []
-                for value, reverse in sort_key:
-                    # 处理None值，将其放在最后（无论升序降序）
-                    if value is None:
-                        # 对于降序，None值应该在最前面，但我们统一放在最后
-                        key_value = (0 if reverse else 1, '')  # 使用特殊值确保None在最后
-                    else:
-                        # 对于降序，使用负值或反转比较
-                        if reverse:
-                            # 对于数字，使用负值；对于其他类型，使用特殊处理
-                            if isinstance(value, (int, float)):
-                                key_value = (-value, '')
-                            else:
-                                key_value = (1, str(value))  # 降序时字符串排序需要特殊处理
-                        else:
-                            key_value = (0, value) if isinstance(value, (int, float)) else (1, str(value))
-                    key_values.append(key_value)
-                return tuple(key_values)
+            if limit == 0:
+                return
+
+            # heapq.nsmallest 是稳定的，结果与全排序后截取一致
+            top_rows = heapq.nsmallest(offset + limit, self.iterate_plan(child_plan, fetch_columns),
+                                       key=self._make_sort_key(order_columns))
+            yield from itertools.islice(top_rows, offset, None)
+
+        except Exception as e:
+            raise SemanticError(f"Top-N 排序错误: {str(e)}")
 
-            # 执行排序
-            sorted_results = sorted(child_results, key=sort_rows)
+    def execute_limit(self, limit: Optional[int], offset: int, child_plan: Operator,
+                      fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """执行 LIMIT/OFFSET：够数后停止拉取上游，扫描不会继续读后面的页"""
+        try:
+            if limit == 0:
+                return
 
-            return sorted_results
+            stop = None if limit is None else offset + limit
+            yield from itertools.islice(self.iterate_plan(child_plan, fetch_columns), offset, stop)
 
         except Exception as e:
-            raise SemanticError(f"排序操作错误: {str(e)}")
+            raise SemanticError(f"LIMIT 操作错误: {str(e)}")
+
+    @staticmethod
+    def _make_sort_key(order_columns: List[Tuple[str, str]]):
+        """构建 ORDER BY 的排序键函数"""
+
+        def get_sort_key(row):
+            sort_key = []
+            for column, direction in order_columns:
+                # 处理可能的 table.column 格式
+                if '.' in column:
+                    # 如果列名包含表名，尝试直接查找
+                    if column in row:
+                        value = row[column]
+                    else:
+                        # 尝试分割表名和列名
+                        table_name, col_name = column.split('.', 1)
+                        full_key = f"{table_name}.{col_name}"
+                        value = row.get(full_key, row.get(col_name, None))
+                else:
+                    value = row.get(column, None)
+
+                # 处理排序方向
+                sort_key.append((value, direction.lower() == 'desc'))
+            return sort_key
+
+        def sort_rows(row):
+            sort_key = get_sort_key(row)
+            key_values = []
+            for value, reverse in sort_key:
+                if value is None:
+                    # None值无论升序降序都放在最后
+                    key_values.append((1, None))
+                    continue
+                # 数字排在字符串之前；降序时整体反转比较
+                key_value = (0, value) if isinstance(value, (int, float)) else (1, str(value))
+                key_values.append((0, _Descending(key_value) if reverse else key_value))
+            return tuple(key_values)
+
+        return sort_rows
 
     def execute_group_by(self, group_columns: List[str], having_condition: Optional[Any],
-                         child_plan: Operator, aggregate_functions: List[tuple]) -> List[Dict]:
-        """执行分组操作"""
+                         child_plan: Operator, aggregate_functions: List[tuple],
+                         fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """执行分组操作（流式哈希聚合）
+
+        每个 (分组, 聚合函数) 只保存累加器状态，输入行累加后即丢弃；
+        分组数超过 aggregate_max_groups 时新分组的输入溢出到磁盘分区。
+        """
         try:
-            # 先执行子计划获取数据
-            child_results = list(self.execute_plan(child_plan))
-            print(f"DEBUG: GroupBy - Child results: {child_results}")
-            print(f"DEBUG: GroupBy - Group columns: {group_columns}")
-            print(f"DEBUG: GroupBy - Aggregate functions: {aggregate_functions}")
+            trace = self.tracer.is_enabled('executor')
+            self.tracer.debug('executor', "GroupBy - Group columns: %s", group_columns)
+            self.tracer.debug('executor', "GroupBy - Aggregate functions: %s", aggregate_functions)
 
             # 如果没有聚合函数但有GROUP BY，需要添加COUNT(*)
             if not aggregate_functions and group_columns:
                 aggregate_functions = [('COUNT', '*')]
-                print(f"DEBUG: GroupBy - Added default COUNT(*) aggregation")
+                self.tracer.debug('executor', "GroupBy - Added default COUNT(*) aggregation")
 
-            # 分组操作
-            groups = {}
-            for row in child_results:
-                # 构建分组键
-                group_key_values = []
-                for col in group_columns:
-                    group_key_values.append(row.get(col, None))
+            having_predicate = self.compile_condition(having_condition) if having_condition else None
 
-                group_key = tuple(group_key_values)
-                print(f"DEBUG: GroupBy - Row: {row}, Group key: {group_key}")
+            aggregator = HashAggregator(group_columns, aggregate_functions, max_groups=self.aggregate_max_groups,
+                                        temp_dir=self.storage_engine.get_temp_directory())
+            for row in self.iterate_plan(child_plan, fetch_columns):
+                aggregator.add_row(row)
 
-                if group_key not in groups:
-                    groups[group_key] = []
-                groups[group_key].append(row)
+            self.tracer.debug('executor', "GroupBy - Groups in memory: %s, spilled rows: %s",
+                              aggregator.group_count, aggregator.spilled_rows)
 
-            print(f"DEBUG: GroupBy - Groups formed: {groups}")
-
-            # 应用聚合函数并构建结果
-            result_rows = []
-            for group_key, group_rows in groups.items():
-                print(f"DEBUG: GroupBy - Processing group: {group_key}, rows: {len(group_rows)}")
-
-                # 构建分组结果行
-                result_row = {}
-
-                # 添加分组列
-                for i, col in enumerate(group_columns):
-                    result_row[col] = group_key[i]
-
-                # 计算所有聚合函数
-                for func_name, column_name in aggregate_functions:
-                    print(f"DEBUG: GroupBy - Calculating {func_name}({column_name})")
-
-                    # 在 execute_group_by 方法中，修改聚合列名的创建方式
-                    if func_name.upper() == 'COUNT':
-                        if column_name == '*':
-                            # COUNT(*) - 计算所有行数
-                            result_row["COUNT(*)"] = len(group_rows)  # 使用 "COUNT(*)" 而不是 "COUNT(*)"
-                            print(f"DEBUG: GroupBy - COUNT(*): {len(group_rows)}")
-                        else:
-                            # COUNT(column) - 计算非空值数量
-                            values = [row.get(column_name) for row in group_rows if row.get(column_name) is not None]
-                            result_row[f"COUNT({column_name})"] = len(values)  # 使用 "COUNT(column)" 格式
-                            print(f"DEBUG: GroupBy - COUNT({column_name}): {len(values)}")
-
-                    elif func_name.upper() == 'SUM':
-                        # 计算总和
-                        values = [row.get(column_name) for row in group_rows
-                                  if
-                                  row.get(column_name) is not None and isinstance(row.get(column_name), (int, float))]
-                        sum_value = sum(values) if values else 0
-                        result_row[f"SUM({column_name})"] = sum_value
-                        print(f"DEBUG: GroupBy - SUM({column_name}): {sum_value}")
-
-                    elif func_name.upper() == 'AVG':
-                        # 计算平均值
-                        values = [row.get(column_name) for row in group_rows
-                                  if
-                                  row.get(column_name) is not None and isinstance(row.get(column_name), (int, float))]
-                        print(f"DEBUG: GroupBy - AVG values: {values}")
-                        if values:
-                            avg_value = sum(values) / len(values)
-                            result_row[f"AVG({column_name})"] = avg_value
-                            print(f"DEBUG: GroupBy - AVG({column_name}): {avg_value}")
-                        else:
-                            result_row[f"AVG({column_name})"] = None
-                            print(f"DEBUG: GroupBy - AVG({column_name}): None")
-
-                    elif func_name.upper() == 'MAX':
-                        # 计算最大值
-                        values = [row.get(column_name) for row in group_rows
-                                  if
-                                  row.get(column_name) is not None and isinstance(row.get(column_name), (int, float))]
-                        max_value = max(values) if values else None
-                        result_row[f"MAX({column_name})"] = max_value
-                        print(f"DEBUG: GroupBy - MAX({column_name}): {max_value}")
-
-                    elif func_name.upper() == 'MIN':
-                        # 计算最小值
-                        values = [row.get(column_name) for row in group_rows
-                                  if
-                                  row.get(column_name) is not None and isinstance(row.get(column_name), (int, float))]
-                        min_value = min(values) if values else None
-                        result_row[f"MIN({column_name})"] = min_value
-                        print(f"DEBUG: GroupBy - MIN({column_name}): {min_value}")
-
-                print(f"DEBUG: GroupBy - Result row before HAVING: {result_row}")
+            output_count = 0
+            for result_row in aggregator.results():
+                if trace:
+                    self.tracer.debug('executor', "GroupBy - Result row before HAVING: %s", result_row)
 
                 # 应用 HAVING 条件（如果有）
-                if having_condition:
-                    condition_result = self.evaluate_condition(result_row, having_condition)
-                    print(f"DEBUG: GroupBy - HAVING condition result: {condition_result}")
+                if having_predicate is not None and not having_predicate(result_row):
+                    if trace:
+                        self.tracer.debug('executor', "GroupBy - Group filtered out by HAVING")
+                    continue  # 跳过不满足 HAVING 条件的分组
 
-                    if not condition_result:
-                        print(f"DEBUG: GroupBy - Group filtered out by HAVING")
-                        continue  # 跳过不满足 HAVING 条件的分组
+                output_count += 1
+                yield result_row
 
-                result_rows.append(result_row)
-                print(f"DEBUG: GroupBy - Added result row: {result_row}")
-
-            print(f"DEBUG: GroupBy - Final result rows: {result_rows}")
-            return result_rows
+            self.tracer.debug('executor', "GroupBy - Final result rows: %s", output_count)
 
         except Exception as e:
-            print(f"DEBUG: GroupBy - Error: {e}")
+            self.tracer.debug('executor', "GroupBy - Error: %s", e)
             raise SemanticError(f"分组操作错误: {str(e)}")
 
     def _evaluate_subquery_expression(self, row: Dict, subquery_expr: Dict) -> Any:
@@ -1813,8 +1482,12 @@ class ExecutionEngine:
                             right_expr
                         )
 
+            # ORDER BY 和 LIMIT/OFFSET（例如 IN (SELECT ... ORDER BY ... LIMIT n)）
+            order_by = [(item['column'], item['direction']) for item in select_stmt_dict.get('order_by', [])]
+
             # 创建SELECT语句
-            select_stmt = SelectStmt(columns, from_clause)
+            select_stmt = SelectStmt(columns, from_clause, order_by=order_by or None,
+                                     limit=select_stmt_dict.get('limit'), offset=select_stmt_dict.get('offset'))
             select_stmt.where_clause = where_clause
 
             # 生成执行计划并执行子查询
@@ -1836,133 +1509,341 @@ class ExecutionEngine:
             return result_values
 
         except Exception as e:
-            print(f"DEBUG: Error evaluating subquery: {e}")
+            self.tracer.debug('executor', "Error evaluating subquery: %s", e)
             return []
 
-    def execute_filtered_seq_scan(self, table_name: str, condition: Any) -> List[Dict]:
+    def execute_filtered_seq_scan(self, table_name: str, condition: Any,
+                                  fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
         """执行带过滤条件的顺序扫描（谓词下推优化）"""
         try:
-            # 获取所有行数据
-            all_rows = self.storage_engine.get_all_rows(table_name)
-
-            # 应用过滤条件
-            filtered_rows = []
-            for row in all_rows:
-                if self.evaluate_condition(row, condition):
-                    filtered_rows.append(row)
+            predicate = self.compile_condition(condition)
 
-            return filtered_rows
+            # 逐页扫描并应用过滤条件
+            for row in self.storage_engine.scan_rows(table_name, table_name == self.row_id_table, fetch_columns):
+                if predicate(row):
+                    yield row
         except Exception as e:
             raise SemanticError(f"扫描表 {table_name} 错误: {str(e)}")
 
-    def execute_join(self, join_type: str, on_condition: Any, children: List[Operator]) -> List[Dict]:
-        """执行JOIN操作"""
-        try:
-            # 先执行左右子计划
-            left_results = list(self.execute_plan(children[0]))
-            right_results = list(self.execute_plan(children[1]))
-
-            print(f"DEBUG: JOIN - Left results columns: {list(left_results[0].keys()) if left_results else 'None'}")
-            print(f"DEBUG: JOIN - Right results columns: {list(right_results[0].keys()) if right_results else 'None'}")
+    def execute_join(self, join_type: str, on_condition: Any, children: List[Operator],
+                     allow_hash_join: bool = True, fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """执行JOIN操作
 
+        ON条件包含等值连接键时使用哈希连接；否则退化为嵌套循环，外侧输入
+        逐行流式拉取，只有内侧输入会被缓存：INNER/LEFT 缓存右表，RIGHT 缓存左表。
+        """
+        try:
             # 获取左右表的真实别名（从操作符中获取）
-            left_alias = getattr(children[0], 'table_alias', None) or "left_table"
-            right_alias = getattr(children[1], 'table_alias', None) or "right_table"
+            left_alias = join_alias(children[0], 0)
+            right_alias = join_alias(children[1], 1)
 
-            print(f"DEBUG: JOIN - Left alias: {left_alias}, Right alias: {right_alias}")
+            self.tracer.debug('executor', "JOIN - Left alias: %s, Right alias: %s", left_alias, right_alias)
 
-            joined_results = []
+            merge_rows = self._make_row_merger(left_alias, right_alias)
 
             # 处理不同的JOIN类型
-            if join_type.upper() == 'INNER':
-                for left_row in left_results:
-                    for right_row in right_results:
-                        # 创建合并的行，使用完整的限定列名
-                        merged_row = {}
+            normalized_type = join_type.upper()
 
-                        # 添加左表列，加上表别名前缀
-                        for key, value in left_row.items():
-                            merged_row[f"{left_alias}.{key}"] = value
+            if allow_hash_join and normalized_type in ('INNER', 'LEFT', 'RIGHT'):
+                join_keys = extract_equi_join_keys(on_condition, children[0], children[1])
+                if join_keys is not None:
+                    left_columns, right_columns, has_residual = join_keys
+                    yield from self._execute_hash_join(
+                        normalized_type, on_condition if has_residual else None, children,
+                        left_columns, right_columns, merge_rows, fetch_columns)
+                    return
 
-                        # 添加右表列，加上表别名前缀
-                        for key, value in right_row.items():
-                            merged_row[f"{right_alias}.{key}"] = value
+            on_predicate = self.compile_condition(on_condition)
 
-                        # 评估ON条件
-                        if self.evaluate_condition(merged_row, on_condition):
-                            joined_results.append(merged_row)
+            if normalized_type in ('INNER', 'LEFT'):
+                # 缓存右表，流式遍历左表
+                right_results = list(self.iterate_plan(children[1], fetch_columns))
+                right_columns = list(right_results[0].keys()) if right_results else []
 
-            elif join_type.upper() == 'LEFT':
-                for left_row in left_results:
+                for left_row in self.iterate_plan(children[0], fetch_columns):
                     matched = False
                     for right_row in right_results:
-                        # 创建合并的行，使用完整的限定列名
-                        merged_row = {}
-
-                        # 添加左表列，加上表别名前缀
-                        for key, value in left_row.items():
-                            merged_row[f"{left_alias}.{key}"] = value
+                        merged_row = merge_rows(left_row, right_row)
+                        # 评估ON条件
+                        if on_predicate(merged_row):
+                            matched = True
+                            yield merged_row
 
-                        # 添加右表列，加上表别名前缀
-                        for key, value in right_row.items():
-                            merged_row[f"{right_alias}.{key}"] = value
+                    # LEFT JOIN 没有匹配时，添加左表行，右表列为NULL
+                    if not matched and normalized_type == 'LEFT':
+                        yield merge_rows(left_row, dict.fromkeys(right_columns))
 
-                        if self.evaluate_condition(merged_row, on_condition):
-                            joined_results.append(merged_row)
-                            matched = True
+            elif normalized_type == 'RIGHT':
+                # 缓存左表，流式遍历右表
+                left_results = list(self.iterate_plan(children[0], fetch_columns))
+                left_columns = list(left_results[0].keys()) if left_results else []
 
-                    # 如果没有匹配，添加左表行，右表列为NULL
-                    if not matched:
-                        null_row = {}
-                        # 添加左表列
-                        for key, value in left_row.items():
-                            null_row[f"{left_alias}.{key}"] = value
-                        # 添加右表NULL值
-                        for key in right_results[0].keys():
-                            null_row[f"{right_alias}.{key}"] = None
-                        joined_results.append(null_row)
-
-            elif join_type.upper() == 'RIGHT':
-                for right_row in right_results:
+                for right_row in self.iterate_plan(children[1], fetch_columns):
                     matched = False
                     for left_row in left_results:
-                        # 创建合并的行，使用完整的限定列名
-                        merged_row = {}
-
-                        # 添加左表列，加上表别名前缀
-                        for key, value in left_row.items():
-                            merged_row[f"{left_alias}.{key}"] = value
-
-                        # 添加右表列，加上表别名前缀
-                        for key, value in right_row.items():
-                            merged_row[f"{right_alias}.{key}"] = value
-
-                        if self.evaluate_condition(merged_row, on_condition):
-                            joined_results.append(merged_row)
+                        merged_row = merge_rows(left_row, right_row)
+                        if on_predicate(merged_row):
                             matched = True
+                            yield merged_row
 
                     # 如果没有匹配，添加右表行，左表列为NULL
                     if not matched:
-                        null_row = {}
-                        # 添加左表NULL值
-                        for key in left_results[0].keys():
-                            null_row[f"{left_alias}.{key}"] = None
-                        # 添加右表列
-                        for key, value in right_row.items():
-                            null_row[f"{right_alias}.{key}"] = value
-                        joined_results.append(null_row)
+                        yield merge_rows(dict.fromkeys(left_columns), right_row)
 
             else:
                 raise SemanticError(f"不支持的JOIN类型: {join_type}")
 
-            print(f"DEBUG: JOIN - Result: {len(joined_results)} rows")
-            if joined_results:
-                print(f"DEBUG: JOIN - First result row keys: {list(joined_results[0].keys())}")
-            return joined_results
-
         except Exception as e:
             raise SemanticError(f"JOIN操作错误: {str(e)}")
 
+    def _make_row_merger(self, left_alias: str, right_alias: str):
+        """构造合并左右行的函数，合并结果使用 别名.列名 作为键"""
+        def merge_rows(left_row: Dict, right_row: Dict) -> Dict:
+            # 创建合并的行，使用完整的限定列名
+            merged_row = {}
+            for key, value in left_row.items():
+                merged_row[f"{left_alias}.{key}"] = value
+            for key, value in right_row.items():
+                merged_row[f"{right_alias}.{key}"] = value
+            return merged_row
+
+        return merge_rows
+
+    def execute_sort_merge_join(self, join_type: str, on_condition: Any, children: List[Operator],
+                                fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """执行排序合并连接
+
+        两侧按等值连接键排序后归并；已经按连接键有序的输入（索引扫描、
+        按键升序的ORDER BY）跳过排序并直接流式归并。相同键的重复行按
+        run 做笛卡尔积，支持 INNER/LEFT/RIGHT。
+        """
+        try:
+            left_alias = join_alias(children[0], 0)
+            right_alias = join_alias(children[1], 1)
+            normalized_type = join_type.upper()
+
+            join_keys = None
+            if normalized_type in ('INNER', 'LEFT', 'RIGHT'):
+                join_keys = extract_equi_join_keys(on_condition, children[0], children[1])
+            if join_keys is None:
+                # 没有等值连接键时无法归并，退化为嵌套循环
+                yield from self.execute_join(join_type, on_condition, children, allow_hash_join=False,
+                                             fetch_columns=fetch_columns)
+                return
+
+            left_columns, right_columns, has_residual = join_keys
+            residual_predicate = self.compile_condition(on_condition) if has_residual else None
+            merge_rows = self._make_row_merger(left_alias, right_alias)
+            preserve_left = normalized_type == 'LEFT'
+            preserve_right = normalized_type == 'RIGHT'
+
+            left_rows, left_null_row = self._prepare_merge_input(children[0], left_columns, fetch_columns)
+            right_rows, right_null_row = self._prepare_merge_input(children[1], right_columns, fetch_columns)
+
+            def key_of(columns):
+                return lambda row: tuple(row.get(col) for col in columns)
+
+            left_groups = itertools.groupby(left_rows, key=key_of(left_columns))
+            right_groups = itertools.groupby(right_rows, key=key_of(right_columns))
+            left_group = next(left_groups, None)
+            right_group = next(right_groups, None)
+
+            while left_group is not None and right_group is not None:
+                left_key, left_run = left_group
+                right_key, right_run = right_group
+
+                # NULL 键永远不匹配
+                if None in left_key or None in right_key:
+                    if None in left_key:
+                        if preserve_left:
+                            for left_row in left_run:
+                                yield merge_rows(left_row, right_null_row)
+                        left_group = next(left_groups, None)
+                    if None in right_key:
+                        if preserve_right:
+                            for right_row in right_run:
+                                yield merge_rows(left_null_row, right_row)
+                        right_group = next(right_groups, None)
+                    continue
+
+                left_order = self._merge_order_key(left_key)
+                right_order = self._merge_order_key(right_key)
+
+                if left_order < right_order:
+                    if preserve_left:
+                        for left_row in left_run:
+                            yield merge_rows(left_row, right_null_row)
+                    left_group = next(left_groups, None)
+                elif left_order > right_order:
+                    if preserve_right:
+                        for right_row in right_run:
+                            yield merge_rows(left_null_row, right_row)
+                    right_group = next(right_groups, None)
+                else:
+                    # 键相同的两个 run 做笛卡尔积
+                    left_run = list(left_run)
+                    right_run = list(right_run)
+                    right_matched = [False] * len(right_run)
+
+                    for left_row in left_run:
+                        matched = False
+                        for position, right_row in enumerate(right_run):
+                            merged_row = merge_rows(left_row, right_row)
+                            if residual_predicate is not None and not residual_predicate(merged_row):
+                                continue
+                            matched = True
+                            right_matched[position] = True
+                            yield merged_row
+
+                        if not matched and preserve_left:
+                            yield merge_rows(left_row, right_null_row)
+
+                    if preserve_right:
+                        for position, right_row in enumerate(right_run):
+                            if not right_matched[position]:
+                                yield merge_rows(left_null_row, right_row)
+
+                    left_group = next(left_groups, None)
+                    right_group = next(right_groups, None)
+
+            # 输出剩余的未匹配行
+            while preserve_left and left_group is not None:
+                for left_row in left_group[1]:
+                    yield merge_rows(left_row, right_null_row)
+                left_group = next(left_groups, None)
+
+            while preserve_right and right_group is not None:
+                for right_row in right_group[1]:
+                    yield merge_rows(left_null_row, right_row)
+                right_group = next(right_groups, None)
+
+        except Exception as e:
+            raise SemanticError(f"排序合并连接错误: {str(e)}")
+
+    def _prepare_merge_input(self, child: Operator, key_columns: List[str],
+                             fetch_columns: Optional[Set[str]] = None) -> Tuple[Iterator[Dict], Dict]:
+        """准备归并输入：必要时按连接键排序，并返回该侧的NULL补齐行"""
+        rows = self.iterate_plan(child, fetch_columns)
+
+        if not self._is_ordered_on(child, key_columns):
+            rows = sorted(rows, key=lambda row: self._merge_order_key(
+                tuple(row.get(col) for col in key_columns)))
+
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            return iter(()), {}
+        return itertools.chain([first_row], rows), dict.fromkeys(first_row.keys())
+
+    @staticmethod
+    def _merge_order_key(key: Tuple) -> Tuple:
+        """归并比较用的排序键：数值排在字符串之前，与ORDER BY的升序规则一致"""
+        return tuple((0, value) if isinstance(value, (int, float)) else (1, str(value))
+                     for value in key)
+
+    def _is_ordered_on(self, child: Operator, key_columns: List[str]) -> bool:
+        """判断子计划的输出是否已经按连接键升序排列"""
+        return is_ordered_on(child, key_columns, self._get_index_columns)
+
+    def _get_index_columns(self, index_name: str) -> List[str]:
+        """从catalog的索引元数据获取索引列，索引不在catalog中时返回空列表"""
+        try:
+            index_info = self.catalog.get_index_info(index_name)
+        except Exception as e:
+            self.logger.debug(f"Could not look up index '{index_name}' in catalog: {e}")
+            return []
+        return list(index_info.get('columns') or []) if index_info else []
+
+    def _execute_hash_join(self, join_type: str, residual_condition: Any, children: List[Operator],
+                           left_columns: List[str], right_columns: List[str], merge_rows,
+                           fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """执行等值哈希连接
+
+        事先不知道两侧的行数，所以交替从左右两侧各拉取一行，先读完的一侧就是
+        较小的输入：在它上面建哈希表，另一侧（已预读的行加上剩余的流）逐行探测。
+        缓存的行数不超过较小输入的两倍，较大的输入不会被整体物化。
+        NULL 键永远不匹配，外连接中未匹配的行用 NULL 补齐另一侧。
+        """
+        residual_predicate = self.compile_condition(residual_condition) if residual_condition is not None else None
+
+        left_iter = self.iterate_plan(children[0], fetch_columns)
+        right_iter = self.iterate_plan(children[1], fetch_columns)
+        left_buffer, right_buffer = [], []
+
+        while True:
+            left_row = next(left_iter, None)
+            if left_row is None:
+                build_left = True
+                break
+            left_buffer.append(left_row)
+
+            right_row = next(right_iter, None)
+            if right_row is None:
+                build_left = False
+                break
+            right_buffer.append(right_row)
+
+        if build_left:
+            build_rows, build_columns, build_is_left = left_buffer, left_columns, True
+            probe_rows, probe_columns = itertools.chain(right_buffer, right_iter), right_columns
+        else:
+            build_rows, build_columns, build_is_left = right_buffer, right_columns, False
+            probe_rows, probe_columns = itertools.chain(left_buffer, left_iter), left_columns
+
+        self.tracer.debug('executor', "HashJoin - build side: %s, %s rows",
+                          'left' if build_is_left else 'right', len(build_rows))
+
+        # 哈希表：连接键 -> 构建侧行号列表
+        hash_table: Dict[Tuple, List[int]] = {}
+        for position, row in enumerate(build_rows):
+            key = tuple(row.get(col) for col in build_columns)
+            if None in key:
+                continue
+            hash_table.setdefault(key, []).append(position)
+
+        # 外连接需要补齐的一侧
+        preserve_build = join_type == ('LEFT' if build_is_left else 'RIGHT')
+        preserve_probe = join_type == ('RIGHT' if build_is_left else 'LEFT')
+        build_null_row = dict.fromkeys(build_rows[0].keys()) if build_rows else {}
+        probe_null_row = None
+        matched_build = set() if preserve_build else None
+
+        for probe_row in probe_rows:
+            if probe_null_row is None:
+                probe_null_row = dict.fromkeys(probe_row.keys())
+
+            key = tuple(probe_row.get(col) for col in probe_columns)
+            matched = False
+            for position in hash_table.get(key, ()):
+                build_row = build_rows[position]
+                if build_is_left:
+                    merged_row = merge_rows(build_row, probe_row)
+                else:
+                    merged_row = merge_rows(probe_row, build_row)
+
+                if residual_predicate is not None and not residual_predicate(merged_row):
+                    continue
+
+                matched = True
+                if matched_build is not None:
+                    matched_build.add(position)
+                yield merged_row
+
+            if not matched and preserve_probe:
+                if build_is_left:
+                    yield merge_rows(build_null_row, probe_row)
+                else:
+                    yield merge_rows(probe_row, build_null_row)
+
+        if preserve_build:
+            for position, build_row in enumerate(build_rows):
+                if position in matched_build:
+                    continue
+                if build_is_left:
+                    yield merge_rows(build_row, probe_null_row or {})
+                else:
+                    yield merge_rows(probe_null_row or {}, build_row)
+
     def execute_index_scan(self, table_name: str, index_name: str, scan_condition: Any) -> List[Dict]:
         """执行索引扫描"""
         try:
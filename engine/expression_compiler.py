@@ -0,0 +1,386 @@
+# engine/expression_compiler.py
+"""
+表达式编译器：把 WHERE/ON/HAVING 以及 SET 子句中的表达式在执行前编译为嵌套闭包。
+
+解释执行时每一行都要调用 to_dict() 重建整棵表达式树再逐层分派；编译后每个
+查询只做一次这些工作，列引用提前解析成固定的字典键，逐行只剩闭包调用。
+编译结果的语义与原来基于字典的解释器一致，只是 AND/OR 不再区分大小写，
+HAVING 中 AND/OR 连接的聚合条件也会分别求值。
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+AGGREGATE_FUNCTIONS = ('AVG', 'SUM', 'COUNT', 'MAX', 'MIN')
+
+COMPARISON_OPERATORS = {
+    '=': lambda left, right: left == right,
+    '!=': lambda left, right: left != right,
+    '<>': lambda left, right: left != right,
+    '>': lambda left, right: left > right,
+    '>=': lambda left, right: left >= right,
+    '<': lambda left, right: left < right,
+    '<=': lambda left, right: left <= right,
+}
+
+ARITHMETIC_OPERATORS = {
+    '+': lambda left, right: left + right,
+    '-': lambda left, right: left - right,
+    '*': lambda left, right: left * right,
+    # 除零返回 None
+    '/': lambda left, right: left / right if right != 0 else None,
+}
+
+RowPredicate = Callable[[Dict], Any]
+RowFunction = Callable[[Dict], Any]
+
+
+def _always_true(row: Dict) -> bool:
+    return True
+
+
+def _unknown_operator(left: Any, right: Any) -> bool:
+    return True
+
+
+class ExpressionCompiler:
+    """把表达式节点（或其字典形式）编译成以行为参数的闭包"""
+
+    def __init__(self, execution_engine):
+        # 子查询和函数求值需要回调执行引擎
+        self.engine = execution_engine
+
+    # ==================== 对外接口 ====================
+
+    def compile_condition(self, condition: Any) -> RowPredicate:
+        """编译条件表达式，返回 row -> 真值 的函数"""
+        condition_dict = self._to_dict(condition)
+        if condition_dict is None:
+            # 未知的条件类型按原有行为视为恒真
+            return _always_true
+
+        if self._contains_aggregate(condition_dict):
+            return self._compile_having(condition_dict)
+        return self._compile_predicate(condition_dict)
+
+    def compile_expression(self, expr: Any) -> RowFunction:
+        """编译值表达式，返回 row -> 值 的函数"""
+        expr_dict = self._to_dict(expr)
+        if expr_dict is not None:
+            return self._compile_value(expr_dict)
+
+        if isinstance(expr, (int, float, str, bool)):
+            return lambda row: expr
+
+        # 其他节点与行无关，提前提取一次值
+        value = self.engine._extract_value(expr)
+        return lambda row: value
+
+    # ==================== 条件（布尔上下文） ====================
+
+    def _compile_predicate(self, condition: Dict) -> RowPredicate:
+        condition_type = condition.get('type')
+
+        if condition_type == 'BinaryExpr':
+            operator = condition.get('operator', '')
+            logical_operator = operator.upper() if isinstance(operator, str) else operator
+
+            if logical_operator == 'AND':
+                left = self._compile_predicate(condition.get('left', {}))
+                right = self._compile_predicate(condition.get('right', {}))
+                return lambda row: bool(left(row)) and bool(right(row))
+            if logical_operator == 'OR':
+                left = self._compile_predicate(condition.get('left', {}))
+                right = self._compile_predicate(condition.get('right', {}))
+                return lambda row: bool(left(row)) or bool(right(row))
+
+            # 不支持的运算符（如 LIKE）在两侧都非 NULL 时视为满足
+            compare = COMPARISON_OPERATORS.get(operator, _unknown_operator)
+            return self._compile_comparison(self._compile_value(condition.get('left', {})),
+                                            self._compile_value(condition.get('right', {})),
+                                            compare)
+
+        if condition_type == 'IdentifierExpr':
+            column_name = condition.get('name')
+            table_name = condition.get('table_name')
+
+            # 聚合函数列（如 "AVG(age)"）和带表名的列都只按完整键查找
+            if '(' in column_name and ')' in column_name:
+                key = column_name
+            elif table_name:
+                key = f"{table_name}.{column_name}"
+            else:
+                key = column_name
+            return lambda row: bool(row[key]) if key in row else False
+
+        if condition_type == 'LiteralExpr':
+            value = bool(condition.get('value'))
+            return lambda row: value
+
+        if condition_type == 'UnaryExpr':
+            if condition.get('operator') == 'NOT':
+                operand = self._compile_predicate(condition.get('operand', {}))
+                return lambda row: not operand(row)
+            return _always_true
+
+        if condition_type == 'FunctionExpr':
+            return self._compile_function(condition)
+
+        if condition_type == 'InExpr':
+            return self._compile_in(condition)
+
+        if condition_type == 'SubqueryExpr':
+            subquery = self._compile_subquery(condition)
+            return lambda row: bool(subquery(row))
+
+        return _always_true
+
+    @staticmethod
+    def _compile_comparison(left: RowFunction, right: RowFunction, compare) -> RowPredicate:
+        def evaluate(row: Dict) -> bool:
+            left_value = left(row)
+            right_value = right(row)
+            if left_value is None or right_value is None:
+                return False
+            return compare(left_value, right_value)
+
+        return evaluate
+
+    def _compile_in(self, condition: Dict) -> RowPredicate:
+        left = self._compile_value(condition.get('left_expr', {}))
+        right_expr = condition.get('right_expr', {})
+        is_not = condition.get('is_not', False)
+
+        def membership(left_value, right_value) -> bool:
+            # 子查询或值列表返回列表，字面值退化为相等比较
+            if isinstance(right_value, (list, frozenset)):
+                result = left_value in right_value
+            elif isinstance(right_value, (str, int, float, bool)):
+                result = left_value == right_value
+            else:
+                return False
+            return not result if is_not else result
+
+        # 右侧是不含列引用的值列表或子查询时，只求值一次并转成集合
+        if not self._references_columns(right_expr):
+            right = self._compile_value(right_expr)
+            cached = []
+
+            def evaluate_constant(row: Dict) -> bool:
+                if not cached:
+                    cached.append(self._as_lookup(right(row)))
+                return membership(left(row), cached[0])
+
+            return evaluate_constant
+
+        right = self._compile_value(right_expr)
+        return lambda row: membership(left(row), right(row))
+
+    @staticmethod
+    def _as_lookup(value: Any) -> Any:
+        """把列表转成 frozenset 加速 IN 判断，不可哈希时保留列表"""
+        if isinstance(value, list):
+            try:
+                return frozenset(value)
+            except TypeError:
+                return value
+        return value
+
+    # ==================== HAVING 条件 ====================
+
+    def _compile_having(self, condition: Dict) -> RowPredicate:
+        """HAVING 条件优先使用分组结果中已经算好的聚合值"""
+        if condition.get('type') != 'BinaryExpr':
+            return self._compile_predicate(condition)
+
+        operator = condition.get('operator', '')
+        left_expr = condition.get('left', {})
+        right_expr = condition.get('right', {})
+
+        # AND/OR 的每一侧分别按 HAVING 或普通条件编译
+        logical_operator = operator.upper() if isinstance(operator, str) else operator
+        if logical_operator in ('AND', 'OR'):
+            left = self.compile_condition(left_expr)
+            right = self.compile_condition(right_expr)
+            if logical_operator == 'AND':
+                return lambda row: bool(left(row)) and bool(right(row))
+            return lambda row: bool(left(row)) or bool(right(row))
+
+        left_value = self._compile_having_value(left_expr)
+        right_value = self._compile_having_value(right_expr)
+        compare = COMPARISON_OPERATORS.get(operator)
+        if compare is not None:
+            return self._compile_comparison(left_value, right_value, compare)
+
+        # 其他运算符：两侧非 NULL 时按普通条件求值
+        predicate = self._compile_predicate(condition)
+        guard = self._compile_comparison(left_value, right_value, _unknown_operator)
+        return lambda row: guard(row) and predicate(row)
+
+    def _compile_having_value(self, expr: Dict) -> RowFunction:
+        expr_type = expr.get('type')
+
+        if expr_type == 'FunctionExpr':
+            func_name = expr.get('function_name', '').upper()
+            args = expr.get('arguments', [])
+            column_name = self._aggregate_column_name(func_name, args, expr.get('distinct', False))
+            prefix = func_name + '('
+            fallback = self._compile_function(expr)
+
+            def lookup(row: Dict) -> Any:
+                if column_name in row:
+                    return row[column_name]
+                # 尝试其他可能的列名格式
+                for key in row:
+                    if key.startswith(prefix):
+                        return row[key]
+                return fallback(row)
+
+            return lookup
+
+        if expr_type == 'LiteralExpr':
+            value = expr.get('value')
+            return lambda row: value
+
+        if expr_type == 'IdentifierExpr':
+            column_name = expr.get('name')
+            return lambda row: row.get(column_name)
+
+        return self._compile_value(expr)
+
+    @staticmethod
+    def _aggregate_column_name(func_name: str, args: List[Dict], distinct: bool = False) -> str:
+        """构建与分组结果中一致的聚合列名"""
+        if args and len(args) == 1 and args[0].get('type') == 'LiteralExpr' and args[0].get('value') == '*':
+            return f"{func_name}(*)"
+        if args:
+            arg_values = []
+            for arg in args:
+                if arg.get('type') == 'IdentifierExpr':
+                    arg_values.append(arg.get('name'))
+                elif arg.get('type') == 'LiteralExpr':
+                    arg_values.append(str(arg.get('value')))
+                else:
+                    arg_values.append('?')
+            if distinct:
+                return f"{func_name}(DISTINCT {', '.join(arg_values)})"
+            return f"{func_name}({', '.join(arg_values)})"
+        return f"{func_name}()"
+
+    # ==================== 值表达式 ====================
+
+    def _compile_value(self, expr: Dict) -> RowFunction:
+        expr_type = expr.get('type')
+
+        if expr_type == 'IdentifierExpr':
+            column_name = expr.get('name')
+            table_name = expr.get('table_name')
+
+            if table_name:
+                full_column_name = f"{table_name}.{column_name}"
+
+                def lookup(row: Dict) -> Any:
+                    # JOIN 结果中的列可能只保留了列名
+                    if full_column_name in row:
+                        return row[full_column_name]
+                    return row.get(column_name)
+
+                return lookup
+
+            return lambda row: row.get(column_name)
+
+        if expr_type == 'LiteralExpr':
+            value = expr.get('value')
+            return lambda row: value
+
+        if expr_type == 'BinaryExpr':
+            left = self._compile_value(expr.get('left', {}))
+            right = self._compile_value(expr.get('right', {}))
+            arithmetic = ARITHMETIC_OPERATORS.get(expr.get('operator', ''))
+
+            def evaluate(row: Dict) -> Any:
+                left_value = left(row)
+                right_value = right(row)
+                # 任一操作数为 NULL 或者不是算术运算时结果为 NULL
+                if left_value is None or right_value is None or arithmetic is None:
+                    return None
+                return arithmetic(left_value, right_value)
+
+            return evaluate
+
+        if expr_type == 'FunctionExpr':
+            return self._compile_function(expr)
+
+        if expr_type == 'ValueListExpr':
+            values = [self._compile_value(value) for value in expr.get('values', [])]
+            return lambda row: [value(row) for value in values]
+
+        if expr_type == 'SubqueryExpr':
+            return self._compile_subquery(expr)
+
+        return lambda row: None
+
+    def _compile_function(self, expr: Dict) -> RowFunction:
+        func_name = expr.get('function_name', '').upper()
+        args = [self._compile_value(arg) for arg in expr.get('arguments', [])]
+        apply_function = self.engine._apply_function
+        return lambda row: apply_function(func_name, [arg(row) for arg in args])
+
+    def _compile_subquery(self, expr: Dict) -> RowFunction:
+        """子查询不引用外层行，第一次求值后缓存结果"""
+        cached = []
+
+        def evaluate(row: Dict) -> Any:
+            if not cached:
+                cached.append(self.engine._evaluate_subquery_expression(row, expr))
+            return cached[0]
+
+        return evaluate
+
+    # ==================== 工具方法 ====================
+
+    @staticmethod
+    def _to_dict(expr: Any) -> Optional[Dict]:
+        if hasattr(expr, 'to_dict'):
+            return expr.to_dict()
+        if isinstance(expr, dict):
+            return expr
+        return None
+
+    @classmethod
+    def _contains_aggregate(cls, expr: Any) -> bool:
+        """检查条件是否包含聚合函数（HAVING条件）"""
+        if not isinstance(expr, dict):
+            return False
+
+        if expr.get('type') == 'FunctionExpr':
+            if expr.get('function_name', '').upper() in AGGREGATE_FUNCTIONS:
+                return True
+
+        for value in expr.values():
+            if isinstance(value, dict):
+                if cls._contains_aggregate(value):
+                    return True
+            elif isinstance(value, list):
+                if any(cls._contains_aggregate(item) for item in value):
+                    return True
+
+        return False
+
+    @classmethod
+    def _references_columns(cls, expr: Any) -> bool:
+        """表达式中是否包含列引用（子查询内部的列不算）"""
+        if not isinstance(expr, dict):
+            return False
+        if expr.get('type') == 'IdentifierExpr':
+            return True
+        if expr.get('type') == 'SubqueryExpr':
+            return False
+
+        for value in expr.values():
+            if isinstance(value, dict):
+                if cls._references_columns(value):
+                    return True
+            elif isinstance(value, list):
+                if any(cls._references_columns(item) for item in value):
+                    return True
+
+        return False
@@ -0,0 +1,109 @@
+# engine/external_sort.py
+"""
+外部归并排序。
+
+输入行在内存中累积到 work_mem 字节后排序并写成一个有序段（run）到临时文件，
+最后用 heapq.merge 做 k 路归并。段数超过归并扇入时先分批归并成更长的段，
+避免同时打开过多文件。排序是稳定的：段按输入顺序生成，heapq.merge 在键相等时
+优先输出前面的段。
+"""
+import heapq
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# 默认排序内存：4MB
+DEFAULT_WORK_MEM = 4 * 1024 * 1024
+
+# 一次归并最多同时打开的段数
+MAX_MERGE_FANIN = 64
+
+# 写入段文件时每次序列化的行数
+RUN_CHUNK_ROWS = 512
+
+
+def estimate_row_size(row: Dict) -> int:
+    """粗略估计一行在内存中占用的字节数"""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+
+
+class ExternalSorter:
+    """在 work_mem 限制内排序任意大小的行流"""
+
+    def __init__(self, key: Callable[[Dict], Any], work_mem: int = DEFAULT_WORK_MEM,
+                 temp_dir: Optional[str] = None, max_fanin: int = MAX_MERGE_FANIN):
+        if work_mem <= 0:
+            raise ValueError("work_mem 必须大于0")
+        self.key = key
+        self.work_mem = work_mem
+        self.temp_dir = temp_dir
+        self.max_fanin = max(2, max_fanin)
+
+        # 统计信息
+        self.runs_written = 0
+        self.merge_passes = 0
+
+    def sort(self, rows: Iterable[Dict]) -> Iterator[Dict]:
+        """排序输入行；全部能放进 work_mem 时只在内存中排序"""
+        runs: List[Any] = []
+        try:
+            buffer = []
+            buffer_bytes = 0
+            for row in rows:
+                buffer.append(row)
+                buffer_bytes += estimate_row_size(row)
+                if buffer_bytes >= self.work_mem:
+                    buffer.sort(key=self.key)
+                    runs.append(self._write_run(buffer))
+                    buffer = []
+                    buffer_bytes = 0
+
+            buffer.sort(key=self.key)
+            if not runs:
+                yield from buffer
+                return
+
+            # 段数过多时先分批归并
+            while len(runs) + 1 > self.max_fanin:
+                batch, runs = runs[:self.max_fanin], runs[self.max_fanin:]
+                merged = self._write_run(heapq.merge(*[self._read_run(run) for run in batch], key=self.key))
+                for run in batch:
+                    run.close()
+                # 合并后的段排在最前面，保持段之间的输入顺序
+                runs.insert(0, merged)
+                self.merge_passes += 1
+
+            # 最后一段还在内存中，直接参与归并
+            yield from heapq.merge(*[self._read_run(run) for run in runs], buffer, key=self.key)
+        finally:
+            for run in runs:
+                run.close()
+
+    def _write_run(self, rows: Iterable[Dict]) -> Any:
+        if self.temp_dir:
+            os.makedirs(self.temp_dir, exist_ok=True)
+        run = tempfile.TemporaryFile(prefix='sort_run_', dir=self.temp_dir)
+
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= RUN_CHUNK_ROWS:
+                pickle.dump(chunk, run, pickle.HIGHEST_PROTOCOL)
+                chunk = []
+        if chunk:
+            pickle.dump(chunk, run, pickle.HIGHEST_PROTOCOL)
+
+        self.runs_written += 1
+        return run
+
+    @staticmethod
+    def _read_run(run: Any) -> Iterator[Dict]:
+        run.seek(0)
+        while True:
+            try:
+                chunk = pickle.load(run)
+            except EOFError:
+                return
+            yield from chunk
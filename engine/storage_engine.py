@@ -2,14 +2,40 @@
 # engine/storage_engine.py
 import os
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable, Set
 from storage.core.storage_manager import StorageManager
 from storage.core.table_storage import TableStorage
-from storage.utils.serializer import RecordSerializer, PageSerializer
+from storage.core.toast_storage import ToastStorage
+from storage.utils.serializer import RecordSerializer, PageSerializer, RecordCodec, ToastPointer
 from storage.utils.exceptions import StorageException, TableNotFoundException
+from storage.utils.constants import SCAN_RING_THRESHOLD
 from storage.utils.logger import get_logger
 from sql_compiler.btree.BPlusTreeIndex import BPlusTreeIndex  # 导入B+树索引
 from storage.core.transaction_manager import TransactionManager, IsolationLevel, TransactionState  # 添加TransactionState导入
+from engine.tracing import Tracer
+
+
+class StoredRow(dict):
+    """带隐藏行标识的行：row_id 为 (页号, 槽位号)，只在 UPDATE/DELETE 收集目标行时附加"""
+
+    __slots__ = ('row_id',)
+
+    def __init__(self, values: Dict, row_id: Tuple[int, int]):
+        super().__init__(values)
+        self.row_id = row_id
+
+
+class CachedTableSchema:
+    """schema缓存项：catalog schema版本、列定义、RecordSerializer格式的schema和预编译编解码器"""
+
+    __slots__ = ('version', 'columns', 'schema_format', 'codec')
+
+    def __init__(self, version: int, columns: List[Dict], schema_format: List[tuple], codec: RecordCodec):
+        self.version = version
+        self.columns = columns
+        self.schema_format = schema_format
+        self.codec = codec
+
 
 class StorageEngine:
     def __init__(self, storage_manager: StorageManager, table_storage: TableStorage, catalog_manager=None):
@@ -18,6 +44,9 @@ class StorageEngine:
         self.catalog_manager = catalog_manager
         self.logger = get_logger("storage_engine")
 
+        # 会话级跟踪器（默认关闭），执行引擎共享同一个实例
+        self.tracer = Tracer()
+
         # 表空间和区管理相关属性
         self.current_table_context = None
         self.table_tablespace_mapping = {}  # 表名到表空间的映射
@@ -26,9 +55,15 @@ class StorageEngine:
         # 添加事务管理器
         self.transaction_manager = TransactionManager(storage_manager)
 
+        # 行外存储：过大的VARCHAR值存放在表的溢出页链中
+        self.toast_storage = ToastStorage(table_storage, self.transaction_manager)
+
         # 添加视图存储
         self.views = {}  # 视图名 -> 视图定义
 
+        # schema缓存：表名 -> CachedTableSchema，catalog schema版本变化或DDL时失效
+        self._schema_cache: Dict[str, CachedTableSchema] = {}
+
         # 从持久化存储加载视图
         self.load_views()
 
@@ -48,6 +83,7 @@ class StorageEngine:
         """提交事务"""
         try:
             self.transaction_manager.commit(txn_id)
+            self.toast_storage.end_transaction(txn_id, committed=True)
             return True
         except Exception as e:
             self.logger.error(f"Failed to commit transaction {txn_id}: {e}")
@@ -57,7 +93,7 @@ class StorageEngine:
 
     def rollback_transaction(self, txn_id: int) -> bool:
         """回滚指定事务"""
-        print(f"DEBUG: Attempting rollback for transaction ID: {txn_id}")
+        self.tracer.debug('storage', "Attempting rollback for transaction ID: %s", txn_id)
 
         if txn_id is None:
             print("WARNING: No transaction ID provided for rollback")
@@ -81,8 +117,9 @@ class StorageEngine:
 
             # 执行回滚
             success = self.transaction_manager.rollback(txn_id)
+            self.toast_storage.end_transaction(txn_id, committed=False)
             if success:
-                print(f"DEBUG: Successfully rolled back transaction {txn_id}")
+                self.tracer.debug('storage', "Successfully rolled back transaction %s", txn_id)
             else:
                 print(f"ERROR: Failed to rollback transaction {txn_id}")
             return success
@@ -116,6 +153,8 @@ class StorageEngine:
                     materialized: bool = False, with_check_option: bool = False) -> bool:
         """创建视图并持久化存储 - 修复版，确保与catalog同步"""
         try:
+            self.invalidate_schema_cache(view_name)
+
             # 存储到内存
             self.views[view_name] = {
                 'definition': definition,
@@ -156,6 +195,7 @@ class StorageEngine:
             # 从内存中删除
             if view_name in self.views:
                 del self.views[view_name]
+            self.invalidate_schema_cache(view_name)
 
             # 删除持久化文件
             views_dir = "system_views"
@@ -207,8 +247,9 @@ class StorageEngine:
         """在事务中插入一行数据"""
         try:
             # 添加调试信息
-            print(f"DEBUG: Inserting into table '{table_name}' in transaction {txn_id}")
-            print(f"DEBUG: Row data: {row_data}")
+            trace = self.tracer.is_enabled('storage')
+            self.tracer.debug('storage', "Inserting into table '%s' in transaction %s", table_name, txn_id)
+            self.tracer.debug('storage', "Row data: %s", row_data)
 
             # 检查表是否存在
             if not self.table_storage.table_exists(table_name):
@@ -221,7 +262,7 @@ class StorageEngine:
                 print(f"ERROR: Schema not found for table '{table_name}'")
                 return False
 
-            print(f"DEBUG: Table schema: {schema}")
+            self.tracer.debug('storage', "Table schema: %s", schema)
 
             # 将值列表转换为字典格式
             column_names = [col['name'] for col in schema]
@@ -236,23 +277,26 @@ class StorageEngine:
                 else:
                     row_dict[col_name] = None
 
-            # 序列化记录
-            binary_row = self.serialize_row(row_dict, schema)
-            print(f"DEBUG: Serialized binary data length: {len(binary_row)}")
+            # 序列化记录（过大的VARCHAR移到溢出页）
+            binary_row = self.toast_storage.toast_record(table_name, self._get_table_codec(table_name), row_dict, txn_id)
+            self.tracer.debug('storage', "Serialized binary data length: %s", len(binary_row))
 
-            # 获取表的所有页
-            page_ids = self.table_storage.get_table_pages(table_name)
-            print(f"DEBUG: Table has {len(page_ids)} pages")
+            # 通过FSM找放得下记录的页（记录本身加4字节偏移），只锁定选中的页
+            needed_bytes = len(binary_row) + 4
+            while True:
+                page_id = self.table_storage.find_page_with_free_space(table_name, needed_bytes)
+                if page_id is None:
+                    break
+                page_index = self.table_storage.get_page_index(table_name, page_id)
 
-            # 尝试在现有页中插入记录
-            for page_index, page_id in enumerate(page_ids):
                 # 准备写操作（获取锁，保存undo信息）
                 if not self.transaction_manager.prepare_write(txn_id, page_id):
                     raise StorageException(f"Failed to acquire write lock on page {page_id}")
 
                 # 读取页数据
                 page_data = self.table_storage.read_table_page(table_name, page_index)
-                print(f"DEBUG: Page {page_index} data length: {len(page_data)}")
+                if trace:
+                    self.tracer.debug('storage', "Page %s data length: %s", page_index, len(page_data))
 
                 # 尝试将记录添加到页
                 new_page_data, success = PageSerializer.add_record_to_page(page_data, binary_row)
@@ -276,19 +320,22 @@ class StorageEngine:
 
                     return True
                 else:
-                    print(f"DEBUG: Page {page_id} does not have enough space")
+                    # FSM中的值已过时，用页头的实际空闲空间修正后重新查找
+                    if trace:
+                        self.tracer.debug('storage', "Page %s does not have enough space", page_id)
+                    self.table_storage.update_free_space(table_name, page_id,
+                                                         PageSerializer.get_page_info(page_data)['free_space_size'])
 
             # 如果没有现有页有足够空间，分配新页
-            new_page_id = self.table_storage.allocate_table_page(table_name)
-            page_index = len(page_ids)
-            print(f"DEBUG: Allocated new page {new_page_id}")
+            new_page_id, page_index = self._allocate_new_page(table_name)
+            self.tracer.debug('storage', "Allocated new page %s", new_page_id)
 
             # 准备写操作（获取锁，保存undo信息）
             if not self.transaction_manager.prepare_write(txn_id, new_page_id):
                 raise StorageException(f"Failed to acquire write lock on new page {new_page_id}")
 
             # 创建空页并添加记录
-            empty_page = PageSerializer.create_empty_page()
+            empty_page = PageSerializer.create_empty_page(self.table_storage.get_page_size(table_name))
             new_page_data, success = PageSerializer.add_record_to_page(empty_page, binary_row)
 
             if not success:
@@ -356,41 +403,38 @@ class StorageEngine:
                 # 读取页数据
                 page_data = self.table_storage.read_table_page(table_name, page_index)
 
-                # 从页中提取所有记录
-                schema_format = self._convert_to_schema_format(schema)
-                records = PageSerializer.get_records_from_page(page_data, schema_format)
+                # 从页中提取所有记录及其槽位号
+                schema_format = self._get_schema_format(table_name)
+                records = PageSerializer.get_records_with_slots_from_page(page_data, schema_format)
 
                 # 查找要更新的记录
-                for i, record in enumerate(records):
-                    if self._rows_match(record, old_row):
+                for i, record in records:
+                    if self._matches_stored(table_name, record, old_row):
                         # 准备写操作（获取锁，保存undo信息）
                         if not self.transaction_manager.prepare_write(txn_id, page_id):
                             self.logger.error(f"Failed to acquire write lock on page {page_id}")
                             return False
 
-                        # 创建更新后的行数据
+                        # 创建更新后的行数据（未修改的行外存储值保留原指针）
                         updated_row = record.copy()
                         updated_row.update(new_data)
 
                         # 序列化更新后的记录
-                        binary_updated_row = self.serialize_row(updated_row, schema)
-
-                        # 移除旧记录
-                        page_data_after_remove, success = PageSerializer.remove_data_from_page(page_data, i)
-                        if not success:
-                            raise StorageException("Failed to remove old record from page")
+                        binary_updated_row = self.toast_storage.toast_record(
+                            table_name, self._get_table_codec(table_name), updated_row, txn_id)
 
-                        # 添加新记录
-                        updated_page_data, success = PageSerializer.add_record_to_page(page_data_after_remove,
-                                                                                       binary_updated_row)
+                        # 在原槽位替换记录
+                        updated_page_data, success = PageSerializer.update_data_blocks_in_page(
+                            page_data, {i: binary_updated_row})
                         if not success:
-                            raise StorageException("Failed to add updated record to page")
+                            raise StorageException("Failed to replace record in page")
 
                         # 记录redo日志
                         self.transaction_manager.record_write(txn_id, page_id, updated_page_data)
 
                         # 写入更新后的页
                         self.table_storage.write_table_page(table_name, page_index, updated_page_data)
+                        self._release_replaced_values(table_name, record, new_data, txn_id)
                         self.logger.debug(
                             f"Updated row in table '{table_name}', page {page_index} in transaction {txn_id}")
                         return True
@@ -426,13 +470,13 @@ class StorageEngine:
                 # 读取页数据
                 page_data = self.table_storage.read_table_page(table_name, page_index)
 
-                # 从页中提取所有记录
-                schema_format = self._convert_to_schema_format(schema)
-                records = PageSerializer.get_records_from_page(page_data, schema_format)
+                # 从页中提取所有记录及其槽位号
+                schema_format = self._get_schema_format(table_name)
+                records = PageSerializer.get_records_with_slots_from_page(page_data, schema_format)
 
                 # 查找要删除的记录
-                for i, record in enumerate(records):
-                    if self._rows_match(record, row):
+                for i, record in records:
+                    if self._matches_stored(table_name, record, row):
                         # 准备写操作（获取锁，保存undo信息）
                         if not self.transaction_manager.prepare_write(txn_id, page_id):
                             raise StorageException(f"Failed to acquire write lock on page {page_id}")
@@ -447,6 +491,7 @@ class StorageEngine:
 
                         # 写入更新后的页
                         self.table_storage.write_table_page(table_name, page_index, updated_page_data)
+                        self.toast_storage.release_record(table_name, record, txn_id)
                         self.logger.debug(
                             f"Deleted row from table '{table_name}', page {page_index} in transaction {txn_id}")
 
@@ -465,19 +510,26 @@ class StorageEngine:
             self.logger.error(f"Error deleting row from table '{table_name}' in transaction {txn_id}: {e}")
             return False
 
-    def create_table(self, table_name: str, columns: List[Dict]) -> None:
-        """为表分配初始存储空间 - 增强版，支持表空间和区管理"""
+    def create_table(self, table_name: str, columns: List[Dict], tablespace_name: Optional[str] = None) -> None:
+        """
+        为表分配初始存储空间 - 增强版，支持表空间和区管理
+
+        tablespace_name 为None时按表名自动选择表空间；表的页大小由所在表空间决定
+        """
         try:
+            self.invalidate_schema_cache(table_name)
+
             # 计算预估记录大小
             schema = self._convert_to_schema_format(columns)
             estimated_size = RecordSerializer.calculate_record_size(schema)
 
-            # 智能选择表空间 - 强制使用表空间管理器
-            if self.storage_manager and hasattr(self.storage_manager, 'tablespace_manager'):
-                tablespace_name = self.storage_manager.tablespace_manager.allocate_tablespace_for_table(table_name)
-            else:
-                # 回退策略
-                tablespace_name = self._choose_tablespace_for_table(table_name)
+            # 未指定时智能选择表空间 - 强制使用表空间管理器
+            if tablespace_name is None:
+                if self.storage_manager and hasattr(self.storage_manager, 'tablespace_manager'):
+                    tablespace_name = self.storage_manager.tablespace_manager.allocate_tablespace_for_table(table_name)
+                else:
+                    # 回退策略
+                    tablespace_name = self._choose_tablespace_for_table(table_name)
 
             self.table_tablespace_mapping[table_name] = tablespace_name
 
@@ -656,6 +708,276 @@ class StorageEngine:
     #         raise
 
     # 修改原有的非事务方法，使其在需要时自动使用事务
+    def insert_rows_transactional(self, table_name: str, rows: List[List[Any]], txn_id: int) -> int:
+        """
+        在事务中批量插入多行数据
+
+        schema 只解析一次，所有行先序列化；通过FSM选择有空闲空间的页填充，每页只读写一次、
+        只记录一次redo，现有页放不下的行依次写入新分配的页。
+
+        Returns:
+            int: 插入的行数
+        """
+        try:
+            self.tracer.debug('storage', "Batch inserting %s rows into table '%s' in transaction %s",
+                              len(rows), table_name, txn_id)
+
+            if not rows:
+                return 0
+
+            # 检查表是否存在
+            if not self.table_storage.table_exists(table_name):
+                raise TableNotFoundException(table_name)
+
+            # 获取表schema（整批只做一次）
+            schema = self._get_table_schema(table_name)
+            if not schema:
+                raise StorageException(f"Schema not found for table '{table_name}'")
+
+            codec = self._get_table_codec(table_name)
+            column_names = [col['name'] for col in schema]
+
+            # 序列化所有记录
+            row_dicts = []
+            binary_rows = []
+            for row_data in rows:
+                if len(row_data) != len(column_names):
+                    raise StorageException(
+                        f"Number of values ({len(row_data)}) doesn't match number of columns ({len(column_names)})")
+                row_dict = dict(zip(column_names, row_data))
+                row_dicts.append(row_dict)
+                binary_rows.append(self.toast_storage.toast_record(table_name, codec, row_dict, txn_id))
+
+            inserted = self._append_binary_rows(table_name, binary_rows, txn_id)
+
+            # 维护所有索引
+            if table_name in self.table_indexes:
+                for index_name, index in self.table_indexes[table_name].items():
+                    col_name = index_name.split('_')[-1]
+                    for row_dict in row_dicts:
+                        key = row_dict.get(col_name)
+                        if key is not None:
+                            index.insert(key, row_dict)
+
+            self.logger.debug(f"Batch inserted {inserted} rows into table '{table_name}' in transaction {txn_id}")
+            return inserted
+
+        except Exception as e:
+            self.logger.error(f"Error batch inserting into table '{table_name}': {e}")
+            raise
+
+    def _append_binary_rows(self, table_name: str, binary_rows: List[bytes], txn_id: Optional[int]) -> int:
+        """
+        把序列化好的记录写入表：先通过FSM填充有空闲空间的页，其余写入新分配的页
+
+        每页只读写一次；txn_id 为None时不加锁也不记录redo（非事务路径）。
+
+        Returns:
+            int: 写入的记录数
+        """
+
+        def write_page(page_id: int, page_index: int, page_data: bytes, start: int) -> int:
+            new_page_data, added = PageSerializer.add_data_blocks_to_page(page_data, binary_rows, start)
+            if added:
+                # 每页只记录一次redo并写入一次
+                self._write_page(table_name, page_id, page_index, new_page_data, txn_id)
+                self.tracer.debug('storage', "Wrote %s rows to page %s", added, page_id)
+            return added
+
+        inserted = 0
+
+        # 先通过FSM填充现有页中放得下下一行的页
+        while inserted < len(binary_rows):
+            page_id = self.table_storage.find_page_with_free_space(table_name, len(binary_rows[inserted]) + 4)
+            if page_id is None:
+                break
+            page_index = self.table_storage.get_page_index(table_name, page_id)
+
+            # 准备写操作（获取锁，保存undo信息）
+            self._prepare_page_write(page_id, txn_id)
+
+            page_data = self.table_storage.read_table_page(table_name, page_index)
+            added = write_page(page_id, page_index, page_data, inserted)
+            if not added:
+                # FSM中的值已过时，修正后重新查找
+                self.table_storage.update_free_space(table_name, page_id,
+                                                     PageSerializer.get_page_info(page_data)['free_space_size'])
+            inserted += added
+
+        # 剩余的行写入新分配的页
+        page_size = self.table_storage.get_page_size(table_name)
+        while inserted < len(binary_rows):
+            new_page_id, page_index = self._allocate_new_page(table_name)
+            self._prepare_page_write(new_page_id, txn_id)
+
+            added = write_page(new_page_id, page_index, PageSerializer.create_empty_page(page_size), inserted)
+            if not added:
+                raise StorageException(f"Failed to add record to new page {new_page_id}")
+            inserted += added
+
+        return inserted
+
+    def _allocate_new_page(self, table_name: str) -> Tuple[int, int]:
+        """为表分配新页，返回 (页号, 页索引)；新页必须追加在表的页列表末尾，否则写入会覆盖已有页"""
+        page_count = self.table_storage.get_table_page_count(table_name)
+        new_page_id = self.table_storage.allocate_table_page(table_name)
+        page_index = self.table_storage.get_page_index(table_name, new_page_id)
+        if page_index != page_count:
+            raise StorageException(
+                f"Allocated page {new_page_id} for table '{table_name}' at index {page_index}, expected {page_count}")
+        return new_page_id, page_index
+
+    def _prepare_page_write(self, page_id: int, txn_id: Optional[int]):
+        """事务中写页前获取排他锁并保存undo信息"""
+        if txn_id is not None and not self.transaction_manager.prepare_write(txn_id, page_id):
+            raise StorageException(f"Failed to acquire write lock on page {page_id}")
+
+    def _write_page(self, table_name: str, page_id: int, page_index: int, page_data: bytes, txn_id: Optional[int]):
+        """写入表页，事务中先记录redo"""
+        if txn_id is not None:
+            self.transaction_manager.record_write(txn_id, page_id, page_data)
+        self.table_storage.write_table_page(table_name, page_index, page_data)
+
+    def update_rows(self, table_name: str, rows: List[StoredRow], new_values: List[Dict],
+                    txn_id: Optional[int] = None) -> int:
+        """
+        按行标识更新多行（rows 来自 scan_rows(with_row_ids=True)，new_values 与之一一对应）
+
+        同一页上的行一起处理，每页只读写一次，新版本留在原槽位；页内放不下时
+        把这些行从原页移除，新版本通过FSM写入其他页。
+
+        Returns:
+            int: 更新的行数
+        """
+        codec = self._get_table_codec(table_name)
+        moved_rows = []
+        replaced = []
+
+        def apply(page_id: int, page_data: bytes, entries: List[Tuple[int, Dict, Dict]]) -> bytes:
+            replacements = {}
+            for slot, stored, new_data in entries:
+                # 从页中的记录出发，未修改的行外存储值保留原指针
+                updated_row = dict(stored)
+                updated_row.update(new_data)
+                replacements[slot] = self.toast_storage.toast_record(table_name, codec, updated_row, txn_id)
+                replaced.append((stored, new_data))
+
+            new_page_data, success = PageSerializer.update_data_blocks_in_page(page_data, replacements)
+            if not success:
+                # 新版本在原页放不下，整体移到其他页
+                new_page_data, success = PageSerializer.update_data_blocks_in_page(
+                    page_data, dict.fromkeys(replacements))
+                if not success:
+                    raise StorageException(f"Failed to remove old records from page {page_id}")
+                moved_rows.extend(replacements.values())
+            return new_page_data
+
+        updated = self._modify_rows_by_id(table_name, codec, rows, new_values, apply, txn_id)
+        if moved_rows:
+            self._append_binary_rows(table_name, moved_rows, txn_id)
+        for stored, new_data in replaced:
+            self._release_replaced_values(table_name, stored, new_data, txn_id)
+
+        self.logger.debug(f"Updated {updated} rows in table '{table_name}' ({len(moved_rows)} moved)")
+        return updated
+
+    def delete_rows(self, table_name: str, rows: List[StoredRow], txn_id: Optional[int] = None) -> int:
+        """
+        按行标识删除多行（rows 来自 scan_rows(with_row_ids=True)），每页只读写一次
+
+        Returns:
+            int: 删除的行数
+        """
+        codec = self._get_table_codec(table_name)
+        removed = []
+
+        def apply(page_id: int, page_data: bytes, entries: List[Tuple[int, Dict, Dict]]) -> bytes:
+            new_page_data, success = PageSerializer.update_data_blocks_in_page(
+                page_data, dict.fromkeys(slot for slot, _, _ in entries))
+            if not success:
+                raise StorageException(f"Failed to remove records from page {page_id}")
+            removed.extend(stored for _, stored, _ in entries)
+            return new_page_data
+
+        deleted = self._modify_rows_by_id(table_name, codec, rows, [None] * len(rows), apply, txn_id)
+        for stored in removed:
+            self.toast_storage.release_record(table_name, stored, txn_id)
+
+        # 维护所有索引
+        if table_name in self.table_indexes:
+            for index_name, index in self.table_indexes[table_name].items():
+                col_name = index_name.split('_')[-1]
+                for row in rows:
+                    key = row.get(col_name)
+                    if type(key) is ToastPointer:
+                        key = self.toast_storage.fetch(table_name, key)
+                    if key is not None:
+                        index.delete(key)
+
+        self.logger.debug(f"Deleted {deleted} rows from table '{table_name}'")
+        return deleted
+
+    def _modify_rows_by_id(self, table_name: str, codec: RecordCodec, rows: List[StoredRow],
+                           new_values: List[Optional[Dict]], apply: Callable[[int, bytes, list], bytes],
+                           txn_id: Optional[int]) -> int:
+        """
+        按页分组修改行：每页加锁、读取、校验槽位中的记录后交给 apply 生成新页并写回
+
+        交给 apply 的是 (槽位号, 页中解码出的记录, 新值)，行外存储的列仍为 ToastPointer。
+        """
+        pages: Dict[int, List[Tuple[int, StoredRow, Optional[Dict]]]] = {}
+        for row, new_data in zip(rows, new_values):
+            page_id, slot = row.row_id
+            pages.setdefault(page_id, []).append((slot, row, new_data))
+
+        for page_id, entries in pages.items():
+            page_index = self.table_storage.get_page_index(table_name, page_id)
+            self._prepare_page_write(page_id, txn_id)
+            page_data = self.table_storage.read_table_page(table_name, page_index)
+
+            # 行标识只在本条语句内有效，槽位中的记录必须仍是扫描到的那一行
+            stored_entries = []
+            for slot, row, new_data in entries:
+                data_block = PageSerializer.get_data_block(page_data, slot)
+                stored = codec.decode(data_block) if data_block is not None else None
+                if stored is None or not self._matches_stored(table_name, stored, row):
+                    raise StorageException(f"Row {row.row_id} in table '{table_name}' has changed since it was read")
+                stored_entries.append((slot, stored, new_data))
+
+            self._write_page(table_name, page_id, page_index, apply(page_id, page_data, stored_entries), txn_id)
+
+        return len(rows)
+
+    def _get_schema_format(self, table_name: str) -> List[tuple]:
+        cached = self._get_cached_schema(table_name)
+        if not cached.columns:
+            raise StorageException(f"Schema not found for table '{table_name}'")
+        return cached.schema_format
+
+    def _get_table_codec(self, table_name: str) -> RecordCodec:
+        cached = self._get_cached_schema(table_name)
+        if not cached.columns:
+            raise StorageException(f"Schema not found for table '{table_name}'")
+        return cached.codec
+
+    def _get_cached_schema(self, table_name: str) -> 'CachedTableSchema':
+        """按 (表名, catalog schema版本) 缓存转换后的schema和预编译编解码器"""
+        version = getattr(self.catalog_manager, 'schema_version', 0)
+        cached = self._schema_cache.get(table_name)
+        if cached is None or cached.version != version:
+            columns = self._load_table_schema(table_name)
+            schema_format = self._convert_to_schema_format(columns)
+            cached = CachedTableSchema(version, columns, schema_format, RecordSerializer.get_codec(schema_format))
+            self._schema_cache[table_name] = cached
+        return cached
+
+    def invalidate_schema_cache(self, table_name: Optional[str] = None):
+        """DDL 之后使schema缓存失效（不指定表名时清空全部）"""
+        if table_name is None:
+            self._schema_cache.clear()
+        else:
+            self._schema_cache.pop(table_name, None)
+
     def insert_row(self, table_name: str, row_data: List[Any]) -> None:
         """插入一行数据 - 非事务版本"""
         # 对于非事务操作，自动开始并提交一个事务
@@ -669,47 +991,159 @@ class StorageEngine:
             self.rollback_transaction(txn_id)
             raise
 
+    def insert_rows(self, table_name: str, rows: List[List[Any]]) -> int:
+        """批量插入多行数据 - 非事务版本，整批在一个事务中提交（只写一次提交日志）"""
+        txn_id = self.begin_transaction()
+        try:
+            inserted = self.insert_rows_transactional(table_name, rows, txn_id)
+            self.commit_transaction(txn_id)
+            return inserted
+        except Exception:
+            self.rollback_transaction(txn_id)
+            raise
+
+    def _scan_ring(self, page_count: int):
+        """表的页数超过缓存池的 SCAN_RING_THRESHOLD 时，顺序扫描改用环形缓冲区，避免挤出缓存池中的热页"""
+        if page_count > self.storage_manager.buffer_pool.capacity * SCAN_RING_THRESHOLD:
+            return self.storage_manager.create_scan_ring()
+        return None
+
     def get_all_rows(self, table_name: str) -> List[Dict]:
         """获取表中的所有行（用于SeqScan）"""
+        return list(self.scan_rows(table_name))
+
+    def scan_rows(self, table_name: str, with_row_ids: bool = False,
+                  fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """逐页扫描表中的行（流式SeqScan），同一时刻只持有一页的记录
+
+        with_row_ids 为True时产出 StoredRow，附带 (页号, 槽位号) 行标识，供 update_rows/delete_rows 直接定位。
+        指定 fetch_columns 时只沿溢出页链读取这些列，其他列的行外存储值保留为 ToastPointer。
+        """
         try:
             # 首先检查是否是视图
             if self.view_exists(table_name):
-                return []
+                return
 
             # 获取表schema - 从catalog获取真实schema
             schema = self._get_table_schema(table_name)
             if not schema:
                 raise StorageException(f"Schema not found for table '{table_name}'")
 
-            all_rows = []
+            # schema转换只需做一次
+            schema_format = self._get_schema_format(table_name)
 
             # 获取表的所有页
             page_count = self.table_storage.get_table_page_count(table_name)
             self.logger.debug(f"Table {table_name} has {page_count} pages")
 
+            page_ids = self.table_storage.get_table_pages(table_name) if with_row_ids else None
+            ring = self._scan_ring(page_count)
+
+            # 没有溢出页的表不必检查 ToastPointer
+            toasted = self.table_storage.has_overflow_pages(table_name)
+            detoast_columns = None
+            if toasted and fetch_columns is not None:
+                detoast_columns = [col_name for col_name, data_type, _ in schema_format
+                                   if col_name in fetch_columns and data_type.upper() == 'VARCHAR']
+                toasted = bool(detoast_columns)
+            detoast = self.toast_storage.detoast_record
+
             # 遍历所有页提取记录
             for page_index in range(page_count):
                 # 读取页数据
-                page_data = self.table_storage.read_table_page(table_name, page_index)
-                self.logger.debug(f"Page {page_index} data length: {len(page_data)}")
+                page_data = self.table_storage.read_table_page(table_name, page_index, ring)
+
+                if with_row_ids:
+                    page_id = page_ids[page_index]
+                    for slot, record in PageSerializer.get_records_with_slots_from_page(page_data, schema_format):
+                        if toasted:
+                            detoast(table_name, record, detoast_columns)
+                        yield StoredRow(record, (page_id, slot))
+                    continue
 
                 # 从页中提取所有记录
-                schema_format = self._convert_to_schema_format(schema)
                 records = PageSerializer.get_records_from_page(page_data, schema_format)
-
-                # 添加调试信息
                 self.logger.debug(f"Page {page_index} contains {len(records)} records")
-                for i, record in enumerate(records):
-                    self.logger.debug(f"Record {i}: {record}")
-
-                all_rows.extend(records)
 
-            return all_rows
+                if toasted:
+                    for record in records:
+                        detoast(table_name, record, detoast_columns)
+                yield from records
 
         except Exception as e:
             self.logger.error(f"Error getting all rows from table '{table_name}': {e}")
             raise
 
+    def scan_column_batches(self, table_name: str, batch_size: int, columns: Optional[List[str]] = None,
+                            fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict[str, List[Any]]]:
+        """
+        逐页把表按列解码，每攒够 batch_size 行产出一个 列名 -> 值列表 的批
+
+        指定 columns 时只产出这些列，其他列中行外存储的值不会被读取；
+        columns 为空或含有表中不存在的列时产出所有列。
+        指定 fetch_columns 时产出的其他列中行外存储的值保留为 ToastPointer。
+        """
+        try:
+            schema = self._get_table_schema(table_name)
+            if not schema:
+                raise StorageException(f"Schema not found for table '{table_name}'")
+
+            schema_format = self._get_schema_format(table_name)
+            if columns is not None:
+                column_names = {col_name for col_name, _, _ in schema_format}
+                if not columns or any(col_name not in column_names for col_name in columns):
+                    columns = None
+            output_columns = [col_name for col_name, _, _ in schema_format
+                              if columns is None or col_name in columns]
+            toasted_columns = [col_name for col_name, data_type, _ in schema_format
+                               if col_name in output_columns and data_type.upper() == 'VARCHAR'
+                               and (fetch_columns is None or col_name in fetch_columns)] \
+                if self.table_storage.has_overflow_pages(table_name) else []
+
+            def new_batch() -> Dict[str, List[Any]]:
+                return {col_name: [] for col_name, _, _ in schema_format}
+
+            def finish_batch(batch: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+                for col_name in toasted_columns:
+                    self.toast_storage.detoast_values(table_name, batch[col_name])
+                if columns is None:
+                    return batch
+                return {col_name: batch[col_name] for col_name in output_columns}
+
+            batch = new_batch()
+            row_count = 0
+            page_count = self.table_storage.get_table_page_count(table_name)
+            ring = self._scan_ring(page_count)
+
+            for page_index in range(page_count):
+                page_data = self.table_storage.read_table_page(table_name, page_index, ring)
+                row_count += PageSerializer.get_columns_from_page(page_data, schema_format, batch)
+
+                if row_count >= batch_size:
+                    yield finish_batch(batch)
+                    batch = new_batch()
+                    row_count = 0
+
+            if row_count:
+                yield finish_batch(batch)
+
+        except Exception as e:
+            self.logger.error(f"Error scanning column batches from table '{table_name}': {e}")
+            raise
+
+    def get_temp_directory(self) -> Optional[str]:
+        """获取临时表空间的临时文件目录，无法确定时返回None（使用系统临时目录）"""
+        try:
+            return self.storage_manager.tablespace_manager.get_temp_directory()
+        except Exception as e:
+            self.logger.warning(f"Could not resolve temp tablespace directory: {e}")
+            return None
+
+    def get_column_types(self, table_name: str) -> Dict[str, str]:
+        """获取表的 列名 -> 数据类型"""
+        schema = self._get_table_schema(table_name) or []
+        return {col['name']: col['type'].upper() for col in schema}
+
     def _convert_to_schema_format(self, columns: List[Dict]) -> List[tuple]:
         """将列定义转换为RecordSerializer需要的格式"""
         schema = []
@@ -739,6 +1173,10 @@ class StorageEngine:
         return schema
 
     def _get_table_schema(self, table_name: str) -> List[Dict]:
+        """获取表schema（走schema缓存，返回的列表由缓存共享，调用方不要修改）"""
+        return self._get_cached_schema(table_name).columns
+
+    def _load_table_schema(self, table_name: str) -> List[Dict]:
         """获取表schema - 从catalog获取真实schema，添加回退机制"""
         try:
             # 优先使用catalog manager实例
@@ -843,6 +1281,7 @@ class StorageEngine:
         try:
             # 刷盘确保数据持久化
             self.storage_manager.flush_all_pages()
+            self.table_storage.flush_catalog()
             self.logger.info("Storage engine shutdown completed")
         except Exception as e:
             self.logger.error(f"Error during storage engine shutdown: {e}")
@@ -864,37 +1303,31 @@ class StorageEngine:
                 # 读取页数据
                 page_data = self.table_storage.read_table_page(table_name, page_index)
 
-                # 从页中提取所有记录
-                schema_format = self._convert_to_schema_format(schema)
-                records = PageSerializer.get_records_from_page(page_data, schema_format)
+                # 从页中提取所有记录及其槽位号
+                schema_format = self._get_schema_format(table_name)
+                records = PageSerializer.get_records_with_slots_from_page(page_data, schema_format)
 
                 # 查找要更新的记录（基于所有字段的精确匹配）
-                for i, record in enumerate(records):
+                for i, record in records:
                     # 检查是否是要更新的行（比较所有字段）
-                    if self._rows_match(record, old_row):
+                    if self._matches_stored(table_name, record, old_row):
                         # 创建更新后的行数据
                         updated_row = record.copy()  # 使用当前记录而不是old_row
                         updated_row.update(new_data)
 
                         # 序列化更新后的记录
-                        binary_updated_row = self.serialize_row(updated_row, schema)
+                        binary_updated_row = self.toast_storage.toast_record(
+                            table_name, self._get_table_codec(table_name), updated_row)
 
-                        # 更新页中的记录
-                        # 首先需要移除旧记录，然后添加新记录
-
-                        # 移除旧记录
-                        page_data_after_remove, success = PageSerializer.remove_data_from_page(page_data, i)
-                        if not success:
-                            raise StorageException("Failed to remove old record from page")
-
-                        # 添加新记录
-                        updated_page_data, success = PageSerializer.add_record_to_page(page_data_after_remove,
-                                                                                       binary_updated_row)
+                        # 在原槽位替换记录
+                        updated_page_data, success = PageSerializer.update_data_blocks_in_page(
+                            page_data, {i: binary_updated_row})
                         if not success:
-                            raise StorageException("Failed to add updated record to page")
+                            raise StorageException("Failed to replace record in page")
 
                         # 写入更新后的页
                         self.table_storage.write_table_page(table_name, page_index, updated_page_data)
+                        self._release_replaced_values(table_name, record, new_data)
                         self.logger.debug(f"Updated row in table '{table_name}', page {page_index}")
                         return
 
@@ -934,6 +1367,29 @@ class StorageEngine:
         self.logger.debug("Rows match")
         return True
 
+    def _matches_stored(self, table_name: str, record: Dict, row: Dict) -> bool:
+        """比较页中解码出的记录（行外存储的列为 ToastPointer）与执行器看到的行
+
+        扫描时没有读取的列在行中也是 ToastPointer，直接比较指针。
+        """
+        if record.keys() != row.keys():
+            return False
+        for col_name, value in record.items():
+            other = row[col_name]
+            if type(value) is ToastPointer and type(other) is not ToastPointer:
+                value = self.toast_storage.fetch(table_name, value)
+            if value != other:
+                return False
+        return True
+
+    def _release_replaced_values(self, table_name: str, record: Dict, new_data: Dict,
+                                 txn_id: Optional[int] = None):
+        """记录更新后释放被新值替换掉的行外存储值"""
+        for col_name in new_data:
+            value = record.get(col_name)
+            if type(value) is ToastPointer:
+                self.toast_storage.release(table_name, value, txn_id)
+
     def delete_row(self, table_name: str, row: Dict) -> None:
         """删除表中的一行数据"""
         try:
@@ -950,20 +1406,21 @@ class StorageEngine:
                 # 读取页数据
                 page_data = self.table_storage.read_table_page(table_name, page_index)
 
-                # 从页中提取所有记录
-                schema_format = self._convert_to_schema_format(schema)
-                records = PageSerializer.get_records_from_page(page_data, schema_format)
+                # 从页中提取所有记录及其槽位号
+                schema_format = self._get_schema_format(table_name)
+                records = PageSerializer.get_records_with_slots_from_page(page_data, schema_format)
 
                 # 查找要删除的记录（基于所有字段的精确匹配）
-                for i, record in enumerate(records):
+                for i, record in records:
                     # 检查是否是要删除的行（比较所有字段）
-                    if self._rows_match(record, row):
+                    if self._matches_stored(table_name, record, row):
                         # 从页中移除记录
                         updated_page_data, success = PageSerializer.remove_data_from_page(page_data, i)
 
                         if success:
                             # 写入更新后的页
                             self.table_storage.write_table_page(table_name, page_index, updated_page_data)
+                            self.toast_storage.release_record(table_name, record)
                             self.logger.debug(f"Deleted row from table '{table_name}', page {page_index}")
 
                             # 维护所有索引
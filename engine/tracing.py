@@ -0,0 +1,147 @@
+# engine/tracing.py
+"""
+按组件分级的执行跟踪。
+
+默认所有组件都是 off，热路径上只做一次布尔判断，不格式化任何字符串；
+通过 SET TRACE executor=debug 等语句在当前会话中打开。事件写入固定大小的
+环形缓冲区（SHOW TRACE 查看），可以按采样率只保留一部分，也可以同时回显到标准输出。
+"""
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 跟踪级别，数值越大越详细
+TRACE_LEVELS = {
+    'off': 0,
+    'error': 1,
+    'warning': 2,
+    'info': 3,
+    'debug': 4,
+}
+
+# 支持单独设置级别的组件
+TRACE_COMPONENTS = ('executor', 'storage')
+
+DEFAULT_TRACE_BUFFER_SIZE = 1000
+
+
+class Tracer:
+    """会话级跟踪器：按组件的级别开关 + 采样 + 环形缓冲区"""
+
+    def __init__(self, buffer_size: int = DEFAULT_TRACE_BUFFER_SIZE, sample_every: int = 1, echo: bool = False):
+        self.levels: Dict[str, str] = dict.fromkeys(TRACE_COMPONENTS, 'off')
+        self.sample_every = sample_every
+        self.echo = echo
+        self.events = deque(maxlen=buffer_size)
+
+        # 预先计算好的 (组件, 级别) 开关集合，is_enabled 只做一次集合查找
+        self._enabled = frozenset()
+        self._sequence = 0
+
+    # ==================== 配置 ====================
+
+    def set_level(self, component: str, level: str):
+        """设置组件的跟踪级别，component 为 all 时设置全部组件"""
+        level = level.lower()
+        if level not in TRACE_LEVELS:
+            raise ValueError(f"未知的跟踪级别: {level}，可选: {', '.join(TRACE_LEVELS)}")
+
+        component = component.lower()
+        if component == 'all':
+            for name in self.levels:
+                self.levels[name] = level
+        elif component in self.levels:
+            self.levels[component] = level
+        else:
+            raise ValueError(f"未知的跟踪组件: {component}，可选: all, {', '.join(TRACE_COMPONENTS)}")
+
+        self._refresh_flags()
+
+    def set_buffer_size(self, buffer_size: int):
+        """调整环形缓冲区大小，保留最近的事件"""
+        if buffer_size <= 0:
+            raise ValueError("跟踪缓冲区大小必须大于0")
+        self.events = deque(self.events, maxlen=buffer_size)
+
+    def set_sampling(self, sample_every: int):
+        """每 sample_every 个事件只记录一个"""
+        if sample_every <= 0:
+            raise ValueError("采样间隔必须大于0")
+        self.sample_every = sample_every
+
+    def configure(self, settings: Iterable[Tuple[str, str]]) -> List[str]:
+        """应用 SET TRACE 的 key=value 设置，返回应用后的描述"""
+        applied = []
+        for key, value in settings:
+            key = key.lower()
+            value = str(value)
+            if key == 'sample':
+                self.set_sampling(int(value))
+            elif key == 'buffer':
+                self.set_buffer_size(int(value))
+            elif key == 'echo':
+                self.echo = value.lower() in ('on', 'true', '1', 'yes')
+            else:
+                self.set_level(key, value)
+            applied.append(f"{key}={value.lower()}")
+        return applied
+
+    def reset(self):
+        """关闭所有跟踪并清空缓冲区"""
+        for name in self.levels:
+            self.levels[name] = 'off'
+        self.sample_every = 1
+        self.echo = False
+        self.events.clear()
+        self._refresh_flags()
+
+    def _refresh_flags(self):
+        enabled = set()
+        for component, level in self.levels.items():
+            threshold = TRACE_LEVELS[level]
+            for name, value in TRACE_LEVELS.items():
+                if 0 < value <= threshold:
+                    enabled.add((component, name))
+        self._enabled = frozenset(enabled)
+
+    # ==================== 记录 ====================
+
+    def is_enabled(self, component: str, level: str = 'debug') -> bool:
+        """组件在该级别是否开启；热路径应在循环外调用一次并缓存结果"""
+        return (component, level) in self._enabled
+
+    def log(self, component: str, level: str, message: str, *args: Any):
+        """记录事件，消息只在通过级别和采样检查后才格式化"""
+        if (component, level) not in self._enabled:
+            return
+
+        self._sequence += 1
+        if self._sequence % self.sample_every:
+            return
+
+        text = message % args if args else message
+        self.events.append({
+            'seq': self._sequence,
+            'time': time.time(),
+            'component': component,
+            'level': level,
+            'message': text,
+        })
+        if self.echo:
+            print(f"TRACE [{component}:{level}] {text}")
+
+    def debug(self, component: str, message: str, *args: Any):
+        self.log(component, 'debug', message, *args)
+
+    def info(self, component: str, message: str, *args: Any):
+        self.log(component, 'info', message, *args)
+
+    def get_events(self, component: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取缓冲区中的事件（从旧到新）"""
+        if component is None:
+            return list(self.events)
+        return [event for event in self.events if event['component'] == component]
+
+    def clear(self):
+        """清空缓冲区"""
+        self.events.clear()
@@ -0,0 +1,447 @@
+# engine/vectorized.py
+"""
+批处理（向量化）执行器。
+
+与逐行的迭代器执行并存：扫描算子直接从页按列解码出列批（ColumnBatch），
+过滤、投影和聚合整批处理，只在计划顶端把批转换回行字典。数值列
+（INT/FLOAT 且没有 NULL）使用 array 存储，安装了 NumPy 时使用 ndarray 并走
+NumPy 内核；没有 NumPy 时回退到纯 Python 实现。不支持批处理的子计划仍然按行
+执行，再把行打包成批。
+"""
+import itertools
+import operator
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from sql_compiler.codegen.operators import (Operator, SeqScanOp, OptimizedSeqScanOp, FilteredSeqScanOp,
+                                            FilterOp, ProjectOp, GroupByOp)
+from sql_compiler.codegen.column_usage import input_columns
+from sql_compiler.exceptions.compiler_errors import SemanticError
+from engine.aggregation import HashAggregator
+
+# NumPy 是可选依赖
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 每批的目标行数
+BATCH_SIZE = 1024
+
+# 可以整批执行的算子
+BATCH_OPERATORS = (SeqScanOp, OptimizedSeqScanOp, FilteredSeqScanOp, FilterOp, ProjectOp, GroupByOp)
+
+# 数值列使用的 array 类型码
+NUMERIC_TYPECODES = {
+    'INT': 'q',
+    'DATE': 'q',
+    'FLOAT': 'd',
+}
+
+COMPARISON_KERNELS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<>': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+# 比较两侧交换位置时对应的运算符
+SWAPPED_OPERATORS = {'=': '=', '!=': '!=', '<>': '<>', '>': '<', '>=': '<=', '<': '>', '<=': '>='}
+
+
+class ColumnBatch:
+    """列批：列名 -> 列向量（list、array 或 ndarray），所有列等长"""
+
+    __slots__ = ('columns', 'length')
+
+    def __init__(self, columns: Dict[str, Any], length: int):
+        self.columns = columns
+        self.length = length
+
+    @classmethod
+    def from_lists(cls, columns: Dict[str, List[Any]], column_types: Dict[str, str]) -> 'ColumnBatch':
+        """由值列表构建列批，没有NULL的数值列转换为数组"""
+        length = len(next(iter(columns.values()))) if columns else 0
+        typed = {}
+        for name, values in columns.items():
+            typecode = NUMERIC_TYPECODES.get(column_types.get(name))
+            if typecode is not None and None not in values:
+                typed[name] = _make_numeric_column(values, typecode)
+            else:
+                typed[name] = values
+        return cls(typed, length)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> 'ColumnBatch':
+        """由键相同的一组行构建列批"""
+        if not rows:
+            return cls({}, 0)
+        columns = {name: [row[name] for row in rows] for name in rows[0]}
+        return cls(columns, len(rows))
+
+    def resolve(self, name: str, table_name: Optional[str] = None) -> Optional[Any]:
+        """按与行执行相同的规则解析列：优先 表名.列名，其次列名"""
+        if table_name:
+            full_name = f"{table_name}.{name}"
+            if full_name in self.columns:
+                return self.columns[full_name]
+        return self.columns.get(name)
+
+    def take(self, selection: List[int]) -> 'ColumnBatch':
+        """按选择向量取出子批"""
+        if len(selection) == self.length:
+            return self
+        return ColumnBatch({name: _take(column, selection) for name, column in self.columns.items()},
+                           len(selection))
+
+    def row(self, index: int) -> Dict:
+        return {name: _python_value(column[index]) for name, column in self.columns.items()}
+
+    def to_rows(self) -> Iterator[Dict]:
+        """转换回行字典，键顺序与逐行执行一致"""
+        if not self.columns:
+            for _ in range(self.length):
+                yield {}
+            return
+        names = list(self.columns)
+        vectors = [_as_list(column) for column in self.columns.values()]
+        for values in zip(*vectors):
+            yield dict(zip(names, values))
+
+
+def _make_numeric_column(values: List[Any], typecode: str) -> Any:
+    if NUMPY_AVAILABLE:
+        return np.array(values, dtype=np.int64 if typecode == 'q' else np.float64)
+    try:
+        return array(typecode, values)
+    except (TypeError, OverflowError):
+        return values
+
+
+def _take(column: Any, selection: List[int]) -> Any:
+    if NUMPY_AVAILABLE and isinstance(column, np.ndarray):
+        return column[np.asarray(selection, dtype=np.intp)]
+    values = [column[i] for i in selection]
+    if isinstance(column, array):
+        return array(column.typecode, values)
+    return values
+
+
+def _as_list(column: Any) -> List[Any]:
+    if isinstance(column, list):
+        return column
+    return column.tolist()
+
+
+def _python_value(value: Any) -> Any:
+    if NUMPY_AVAILABLE and isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _is_array(column: Any) -> bool:
+    """数组列保证没有NULL"""
+    return isinstance(column, array) or (NUMPY_AVAILABLE and isinstance(column, np.ndarray))
+
+
+class BatchExecutor:
+    """批处理执行器，作为 ExecutionEngine 的行执行之外的另一种执行方式"""
+
+    def __init__(self, execution_engine, batch_size: int = BATCH_SIZE):
+        self.engine = execution_engine
+        self.batch_size = batch_size
+
+    @staticmethod
+    def supports(plan: Operator) -> bool:
+        return isinstance(plan, BATCH_OPERATORS)
+
+    def iterate_rows(self, plan: Operator, fetch_columns: Optional[Set[str]] = None) -> Iterator[Dict]:
+        """整批执行计划，在顶端转换为行"""
+        for batch in self.execute(plan, fetch_columns):
+            yield from batch.to_rows()
+
+    def execute(self, plan: Operator, fetch_columns: Optional[Set[str]] = None) -> Iterator[ColumnBatch]:
+        """执行计划并产出列批；fetch_columns 的含义与 ExecutionEngine.iterate_plan 相同"""
+        columns = input_columns(plan, fetch_columns)
+        if isinstance(plan, FilteredSeqScanOp):
+            return self.execute_filter(plan.condition, self.scan_table(plan.table_name, fetch_columns=columns))
+        elif isinstance(plan, OptimizedSeqScanOp):
+            return self.execute_project_scan(plan.table_name, plan.selected_columns, columns)
+        elif isinstance(plan, SeqScanOp):
+            return self.scan_table(plan.table_name, fetch_columns=columns)
+        elif isinstance(plan, FilterOp):
+            return self.execute_filter(plan.condition, self.execute(plan.children[0], columns))
+        elif isinstance(plan, ProjectOp):
+            return self.execute_project(plan.columns, self.execute(plan.children[0], columns))
+        elif isinstance(plan, GroupByOp):
+            return self.execute_group_by(plan.group_columns, plan.having_condition,
+                                         self.execute(plan.children[0], columns), plan.aggregate_functions)
+        else:
+            # 不支持批处理的子计划按行执行后打包
+            return self.rows_to_batches(self.engine.iterate_plan(plan, fetch_columns))
+
+    # ==================== 扫描 ====================
+
+    def scan_table(self, table_name: str, columns: Optional[List[str]] = None,
+                   fetch_columns: Optional[Set[str]] = None) -> Iterator[ColumnBatch]:
+        """
+        从页直接按列解码；视图和大小写不一致的表名交给行执行处理
+
+        指定 columns 时存储层只产出这些列（其他列的行外存储值不会被读取）；
+        指定 fetch_columns 时只读取这些列的行外存储值，其他列保留为 ToastPointer。
+        """
+        storage_engine = self.engine.storage_engine
+        if table_name in self.engine.views or not storage_engine.table_storage.table_exists(table_name):
+            return self.rows_to_batches(self.engine.execute_seq_scan(table_name, fetch_columns))
+        return self._scan_table_batches(table_name, columns, fetch_columns)
+
+    def _scan_table_batches(self, table_name: str, columns: Optional[List[str]] = None,
+                            fetch_columns: Optional[Set[str]] = None) -> Iterator[ColumnBatch]:
+        try:
+            storage_engine = self.engine.storage_engine
+            column_types = storage_engine.get_column_types(table_name)
+            for values in storage_engine.scan_column_batches(table_name, self.batch_size, columns,
+                                                             fetch_columns):
+                yield ColumnBatch.from_lists(values, column_types)
+        except Exception as e:
+            raise SemanticError(f"扫描表 {table_name} 错误: {str(e)}")
+
+    def rows_to_batches(self, rows: Iterator[Dict]) -> Iterator[ColumnBatch]:
+        """把行流打包成列批，列集合变化时切分新批"""
+        buffer = []
+        keys = None
+        for row in rows:
+            row_keys = list(row)
+            if buffer and (row_keys != keys or len(buffer) >= self.batch_size):
+                yield ColumnBatch.from_rows(buffer)
+                buffer = []
+            keys = row_keys
+            buffer.append(row)
+        if buffer:
+            yield ColumnBatch.from_rows(buffer)
+
+    # ==================== 过滤 ====================
+
+    def execute_filter(self, condition: Any, batches: Iterator[ColumnBatch]) -> Iterator[ColumnBatch]:
+        try:
+            condition_dict = condition.to_dict() if hasattr(condition, 'to_dict') else condition
+            select = self.compile_batch_predicate(condition_dict) if isinstance(condition_dict, dict) \
+                else self._row_predicate(condition)
+
+            for batch in batches:
+                selection = select(batch, range(batch.length))
+                if selection:
+                    yield batch.take(list(selection))
+        except SemanticError:
+            raise
+        except Exception as e:
+            raise SemanticError(f"应用过滤条件错误: {str(e)}")
+
+    def compile_batch_predicate(self, condition: Dict) -> Callable:
+        """编译为 (batch, selection) -> 满足条件的行号列表；不支持的子表达式逐行求值"""
+        condition_type = condition.get('type')
+
+        if condition_type == 'BinaryExpr' and not self.engine.expression_compiler._contains_aggregate(condition):
+            operator_name = condition.get('operator', '')
+            logical_operator = operator_name.upper() if isinstance(operator_name, str) else operator_name
+
+            if logical_operator == 'AND':
+                left = self.compile_batch_predicate(condition.get('left', {}))
+                right = self.compile_batch_predicate(condition.get('right', {}))
+                return lambda batch, selection: right(batch, left(batch, selection))
+
+            if logical_operator == 'OR':
+                left = self.compile_batch_predicate(condition.get('left', {}))
+                right = self.compile_batch_predicate(condition.get('right', {}))
+
+                def select_or(batch: ColumnBatch, selection) -> List[int]:
+                    selection = list(selection)
+                    matched = set(left(batch, selection))
+                    # 与逐行执行一样短路：左侧已满足的行不再计算右侧
+                    matched.update(right(batch, [i for i in selection if i not in matched]))
+                    return [i for i in selection if i in matched]
+
+                return select_or
+
+            comparison = self._compile_comparison(condition)
+            if comparison is not None:
+                return comparison
+
+        return self._row_predicate(condition)
+
+    def _compile_comparison(self, condition: Dict) -> Optional[Callable]:
+        """列与字面量、列与列的比较"""
+        operator_name = condition.get('operator', '')
+        left, right = condition.get('left', {}), condition.get('right', {})
+        kernel = COMPARISON_KERNELS.get(operator_name)
+
+        if left.get('type') == 'IdentifierExpr' and right.get('type') == 'LiteralExpr':
+            return self._column_literal_comparison(left, right.get('value'), kernel)
+        if left.get('type') == 'LiteralExpr' and right.get('type') == 'IdentifierExpr':
+            swapped = COMPARISON_KERNELS.get(SWAPPED_OPERATORS.get(operator_name))
+            if kernel is not None and swapped is None:
+                return None
+            return self._column_literal_comparison(right, left.get('value'), swapped)
+        if left.get('type') == 'IdentifierExpr' and right.get('type') == 'IdentifierExpr':
+            return self._column_column_comparison(left, right, kernel)
+        return None
+
+    @staticmethod
+    def _column_literal_comparison(column_expr: Dict, literal: Any, kernel: Optional[Callable]) -> Callable:
+        name, table_name = column_expr.get('name'), column_expr.get('table_name')
+
+        def select(batch: ColumnBatch, selection) -> List[int]:
+            column = batch.resolve(name, table_name)
+            if column is None or literal is None:
+                return []
+            if kernel is None:
+                # 不支持的运算符在两侧都非NULL时视为满足
+                return [i for i in selection if column[i] is not None]
+
+            if NUMPY_AVAILABLE and isinstance(column, np.ndarray) and isinstance(literal, (int, float)) \
+                    and not isinstance(literal, bool):
+                if isinstance(selection, range) and len(selection) == batch.length:
+                    return np.flatnonzero(kernel(column, literal)).tolist()
+                indexes = np.asarray(selection, dtype=np.intp)
+                return indexes[kernel(column[indexes], literal)].tolist()
+
+            if _is_array(column):
+                values = column if len(selection) == batch.length else [column[i] for i in selection]
+                return list(itertools.compress(selection, map(kernel, values, itertools.repeat(literal))))
+
+            return [i for i in selection if column[i] is not None and kernel(column[i], literal)]
+
+        return select
+
+    @staticmethod
+    def _column_column_comparison(left_expr: Dict, right_expr: Dict, kernel: Optional[Callable]) -> Callable:
+        def select(batch: ColumnBatch, selection) -> List[int]:
+            left = batch.resolve(left_expr.get('name'), left_expr.get('table_name'))
+            right = batch.resolve(right_expr.get('name'), right_expr.get('table_name'))
+            if left is None or right is None:
+                return []
+            if kernel is None:
+                return [i for i in selection if left[i] is not None and right[i] is not None]
+            if NUMPY_AVAILABLE and isinstance(left, np.ndarray) and isinstance(right, np.ndarray):
+                indexes = np.asarray(selection, dtype=np.intp)
+                return indexes[kernel(left[indexes], right[indexes])].tolist()
+            return [i for i in selection
+                    if left[i] is not None and right[i] is not None and kernel(left[i], right[i])]
+
+        return select
+
+    def _row_predicate(self, condition: Any) -> Callable:
+        """回退：用逐行编译的条件在选中的行上求值"""
+        predicate = self.engine.compile_condition(condition)
+
+        def select(batch: ColumnBatch, selection) -> List[int]:
+            return [i for i in selection if predicate(batch.row(i))]
+
+        return select
+
+    # ==================== 投影 ====================
+
+    def execute_project_scan(self, table_name: str, selected_columns: List[str],
+                             fetch_columns: Optional[Set[str]] = None) -> Iterator[ColumnBatch]:
+        """投影下推的扫描：只保留存在的列"""
+        for batch in self.scan_table(table_name, None if '*' in selected_columns else selected_columns,
+                                     fetch_columns):
+            if '*' in selected_columns:
+                # 与逐行执行一致：遇到 * 时输出整行
+                yield batch
+            else:
+                yield ColumnBatch({col: batch.columns[col] for col in selected_columns if col in batch.columns},
+                                  batch.length)
+
+    def execute_project(self, columns: List[str], batches: Iterator[ColumnBatch]) -> Iterator[ColumnBatch]:
+        try:
+            for batch in batches:
+                projected = {}
+                for col in columns:
+                    if '(' in col and ')' in col:
+                        # 聚合函数列，已经在分组阶段计算好
+                        if col in batch.columns:
+                            projected[col] = batch.columns[col]
+                        else:
+                            matching_keys = [key for key in batch.columns if key.upper() == col.upper()]
+                            projected[col] = batch.columns[matching_keys[0]] if matching_keys \
+                                else [None] * batch.length
+                    elif col in batch.columns:
+                        projected[col] = batch.columns[col]
+                    elif col == '*':
+                        projected = dict(batch.columns)
+                        break
+                    elif '.' in col:
+                        column_name = col.split('.', 1)[1]
+                        # 完全匹配 table.column 或者按列名后缀匹配
+                        matching_keys = [key for key in batch.columns
+                                         if key == col or key.endswith('.' + column_name)]
+                        projected[col] = batch.columns[matching_keys[0]] if matching_keys \
+                            else [None] * batch.length
+                    else:
+                        projected[col] = [None] * batch.length
+                yield ColumnBatch(projected, batch.length)
+        except Exception as e:
+            raise SemanticError(f"应用投影错误: {str(e)}")
+
+    # ==================== 聚合 ====================
+
+    def execute_group_by(self, group_columns: List[str], having_condition: Optional[Any],
+                         batches: Iterator[ColumnBatch], aggregate_functions: List[tuple]) -> Iterator[ColumnBatch]:
+        try:
+            if not aggregate_functions and group_columns:
+                aggregate_functions = [('COUNT', '*')]
+
+            aggregator = HashAggregator(group_columns, aggregate_functions,
+                                        max_groups=self.engine.aggregate_max_groups,
+                                        temp_dir=self.engine.storage_engine.get_temp_directory())
+
+            for batch in batches:
+                value_columns = [batch.columns.get(col) if col is not None else None
+                                 for col in aggregator.value_columns]
+
+                if not group_columns:
+                    # 无分组时整列累加，没有NULL的数值列走向量内核
+                    if batch.length:
+                        accumulators = aggregator.accumulators_for(())
+                        for accumulator, column in zip(accumulators, value_columns):
+                            if column is None:
+                                accumulator.add_values(itertools.repeat(None, batch.length))
+                            elif _is_array(column):
+                                accumulator.add_numeric(column)
+                            else:
+                                accumulator.add_values(column)
+                    continue
+
+                key_columns = [batch.columns[col] if col in batch.columns else [None] * batch.length
+                               for col in group_columns]
+                value_columns = [_as_list(column) if column is not None else [None] * batch.length
+                                 for column in value_columns]
+                value_rows = zip(*value_columns) if value_columns else itertools.repeat(())
+                for group_key, values in zip(zip(*map(_as_list, key_columns)), value_rows):
+                    aggregator.add(group_key, values)
+
+            having_predicate = self.engine.compile_condition(having_condition) if having_condition else None
+            result_rows = []
+            for result_row in aggregator.results():
+                if having_predicate is not None and not having_predicate(result_row):
+                    continue
+                result_rows.append(result_row)
+
+                if len(result_rows) >= self.batch_size:
+                    yield ColumnBatch.from_rows(result_rows)
+                    result_rows = []
+
+            if result_rows:
+                yield ColumnBatch.from_rows(result_rows)
+
+        except SemanticError:
+            raise
+        except Exception as e:
+            raise SemanticError(f"分组操作错误: {str(e)}")
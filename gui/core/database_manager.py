@@ -372,6 +372,7 @@ class DatabaseManager:
     def shutdown(self):
         """关闭数据库连接"""
         try:
+            self.table_storage.shutdown()
             self.storage_manager.shutdown()
         except:
             pass
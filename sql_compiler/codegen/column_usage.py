@@ -0,0 +1,135 @@
+"""
+列使用分析：上层读取算子输出行中的哪些列时，算子需要从输入（子计划或表）读取哪些列
+
+扫描据此只沿溢出页链读取真正用到的列，其他列的行外存储值保留为 ToastPointer。
+列集合为None表示需要所有列；无法确定时一律返回None。
+执行引擎的逐行执行和批处理执行共用。
+"""
+
+from typing import Any, Iterable, Optional, Set
+
+from sql_compiler.codegen.operators import (Operator, SeqScanOp, OptimizedSeqScanOp, FilteredSeqScanOp, FilterOp,
+                                            ProjectOp, GroupByOp, OrderByOp, TopNOp, LimitOp, JoinOp)
+
+# 条件中出现这些节点时无法确定用到的列（子查询可能引用外层的任意列）
+OPAQUE_EXPRESSION_TYPES = ('SubqueryExpr', 'SelectStmt')
+
+
+def column_key(column: str) -> str:
+    """去掉表名/别名限定：连接输出行的键为 别名.列名，扫描看到的是列名"""
+    return column.rsplit('.', 1)[-1]
+
+
+def aggregate_argument(column: str) -> Optional[str]:
+    """聚合列（如 SUM(amount)、COUNT(DISTINCT name)）的参数列名，COUNT(*) 返回None"""
+    return _argument_column(column[column.find('(') + 1:column.rfind(')')])
+
+
+def _argument_column(argument: str) -> Optional[str]:
+    argument = argument.strip()
+    if argument.upper().startswith('DISTINCT '):
+        argument = argument[len('DISTINCT '):].strip()
+    if not argument or argument == '*':
+        return None
+    return column_key(argument)
+
+
+def expression_columns(expr: Any) -> Optional[Set[str]]:
+    """表达式引用的列名（去掉限定）；含子查询或无法识别的表达式时返回None"""
+    if expr is None:
+        return set()
+    if hasattr(expr, 'to_dict'):
+        expr = expr.to_dict()
+    if not isinstance(expr, (dict, list)):
+        return None
+
+    columns = set()
+    pending = [expr]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        node_type = node.get('type')
+        if node_type in OPAQUE_EXPRESSION_TYPES:
+            return None
+        if node_type == 'IdentifierExpr':
+            columns.add(column_key(node.get('name', '')))
+        elif node_type == 'ColumnRef':
+            columns.add(column_key(node.get('column', '')))
+        else:
+            pending.extend(value for value in node.values() if isinstance(value, (dict, list)))
+    return columns
+
+
+def union_columns(*column_sets: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    """合并列集合，任何一个为None（所有列）时结果为None"""
+    result = set()
+    for columns in column_sets:
+        if columns is None:
+            return None
+        result.update(columns)
+    return result
+
+
+def _project_columns(columns) -> Optional[Set[str]]:
+    result = set()
+    for column in columns:
+        if not isinstance(column, str):
+            referenced = expression_columns(column)
+            if referenced is None:
+                return None
+            result.update(referenced)
+        elif column == '*':
+            return None
+        elif '(' in column and ')' in column:
+            argument = aggregate_argument(column)
+            if argument is not None:
+                result.add(argument)
+        else:
+            result.add(column_key(column))
+    return result
+
+
+def _group_by_columns(plan: GroupByOp) -> Optional[Set[str]]:
+    aggregate_columns = set()
+    for _, column in plan.aggregate_functions:
+        argument = _argument_column(str(column))
+        if argument is not None:
+            aggregate_columns.add(argument)
+    return union_columns({column_key(column) for column in plan.group_columns}, aggregate_columns,
+                  expression_columns(plan.having_condition))
+
+
+def input_columns(plan: Operator, output_columns: Optional[Set[str]]) -> Optional[Set[str]]:
+    """
+    上层读取 output_columns 时，plan 需要从输入读取的列
+
+    Args:
+        plan: 查询算子
+        output_columns: 上层会读取的 plan 输出行中的列，None 表示所有列
+
+    Returns:
+        plan 从子计划（扫描算子则为表）读取的列，None 表示所有列
+    """
+    if isinstance(plan, ProjectOp):
+        # 投影输出的只有这些列，与上层读取哪些列无关
+        return _project_columns(plan.columns)
+    if isinstance(plan, GroupByOp):
+        return _group_by_columns(plan)
+    if isinstance(plan, OptimizedSeqScanOp):
+        selected = _project_columns(plan.selected_columns)
+        return output_columns if selected is None else selected
+    if isinstance(plan, (FilterOp, FilteredSeqScanOp)):
+        return union_columns(output_columns, expression_columns(plan.condition))
+    if isinstance(plan, (OrderByOp, TopNOp)):
+        return union_columns(output_columns, {column_key(column) for column, _ in plan.order_columns})
+    if isinstance(plan, JoinOp):
+        # 两侧都按列名读取，同名列在另一侧多读一次不影响结果
+        return union_columns(output_columns, expression_columns(plan.on_condition))
+    if isinstance(plan, (LimitOp, SeqScanOp)):
+        return output_columns
+    return None
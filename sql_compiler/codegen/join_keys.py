@@ -0,0 +1,144 @@
+"""
+连接键分析：从ON条件中提取等值连接键，并把 表名/别名.列名 解析为子计划输出行中的列名；
+判断子计划的输出是否已经按连接键升序排列（排序合并连接据此跳过排序）
+执行引擎（哈希连接、排序合并连接）和成本模型共用
+"""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from sql_compiler.codegen.operators import (Operator, JoinOp, FilterOp, LimitOp, OrderByOp, TopNOp,
+                                            IndexScanOp, BTreeIndexScanOp)
+from sql_compiler.parser.ast_nodes import BinaryExpr, IdentifierExpr
+
+# 输出行的列名与输入相同的算子：连接列穿过它们解析到下层
+PASS_THROUGH_OPERATORS = (FilterOp, LimitOp, OrderByOp, TopNOp)
+
+
+def join_alias(child: Operator, side: int) -> str:
+    """连接输出行中该侧列名的前缀：子计划的别名，没有别名时为 left_table/right_table"""
+    return getattr(child, 'table_alias', None) or ("left_table" if side == 0 else "right_table")
+
+
+def resolve_join_column(child: Operator, identifier: IdentifierExpr) -> Optional[str]:
+    """
+    把带表名的列引用解析为子计划输出行中的列名
+
+    扫描算子按别名（没有别名时按表名、视图名）匹配；连接子计划在其两侧中查找，
+    结果带上该侧的前缀。
+
+    Returns:
+        子计划输出行中的列名；列不属于该子计划或没有表名限定时返回None
+    """
+    qualifier = identifier.table_name
+    if not qualifier:
+        return None
+
+    if isinstance(child, JoinOp):
+        for side, grandchild in enumerate(child.children[:2]):
+            column = resolve_join_column(grandchild, identifier)
+            if column is not None:
+                return f"{join_alias(grandchild, side)}.{column}"
+        return None
+
+    if isinstance(child, PASS_THROUGH_OPERATORS):
+        return resolve_join_column(child.children[0], identifier) if child.children else None
+
+    name = (getattr(child, 'table_alias', None) or getattr(child, 'table_name', None)
+            or getattr(child, 'view_name', None))
+    return identifier.name if name == qualifier else None
+
+
+def split_conjuncts(condition: Any) -> List[Any]:
+    """把条件按AND拆分为合取项"""
+    conjuncts = []
+    pending = [condition]
+    while pending:
+        expr = pending.pop()
+        if isinstance(expr, BinaryExpr) and str(expr.operator).upper() == 'AND':
+            pending.append(expr.right)
+            pending.append(expr.left)
+        else:
+            conjuncts.append(expr)
+    return conjuncts
+
+
+def extract_equi_join_keys(on_condition: Any, left_child: Operator,
+                           right_child: Operator) -> Optional[Tuple[List[str], List[str], bool]]:
+    """
+    从ON条件中提取等值连接键
+
+    形如 x.col = y.col 且两边分别属于左右子计划的合取项作为连接键，
+    其余合取项作为残余条件在键匹配后再评估。
+
+    Returns:
+        (左侧键列, 右侧键列, 是否存在残余条件)，键列是子计划输出行中的列名；
+        没有可用的等值键时返回None
+    """
+    if on_condition is None:
+        return None
+
+    left_columns, right_columns = [], []
+    has_residual = False
+    for expr in split_conjuncts(on_condition):
+        if (isinstance(expr, BinaryExpr) and expr.operator == '='
+                and isinstance(expr.left, IdentifierExpr) and isinstance(expr.right, IdentifierExpr)):
+            for left_ref, right_ref in ((expr.left, expr.right), (expr.right, expr.left)):
+                left_column = resolve_join_column(left_child, left_ref)
+                right_column = resolve_join_column(right_child, right_ref)
+                if left_column is not None and right_column is not None:
+                    left_columns.append(left_column)
+                    right_columns.append(right_column)
+                    break
+            else:
+                has_residual = True
+            continue
+        has_residual = True
+
+    if not left_columns:
+        return None
+    return left_columns, right_columns, has_residual
+
+
+def order_column_key(sort_op: Operator, column: str) -> Optional[str]:
+    """ORDER BY 列在排序算子输出行中的列名（与 ExecutionEngine._make_sort_key 取值的列一致）"""
+    if '.' not in column:
+        return column
+    qualifier, name = column.split('.', 1)
+    if not sort_op.children:
+        return None
+    return resolve_join_column(sort_op.children[0], IdentifierExpr(name, qualifier))
+
+
+def is_ordered_on(child: Operator, key_columns: List[str],
+                  index_columns: Callable[[str], List[str]]) -> bool:
+    """
+    判断子计划的输出是否已经按连接键升序排列
+
+    ORDER BY/Top-N 的前几个排序列必须依次就是连接键且都是 ASC；索引扫描的索引
+    首列必须是（唯一的）连接键，索引列取自 index_columns（catalog 中的索引元数据）。
+
+    Args:
+        child: 连接的子计划
+        key_columns: 连接键在子计划输出行中的列名
+        index_columns: 索引名 -> 索引列列表，未知索引返回空列表
+    """
+    if not key_columns:
+        return False
+
+    if isinstance(child, (OrderByOp, TopNOp)):
+        order_columns = child.order_columns
+        if len(order_columns) < len(key_columns):
+            return False
+        return all((direction or 'ASC').upper() == 'ASC' and order_column_key(child, column) == key
+                   for (column, direction), key in zip(order_columns, key_columns))
+
+    if isinstance(child, (FilterOp, LimitOp)):
+        # 过滤和截取保持输入顺序
+        return bool(child.children) and is_ordered_on(child.children[0], key_columns, index_columns)
+
+    if isinstance(child, (IndexScanOp, BTreeIndexScanOp)) and len(key_columns) == 1:
+        # 索引扫描按索引键升序返回行
+        columns = index_columns(child.index_name)
+        return bool(columns) and columns[0] == key_columns[0]
+
+    return False
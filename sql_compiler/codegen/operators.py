@@ -399,6 +399,58 @@ class OrderByOp(Operator):
             yield row
 
 
+class LimitOp(Operator):
+    """LIMIT/OFFSET操作符：跳过 offset 行后最多输出 limit 行，够数后不再拉取上游"""
+
+    def __init__(self, limit: Optional[int], offset: int, children: List[Operator]):
+        super().__init__(children)
+        self.limit = limit  # None 表示只有 OFFSET
+        self.offset = offset or 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "LimitOp",
+            "limit": self.limit,
+            "offset": self.offset,
+            "children": [child.to_dict() for child in self.children]
+        }
+
+    def execute(self) -> Iterator[Dict[str, Any]]:
+        import itertools
+
+        stop = None if self.limit is None else self.offset + self.limit
+        yield from itertools.islice(self.children[0].execute(), self.offset, stop)
+
+
+class TopNOp(Operator):
+    """Top-N操作符：ORDER BY + LIMIT 融合，用大小为 offset+limit 的堆代替全排序"""
+
+    def __init__(self, order_columns: List[Tuple[str, str]], limit: int, offset: int, children: List[Operator]):
+        super().__init__(children)
+        self.order_columns = order_columns  # [(column, direction), ...]
+        self.limit = limit
+        self.offset = offset or 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "TopNOp",
+            "order_columns": [
+                {"column": col, "direction": direction}
+                for col, direction in self.order_columns
+            ],
+            "limit": self.limit,
+            "offset": self.offset,
+            "children": [child.to_dict() for child in self.children]
+        }
+
+    def execute(self) -> Iterator[Dict[str, Any]]:
+        import heapq
+
+        # 与 OrderByOp.execute 相同的简化排序键
+        top_rows = heapq.nsmallest(self.offset + self.limit, self.children[0].execute(), key=lambda x: str(x))
+        yield from top_rows[self.offset:]
+
+
 class InOp(Operator):
     """IN操作符"""
 
@@ -824,16 +876,15 @@ class ExternalSortOp(OrderByOp):
         return result
 
     def execute(self) -> Iterator[Dict[str, Any]]:
-        # 外部排序的执行逻辑（分批排序后合并）
-        all_rows = []
-        for child in self.children:
-            all_rows.extend(child.execute())
+        # 外部排序：超过 memory_limit 的输入分段排序写入临时文件，再多路归并
+        from engine.external_sort import ExternalSorter
 
-        # 简化实现：直接内存排序
-        sorted_rows = sorted(all_rows, key=self._sort_key)
+        def child_rows():
+            for child in self.children:
+                yield from child.execute()
 
-        for row in sorted_rows:
-            yield row
+        sorter = ExternalSorter(self._sort_key, work_mem=self.memory_limit)
+        yield from sorter.sort(child_rows())
 
     def _sort_key(self, row: Dict[str, Any]):
         """生成排序键"""
@@ -1278,6 +1329,47 @@ class ShowIndexesOp(Operator):
             }
 
 
+class SetTraceOp(Operator):
+    """设置会话跟踪级别操作符"""
+
+    def __init__(self, settings: List[Tuple[str, str]]):
+        super().__init__([])
+        self.settings = settings
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "SetTraceOp",
+            "settings": self.settings
+        }
+
+    def execute(self) -> Iterator[Dict[str, Any]]:
+        yield {
+            "operation": "set_trace",
+            "settings": self.settings,
+            "status": "success"
+        }
+
+
+class ShowTraceOp(Operator):
+    """显示跟踪缓冲区操作符"""
+
+    def __init__(self, component: Optional[str] = None):
+        super().__init__([])
+        self.component = component
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "ShowTraceOp",
+            "component": self.component
+        }
+
+    def execute(self) -> Iterator[Dict[str, Any]]:
+        yield {
+            "operation": "show_trace",
+            "component": self.component
+        }
+
+
 class SortOp(Operator):
     """排序操作符"""
 
@@ -1541,11 +1633,13 @@ class SeqScanOp(TransactionAwareOp):
 class InsertOp(Operator):
     """INSERT操作符 - 支持事务"""
 
-    def __init__(self, table_name: str, columns: Optional[List[str]], values: List[Expression]):
+    def __init__(self, table_name: str, columns: Optional[List[str]], values: List[Expression],
+                 rows: Optional[List[List[Expression]]] = None):
         super().__init__()
         self.table_name = table_name
         self.columns = columns  # 保持原有的columns属性
-        self.values = values
+        self.values = values  # 第一行的值
+        self.rows = rows or [values]  # 多行 VALUES 的所有行
 
         # 添加事务支持属性
         self.transaction_id: Optional[str] = None
@@ -1566,7 +1660,7 @@ class InsertOp(Operator):
             else:
                 serializable_values.append(str(value))
 
-        return {
+        result = {
             "type": "InsertOp",
             "table_name": self.table_name,
             "columns": self.columns,  # 保持原有结构
@@ -1575,6 +1669,11 @@ class InsertOp(Operator):
             "requires_transaction": self.requires_transaction
         }
 
+        if len(self.rows) > 1:
+            result["row_count"] = len(self.rows)
+
+        return result
+
     def execute(self) -> Iterator[Dict[str, Any]]:
         # 提取实际值用于执行
         actual_values = []
@@ -1591,7 +1690,7 @@ class InsertOp(Operator):
             "values": actual_values,
             "transaction_id": self.transaction_id,
             "requires_transaction": self.requires_transaction,
-            "rows_affected": 1
+            "rows_affected": len(self.rows)
         }
 
 
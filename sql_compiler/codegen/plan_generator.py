@@ -87,6 +87,10 @@ class PlanGenerator:
             return self._generate_show_views_plan(stmt)
         elif isinstance(stmt, DescribeViewStmt):
             return self._generate_describe_view_plan(stmt)
+        elif isinstance(stmt, SetTraceStmt):
+            return SetTraceOp(stmt.settings)
+        elif isinstance(stmt, ShowTraceStmt):
+            return ShowTraceOp(stmt.component)
         else:
             raise SemanticError(f"不支持的语句类型: {type(stmt).__name__}")
 
@@ -123,13 +127,28 @@ class PlanGenerator:
                 # 保存捕获的输出
                 self.optimization_output = output_buffer.getvalue()
 
-                return optimized_plan
+                return self._fuse_top_n(optimized_plan)
 
             except Exception as e:
                 if not self.silent_mode:
                     print(f"⚠️ 查询优化失败: {e}，使用原始计划")
                 self.optimization_output = f"优化失败: {e}\n使用原始执行计划"
 
+        if isinstance(stmt, SelectStmt):
+            return self._fuse_top_n(plan)
+        return plan
+
+    def _fuse_top_n(self, plan: Operator) -> Operator:
+        """把 LIMIT 直接作用在排序上的子树融合为 TopNOp（在优化之后进行，避免优化器改写时丢失LIMIT）"""
+        children = [self._fuse_top_n(child) for child in plan.children]
+        if any(new is not old for new, old in zip(children, plan.children)):
+            plan.children = children
+
+        if (isinstance(plan, LimitOp) and plan.limit is not None and
+                type(plan.children[0]) in (OrderByOp, QuickSortOp, ExternalSortOp)):
+            sort_op = plan.children[0]
+            return TopNOp(sort_op.order_columns, plan.limit, plan.offset, sort_op.children)
+
         return plan
 
     def _generate_begin_transaction_plan(self, stmt: BeginTransactionStmt) -> BeginTransactionOp:
@@ -195,7 +214,7 @@ class PlanGenerator:
             raise ValueError(f"表不存在: {stmt.table_name}")
 
         # 创建插入操作符
-        insert_op = InsertOp(stmt.table_name,stmt.columns, stmt.values)
+        insert_op = InsertOp(stmt.table_name, stmt.columns, stmt.values, stmt.rows)
 
         # 设置事务上下文（如果语句包含事务信息）
         if hasattr(stmt, 'transaction_id'):
@@ -325,6 +344,12 @@ class PlanGenerator:
             if not self.silent_mode:
                 print(f"   ✅ 添加ORDER BY")
 
+        # 添加LIMIT/OFFSET
+        if stmt.limit is not None or stmt.offset:
+            plan = LimitOp(stmt.limit, stmt.offset, [plan])
+            if not self.silent_mode:
+                print(f"   ✅ 添加LIMIT {stmt.limit} OFFSET {stmt.offset or 0}")
+
         if not self.silent_mode:
             print(f"   🎯 最终计划: {type(plan).__name__}")
 
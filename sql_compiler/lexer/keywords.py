@@ -29,6 +29,8 @@ KEYWORDS = {
     'HAVING': TokenType.HAVING,
     'ASC': TokenType.ASC,
     'DESC': TokenType.DESC,
+    'LIMIT': TokenType.LIMIT,
+    'OFFSET': TokenType.OFFSET,
 
     # 聚合函数
     'COUNT': TokenType.COUNT,
@@ -36,6 +38,7 @@ KEYWORDS = {
     'AVG': TokenType.AVG,
     'MAX': TokenType.MAX,
     'MIN': TokenType.MIN,
+    'DISTINCT': TokenType.DISTINCT,
 
     # 数据类型
     'INT': TokenType.INT,
@@ -31,6 +31,8 @@ class TokenType(Enum):
     HAVING = "HAVING"
     ASC = "ASC"
     DESC = "DESC"
+    LIMIT = "LIMIT"
+    OFFSET = "OFFSET"
 
     # 聚合函数
     COUNT = "COUNT"
@@ -38,6 +40,7 @@ class TokenType(Enum):
     AVG = "AVG"
     MAX = "MAX"
     MIN = "MIN"
+    DISTINCT = "DISTINCT"
 
     # 数据类型
     INT = "INT"
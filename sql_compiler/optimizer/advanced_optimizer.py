@@ -16,7 +16,7 @@ class AdvancedQueryOptimizer:
 
         # 成本模型
         self.system_params = SystemParameters()
-        self.cost_model = CostModel(self.stats_manager, self.system_params)
+        self.cost_model = CostModel(self.stats_manager, self.system_params, catalog_manager)
 
         # 计划枚举器
         self.plan_enumerator = AdvancedPlanEnumerator(self.cost_model)
@@ -1267,6 +1267,10 @@ class AdvancedQueryOptimizer:
                 return HashJoinOp(original.join_type, original.on_condition, new_children)
             elif isinstance(original, SortMergeJoinOp):
                 return SortMergeJoinOp(original.join_type, original.on_condition, new_children)
+            elif isinstance(original, LimitOp):
+                return LimitOp(original.limit, original.offset, new_children)
+            elif isinstance(original, TopNOp):
+                return TopNOp(original.order_columns, original.limit, original.offset, new_children)
             elif isinstance(original, OrderByOp):
                 return OrderByOp(original.order_columns, new_children)
             else:
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 import math
 from sql_compiler.codegen.operators import *
 from sql_compiler.optimizer.statistics import StatisticsManager
+from sql_compiler.codegen.join_keys import extract_equi_join_keys, is_ordered_on
 
 
 @dataclass
@@ -29,9 +30,10 @@ class SystemParameters:
 class CostModel:
     """精确的成本计算模型"""
 
-    def __init__(self, stats_manager: StatisticsManager, params: SystemParameters = None):
+    def __init__(self, stats_manager: StatisticsManager, params: SystemParameters = None, catalog_manager=None):
         self.stats_manager = stats_manager
         self.params = params or SystemParameters()
+        self.catalog_manager = catalog_manager  # 索引列等元数据
         self.btree_params = {
             'btree_page_cost': 0.1,      # B+树页访问成本
             'btree_cpu_cost': 0.001,     # B+树CPU处理成本
@@ -122,18 +124,23 @@ class CostModel:
             return self._cost_filter(operator)
         elif isinstance(operator, ProjectOp):
             return self._cost_project(operator)
-        elif isinstance(operator, JoinOp):
-            return self._cost_join(operator)
+        # 具体的连接算法要先于通用 JoinOp 判断，否则子类成本永远不会被使用
         elif isinstance(operator, NestedLoopJoinOp):
             return self._cost_nested_loop_join(operator)
         elif isinstance(operator, HashJoinOp):
             return self._cost_hash_join(operator)
         elif isinstance(operator, SortMergeJoinOp):
             return self._cost_sort_merge_join(operator)
+        elif isinstance(operator, JoinOp):
+            return self._cost_join(operator)
         elif isinstance(operator, GroupByOp):
             return self._cost_group_by(operator)
         elif isinstance(operator, OrderByOp):
             return self._cost_order_by(operator)
+        elif isinstance(operator, TopNOp):
+            return self._cost_top_n(operator)
+        elif isinstance(operator, LimitOp):
+            return self._cost_limit(operator)
         else:
             return self._cost_generic(operator)
 
@@ -308,9 +315,13 @@ class CostModel:
         left_cost = self.calculate_cost(join_op.children[0])
         right_cost = self.calculate_cost(join_op.children[1])
 
-        # 排序成本
-        left_sort_cost = self._cost_sort(left_cost['rows'], left_cost['width'])
-        right_sort_cost = self._cost_sort(right_cost['rows'], right_cost['width'])
+        # 排序成本：已经按连接键升序排列的输入（索引扫描、ORDER BY）不需要再排序
+        join_keys = extract_equi_join_keys(join_op.on_condition, join_op.children[0], join_op.children[1])
+        left_keys, right_keys = (join_keys[0], join_keys[1]) if join_keys else ([], [])
+        left_sort_cost = 0.0 if self._is_presorted(join_op.children[0], left_keys) else \
+            self._cost_sort(left_cost['rows'], left_cost['width'])
+        right_sort_cost = 0.0 if self._is_presorted(join_op.children[1], right_keys) else \
+            self._cost_sort(right_cost['rows'], right_cost['width'])
 
         # 合并成本
         merge_cpu_cost = (left_cost['rows'] + right_cost['rows']) * self.params.cpu_operator_cost
@@ -329,6 +340,22 @@ class CostModel:
             'width': left_cost['width'] + right_cost['width']
         }
 
+    def _is_presorted(self, operator: Operator, key_columns: List[str]) -> bool:
+        """输入是否已经按连接键升序排列，排序合并连接可以跳过对它的排序"""
+        return is_ordered_on(operator, key_columns, self._get_index_columns)
+
+    def _get_index_columns(self, index_name: str) -> List[str]:
+        """获取索引列：优先取catalog中的索引元数据，其次取已分析的索引统计信息"""
+        if self.catalog_manager is not None:
+            index_info = self.catalog_manager.get_index_info(index_name)
+            return list(index_info.get('columns') or []) if index_info else []
+
+        for table_indexes in self.stats_manager.index_stats.values():
+            index_stats = table_indexes.get(index_name)
+            if index_stats is not None:
+                return list(index_stats.columns)
+        return []
+
     def _cost_sort(self, rows: float, width: float) -> float:
         """计算排序成本"""
         if rows <= 1:
@@ -368,6 +395,44 @@ class CostModel:
             'width': child_cost['width']
         }
 
+    def _cost_top_n(self, top_n_op: TopNOp) -> Dict[str, float]:
+        """计算Top-N成本：大小为 k 的堆，O(n log k)"""
+        child_cost = self.calculate_cost(top_n_op.children[0])
+        k = top_n_op.offset + top_n_op.limit
+
+        rows = child_cost['rows']
+        heap_cost = rows * math.log2(max(k, 2)) * self.params.cpu_operator_cost if rows > 0 and k > 0 else 0
+
+        return {
+            'startup_cost': child_cost['total_cost'] + heap_cost,
+            'total_cost': child_cost['total_cost'] + heap_cost,
+            'rows': max(0, min(top_n_op.limit, rows - top_n_op.offset)),
+            'width': child_cost['width']
+        }
+
+    def _cost_limit(self, limit_op: LimitOp) -> Dict[str, float]:
+        """计算LIMIT成本：只需要拉取 offset+limit 行，按比例计入子节点的运行成本"""
+        child_cost = self.calculate_cost(limit_op.children[0])
+        rows = child_cost['rows']
+
+        if limit_op.limit is None:
+            return {
+                'startup_cost': child_cost['startup_cost'],
+                'total_cost': child_cost['total_cost'],
+                'rows': max(0, rows - limit_op.offset),
+                'width': child_cost['width']
+            }
+
+        fraction = min(1.0, (limit_op.offset + limit_op.limit) / rows) if rows > 0 else 1.0
+        run_cost = child_cost['total_cost'] - child_cost['startup_cost']
+
+        return {
+            'startup_cost': child_cost['startup_cost'],
+            'total_cost': child_cost['startup_cost'] + run_cost * fraction,
+            'rows': max(0, min(limit_op.limit, rows - limit_op.offset)),
+            'width': child_cost['width']
+        }
+
     def _cost_order_by(self, order_op: OrderByOp) -> Dict[str, float]:
         """计算排序操作成本"""
         child_cost = self.calculate_cost(order_op.children[0])
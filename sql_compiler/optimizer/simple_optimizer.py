@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Optional
 from sql_compiler.parser.ast_nodes import *
 from sql_compiler.codegen.operators import *
+from sql_compiler.codegen.column_usage import column_key, expression_columns
 
 
 class SimpleQueryOptimizer:
@@ -173,13 +174,14 @@ class SimpleQueryOptimizer:
                     optimizations += 1
                     return optimized_scan, optimizations
 
-                # 情况2: Project -> Filter -> SeqScan
+                # 情况2: Project -> Filter -> SeqScan（过滤条件只用到投影列时才能去掉投影）
                 elif (len(plan.children) == 1 and
                       isinstance(plan.children[0], FilterOp) and
                       len(plan.children[0].children) == 1 and
                       isinstance(plan.children[0].children[0], SeqScanOp) and
                       plan.columns != ["*"] and
-                      len(plan.columns) > 0):
+                      len(plan.columns) > 0 and
+                      self._uses_only_columns(plan.children[0].condition, plan.columns)):
 
                     filter_op = plan.children[0]
                     scan_op = filter_op.children[0]
@@ -220,6 +222,13 @@ class SimpleQueryOptimizer:
         except Exception:
             return plan, 0
 
+    @staticmethod
+    def _uses_only_columns(condition: Expression, columns: List[str]) -> bool:
+        """条件引用的列是否都在投影列中"""
+        referenced = expression_columns(condition)
+        projected = {column_key(column) for column in columns if isinstance(column, str)}
+        return referenced is not None and referenced <= projected
+
     def _apply_predicate_pushdown(self, plan: Operator) -> tuple:
         """应用谓词下推优化"""
         try:
@@ -297,7 +306,7 @@ class SimpleQueryOptimizer:
                     right_cost = self._estimate_table_size(right_child)
 
                     # 如果右边的表更小，交换顺序
-                    if right_cost < left_cost:
+                    if right_cost < left_cost and plan.join_type.upper() == 'INNER':
                         new_children = [right_child, left_child]
                         new_join = JoinOp(
                             plan.join_type,
@@ -475,6 +484,10 @@ class SimpleQueryOptimizer:
                 return JoinOp(original.join_type, original.on_condition, new_children)
             elif isinstance(original, GroupByOp):
                 return GroupByOp(original.group_columns, original.having_condition, new_children)
+            elif isinstance(original, LimitOp):
+                return LimitOp(original.limit, original.offset, new_children)
+            elif isinstance(original, TopNOp):
+                return TopNOp(original.order_columns, original.limit, original.offset, new_children)
             elif isinstance(original, OrderByOp):
                 return OrderByOp(original.order_columns, new_children)
             elif isinstance(original, UpdateOp):
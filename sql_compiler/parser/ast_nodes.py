@@ -47,19 +47,26 @@ class CreateTableStmt(Statement):
 class InsertStmt(TransactionAwareStmt):
     """INSERT语句"""
 
-    def __init__(self, table_name: str, columns: Optional[List[str]], values: List['Expression']):
+    def __init__(self, table_name: str, columns: Optional[List[str]], values: List['Expression'],
+                 rows: Optional[List[List['Expression']]] = None):
         self.table_name = table_name
         self.columns = columns
-        self.values = values
+        self.values = values  # 第一行的值
+        self.rows = rows or [values]  # 所有行的值（多行 VALUES）
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        result = {
             "type": "InsertStmt",
             "table_name": self.table_name,
             "columns": self.columns,
             "values": [v.to_dict() for v in self.values]
         }
 
+        if len(self.rows) > 1:
+            result["rows"] = [[v.to_dict() for v in row] for row in self.rows]
+
+        return result
+
 
 class SelectStmt(TransactionAwareStmt):
     """SELECT语句"""
@@ -68,13 +75,17 @@ class SelectStmt(TransactionAwareStmt):
                  where_clause: Optional['Expression'] = None,
                  group_by: Optional[List[str]] = None,
                  having_clause: Optional['Expression'] = None,
-                 order_by: Optional[List[tuple]] = None):  # [(column, direction), ...]
+                 order_by: Optional[List[tuple]] = None,  # [(column, direction), ...]
+                 limit: Optional[int] = None,
+                 offset: Optional[int] = None):
         self.columns = columns
         self.from_clause = from_clause
         self.where_clause = where_clause
         self.group_by = group_by
         self.having_clause = having_clause
         self.order_by = order_by
+        self.limit = limit
+        self.offset = offset
         self.in_transaction = False
         self.transaction_id = None
 
@@ -98,6 +109,12 @@ class SelectStmt(TransactionAwareStmt):
             result["order_by"] = [{"column": col, "direction": direction}
                                   for col, direction in self.order_by]
 
+        if self.limit is not None:
+            result["limit"] = self.limit
+
+        if self.offset is not None:
+            result["offset"] = self.offset
+
         return result
 
 
@@ -300,15 +317,17 @@ class LiteralExpr(Expression):
 class FunctionExpr(Expression):
     """函数表达式"""
 
-    def __init__(self, function_name: str, arguments: List[Expression]):
+    def __init__(self, function_name: str, arguments: List[Expression], distinct: bool = False):
         self.function_name = function_name
         self.arguments = arguments
+        self.distinct = distinct  # COUNT(DISTINCT column) 等
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "type": "FunctionExpr",
             "function_name": self.function_name,
-            "arguments": [arg.to_dict() for arg in self.arguments]
+            "arguments": [arg.to_dict() for arg in self.arguments],
+            "distinct": self.distinct
         }
 
 
@@ -361,6 +380,32 @@ class ShowIndexesStmt(Statement):
         }
 
 
+class SetTraceStmt(Statement):
+    """SET TRACE语句，例如 SET TRACE executor=debug, sample=10"""
+
+    def __init__(self, settings: List[tuple]):
+        self.settings = settings  # [(key, value)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "SetTraceStmt",
+            "settings": self.settings
+        }
+
+
+class ShowTraceStmt(Statement):
+    """SHOW TRACE语句，查看跟踪缓冲区"""
+
+    def __init__(self, component: Optional[str] = None):
+        self.component = component
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": "ShowTraceStmt",
+            "component": self.component
+        }
+
+
 class ColumnRef(Expression):
     """列引用表达式"""
 
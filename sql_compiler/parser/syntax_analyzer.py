@@ -99,6 +99,8 @@ class SyntaxAnalyzer:
             return self._parse_update()
         elif self._match(TokenType.DELETE):
             return self._parse_delete()
+        elif self._match(TokenType.SET):
+            return self._parse_set_statement()
         else:
             raise SyntaxErr(f"无效的语句开头: '{current_token.lexeme}'",
                             current_token.line, current_token.column,
@@ -276,6 +278,8 @@ class SyntaxAnalyzer:
         elif self._check(TokenType.INDEXES) or self._check(TokenType.INDEX):
             # 支持 SHOW INDEXES 和 SHOW INDEX 两种形式
             return self._parse_show_indexes()
+        elif self._check_trace_keyword():
+            return self._parse_show_trace()
         elif self._match(TokenType.TABLES):
             return self._parse_show_tables()
         else:
@@ -284,6 +288,44 @@ class SyntaxAnalyzer:
             raise SyntaxErr(f"期望 VIEWS, INDEXES/INDEX 或 TABLES，但遇到 '{current.lexeme}'",
                             current.line, current.column, "SHOW对象类型")
 
+    def _check_trace_keyword(self) -> bool:
+        """TRACE 不是保留字，按标识符匹配"""
+        current = self._current_token()
+        return current.type == TokenType.IDENTIFIER and current.lexeme.upper() == 'TRACE'
+
+    def _parse_set_statement(self) -> SetTraceStmt:
+        """解析 SET TRACE key=value [, key=value ...] 语句"""
+        if not self._check_trace_keyword():
+            current = self._current_token()
+            raise SyntaxErr(f"期望 TRACE，但遇到 '{current.lexeme}'",
+                            current.line, current.column, "SET TRACE")
+        self._advance()
+
+        settings = []
+        while True:
+            key_token = self._expect(TokenType.IDENTIFIER)
+            self._expect(TokenType.EQUALS)
+
+            value_token = self._current_token()
+            if value_token.type in (TokenType.SEMICOLON, TokenType.COMMA, TokenType.EOF):
+                raise SyntaxErr(f"期望 {key_token.lexeme} 的取值",
+                                value_token.line, value_token.column, "跟踪设置值")
+            self._advance()
+            settings.append((key_token.lexeme, value_token.lexeme.strip("'\"")))
+
+            if not self._match(TokenType.COMMA):
+                break
+
+        return SetTraceStmt(settings)
+
+    def _parse_show_trace(self) -> ShowTraceStmt:
+        """解析 SHOW TRACE [component] 语句"""
+        self._advance()  # 消费 TRACE
+        component = None
+        if self._check(TokenType.IDENTIFIER):
+            component = self._advance().lexeme
+        return ShowTraceStmt(component)
+
     def _parse_show_views(self) -> ShowViewsStmt:
         """解析 SHOW VIEWS 语句"""
         database = None
@@ -624,6 +666,16 @@ class SyntaxAnalyzer:
             self._expect(TokenType.RIGHT_PAREN)
 
         self._expect(TokenType.VALUES)
+
+        # VALUES (...), (...), ... 多行插入
+        rows = [self._parse_values_tuple()]
+        while self._match(TokenType.COMMA):
+            rows.append(self._parse_values_tuple())
+
+        return InsertStmt(table_name, columns, rows[0], rows)
+
+    def _parse_values_tuple(self) -> List[Expression]:
+        """解析VALUES中的一个括号值列表"""
         self._expect(TokenType.LEFT_PAREN)
 
         if self._check(TokenType.RIGHT_PAREN):
@@ -642,7 +694,7 @@ class SyntaxAnalyzer:
             values.append(self._parse_expression())
 
         self._expect(TokenType.RIGHT_PAREN)
-        return InsertStmt(table_name, columns, values)
+        return values
 
     # ==================== SELECT 解析 ====================
 
@@ -706,8 +758,25 @@ class SyntaxAnalyzer:
                     direction = "DESC"
                 order_by.append((column, direction))
 
+        # 可选的LIMIT/OFFSET子句
+        limit, offset = self._parse_limit_clause()
+
         self._debug_current_state("SELECT语句完全解析完成")
-        return SelectStmt(columns, from_clause, where_clause, group_by, having_clause, order_by)
+        return SelectStmt(columns, from_clause, where_clause, group_by, having_clause, order_by, limit, offset)
+
+    def _parse_limit_clause(self) -> Tuple[Optional[int], Optional[int]]:
+        """解析 LIMIT n [OFFSET m] 或单独的 OFFSET m"""
+        limit = None
+        offset = None
+
+        # 整数字面量不带符号，因此一定是非负数
+        if self._match(TokenType.LIMIT):
+            limit = int(self._expect(TokenType.INTEGER_LITERAL).value)
+
+        if self._match(TokenType.OFFSET):
+            offset = int(self._expect(TokenType.INTEGER_LITERAL).value)
+
+        return limit, offset
 
     def _parse_select_list(self) -> List[str]:
         """解析选择列表"""
@@ -738,10 +807,11 @@ class SyntaxAnalyzer:
                 self._expect(TokenType.RIGHT_PAREN)
                 base_item = f"{func_name}(*)"
             else:
-                # COUNT(column), SUM(column) 等
+                # COUNT(column), SUM(column), COUNT(DISTINCT column) 等
+                distinct = self._match(TokenType.DISTINCT)
                 column = self._parse_column_reference()
                 self._expect(TokenType.RIGHT_PAREN)
-                base_item = f"{func_name}({column})"
+                base_item = f"{func_name}(DISTINCT {column})" if distinct else f"{func_name}({column})"
         else:
             # 普通列引用
             base_item = self._parse_column_reference()
@@ -764,9 +834,10 @@ class SyntaxAnalyzer:
                 self._expect(TokenType.RIGHT_PAREN)
                 return f"{func_name}(*)"
             else:
+                distinct = self._match(TokenType.DISTINCT)
                 column = self._parse_column_reference()
                 self._expect(TokenType.RIGHT_PAREN)
-                return f"{func_name}({column})"
+                return f"{func_name}(DISTINCT {column})" if distinct else f"{func_name}({column})"
 
         # 普通列引用
         return self._parse_column_reference()
@@ -1037,7 +1108,10 @@ class SyntaxAnalyzer:
                     direction = "DESC"
                 order_by.append((column, direction))
 
-        return SelectStmt(columns, from_clause, where_clause, group_by, having_clause, order_by)
+        # 可选的LIMIT/OFFSET子句
+        limit, offset = self._parse_limit_clause()
+
+        return SelectStmt(columns, from_clause, where_clause, group_by, having_clause, order_by, limit, offset)
 
     def _parse_in_expression(self) -> Expression:
         """解析 IN 表达式的右侧部分"""
@@ -1105,16 +1179,18 @@ class SyntaxAnalyzer:
             self._expect(TokenType.LEFT_PAREN)
 
             arguments = []
+            distinct = False
             if self._match(TokenType.ASTERISK):
                 arguments.append(LiteralExpr("*"))
             else:
+                distinct = self._match(TokenType.DISTINCT)
                 if not self._check(TokenType.RIGHT_PAREN):  # 避免空参数列表
                     arguments.append(self._parse_expression())
                     while self._match(TokenType.COMMA):
                         arguments.append(self._parse_expression())
 
             self._expect(TokenType.RIGHT_PAREN)
-            return FunctionExpr(func_name, arguments)
+            return FunctionExpr(func_name, arguments, distinct)
 
         if self._match(TokenType.IDENTIFIER):
             identifier = self._previous().lexeme
@@ -44,6 +44,9 @@ class SemanticAnalyzer:
             self._analyze_drop_index(stmt)
         elif isinstance(stmt, ShowIndexesStmt):
             self._analyze_show_indexes(stmt)
+        elif isinstance(stmt, (SetTraceStmt, ShowTraceStmt)):
+            # 跟踪设置只影响当前会话，不涉及数据库对象
+            pass
         elif isinstance(stmt, CreateTableStmt):
             self._analyze_create_table(stmt)
         elif isinstance(stmt, InsertStmt):
@@ -316,22 +319,25 @@ class SemanticAnalyzer:
         else:
             target_columns = table_columns
 
-        # 检查值的数量
-        if len(stmt.values) != len(target_columns):
-            raise SemanticError(f"值的数量({len(stmt.values)})与列的数量({len(target_columns)})不匹配")
-
-        # 检查类型匹配
-        for i, (column, value_expr) in enumerate(zip(target_columns, stmt.values)):
-            expected_type = column_types.get(column)
-            if expected_type:
-                value_type = self._get_expression_type(value_expr, {stmt.table_name: table_columns})
-                if not self._is_type_compatible(value_type, expected_type):
-                    raise SemanticError(f"列 '{column}' 期望类型 '{expected_type}'，但得到 '{value_type}'")
-
-        # 分析每个值表达式
         available_tables = {stmt.table_name: table_columns}
-        for value in stmt.values:
-            self._analyze_expression(value, available_tables)
+
+        # 多行 VALUES 的每一行都要检查
+        for row_values in stmt.rows:
+            # 检查值的数量
+            if len(row_values) != len(target_columns):
+                raise SemanticError(f"值的数量({len(row_values)})与列的数量({len(target_columns)})不匹配")
+
+            # 检查类型匹配
+            for i, (column, value_expr) in enumerate(zip(target_columns, row_values)):
+                expected_type = column_types.get(column)
+                if expected_type:
+                    value_type = self._get_expression_type(value_expr, available_tables)
+                    if not self._is_type_compatible(value_type, expected_type):
+                        raise SemanticError(f"列 '{column}' 期望类型 '{expected_type}'，但得到 '{value_type}'")
+
+            # 分析每个值表达式
+            for value in row_values:
+                self._analyze_expression(value, available_tables)
 
     def _analyze_select(self, stmt: SelectStmt):
         """分析SELECT语句 - 增强列引用验证"""
@@ -47,8 +47,10 @@ class StorageSystem:
         return self.storage_manager.flush_page(page_id)
     
     def flush_all_pages(self):
-        """刷新所有页到磁盘"""
-        return self.storage_manager.flush_all_pages()
+        """刷新所有页到磁盘（连同页写入带来的空闲空间变化）"""
+        flushed = self.storage_manager.flush_all_pages()
+        self.table_storage.flush_catalog()
+        return flushed
     
     # === 表存储接口（你的职责部分）===
     def create_table_storage(self, table_name: str, estimated_record_size: int) -> bool:
@@ -0,0 +1,197 @@
+"""
+后台写出线程和检查点线程
+
+BackgroundWriter 每隔一小段时间把即将被淘汰的脏页提前写出，脏页过多时再写出最早变脏的页，
+这样淘汰时很少需要同步写盘；Checkpointer 定期把所有脏页分批写出，同步数据文件后写WAL检查点，
+避免一次性刷盘造成的I/O尖峰。两者都通过 StorageManager.flush_page 写页，写页前先刷新WAL（先写日志）。
+"""
+
+import math
+import threading
+import time
+
+from ..utils.constants import (
+    BGWRITER_INTERVAL_SECONDS, BGWRITER_MAX_PAGES, BGWRITER_LRU_MULTIPLIER,
+    BGWRITER_DIRTY_RATIO, FLUSH_INTERVAL_SECONDS
+)
+from ..utils.logger import get_logger
+
+
+class BackgroundWriterConfig:
+    """后台写出配置类，线程每轮读取一次，运行中修改即可生效"""
+
+    def __init__(self):
+        self.interval = BGWRITER_INTERVAL_SECONDS  # 两轮之间的间隔（秒）
+        self.max_pages_per_round = BGWRITER_MAX_PAGES  # 每轮最多写出的页数
+        self.lru_multiplier = BGWRITER_LRU_MULTIPLIER  # 按新放入的页数估计淘汰端要写出的页数
+        self.dirty_ratio_target = BGWRITER_DIRTY_RATIO  # 脏页比例超过此值时写出最早变脏的页
+        self.checkpoint_interval = FLUSH_INTERVAL_SECONDS  # 检查点间隔（秒）
+
+    def to_dict(self) -> dict:
+        return {
+            'interval': self.interval,
+            'max_pages_per_round': self.max_pages_per_round,
+            'lru_multiplier': self.lru_multiplier,
+            'dirty_ratio_target': self.dirty_ratio_target,
+            'checkpoint_interval': self.checkpoint_interval
+        }
+
+
+class BackgroundWriter(threading.Thread):
+    """后台写出线程：提前写出淘汰端的脏页，控制缓存中脏页的比例"""
+
+    def __init__(self, storage_manager, config: BackgroundWriterConfig = None):
+        super().__init__(name="BackgroundWriter", daemon=True)
+        self.storage_manager = storage_manager
+        self.config = config or BackgroundWriterConfig()
+        self.logger = get_logger("buffer")
+        self._stop_event = threading.Event()
+
+        # 上一轮时缓存池累计放入的页数，用于估计页的分配速度
+        self._last_write_count = storage_manager.buffer_pool.write_count
+
+        # 统计信息
+        self.rounds = 0
+        self.pages_written = 0
+        self.lru_pages_written = 0  # 因即将被淘汰而写出的页数
+        self.aged_pages_written = 0  # 因脏页过多而写出的最早变脏的页数
+
+    def run(self):
+        while not self._stop_event.wait(self.config.interval):
+            try:
+                self.run_round()
+            except Exception as e:
+                self.logger.error(f"Background writer round failed: {e}")
+
+    def stop(self, timeout: float = None):
+        """停止线程并等待它退出"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run_round(self) -> int:
+        """
+        执行一轮写出
+
+        淘汰端要查看的页数 = 上一轮以来新放入缓存的页数 × lru_multiplier，
+        即接下来的分配大概会淘汰的页；脏页比例超过 dirty_ratio_target 时再加上最早变脏的页。
+
+        Returns:
+            int: 本轮写出的页数
+        """
+        storage_manager = self.storage_manager
+        pool = storage_manager.buffer_pool
+        config = self.config
+
+        with storage_manager._lock:
+            allocated = pool.write_count - self._last_write_count
+            self._last_write_count = pool.write_count
+            scan_depth = min(pool.capacity, math.ceil(max(allocated, 0) * config.lru_multiplier))
+            dirty_ratio = pool.get_statistics()["dirty_pages"] / pool.capacity
+            aged = dirty_ratio > config.dirty_ratio_target
+            lru_candidates = set(pool.get_flush_candidates(config.max_pages_per_round, scan_depth))
+            page_ids = pool.get_flush_candidates(config.max_pages_per_round, scan_depth, oldest=aged)
+
+        written = 0
+        for page_id in page_ids:
+            if self._stop_event.is_set():
+                break
+            if storage_manager.flush_page(page_id):
+                written += 1
+                if page_id in lru_candidates:
+                    self.lru_pages_written += 1
+                else:
+                    self.aged_pages_written += 1
+
+        self.rounds += 1
+        self.pages_written += written
+        if written:
+            self.logger.debug(f"Background writer wrote {written} pages",
+                              scan_depth=scan_depth, dirty_ratio=round(dirty_ratio, 3))
+        return written
+
+    def get_statistics(self) -> dict:
+        return {
+            'running': self.is_alive(),
+            'rounds': self.rounds,
+            'pages_written': self.pages_written,
+            'lru_pages_written': self.lru_pages_written,
+            'aged_pages_written': self.aged_pages_written,
+            'config': self.config.to_dict()
+        }
+
+
+class Checkpointer(threading.Thread):
+    """检查点线程：定期分批写出所有脏页，然后同步数据文件并写WAL检查点"""
+
+    def __init__(self, storage_manager, config: BackgroundWriterConfig = None):
+        super().__init__(name="Checkpointer", daemon=True)
+        self.storage_manager = storage_manager
+        self.config = config or BackgroundWriterConfig()
+        self.logger = get_logger("storage")
+        self._stop_event = threading.Event()
+
+        # 统计信息
+        self.checkpoints = 0
+        self.pages_written = 0
+        self.last_checkpoint_time = None
+
+    def run(self):
+        while not self._stop_event.wait(self.config.checkpoint_interval):
+            try:
+                self.checkpoint()
+            except Exception as e:
+                self.logger.error(f"Checkpoint failed: {e}")
+
+    def stop(self, timeout: float = None):
+        """停止线程并等待它退出"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def checkpoint(self) -> int:
+        """
+        执行一次检查点：按变脏的先后分批写出当前所有脏页，每批之间等待一个后台写出间隔，
+        然后同步数据文件并写WAL检查点（没有WAL时只同步数据文件）
+
+        Returns:
+            int: 写出的页数
+        """
+        storage_manager = self.storage_manager
+        pool = storage_manager.buffer_pool
+        start_time = time.time()
+
+        with storage_manager._lock:
+            page_ids = pool.get_flush_candidates(len(pool.cache), oldest=True)
+
+        batch_size = max(1, self.config.max_pages_per_round)
+        written = 0
+        for i, page_id in enumerate(page_ids, 1):
+            if storage_manager.flush_page(page_id):
+                written += 1
+            if i % batch_size == 0 and i < len(page_ids) and self._stop_event.wait(self.config.interval):
+                break
+
+        if storage_manager.wal_enabled and storage_manager.wal_manager:
+            storage_manager.wal_manager.create_checkpoint(force=True)
+        else:
+            storage_manager.sync_data_files()
+
+        storage_manager.flush_count += 1
+        storage_manager.last_flush_time = time.time()
+        self.checkpoints += 1
+        self.pages_written += written
+        self.last_checkpoint_time = storage_manager.last_flush_time
+
+        self.logger.info(f"Checkpoint completed",
+                         pages_written=written,
+                         elapsed_ms=int((time.time() - start_time) * 1000))
+        return written
+
+    def get_statistics(self) -> dict:
+        return {
+            'running': self.is_alive(),
+            'checkpoints': self.checkpoints,
+            'pages_written': self.pages_written,
+            'last_checkpoint_time': self.last_checkpoint_time
+        }
@@ -12,10 +12,10 @@ from ...utils.exceptions import StorageException
 class BPlusTree:
     """
     B+树实现
-    用于数据库索引，每个节点对应一个4KB的页
+    用于数据库索引，每个节点对应索引所在表空间的一个页
     """
 
-    def __init__(self, storage_manager, index_name: str, order: int = None):
+    def __init__(self, storage_manager, index_name: str, order: int = None, tablespace_name: str = "default"):
         """
         初始化B+树
 
@@ -23,17 +23,18 @@ class BPlusTree:
             storage_manager: 存储管理器实例
             index_name: 索引名称
             order: B+树的阶数（每个节点最大键数）
+            tablespace_name: 索引节点所在的表空间
         """
         self.storage = storage_manager
         self.index_name = index_name
+        self.tablespace_name = tablespace_name
+        self.page_size = self.storage.get_tablespace_page_size(tablespace_name)
         self.logger = get_logger(f"btree_{index_name}")
 
         # 计算合适的阶数
         if order is None:
-            # 根据页大小计算
-            # 头部16字节，每个键4字节，每个值6字节（页号4+槽位2）
-            # 预留一些空间防止溢出
-            self.order = 300
+            # 根据页大小计算，页越大扇出越高
+            self.order = BTreeNode.order_for_page_size(self.page_size)
         else:
             self.order = order
 
@@ -46,7 +47,7 @@ class BPlusTree:
     def _initialize_tree(self):
         """初始化树，创建根节点"""
         # 为根节点分配页
-        self.root_page_id = self.storage.allocate_page()
+        self.root_page_id = self.storage.allocate_page(self.tablespace_name)
 
         # 创建空的叶子节点作为根
         root = BTreeNode(self.root_page_id, is_leaf=True, order=self.order)
@@ -78,7 +79,7 @@ class BPlusTree:
         Args:
             node: 节点对象
         """
-        page_data = node.serialize()
+        page_data = node.serialize(self.page_size)
         self.storage.write_page(node.page_id, page_data)
 
     def search(self, key: int) -> Optional[Tuple[int, int]]:
@@ -207,7 +208,7 @@ class BPlusTree:
             leaf: 需要分裂的叶子节点
         """
         # 创建新节点
-        new_page_id = self.storage.allocate_page()
+        new_page_id = self.storage.allocate_page(self.tablespace_name)
         new_leaf = BTreeNode(new_page_id, is_leaf=True, order=self.order)
 
         # 计算分裂点
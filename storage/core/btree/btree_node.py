@@ -10,7 +10,7 @@ from ...utils.constants import PAGE_SIZE
 class BTreeNode:
     """
     B+树节点类
-    每个节点对应一个4KB的页
+    每个节点对应一个页，页大小由索引所在的表空间决定
     """
 
     # 节点头部格式（16字节）
@@ -22,6 +22,9 @@ class BTreeNode:
     HEADER_FORMAT = 'B H I I 5x'
     HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
 
+    # 4KB页的默认阶数：头部16字节，每个键4字节，每个值6字节（页号4+槽位2），预留一些空间防止溢出
+    DEFAULT_ORDER = 300
+
     def __init__(self, page_id: int, is_leaf: bool = True, order: int = 300):
         """
         初始化B+树节点
@@ -54,15 +57,22 @@ class BTreeNode:
         """检查节点是否为空"""
         return len(self.keys) == 0
 
-    def serialize(self) -> bytes:
+    @staticmethod
+    def order_for_page_size(page_size: int = PAGE_SIZE) -> int:
+        """按页大小计算节点最大键数（与4KB页的默认阶数等比例，页越大扇出越高）"""
+        return BTreeNode.DEFAULT_ORDER * page_size // PAGE_SIZE
+
+    def serialize(self, page_size: int = PAGE_SIZE) -> bytes:
         """
-        将节点序列化为字节数据（4KB页）
+        将节点序列化为字节数据
+
+        Args:
+            page_size: 节点所在表空间的页大小
 
         Returns:
-            bytes: 长度为PAGE_SIZE的字节数据
+            bytes: 长度为page_size的字节数据
         """
-        # 创建4KB的字节数组
-        page_data = bytearray(PAGE_SIZE)
+        page_data = bytearray(page_size)
 
         # 1. 写入头部信息
         node_type = 0 if self.is_leaf else 1
@@ -1,84 +1,270 @@
 """
 缓存池：实现LRU缓存机制（重构版）
 增加了异常处理、日志记录和性能监控
+
+缓存池的大小按帧计算，可以直接按字节指定（如 pool_size="2GB"），没有页数上限。
+页数据存放在预先分配的匿名mmap帧区中，不再为每页保留一个bytes对象；
+帧大小为最小的页大小，较大表空间的页占用多个（不必连续的）帧。
+匿名mmap的物理内存在首次写入时才分配，预留大的帧区不会立即占用内存。
+
+缓存池只有一个页表（页号 -> 首帧号），页的长度、脏标记等按帧号存放在数组中；
+替换策略只维护帧号的淘汰顺序。命中时只有一次字典查找加上策略的记账，
+统计信息在需要时由计数器和页表计算。
+
+正在被使用的页可以用 fetch 固定、用 unpin 释放，淘汰时跳过被固定的帧；
+设置了 write_back 回调时，被淘汰的脏页先经回调写回再释放帧。
+大表的顺序扫描通过 BufferRing 读入页，只重用环中的少量帧，不会挤出缓存池中的热页。
 """
 
-from typing import Optional, Dict, Tuple, List
-from collections import OrderedDict
+from typing import Optional, Dict, Tuple, List, Union, Iterator, Callable
+from collections import deque
+from collections.abc import Mapping
+from itertools import islice
+import heapq
+import mmap
 import time
 
-from ..utils.constants import BUFFER_SIZE, MAX_CACHE_SIZE, MIN_CACHE_SIZE
-from ..utils.exceptions import (
-    BufferPoolException, BufferFullException,
-    handle_storage_exceptions, StorageException
-)
-from ..utils.logger import get_logger, PerformanceTimer, performance_monitor
-
-from .cache_strategies import LRUStrategy, FIFOStrategy, AdaptiveStrategy
 from ..utils.constants import (
-    CACHE_STRATEGY_LRU, CACHE_STRATEGY_FIFO, CACHE_STRATEGY_ADAPTIVE,
-    DEFAULT_CACHE_STRATEGY
+    BUFFER_SIZE, MIN_CACHE_SIZE, BUFFER_FRAME_SIZE, DEFAULT_CACHE_STRATEGY, parse_size,
+    SCAN_RING_SIZE, SCAN_RING_POOL_RATIO
 )
+from ..utils.exceptions import BufferPoolException, BufferFullException
+from ..utils.logger import get_logger
+
+from .cache_strategies import create_replacement_policy
+
+
+class _CacheView(Mapping):
+    """缓存内容的只读视图：{page_id: (data_size, is_dirty, load_time)}"""
+
+    def __init__(self, pool: 'BufferPool'):
+        self._pool = pool
+
+    def __getitem__(self, page_id: int) -> Tuple[int, bool, float]:
+        pool = self._pool
+        frame = pool._page_table[page_id]
+        return pool._frame_length[frame], bool(pool._frame_dirty[frame]), pool._frame_loaded[frame]
+
+    def __contains__(self, page_id) -> bool:
+        return page_id in self._pool._page_table
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._pool._page_table))
+
+    def __len__(self) -> int:
+        return len(self._pool._page_table)
+
+
+class BufferRing:
+    """
+    顺序扫描的环形缓冲区：扫描读入的页最多占用缓存池中 size 页，
+    环满后读入新页时重用环中最早读入的页的帧；已被修改或固定的页留在缓存池中，只从环里移出
+    """
+
+    def __init__(self, size: int = SCAN_RING_SIZE):
+        if size < 1:
+            raise BufferPoolException(f"Invalid ring size: {size}")
+        self.size = size
+        self.pages: deque = deque()  # 经环读入、仍可能在缓存中的页号，最早的在前
+        self.reuse_count = 0  # 重用环中帧的次数
+
+    def __len__(self) -> int:
+        return len(self.pages)
 
 
 class BufferPool:
     """缓存池类，实现LRU缓存算法（增强版）"""
 
-    def __init__(self, capacity: int = BUFFER_SIZE):
+    def __init__(self, capacity: int = BUFFER_SIZE, pool_size: Union[int, str, None] = None,
+                 policy: str = DEFAULT_CACHE_STRATEGY,
+                 write_back: Optional[Callable[[int, bytes], None]] = None):
         """
         初始化缓存池
 
         Args:
-            capacity: 缓存池容量（最多缓存的页数）
+            capacity: 缓存池容量（帧数，默认页大小下即最多缓存的页数）
+            pool_size: 缓存池字节数，可以是整数或 "512MB"、"2GB" 这样的字符串；指定时忽略 capacity
+            policy: 替换策略（LRU、FIFO、ADAPTIVE）
+            write_back: 淘汰脏页时调用的写回函数 write_back(page_id, data)；
+                为None时脏页由淘汰的调用方处理
 
         Raises:
-            BufferPoolException: 容量设置无效
+            BufferPoolException: 容量或替换策略设置无效
         """
-        if not MIN_CACHE_SIZE <= capacity <= MAX_CACHE_SIZE:
-            raise BufferPoolException(
-                f"Invalid buffer capacity: {capacity}. Must be between {MIN_CACHE_SIZE} and {MAX_CACHE_SIZE}",
-                capacity=capacity
-            )
+        capacity = self._capacity_from_size(capacity, pool_size)
 
         self.capacity = capacity
-        self.cache = OrderedDict()  # {page_id: (data, is_dirty, access_time)}
+        self.frame_size = BUFFER_FRAME_SIZE
+
+        # 帧区：所有页数据都存放在这里
+        self._arena = mmap.mmap(-1, capacity * self.frame_size)
+        self._free_frames: List[int] = []  # 释放后可重用的帧号
+        self._next_frame = 0  # 从未使用过的最小帧号
+        self._used_frames = 0
+
+        # 页表和按首帧号存放的页信息
+        self._page_table: Dict[int, int] = {}  # {page_id: 首帧号}
+        self._frame_page: List[Optional[int]] = [None] * capacity
+        self._frame_length: List[int] = [0] * capacity
+        self._frame_extra: List[Optional[Tuple[int, ...]]] = [None] * capacity  # 多帧页除首帧外的帧
+        self._frame_loaded: List[float] = [0.0] * capacity  # 页放入或写入缓存的时间
+        self._frame_dirty = bytearray(capacity)
+        self._frame_pins: List[int] = [0] * capacity  # 固定计数，大于0的帧不会被淘汰
+        self._frame_dirtied: List[int] = [0] * capacity  # 页从干净变脏时的序号，按它排序即按WAL顺序
+        self._dirty_seq = 0
+        self._pinned_copies: Dict[int, bytearray] = {}  # 多帧页固定期间交给调用方的连续副本
+
+        self.write_back = write_back
+
+        # 替换策略（只管理帧号）
+        try:
+            self._strategy = create_replacement_policy(policy, capacity)
+        except ValueError as e:
+            raise BufferPoolException(str(e))
 
         # 统计信息
         self.hit_count = 0  # 缓存命中次数
         self.total_requests = 0  # 总请求次数
         self.eviction_count = 0  # 淘汰次数
         self.write_count = 0  # 写入次数
-
-        # 性能统计
-        self.access_times = []  # 访问时间记录
+        self.writeback_count = 0  # 淘汰时写回的脏页数
+        self.ring_reuse_count = 0  # 顺序扫描重用环形缓冲区帧的次数
         self.creation_time = time.time()
 
         # 日志器
         self.logger = get_logger("buffer")
+        self.logger.info(f"BufferPool initialized",
+                         capacity=capacity,
+                         pool_size_bytes=self.pool_size,
+                         policy=type(self._strategy).__name__,
+                         min_size=MIN_CACHE_SIZE)
 
-        # 策略模式支持（内部使用，不影响外部接口）
-        self.enable_adaptive = True  # 可以后续通过参数控制
-        self._use_strategy_mode = True  # 开关，出问题时可以fallback
+    @staticmethod
+    def _capacity_from_size(capacity: Optional[int], pool_size: Union[int, str, None]) -> int:
+        """由帧数或字节数得到缓存池的帧数"""
+        if pool_size is not None:
+            try:
+                capacity = parse_size(pool_size) // BUFFER_FRAME_SIZE
+            except ValueError as e:
+                raise BufferPoolException(str(e))
 
-        if self._use_strategy_mode:
-            if self.enable_adaptive:
-                self._strategy = AdaptiveStrategy(capacity)
-            else:
-                self._strategy = LRUStrategy(capacity)
+        if capacity is None or capacity < MIN_CACHE_SIZE:
+            raise BufferPoolException(
+                f"Invalid buffer capacity: {capacity}. Must be at least {MIN_CACHE_SIZE} frames "
+                f"({MIN_CACHE_SIZE * BUFFER_FRAME_SIZE} bytes)",
+                capacity=capacity
+            )
+        return capacity
 
-            self.logger.info("BufferPool initialized with strategy mode",
-                             strategy_type=type(self._strategy).__name__)
-        else:
-            self._strategy = None
-            self.logger.info("BufferPool initialized with legacy OrderedDict mode")
+    @property
+    def pool_size(self) -> int:
+        """缓存池字节数"""
+        return self.capacity * self.frame_size
 
-        self.logger.info(f"BufferPool initialized",
-                         capacity=capacity,
-                         max_size=MAX_CACHE_SIZE,
-                         min_size=MIN_CACHE_SIZE)
+    @property
+    def cache(self) -> _CacheView:
+        """缓存内容的只读视图 {page_id: (data_size, is_dirty, load_time)}"""
+        return _CacheView(self)
+
+    # ==================== 帧区管理 ====================
+
+    def _frame_count(self, length: int) -> int:
+        return max(1, -(-length // self.frame_size))
+
+    def _allocate_frames(self, count: int) -> List[int]:
+        """分配指定数量的帧，空闲帧不够时按替换策略淘汰页"""
+        if count > self.capacity:
+            raise BufferPoolException(
+                f"Page needs {count} frames but buffer pool has only {self.capacity}",
+                capacity=self.capacity
+            )
+
+        while self.capacity - self._used_frames < count:
+            if self._evict_lru() is None:
+                raise BufferFullException(f"No evictable page for {count} frames, "
+                                          f"{self.pinned_page_count()} pages are pinned")
+
+        frames = []
+        for _ in range(count):
+            if self._free_frames:
+                frames.append(self._free_frames.pop())
+            else:
+                frames.append(self._next_frame)
+                self._next_frame += 1
+        self._used_frames += count
+        return frames
+
+    def _page_frames(self, frame: int) -> Tuple[int, ...]:
+        extra = self._frame_extra[frame]
+        return (frame,) + extra if extra else (frame,)
+
+    def _write_frames(self, frames, data: bytes):
+        """把页数据按帧大小切分写入各帧"""
+        size = self.frame_size
+        arena = self._arena
+        if len(frames) == 1:
+            start = frames[0] * size
+            arena[start:start + len(data)] = data
+            return
+
+        view = memoryview(data)
+        for i, frame in enumerate(frames):
+            chunk = view[i * size:(i + 1) * size]
+            start = frame * size
+            arena[start:start + len(chunk)] = chunk
+
+    def _read_page(self, frame: int) -> bytes:
+        """从帧区读出首帧为 frame 的页数据"""
+        size = self.frame_size
+        length = self._frame_length[frame]
+        extra = self._frame_extra[frame]
+        if not extra:
+            start = frame * size
+            return self._arena[start:start + length]
+
+        parts = []
+        remaining = length
+        for part in (frame,) + extra:
+            start = part * size
+            parts.append(self._arena[start:start + min(size, remaining)])
+            remaining -= size
+        return b''.join(parts)
+
+    def _store(self, page_id: int, data: bytes, is_dirty: bool) -> int:
+        """为页分配帧、写入数据并登记到页表，返回首帧号"""
+        frames = self._allocate_frames(self._frame_count(len(data)))
+        self._write_frames(frames, data)
+
+        frame = frames[0]
+        self._page_table[page_id] = frame
+        self._frame_page[frame] = page_id
+        self._frame_length[frame] = len(data)
+        self._frame_extra[frame] = tuple(frames[1:]) if len(frames) > 1 else None
+        self._frame_dirty[frame] = 0
+        if is_dirty:
+            self._set_dirty(frame)
+        self._frame_loaded[frame] = time.time()
+        return frame
+
+    def _set_dirty(self, frame: int):
+        """标记帧上的页为脏页，页从干净变脏时记下顺序号"""
+        if not self._frame_dirty[frame]:
+            self._dirty_seq += 1
+            self._frame_dirtied[frame] = self._dirty_seq
+            self._frame_dirty[frame] = 1
+
+    def _unmap(self, page_id: int, frame: int):
+        """把页移出页表并释放它的帧（替换策略由调用方处理）"""
+        del self._page_table[page_id]
+        frames = self._page_frames(frame)
+        self._frame_page[frame] = None
+        self._frame_extra[frame] = None
+        self._frame_dirty[frame] = 0
+        self._free_frames.extend(frames)
+        self._used_frames -= len(frames)
+
+    # ==================== 页访问 ====================
 
-    @handle_storage_exceptions
-    @performance_monitor("buffer_get")
     def get(self, page_id: int) -> Optional[bytes]:
         """
         从缓存中获取页数据
@@ -92,52 +278,29 @@ class BufferPool:
         Raises:
             BufferPoolException: 页号无效
         """
-        if page_id < 0:
-            raise BufferPoolException(f"Invalid page_id: {page_id}", page_id=page_id)
-
         self.total_requests += 1
-        current_time = time.time()
-
-        if self._use_strategy_mode and self._strategy is not None:
-            # 使用策略模式
-            result = self._strategy.get(page_id)
-            if result is not None:
-                data, is_dirty, access_time = result
-                self.hit_count += 1
-
-                # 同步到原有cache以保持统计一致性
-                self.cache[page_id] = (data, is_dirty, current_time)
-
-                self.logger.debug(f"Strategy cache hit for page {page_id}",
-                                  page_id=page_id,
-                                  strategy=type(self._strategy).__name__,
-                                  hit_rate=self.get_hit_rate())
-                return data
-            else:
-                self.logger.debug(f"Strategy cache miss for page {page_id}",
-                                  page_id=page_id,
-                                  strategy=type(self._strategy).__name__)
-                return None
-        else:
-            # 原有的OrderedDict实现（fallback）
-            if page_id in self.cache:
-                # 缓存命中，移到最后（最近使用）
-                data, is_dirty, _ = self.cache.pop(page_id)
-                self.cache[page_id] = (data, is_dirty, current_time)
-                self.hit_count += 1
-
-                self.logger.debug(f"Legacy cache hit for page {page_id}",
-                                  page_id=page_id,
-                                  hit_rate=self.get_hit_rate())
-                return data
-            else:
-                self.logger.debug(f"Legacy cache miss for page {page_id}",
-                                  page_id=page_id,
-                                  cache_size=len(self.cache))
-                return None
+        frame = self._page_table.get(page_id)
+        if frame is None:
+            if page_id < 0:
+                raise BufferPoolException(f"Invalid page_id: {page_id}", page_id=page_id)
+            return None
+
+        self.hit_count += 1
+        self._strategy.access(frame, page_id)
+        return self._read_page(frame)
+
+    def peek(self, page_id: int) -> Optional[Tuple[bytes, bool]]:
+        """
+        读取缓存中的页，不计入命中统计，也不改变淘汰顺序
+
+        Returns:
+            (data, is_dirty)，页不在缓存中时返回None
+        """
+        frame = self._page_table.get(page_id)
+        if frame is None:
+            return None
+        return self._read_page(frame), bool(self._frame_dirty[frame])
 
-    @handle_storage_exceptions
-    @performance_monitor("buffer_put")
     def put(self, page_id: int, data: bytes, is_dirty: bool = False):
         """
         将页数据放入缓存
@@ -150,107 +313,185 @@ class BufferPool:
         Raises:
             BufferPoolException: 参数无效
         """
-        if page_id < 0:
-            raise BufferPoolException(f"Invalid page_id: {page_id}", page_id=page_id)
-
         if not isinstance(data, bytes):
             raise BufferPoolException(f"Data must be bytes, got {type(data)}",
                                       page_id=page_id)
 
-        current_time = time.time()
+        frame = self._page_table.get(page_id)
+        if frame is not None:
+            # 更新已存在的页
+            frames = self._page_frames(frame)
+            if self._frame_count(len(data)) == len(frames):
+                # 帧数不变，原地覆盖
+                self._write_frames(frames, data)
+                self._frame_length[frame] = len(data)
+                copy = self._pinned_copies.get(page_id)
+                if copy is not None:
+                    copy[:] = data
+                if is_dirty:
+                    self._set_dirty(frame)
+                self._frame_loaded[frame] = time.time()
+                self._strategy.access(frame, page_id)
+                return
+
+            # 帧数变化：先移出旧页，再作为新页放入
+            if self._frame_pins[frame]:
+                raise BufferPoolException(f"Cannot change size of pinned page {page_id}",
+                                          page_id=page_id)
+            is_dirty = is_dirty or bool(self._frame_dirty[frame])
+            self._strategy.remove(frame)
+            self._unmap(page_id, frame)
+        elif page_id < 0:
+            raise BufferPoolException(f"Invalid page_id: {page_id}", page_id=page_id)
 
-        if self._use_strategy_mode and self._strategy is not None:
-            # 使用策略模式
-            if page_id in self._strategy:
-                # 更新已存在的页
-                old_data, old_dirty, _ = self._strategy.get(page_id)
-                final_dirty = is_dirty or old_dirty
-                self._strategy.put(page_id, (data, final_dirty, current_time))
+        # 添加新页（空闲帧不够时按替换策略淘汰）
+        frame = self._store(page_id, data, is_dirty)
+        self._strategy.insert(frame, page_id)
+        self.write_count += 1
 
-                # 同步到原有cache
-                self.cache[page_id] = (data, final_dirty, current_time)
+    def create_ring(self) -> BufferRing:
+        """创建顺序扫描用的环形缓冲区，大小不超过缓存池的1/8"""
+        return BufferRing(max(1, min(SCAN_RING_SIZE, self.capacity // SCAN_RING_POOL_RATIO)))
 
-                self.logger.debug(f"Strategy updated cache entry for page {page_id}",
-                                  page_id=page_id,
-                                  is_dirty=final_dirty,
-                                  strategy=type(self._strategy).__name__)
-            else:
-                # 添加新页
-                if len(self._strategy) >= self.capacity:
-                    # 缓存已满，执行策略淘汰
-                    evicted = self._strategy.evict()
-                    if evicted:
-                        evicted_id, evicted_data, evicted_dirty = evicted
-                        # 从原有cache中也移除
-                        if evicted_id in self.cache:
-                            self.cache.pop(evicted_id)
-                        self.eviction_count += 1
-                        self.logger.debug(f"Strategy evicted page {evicted_id}",
-                                          evicted_page=evicted_id,
-                                          was_dirty=evicted_dirty,
-                                          strategy=type(self._strategy).__name__)
-
-                self._strategy.put(page_id, (data, is_dirty, current_time))
-                self.cache[page_id] = (data, is_dirty, current_time)
-                self.write_count += 1
-
-                self.logger.debug(f"Strategy added new cache entry for page {page_id}",
-                                  page_id=page_id,
-                                  is_dirty=is_dirty,
-                                  cache_size=len(self._strategy),
-                                  strategy=type(self._strategy).__name__)
+    def put_ring(self, page_id: int, data: bytes, ring: BufferRing):
+        """
+        通过环形缓冲区放入顺序扫描读入的页
+
+        环满时先移出环中最早读入的页：页仍在缓存中且未被修改、未被固定时释放它的帧，
+        新页随后放进这些帧，因此扫描不会淘汰缓存池中的其他页。
+
+        Args:
+            page_id: 页号
+            data: 页数据
+            ring: 扫描使用的环形缓冲区
+        """
+        if page_id in self._page_table:
+            self.put(page_id, data)
+            return
+
+        if len(ring.pages) >= ring.size:
+            old_page = ring.pages.popleft()
+            frame = self._page_table.get(old_page)
+            if frame is not None and not self._frame_pins[frame] and not self._frame_dirty[frame]:
+                self._strategy.remove(frame)
+                self._unmap(old_page, frame)
+                ring.reuse_count += 1
+                self.ring_reuse_count += 1
+
+        self.put(page_id, data)
+        ring.pages.append(page_id)
+
+    def fetch(self, page_id: int,
+              loader: Optional[Callable[[int], bytes]] = None) -> Optional[memoryview]:
+        """
+        获取并固定页，固定期间页不会被淘汰或移出，用完后必须调用 unpin
+
+        单帧页返回帧区上的可写视图，对它的修改直接作用于缓存中的页；
+        多帧页返回连续副本的视图，修改在 unpin(dirty=True) 时写回各帧。
+        调用 unpin 之后不应再使用返回的视图。
+
+        Args:
+            page_id: 页号
+            loader: 页不在缓存中时读取页数据的函数 loader(page_id)，读出的页放入缓存后固定
+
+        Returns:
+            memoryview: 页数据的视图；页不在缓存中且没有 loader 时返回None
+
+        Raises:
+            BufferPoolException: 页号无效
+            BufferFullException: 所有帧都被固定，无法放入读出的页
+        """
+        self.total_requests += 1
+        frame = self._page_table.get(page_id)
+        if frame is None:
+            if page_id < 0:
+                raise BufferPoolException(f"Invalid page_id: {page_id}", page_id=page_id)
+            if loader is None:
+                return None
+            frame = self._store(page_id, loader(page_id), False)
+            self._strategy.insert(frame, page_id)
+            self.write_count += 1
         else:
-            # 原有的OrderedDict实现（fallback）
-            if page_id in self.cache:
-                # 更新已存在的页
-                old_data, old_dirty, _ = self.cache.pop(page_id)
-                final_dirty = is_dirty or old_dirty
-                self.cache[page_id] = (data, final_dirty, current_time)
-
-                self.logger.debug(f"Legacy updated cache entry for page {page_id}",
-                                  page_id=page_id,
-                                  is_dirty=final_dirty)
-            else:
-                # 添加新页
-                if len(self.cache) >= self.capacity:
-                    # 缓存已满，执行LRU淘汰
-                    evicted_page = self._evict_lru()
-                    if evicted_page:
-                        evicted_id, evicted_data, evicted_dirty = evicted_page
-                        self.logger.debug(f"Legacy LRU evicted page {evicted_id}",
-                                          evicted_page=evicted_id,
-                                          was_dirty=evicted_dirty)
-
-                self.cache[page_id] = (data, is_dirty, current_time)
-                self.write_count += 1
-
-                self.logger.debug(f"Legacy added new cache entry for page {page_id}",
-                                  page_id=page_id,
-                                  is_dirty=is_dirty,
-                                  cache_size=len(self.cache))
+            self.hit_count += 1
+            self._strategy.access(frame, page_id)
+
+        self._frame_pins[frame] += 1
+        if not self._frame_extra[frame]:
+            start = frame * self.frame_size
+            return memoryview(self._arena)[start:start + self._frame_length[frame]]
+
+        copy = self._pinned_copies.get(page_id)
+        if copy is None:
+            copy = self._pinned_copies[page_id] = bytearray(self._read_page(frame))
+        return memoryview(copy)
+
+    def unpin(self, page_id: int, dirty: bool = False):
+        """
+        释放 fetch 固定的页
+
+        Args:
+            page_id: 页号
+            dirty: 固定期间是否修改了页
+
+        Raises:
+            BufferPoolException: 页不在缓存中或没有被固定
+        """
+        frame = self._page_table.get(page_id)
+        if frame is None or not self._frame_pins[frame]:
+            raise BufferPoolException(f"Page {page_id} is not pinned", page_id=page_id)
+
+        self._frame_pins[frame] -= 1
+        copy = self._pinned_copies.get(page_id)
+        if copy is not None:
+            if dirty:
+                self._write_frames(self._page_frames(frame), copy)
+            if not self._frame_pins[frame]:
+                del self._pinned_copies[page_id]
+        if dirty:
+            self._set_dirty(frame)
+            self._frame_loaded[frame] = time.time()
+
+    def is_pinned(self, page_id: int) -> bool:
+        """页是否被固定"""
+        frame = self._page_table.get(page_id)
+        return frame is not None and self._frame_pins[frame] > 0
+
+    def pinned_page_count(self) -> int:
+        """被固定的页数"""
+        pins = self._frame_pins
+        return sum(1 for frame in self._page_table.values() if pins[frame])
 
     def _evict_lru(self) -> Optional[Tuple[int, bytes, bool]]:
         """
-        执行LRU淘汰算法
+        按替换策略淘汰一个未被固定的页并释放其帧
+
+        设置了 write_back 时，脏页先写回再释放帧；写回失败时页留在缓存中，异常向上传递。
 
         Returns:
-            被淘汰页的信息 (page_id, data, is_dirty) 或 None
+            被淘汰页的信息 (page_id, data, is_dirty) 或 None；
+            is_dirty 为True表示页没有写回，需要调用方处理
         """
-        if not self.cache:
+        frame = self._strategy.victim(self._frame_pins)
+        if frame is None:
             return None
 
-        # OrderedDict的第一个元素是最久未使用的
-        page_id, (data, is_dirty, access_time) = self.cache.popitem(last=False)
+        page_id = self._frame_page[frame]
+        data = self._read_page(frame)
+        is_dirty = bool(self._frame_dirty[frame])
+        if is_dirty and self.write_back is not None:
+            try:
+                self.write_back(page_id, data)
+            except Exception:
+                self._strategy.insert(frame, page_id)
+                raise
+            self.writeback_count += 1
+            is_dirty = False
+        elif is_dirty:
+            self.logger.warning(f"Evicted dirty page {page_id} without write-back", page_id=page_id)
+        self._unmap(page_id, frame)
         self.eviction_count += 1
-
-        self.logger.debug(f"Evicted page {page_id} from cache",
-                          page_id=page_id,
-                          was_dirty=is_dirty,
-                          eviction_count=self.eviction_count)
-
         return page_id, data, is_dirty
 
-    @handle_storage_exceptions
     def mark_dirty(self, page_id: int):
         """
         标记页为脏页
@@ -261,26 +502,11 @@ class BufferPool:
         Raises:
             BufferPoolException: 页不在缓存中
         """
-        if self._use_strategy_mode and self._strategy is not None:
-            # 策略模式
-            if page_id in self._strategy:
-                data, _, access_time = self._strategy.get(page_id)
-                self._strategy.put(page_id, (data, True, access_time))
-                # 同步到原有cache
-                self.cache[page_id] = (data, True, access_time)
-                self.logger.debug(f"Strategy marked page {page_id} as dirty", page_id=page_id)
-            else:
-                raise BufferPoolException(f"Page {page_id} not in cache, cannot mark dirty",
-                                          page_id=page_id)
-        else:
-            # 原有实现
-            if page_id in self.cache:
-                data, _, access_time = self.cache[page_id]
-                self.cache[page_id] = (data, True, access_time)
-                self.logger.debug(f"Legacy marked page {page_id} as dirty", page_id=page_id)
-            else:
-                raise BufferPoolException(f"Page {page_id} not in cache, cannot mark dirty",
-                                          page_id=page_id)
+        frame = self._page_table.get(page_id)
+        if frame is None:
+            raise BufferPoolException(f"Page {page_id} not in cache, cannot mark dirty",
+                                      page_id=page_id)
+        self._set_dirty(frame)
 
     def get_dirty_pages(self) -> Dict[int, bytes]:
         """
@@ -289,27 +515,39 @@ class BufferPool:
         Returns:
             Dict[int, bytes]: {page_id: data} 脏页字典
         """
-        dirty_pages = {}
-
-        if self._use_strategy_mode and self._strategy is not None:
-            # 策略模式：需要遍历策略中的所有页
-            # 由于策略对象可能没有直接遍历接口，我们通过原有cache来获取
-            for page_id, (data, is_dirty, _) in self.cache.items():
-                if is_dirty:
-                    dirty_pages[page_id] = data
+        dirty = self._frame_dirty
+        return {page_id: self._read_page(frame)
+                for page_id, frame in self._page_table.items() if dirty[frame]}
 
-            self.logger.debug(f"Strategy retrieved {len(dirty_pages)} dirty pages")
-        else:
-            # 原有实现
-            for page_id, (data, is_dirty, _) in self.cache.items():
-                if is_dirty:
-                    dirty_pages[page_id] = data
+    def get_flush_candidates(self, max_pages: int, scan_depth: int = 0,
+                             oldest: bool = False) -> List[int]:
+        """
+        选出提前写出的脏页（供后台写出和检查点使用）
 
-            self.logger.debug(f"Legacy retrieved {len(dirty_pages)} dirty pages")
+        Args:
+            max_pages: 最多返回的页数
+            scan_depth: 查看淘汰顺序最前的多少个页，其中的脏页即将被淘汰
+            oldest: 是否再加上最早变脏的页
 
-        return dirty_pages
+        Returns:
+            List[int]: 未被固定的脏页页号，按变脏的先后排序
+        """
+        dirty = self._frame_dirty
+        pins = self._frame_pins
+        dirtied = self._frame_dirtied
+
+        frames = set()
+        if scan_depth > 0:
+            frames.update(frame for frame in islice(self._strategy.frames(), scan_depth)
+                          if dirty[frame] and not pins[frame])
+        if oldest:
+            frames.update(heapq.nsmallest(
+                max_pages,
+                (frame for frame in self._page_table.values() if dirty[frame] and not pins[frame]),
+                key=dirtied.__getitem__))
+
+        return [self._frame_page[frame] for frame in sorted(frames, key=dirtied.__getitem__)[:max_pages]]
 
-    @handle_storage_exceptions
     def clear_dirty_flag(self, page_id: int):
         """
         清除页的脏标记
@@ -320,28 +558,12 @@ class BufferPool:
         Raises:
             BufferPoolException: 页不在缓存中
         """
-        if self._use_strategy_mode and self._strategy is not None:
-            # 策略模式
-            if page_id in self._strategy:
-                data, _, access_time = self._strategy.get(page_id)
-                self._strategy.put(page_id, (data, False, access_time))
-                # 同步到原有cache
-                self.cache[page_id] = (data, False, access_time)
-                self.logger.debug(f"Strategy cleared dirty flag for page {page_id}", page_id=page_id)
-            else:
-                raise BufferPoolException(f"Page {page_id} not in cache, cannot clear dirty flag",
-                                          page_id=page_id)
-        else:
-            # 原有实现
-            if page_id in self.cache:
-                data, _, access_time = self.cache[page_id]
-                self.cache[page_id] = (data, False, access_time)
-                self.logger.debug(f"Legacy cleared dirty flag for page {page_id}", page_id=page_id)
-            else:
-                raise BufferPoolException(f"Page {page_id} not in cache, cannot clear dirty flag",
-                                          page_id=page_id)
+        frame = self._page_table.get(page_id)
+        if frame is None:
+            raise BufferPoolException(f"Page {page_id} not in cache, cannot clear dirty flag",
+                                      page_id=page_id)
+        self._frame_dirty[frame] = 0
 
-    @handle_storage_exceptions
     def remove(self, page_id: int) -> Optional[Tuple[bytes, bool]]:
         """
         从缓存中移除页
@@ -351,33 +573,23 @@ class BufferPool:
 
         Returns:
             被移除页的数据和脏标记 (data, is_dirty) 或 None
+
+        Raises:
+            BufferPoolException: 页被固定
         """
-        if self._use_strategy_mode and self._strategy is not None:
-            # 策略模式
-            result = self._strategy.remove(page_id)
-            if result is not None:
-                data, is_dirty = result
-                # 从原有cache中也移除
-                if page_id in self.cache:
-                    self.cache.pop(page_id)
-                self.logger.debug(f"Strategy removed page {page_id} from cache",
-                                  page_id=page_id,
-                                  was_dirty=is_dirty)
-                return data, is_dirty
-            else:
-                self.logger.debug(f"Strategy page {page_id} not in cache", page_id=page_id)
-                return None
-        else:
-            # 原有实现
-            if page_id in self.cache:
-                data, is_dirty, _ = self.cache.pop(page_id)
-                self.logger.debug(f"Legacy removed page {page_id} from cache",
-                                  page_id=page_id,
-                                  was_dirty=is_dirty)
-                return data, is_dirty
-            else:
-                self.logger.debug(f"Legacy page {page_id} not in cache", page_id=page_id)
-                return None
+        frame = self._page_table.get(page_id)
+        if frame is None:
+            return None
+        if self._frame_pins[frame]:
+            raise BufferPoolException(f"Cannot remove pinned page {page_id}", page_id=page_id)
+
+        data = self._read_page(frame)
+        is_dirty = bool(self._frame_dirty[frame])
+        self._strategy.remove(frame)
+        self._unmap(page_id, frame)
+        return data, is_dirty
+
+    # ==================== 统计和管理 ====================
 
     def get_statistics(self) -> dict:
         """
@@ -387,7 +599,8 @@ class BufferPool:
             dict: 统计信息字典
         """
         hit_rate = self.get_hit_rate()
-        dirty_count = sum(1 for _, (_, is_dirty, _) in self.cache.items() if is_dirty)
+        dirty = self._frame_dirty
+        dirty_count = sum(1 for frame in self._page_table.values() if dirty[frame])
         uptime = time.time() - self.creation_time
 
         stats = {
@@ -395,12 +608,19 @@ class BufferPool:
             "hit_count": self.hit_count,
             "miss_count": self.total_requests - self.hit_count,
             "hit_rate": hit_rate,
-            "cache_size": len(self.cache),
+            "cache_size": len(self._page_table),
             "cache_capacity": self.capacity,
+            "frame_size": self.frame_size,
+            "pool_size_bytes": self.pool_size,
+            "used_bytes": self._used_frames * self.frame_size,
             "dirty_pages": dirty_count,
-            "cache_usage": round(len(self.cache) / self.capacity * 100, 2),
+            "cache_usage": round(self._used_frames / self.capacity * 100, 2),
             "eviction_count": self.eviction_count,
+            "writeback_count": self.writeback_count,
+            "ring_reuse_count": self.ring_reuse_count,
+            "pinned_pages": self.pinned_page_count(),
             "write_count": self.write_count,
+            "replacement_policy": type(self._strategy).__name__,
             "uptime_seconds": round(uptime, 2)
         }
 
@@ -419,27 +639,34 @@ class BufferPool:
         Returns:
             Dict[int, bytes]: 所有脏页的数据
         """
-        dirty_pages = {}
-        current_time = time.time()
-
-        for page_id, (data, is_dirty, access_time) in self.cache.items():
-            if is_dirty:
-                dirty_pages[page_id] = data
-                # 清除脏标记
-                self.cache[page_id] = (data, False, current_time)
+        dirty_pages = self.get_dirty_pages()
+        for page_id in dirty_pages:
+            self._frame_dirty[self._page_table[page_id]] = 0
 
         self.logger.info(f"Flushed {len(dirty_pages)} dirty pages")
         return dirty_pages
 
     def clear(self):
         """清空缓存池"""
-        cache_size = len(self.cache)
-        self.cache.clear()
+        cache_size = len(self._page_table)
+        if self.pinned_page_count():
+            raise BufferPoolException(f"Cannot clear cache with {self.pinned_page_count()} pinned pages")
+        for frame in self._page_table.values():
+            self._frame_page[frame] = None
+            self._frame_extra[frame] = None
+        self._page_table.clear()
+        self._frame_dirty = bytearray(self.capacity)
+        self._strategy.clear()
+        self._free_frames = []
+        self._next_frame = 0
+        self._used_frames = 0
+
         self.hit_count = 0
         self.total_requests = 0
         self.eviction_count = 0
+        self.writeback_count = 0
+        self.ring_reuse_count = 0
         self.write_count = 0
-        self.access_times.clear()
 
         self.logger.info(f"Cache cleared, removed {cache_size} pages")
 
@@ -450,50 +677,157 @@ class BufferPool:
         Returns:
             dict: 缓存详细信息
         """
+        now = time.time()
         cache_details = {}
-        for page_id, (data, is_dirty, access_time) in self.cache.items():
+        for page_id, frame in self._page_table.items():
+            loaded = self._frame_loaded[frame]
             cache_details[page_id] = {
-                "data_size": len(data),
-                "is_dirty": is_dirty,
-                "access_time": access_time,
-                "age_seconds": round(time.time() - access_time, 2)
+                "data_size": self._frame_length[frame],
+                "frames": len(self._page_frames(frame)),
+                "is_dirty": bool(self._frame_dirty[frame]),
+                "pin_count": self._frame_pins[frame],
+                "access_time": loaded,
+                "age_seconds": round(now - loaded, 2)
             }
 
         return {
             "cache_details": cache_details,
-            "lru_order": list(self.cache.keys()),  # LRU顺序
+            "lru_order": [self._frame_page[frame] for frame in self._strategy.frames()],  # 淘汰顺序
             "capacity_info": {
-                "current": len(self.cache),
+                "current": len(self._page_table),
                 "capacity": self.capacity,
-                "usage_percent": round(len(self.cache) / self.capacity * 100, 2)
+                "used_frames": self._used_frames,
+                "usage_percent": round(self._used_frames / self.capacity * 100, 2)
             }
         }
 
-    def resize(self, new_capacity: int):
+    def resize(self, new_capacity: Optional[int] = None,
+               pool_size: Union[int, str, None] = None) -> Dict[int, bytes]:
         """
-        调整缓存容量
+        在线调整缓存容量
+
+        缩小时先按替换策略淘汰页，再把剩余的页搬到新帧区的前部；
+        扩大时把已用的帧复制到更大的新帧区。
 
         Args:
-            new_capacity: 新的容量大小
+            new_capacity: 新的帧数
+            pool_size: 新的字节数，可以是整数或 "4GB" 这样的字符串；指定时忽略 new_capacity
+
+        Returns:
+            Dict[int, bytes]: 因缩小被淘汰、没有经 write_back 写回的脏页 {page_id: data}，由调用方写回磁盘
 
         Raises:
-            BufferPoolException: 新容量无效
+            BufferPoolException: 新容量无效，或有页被固定（调整时页会搬到新帧区）
         """
-        if not MIN_CACHE_SIZE <= new_capacity <= MAX_CACHE_SIZE:
-            raise BufferPoolException(
-                f"Invalid new capacity: {new_capacity}. Must be between {MIN_CACHE_SIZE} and {MAX_CACHE_SIZE}"
-            )
-
-        old_capacity = self.capacity
-        self.capacity = new_capacity
-
-        # 如果新容量小于当前缓存大小，需要淘汰一些页
-        while len(self.cache) > new_capacity:
+        new_capacity = self._capacity_from_size(new_capacity, pool_size)
+        pinned = self.pinned_page_count()
+        if pinned:
+            raise BufferPoolException(f"Cannot resize buffer pool with {pinned} pinned pages")
+
+        # 如果新容量小于已用帧数，需要淘汰一些页
+        evicted_dirty = {}
+        while self._used_frames > new_capacity:
             evicted = self._evict_lru()
             if not evicted:
                 break
+            page_id, data, is_dirty = evicted
+            if is_dirty:
+                evicted_dirty[page_id] = data
+
+        if new_capacity >= self._next_frame:
+            self._resize_arena(new_capacity)
+        else:
+            self._compact_arena(new_capacity)
 
-        self.logger.info(f"Buffer capacity changed from {old_capacity} to {new_capacity}")
+        old_capacity = self.capacity
+        self.capacity = new_capacity
+        self._strategy.capacity = new_capacity
+
+        self.logger.info(f"Buffer capacity changed from {old_capacity} to {new_capacity} frames",
+                         pool_size_bytes=self.pool_size,
+                         evicted_dirty=len(evicted_dirty))
+        return evicted_dirty
+
+    def _resize_arrays(self, frames: int):
+        """把按帧号存放的数组截断或扩展到 frames 个元素"""
+        extra = frames - len(self._frame_page)
+        if extra > 0:
+            self._frame_page.extend([None] * extra)
+            self._frame_length.extend([0] * extra)
+            self._frame_extra.extend([None] * extra)
+            self._frame_loaded.extend([0.0] * extra)
+            self._frame_dirty.extend(bytes(extra))
+            self._frame_pins.extend([0] * extra)
+            self._frame_dirtied.extend([0] * extra)
+        else:
+            del self._frame_page[frames:]
+            del self._frame_length[frames:]
+            del self._frame_extra[frames:]
+            del self._frame_loaded[frames:]
+            del self._frame_dirty[frames:]
+            del self._frame_pins[frames:]
+            del self._frame_dirtied[frames:]
+
+    def _resize_arena(self, frames: int):
+        """
+        换成指定帧数的新帧区并复制已用的帧（所有已用帧的帧号都小于 frames）
+
+        不用 mmap.resize：共享匿名映射扩大后，超出原大小的部分在访问时会触发SIGBUS。
+        """
+        arena = mmap.mmap(-1, frames * self.frame_size)
+        copy_bytes = min(self._next_frame, frames) * self.frame_size
+        arena[:copy_bytes] = self._arena[:copy_bytes]
+        self._replace_arena(arena)
+        self._resize_arrays(frames)
+
+    def _compact_arena(self, frames: int):
+        """把缓存中的页依次搬到新帧区的前部，并按新帧号更新页表、数组和替换策略"""
+        size = self.frame_size
+        arena = mmap.mmap(-1, frames * size)
+        pages = [(page_id, frame, self._page_frames(frame), self._frame_length[frame],
+                  self._frame_dirty[frame], self._frame_loaded[frame], self._frame_dirtied[frame])
+                 for page_id, frame in self._page_table.items()]
+
+        self._frame_page = [None] * frames
+        self._frame_length = [0] * frames
+        self._frame_extra = [None] * frames
+        self._frame_loaded = [0.0] * frames
+        self._frame_dirty = bytearray(frames)
+        self._frame_pins = [0] * frames
+        self._frame_dirtied = [0] * frames
+
+        mapping = {}
+        next_frame = 0
+        for page_id, old_frame, old_frames, length, dirty, loaded, dirtied in pages:
+            new_frames = []
+            for part in old_frames:
+                arena[next_frame * size:(next_frame + 1) * size] = self._arena[part * size:(part + 1) * size]
+                new_frames.append(next_frame)
+                next_frame += 1
+
+            frame = new_frames[0]
+            mapping[old_frame] = frame
+            self._page_table[page_id] = frame
+            self._frame_page[frame] = page_id
+            self._frame_length[frame] = length
+            self._frame_extra[frame] = tuple(new_frames[1:]) if len(new_frames) > 1 else None
+            self._frame_dirty[frame] = dirty
+            self._frame_loaded[frame] = loaded
+            self._frame_dirtied[frame] = dirtied
+
+        self._strategy.relabel(mapping)
+        self._replace_arena(arena)
+        self._free_frames = []
+        self._next_frame = next_frame
+
+    def _replace_arena(self, arena: mmap.mmap):
+        """换用新帧区并关闭旧帧区"""
+        try:
+            self._arena.close()
+        except BufferError:
+            # 调用方还持有 fetch 返回的视图，旧帧区在视图释放后回收
+            pass
+        self._arena = arena
 
     def get_performance_metrics(self) -> dict:
         """
@@ -521,4 +855,4 @@ class BufferPool:
 
     def __repr__(self) -> str:
         """详细字符串表示"""
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
@@ -1,16 +1,22 @@
 """
-缓存策略实现 - 支持LRU、FIFO和自适应策略
+缓存策略实现 - 支持LRU、FIFO和自适应策略，缓存池另有抗扫描的2Q、LRU-K和CLOCK
+
+CacheStrategy 系列自己保存缓存项 (data, is_dirty, access_time)；
+缓存池使用 ReplacementPolicy 系列，只维护帧号的淘汰顺序，页表和页数据由缓存池管理。
 """
 
 from abc import ABC, abstractmethod
 from collections import OrderedDict, deque
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, List, Sequence
+import heapq
 import time
 
 from ..utils.constants import (
     ADAPTIVE_ANALYSIS_INTERVAL, ADAPTIVE_MIN_SWITCH_INTERVAL,
     ADAPTIVE_DECISION_THRESHOLD, REPEAT_ACCESS_THRESHOLD,
-    SEQUENTIAL_ACCESS_THRESHOLD, CACHE_STRATEGY_LRU, CACHE_STRATEGY_FIFO
+    SEQUENTIAL_ACCESS_THRESHOLD, CACHE_STRATEGY_LRU, CACHE_STRATEGY_FIFO, CACHE_STRATEGY_ADAPTIVE,
+    CACHE_STRATEGY_2Q, CACHE_STRATEGY_LRU_K, CACHE_STRATEGY_CLOCK,
+    TWO_Q_IN_RATIO, TWO_Q_OUT_RATIO, LRU_K, CLOCK_MAX_USAGE
 )
 from ..utils.logger import get_logger
 
@@ -151,6 +157,7 @@ class AccessPatternAnalyzer:
 
     def __init__(self):
         self.access_history = deque(maxlen=ADAPTIVE_ANALYSIS_INTERVAL)
+        self._history_counts: Dict[int, int] = {}  # 历史窗口中各页出现的次数，重复检测不必扫描窗口
         self.last_page_id = None
         self.repeat_count = 0
         self.sequential_count = 0
@@ -161,14 +168,23 @@ class AccessPatternAnalyzer:
         self.total_accesses += 1
 
         # 检查是否重复访问
-        if page_id in self.access_history:
+        counts = self._history_counts
+        if page_id in counts:
             self.repeat_count += 1
 
         # 检查是否顺序访问
         if self.last_page_id is not None and page_id == self.last_page_id + 1:
             self.sequential_count += 1
 
-        self.access_history.append(page_id)
+        history = self.access_history
+        if len(history) == history.maxlen:
+            oldest = history[0]
+            if counts[oldest] == 1:
+                del counts[oldest]
+            else:
+                counts[oldest] -= 1
+        history.append(page_id)
+        counts[page_id] = counts.get(page_id, 0) + 1
         self.last_page_id = page_id
 
     def get_pattern_stats(self) -> Dict[str, float]:
@@ -196,18 +212,10 @@ class AccessPatternAnalyzer:
         self.total_accesses = 0
 
 
-class AdaptiveStrategy(CacheStrategy):
-    """自适应缓存策略"""
-
-    def __init__(self, capacity: int):
-        super().__init__(capacity)
-        self.lru_strategy = LRUStrategy(capacity)
-        self.fifo_strategy = FIFOStrategy(capacity)
-
-        # 当前使用的策略
-        self.current_strategy = self.lru_strategy
-        self.current_strategy_name = CACHE_STRATEGY_LRU
+class AdaptiveSwitchMixin:
+    """自适应切换的决策逻辑：按访问模式在LRU和FIFO之间切换（由子类实现 _switch_strategy）"""
 
+    def _init_adaptive(self):
         # 访问模式分析
         self.analyzer = AccessPatternAnalyzer()
 
@@ -216,8 +224,6 @@ class AdaptiveStrategy(CacheStrategy):
         self.decision_counter = 0
         self.consecutive_decisions = []
 
-        self.logger.info(f"AdaptiveStrategy initialized with LRU as default")
-
     def _should_analyze(self) -> bool:
         """是否应该进行模式分析"""
         return self.analyzer.total_accesses > 0 and self.analyzer.total_accesses % ADAPTIVE_ANALYSIS_INTERVAL == 0
@@ -276,6 +282,37 @@ class AdaptiveStrategy(CacheStrategy):
 
         return False
 
+    def get_current_strategy(self) -> str:
+        """获取当前使用的策略名称"""
+        return self.current_strategy_name
+
+    def get_strategy_stats(self) -> Dict[str, Any]:
+        """获取策略统计信息"""
+        pattern_stats = self.analyzer.get_pattern_stats()
+        return {
+            'current_strategy': self.current_strategy_name,
+            'pattern_stats': pattern_stats,
+            'consecutive_decisions': self.consecutive_decisions.copy(),
+            'last_switch_time': self.last_switch_time
+        }
+
+
+class AdaptiveStrategy(AdaptiveSwitchMixin, CacheStrategy):
+    """自适应缓存策略"""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.lru_strategy = LRUStrategy(capacity)
+        self.fifo_strategy = FIFOStrategy(capacity)
+
+        # 当前使用的策略
+        self.current_strategy = self.lru_strategy
+        self.current_strategy_name = CACHE_STRATEGY_LRU
+
+        self._init_adaptive()
+
+        self.logger.info(f"AdaptiveStrategy initialized with LRU as default")
+
     def _switch_strategy(self, new_strategy_name: str):
         """切换策略"""
         old_strategy_name = self.current_strategy_name
@@ -336,16 +373,469 @@ class AdaptiveStrategy(CacheStrategy):
     def __contains__(self, key):
         return key in self.current_strategy
 
-    def get_current_strategy(self) -> str:
-        """获取当前使用的策略名称"""
-        return self.current_strategy_name
 
-    def get_strategy_stats(self) -> Dict[str, Any]:
-        """获取策略统计信息"""
-        pattern_stats = self.analyzer.get_pattern_stats()
-        return {
-            'current_strategy': self.current_strategy_name,
-            'pattern_stats': pattern_stats,
-            'consecutive_decisions': self.consecutive_decisions.copy(),
-            'last_switch_time': self.last_switch_time
-        }
\ No newline at end of file
+# ==================== 缓存池的帧替换策略 ====================
+
+class ReplacementPolicy(ABC):
+    """
+    缓存池的替换策略：只维护帧号（页的首帧）的淘汰顺序，不保存页数据和脏标记
+
+    access/insert 同时传入页号，供按页号分析访问模式的策略使用。
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+
+    @abstractmethod
+    def insert(self, frame: int, page_id: int):
+        """页放入缓存"""
+        pass
+
+    @abstractmethod
+    def access(self, frame: int, page_id: int):
+        """缓存命中"""
+        pass
+
+    @abstractmethod
+    def remove(self, frame: int):
+        """页移出缓存（不是由 victim 选出的）"""
+        pass
+
+    @abstractmethod
+    def victim(self, pins: Optional[Sequence[int]] = None) -> Optional[int]:
+        """
+        选出并移除下一个被淘汰的帧，没有可淘汰的帧时返回None
+
+        Args:
+            pins: 按帧号的固定计数，计数大于0的帧被跳过
+        """
+        pass
+
+    @abstractmethod
+    def frames(self) -> List[int]:
+        """按淘汰顺序（最先淘汰的在前）列出帧号"""
+        pass
+
+    @abstractmethod
+    def relabel(self, mapping: Dict[int, int]):
+        """缓存池整理帧区后按 {旧帧号: 新帧号} 更新帧号，顺序不变"""
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    def __contains__(self, frame):
+        return frame in self.frames()
+
+
+def _pop_unpinned(order: Dict[int, None], pins: Optional[Sequence[int]]) -> Optional[int]:
+    """从淘汰顺序中取出第一个未被固定的帧"""
+    for frame in order:
+        if not pins or not pins[frame]:
+            del order[frame]
+            return frame
+    return None
+
+
+class LRUPolicy(ReplacementPolicy):
+    """LRU：淘汰最久未访问的帧"""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self._order: OrderedDict = OrderedDict()
+
+    def insert(self, frame: int, page_id: int = None):
+        self._order[frame] = None
+        self._order.move_to_end(frame)
+
+    def access(self, frame: int, page_id: int = None):
+        self._order.move_to_end(frame)
+
+    def remove(self, frame: int):
+        self._order.pop(frame, None)
+
+    def victim(self, pins: Optional[Sequence[int]] = None) -> Optional[int]:
+        return _pop_unpinned(self._order, pins)
+
+    def frames(self) -> List[int]:
+        return list(self._order)
+
+    def relabel(self, mapping: Dict[int, int]):
+        self._order = OrderedDict((mapping[frame], None) for frame in self._order)
+
+    def clear(self):
+        self._order.clear()
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, frame):
+        return frame in self._order
+
+
+class FIFOPolicy(ReplacementPolicy):
+    """FIFO：淘汰最早放入的帧，命中不改变顺序"""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self._order: Dict[int, None] = {}  # dict保持插入顺序
+
+    def insert(self, frame: int, page_id: int = None):
+        self._order[frame] = None
+
+    def access(self, frame: int, page_id: int = None):
+        pass
+
+    def remove(self, frame: int):
+        self._order.pop(frame, None)
+
+    def victim(self, pins: Optional[Sequence[int]] = None) -> Optional[int]:
+        return _pop_unpinned(self._order, pins)
+
+    def frames(self) -> List[int]:
+        return list(self._order)
+
+    def relabel(self, mapping: Dict[int, int]):
+        self._order = {mapping[frame]: None for frame in self._order}
+
+    def clear(self):
+        self._order.clear()
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, frame):
+        return frame in self._order
+
+
+class AdaptivePolicy(AdaptiveSwitchMixin, ReplacementPolicy):
+    """自适应：按页的访问模式在LRU和FIFO之间切换，切换时保留当前的淘汰顺序"""
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.logger = get_logger("cache_strategy")
+        self.current_strategy: ReplacementPolicy = LRUPolicy(capacity)
+        self.current_strategy_name = CACHE_STRATEGY_LRU
+        self._init_adaptive()
+
+    def _switch_strategy(self, new_strategy_name: str):
+        """切换策略"""
+        old_strategy_name = self.current_strategy_name
+        new_strategy = LRUPolicy(self.capacity) if new_strategy_name == CACHE_STRATEGY_LRU else FIFOPolicy(self.capacity)
+        for frame in self.current_strategy.frames():
+            new_strategy.insert(frame)
+
+        self.current_strategy = new_strategy
+        self.current_strategy_name = new_strategy_name
+        self.last_switch_time = time.time()
+
+        self.logger.info(f"Switched cache strategy from {old_strategy_name} to {new_strategy_name}")
+
+    def _record(self, page_id: int):
+        self.analyzer.record_access(page_id)
+        if self._should_analyze():
+            self._analyze_and_decide()
+
+    def insert(self, frame: int, page_id: int = None):
+        self._record(page_id)
+        self.current_strategy.insert(frame)
+
+    def access(self, frame: int, page_id: int = None):
+        self._record(page_id)
+        self.current_strategy.access(frame)
+
+    def remove(self, frame: int):
+        self.current_strategy.remove(frame)
+
+    def victim(self, pins: Optional[Sequence[int]] = None) -> Optional[int]:
+        return self.current_strategy.victim(pins)
+
+    def frames(self) -> List[int]:
+        return self.current_strategy.frames()
+
+    def relabel(self, mapping: Dict[int, int]):
+        self.current_strategy.relabel(mapping)
+
+    def clear(self):
+        self.current_strategy.clear()
+        self.analyzer = AccessPatternAnalyzer()
+
+    def __len__(self):
+        return len(self.current_strategy)
+
+    def __contains__(self, frame):
+        return frame in self.current_strategy
+
+
+class TwoQPolicy(ReplacementPolicy):
+    """
+    2Q：首次放入的页进入FIFO队列A1in，从A1in淘汰后只在A1out中记下页号；
+    A1out中的页再次放入时进入LRU队列Am。只访问一次的页（如顺序扫描读入的页）不会挤出Am中的热页。
+    """
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self._a1in: Dict[int, None] = {}
+        self._am: OrderedDict = OrderedDict()
+        self._a1out: OrderedDict = OrderedDict()  # 从A1in淘汰的页号
+        self._pages: Dict[int, int] = {}  # {帧号: 页号}
+
+    def insert(self, frame: int, page_id: int = None):
+        self._pages[frame] = page_id
+        if page_id in self._a1out:
+            del self._a1out[page_id]
+            self._am[frame] = None
+        else:
+            self._a1in[frame] = None
+
+    def access(self, frame: int, page_id: int = None):
+        # A1in中的命中视为同一次访问的延续，不改变顺序
+        if frame in self._am:
+            self._am.move_to_end(frame)
+
+    def remove(self, frame: int):
+        self._a1in.pop(frame, None)
+        self._am.pop(frame, None)
+        self._pages.pop(frame, None)
+
+    def victim(self, pins: Optional[Sequence[int]] = None) -> Optional[int]:
+        if len(self._a1in) > max(1, int(self.capacity * TWO_Q_IN_RATIO)):
+            queues = (self._a1in, self._am)
+        else:
+            queues = (self._am, self._a1in)
+
+        for queue in queues:
+            frame = _pop_unpinned(queue, pins)
+            if frame is None:
+                continue
+            page_id = self._pages.pop(frame)
+            if queue is self._a1in:
+                self._a1out[page_id] = None
+                while len(self._a1out) > max(1, int(self.capacity * TWO_Q_OUT_RATIO)):
+                    self._a1out.popitem(last=False)
+            return frame
+        return None
+
+    def frames(self) -> List[int]:
+        return list(self._a1in) + list(self._am)
+
+    def relabel(self, mapping: Dict[int, int]):
+        self._a1in = {mapping[frame]: None for frame in self._a1in}
+        self._am = OrderedDict((mapping[frame], None) for frame in self._am)
+        self._pages = {mapping[frame]: page_id for frame, page_id in self._pages.items()}
+
+    def clear(self):
+        self._a1in.clear()
+        self._am.clear()
+        self._a1out.clear()
+        self._pages.clear()
+
+    def __len__(self):
+        return len(self._a1in) + len(self._am)
+
+    def __contains__(self, frame):
+        return frame in self._a1in or frame in self._am
+
+
+class LRUKPolicy(ReplacementPolicy):
+    """
+    LRU-K：按倒数第K次访问的时间淘汰，最早的先淘汰；访问不足K次的页最先淘汰（它们之间按LRU）。
+    被淘汰页的访问历史保留一段时间，页再次放入时接着计数。
+    """
+
+    def __init__(self, capacity: int, k: int = LRU_K):
+        super().__init__(capacity)
+        self.k = k
+        self._clock = 0  # 逻辑时间，每次访问加一
+        self._history: Dict[int, deque] = {}  # {帧号: 最近K次访问的时间}
+        self._cold: OrderedDict = OrderedDict()  # 访问不足K次的帧
+        self._hot: List[Tuple[int, int]] = []  # 堆 (倒数第K次访问时间, 帧号)，过期项在取出时跳过
+        self._ghost: OrderedDict = OrderedDict()  # {页号: 访问历史}，被淘汰页的历史
+        self._pages: Dict[int, int] = {}  # {帧号: 页号}
+
+    def _touch(self, frame: int):
+        self._clock += 1
+        history = self._history[frame]
+        history.append(self._clock)
+        if len(history) < self.k:
+            self._cold[frame] = None
+            self._cold.move_to_end(frame)
+            return
+
+        self._cold.pop(frame, None)
+        heapq.heappush(self._hot, (history[0], frame))
+        if len(self._hot) > 2 * len(self._history) + 64:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        k = self.k
+        self._hot = [(history[0], frame) for frame, history in self._history.items() if len(history) == k]
+        heapq.heapify(self._hot)
+
+    def _is_current(self, entry: Tuple[int, int]) -> bool:
+        kth, frame = entry
+        history = self._history.get(frame)
+        return history is not None and len(history) == self.k and history[0] == kth
+
+    def insert(self, frame: int, page_id: int = None):
+        self._pages[frame] = page_id
+        history = self._ghost.pop(page_id, None)
+        self._history[frame] = history if history is not None else deque(maxlen=self.k)
+        self._touch(frame)
+
+    def access(self, frame: int, page_id: int = None):
+        self._touch(frame)
+
+    def remove(self, frame: int):
+        self._history.pop(frame, None)
+        self._cold.pop(frame, None)
+        self._pages.pop(frame, None)
+
+    def victim(self, pins: Optional[Sequence[int]] = None) -> Optional[int]:
+        frame = _pop_unpinned(self._cold, pins)
+        if frame is None:
+            skipped = []
+            while self._hot:
+                entry = heapq.heappop(self._hot)
+                if not self._is_current(entry):
+                    continue
+                if pins and pins[entry[1]]:
+                    skipped.append(entry)
+                    continue
+                frame = entry[1]
+                break
+            for entry in skipped:
+                heapq.heappush(self._hot, entry)
+            if frame is None:
+                return None
+
+        self._ghost[self._pages.pop(frame)] = self._history.pop(frame)
+        while len(self._ghost) > self.capacity:
+            self._ghost.popitem(last=False)
+        return frame
+
+    def frames(self) -> List[int]:
+        k = self.k
+        hot = sorted((history[0], frame) for frame, history in self._history.items() if len(history) == k)
+        return list(self._cold) + [frame for _, frame in hot]
+
+    def relabel(self, mapping: Dict[int, int]):
+        self._history = {mapping[frame]: history for frame, history in self._history.items()}
+        self._cold = OrderedDict((mapping[frame], None) for frame in self._cold)
+        self._pages = {mapping[frame]: page_id for frame, page_id in self._pages.items()}
+        self._rebuild_heap()
+
+    def clear(self):
+        self._history.clear()
+        self._cold.clear()
+        self._hot = []
+        self._ghost.clear()
+        self._pages.clear()
+
+    def __len__(self):
+        return len(self._history)
+
+    def __contains__(self, frame):
+        return frame in self._history
+
+
+class ClockPolicy(ReplacementPolicy):
+    """
+    CLOCK：按帧号组成一个环，每帧有使用计数，命中时加一（不超过上限）；
+    淘汰时指针沿环扫过，把计数减一，淘汰第一个计数为0的帧。命中只改一个整数，记账开销最小。
+    """
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self._usage: List[int] = [-1] * capacity  # -1 表示帧上没有页的首帧
+        self._hand = 0
+        self._count = 0
+
+    def insert(self, frame: int, page_id: int = None):
+        if frame >= len(self._usage):
+            self._usage.extend([-1] * (frame + 1 - len(self._usage)))
+        if self._usage[frame] < 0:
+            self._count += 1
+        self._usage[frame] = 1
+
+    def access(self, frame: int, page_id: int = None):
+        if self._usage[frame] < CLOCK_MAX_USAGE:
+            self._usage[frame] += 1
+
+    def remove(self, frame: int):
+        if frame < len(self._usage) and self._usage[frame] >= 0:
+            self._usage[frame] = -1
+            self._count -= 1
+
+    def victim(self, pins: Optional[Sequence[int]] = None) -> Optional[int]:
+        if not self._count:
+            return None
+
+        usage = self._usage
+        size = len(usage)
+        hand = self._hand % size
+        # 最多扫过 CLOCK_MAX_USAGE + 1 圈：未固定帧的计数此时一定已减到0
+        for _ in range(size * (CLOCK_MAX_USAGE + 1)):
+            frame = hand
+            hand = hand + 1 if hand + 1 < size else 0
+            count = usage[frame]
+            if count < 0 or (pins and pins[frame]):
+                continue
+            if count:
+                usage[frame] = count - 1
+                continue
+            usage[frame] = -1
+            self._count -= 1
+            self._hand = hand
+            return frame
+
+        self._hand = hand
+        return None
+
+    def frames(self) -> List[int]:
+        usage = self._usage
+        size = len(usage)
+        return [frame for frame in (
+            (self._hand + i) % size for i in range(size)) if usage[frame] >= 0]
+
+    def relabel(self, mapping: Dict[int, int]):
+        usage = [-1] * len(self._usage)
+        for old, new in mapping.items():
+            usage[new] = self._usage[old]
+        self._usage = usage
+        self._hand = 0
+
+    def clear(self):
+        self._usage = [-1] * len(self._usage)
+        self._hand = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, frame):
+        return 0 <= frame < len(self._usage) and self._usage[frame] >= 0
+
+
+REPLACEMENT_POLICIES = {
+    CACHE_STRATEGY_LRU: LRUPolicy,
+    CACHE_STRATEGY_FIFO: FIFOPolicy,
+    CACHE_STRATEGY_ADAPTIVE: AdaptivePolicy,
+    CACHE_STRATEGY_2Q: TwoQPolicy,
+    CACHE_STRATEGY_LRU_K: LRUKPolicy,
+    CACHE_STRATEGY_CLOCK: ClockPolicy,
+}
+
+
+def create_replacement_policy(name: str, capacity: int) -> ReplacementPolicy:
+    """按名称创建缓存池的替换策略"""
+    policy_class = REPLACEMENT_POLICIES.get(str(name).upper())
+    if policy_class is None:
+        raise ValueError(f"Unknown replacement policy: {name}. "
+                         f"Supported: {', '.join(REPLACEMENT_POLICIES)}")
+    return policy_class(capacity)
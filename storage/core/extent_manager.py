@@ -127,12 +127,21 @@ class ExtentManager:
         """从现有区中尝试分配页"""
         for extent_id, extent in self.extents.items():
             # 简单策略：同一个表空间的区都可以使用
-            if extent.tablespace == tablespace_name and not extent.is_full():
+            if extent.tablespace != tablespace_name:
+                continue
+            while not extent.is_full():
                 page_id = extent.allocate_page_in_extent()
-                if page_id is not None:
-                    self.page_to_extent[page_id] = extent_id
-                    self.logger.info(f"Allocated page {page_id} from existing extent {extent_id}")
-                    return page_id
+                if page_id is None:
+                    break
+                # 区是逻辑范围，区内页号必须在页管理器中占用后才能交给调用方；
+                # 预分配给本区的页已经占用，其余页号可能已被区外分配
+                if self.page_to_extent.get(page_id) != extent_id and \
+                        not self.page_manager.reserve_page(page_id, tablespace_name):
+                    self.logger.debug(f"Page {page_id} in extent {extent_id} is already allocated, skipping")
+                    continue
+                self.page_to_extent[page_id] = extent_id
+                self.logger.info(f"Allocated page {page_id} from existing extent {extent_id}")
+                return page_id
 
         return None
 
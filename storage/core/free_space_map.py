@@ -0,0 +1,84 @@
+# storage/core/free_space_map.py
+"""
+空闲空间映射（FSM）
+
+记录表中每页的近似空闲字节数，插入时直接找到放得下记录的页，不再逐页读取尝试。
+空闲空间按 FSM_CATEGORY_SIZE 字节分档（向下取整），每档维护一个页集合，
+查找时从所需档位向上找第一个非空档，代价与表的页数无关。
+档位数按默认页大小初始化，页更大的表空间中按需增加。
+
+FSM 只是提示：页的实际空闲空间以页头为准，调用方写页失败时用实际值修正即可。
+"""
+
+from typing import Dict, List, Optional, Set
+
+from ..utils.constants import PAGE_SIZE
+
+# 每档的字节数
+FSM_CATEGORY_SIZE = 32
+
+# 初始档位数量（默认页大小）
+FSM_CATEGORIES = PAGE_SIZE // FSM_CATEGORY_SIZE + 1
+
+
+class FreeSpaceMap:
+    """单个表的空闲空间映射：页号 -> 空闲字节数"""
+
+    def __init__(self):
+        self.free_space: Dict[int, int] = {}
+        self._categories: Dict[int, int] = {}
+        self._buckets: List[Set[int]] = [set() for _ in range(FSM_CATEGORIES)]
+
+    @staticmethod
+    def _category(free_bytes: int) -> int:
+        return max(free_bytes, 0) // FSM_CATEGORY_SIZE
+
+    def update(self, page_id: int, free_bytes: int):
+        """记录页的空闲字节数"""
+        category = self._category(free_bytes)
+        if category >= len(self._buckets):
+            self._buckets.extend(set() for _ in range(category + 1 - len(self._buckets)))
+        old_category = self._categories.get(page_id)
+        if old_category != category:
+            if old_category is not None:
+                self._buckets[old_category].discard(page_id)
+            self._buckets[category].add(page_id)
+            self._categories[page_id] = category
+        self.free_space[page_id] = free_bytes
+
+    def remove(self, page_id: int):
+        """页不再属于表时移除"""
+        category = self._categories.pop(page_id, None)
+        if category is not None:
+            self._buckets[category].discard(page_id)
+        self.free_space.pop(page_id, None)
+
+    def find_page(self, needed_bytes: int) -> Optional[int]:
+        """找一个空闲空间不少于 needed_bytes 的页，没有时返回None"""
+        # 向上取整，保证所选档位中的任何页都放得下
+        first = -(-max(needed_bytes, 0) // FSM_CATEGORY_SIZE)
+        for category in range(first, len(self._buckets)):
+            bucket = self._buckets[category]
+            if bucket:
+                return next(iter(bucket))
+        return None
+
+    def __contains__(self, page_id: int) -> bool:
+        return page_id in self.free_space
+
+    def __len__(self) -> int:
+        return len(self.free_space)
+
+    def total_free_space(self) -> int:
+        return sum(self.free_space.values())
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为可以保存到JSON的字典（键为字符串页号）"""
+        return {str(page_id): free_bytes for page_id, free_bytes in self.free_space.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> 'FreeSpaceMap':
+        free_space_map = cls()
+        for page_id, free_bytes in (data or {}).items():
+            free_space_map.update(int(page_id), int(free_bytes))
+        return free_space_map
@@ -23,7 +23,7 @@ class IndexManager:
         self._load_catalog()
 
     def create_index(self, index_name: str, table_name: str,
-                     column_name: str) -> bool:
+                     column_name: str, tablespace_name: str = "default") -> bool:
         """
         创建索引
 
@@ -31,6 +31,7 @@ class IndexManager:
             index_name: 索引名称
             table_name: 表名
             column_name: 列名
+            tablespace_name: 索引节点所在的表空间（决定节点页大小和阶数）
 
         Returns:
             bool: 创建是否成功
@@ -39,7 +40,7 @@ class IndexManager:
             return False
 
         # 创建B+树
-        btree = BPlusTree(self.storage, index_name)
+        btree = BPlusTree(self.storage, index_name, tablespace_name=tablespace_name)
         self.indexes[index_name] = btree
 
         # 保存元数据
@@ -48,6 +49,7 @@ class IndexManager:
             'table_name': table_name,
             'column_name': column_name,
             'root_page_id': btree.root_page_id,
+            'tablespace_name': tablespace_name,
             'index_type': 'btree'
         }
 
@@ -72,7 +74,8 @@ class IndexManager:
 
                 # 如果索引未加载，加载它
                 if index_name not in self.indexes:
-                    btree = BPlusTree(self.storage, index_name)
+                    btree = BPlusTree(self.storage, index_name,
+                                      tablespace_name=metadata.get('tablespace_name', 'default'))
                     btree.root_page_id = metadata['root_page_id']
                     self.indexes[index_name] = btree
 
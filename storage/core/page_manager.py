@@ -1,6 +1,9 @@
 """
 页管理器：负责硬盘文件的实际读写操作（重构版）
 增加了异常处理、日志记录和更完善的元数据管理
+
+每个表空间文件保持一个打开的文件描述符，按偏移用 os.pread/os.pwrite 读写页。
+单页写入不再 fsync：持久性由WAL保证，数据文件在检查点和整体刷盘时通过 sync() 同步。
 """
 
 import os
@@ -17,6 +20,9 @@ from ..utils.exceptions import (
 )
 from ..utils.logger import get_logger, PerformanceTimer, performance_monitor
 
+# 按偏移读写，不移动文件指针（没有 pread/pwrite 的平台退回 lseek + read/write）
+PREAD_AVAILABLE = hasattr(os, 'pread') and hasattr(os, 'pwrite')
+
 
 class PageMetadata:
     """页元数据类"""
@@ -81,14 +87,20 @@ class PageManager:
         self.tablespace_manager = tablespace_manager
         self.tablespace_files = {}  # {tablespace_name: file_path}
 
+        # 打开的文件描述符 {file_path: fd}，以及上次同步后写过的文件
+        self._file_handles: Dict[str, int] = {}
+        self._unsynced_files: Set[str] = set()
+
         # 线程锁，确保并发安全
         self._lock = threading.RLock()
+        self._io_lock = threading.Lock()  # 没有 pread/pwrite 时保护 lseek 与读写
 
         # 统计信息
         self.read_count = 0
         self.write_count = 0
         self.allocation_count = 0
         self.deallocation_count = 0
+        self.sync_count = 0
 
         # 日志器
         self.logger = get_logger("page")
@@ -270,35 +282,77 @@ class PageManager:
                     self.metadata.next_page_id += 1
                     self.logger.debug(f"Allocated new page {page_id} in tablespace '{tablespace_name}'")
 
-                # 记录到已分配列表
-                self.metadata.allocated_pages.add(page_id)
+                self._record_allocation(page_id, tablespace_name)
+                return page_id
 
-                # 记录页的表空间归属
-                self.metadata.page_tablespaces[str(page_id)] = tablespace_name
+            except Exception as e:
+                raise PageException(f"Failed to allocate page: {e}")
 
-                # 记录页使用信息
-                self.metadata.page_usage[str(page_id)] = {
-                    "allocated_time": time.time(),
-                    "access_count": 0,
-                    "last_access": None,
-                    "tablespace": tablespace_name  # 新增：记录表空间信息
-                }
+    @handle_storage_exceptions
+    def reserve_page(self, page_id: int, tablespace_name: str = "default") -> bool:
+        """
+        分配指定页号（区管理器在区内按页号分配时使用）
 
-                # 保存元数据
-                self._save_metadata()
+        Args:
+            page_id: 要分配的页号
+            tablespace_name: 页所属的表空间名称
 
-                # 更新统计
-                self.allocation_count += 1
+        Returns:
+            bool: 分配成功返回True；页号已被分配时返回False
+        """
+        if page_id <= 0:
+            raise InvalidPageIdException(page_id)
 
-                self.logger.info(f"Page allocated",
-                                 page_id=page_id,
-                                 tablespace=tablespace_name,
-                                 total_allocated=len(self.metadata.allocated_pages))
+        with self._lock:
+            if page_id in self.metadata.allocated_pages:
+                return False
 
-                return page_id
+            try:
+                if len(self.metadata.allocated_pages) >= MAX_PAGES:
+                    raise PageException(f"Maximum page limit reached: {MAX_PAGES}")
+
+                if tablespace_name not in self.tablespace_files:
+                    tablespace_name = "default"
+
+                # 从空闲列表移除；跳过的页号放入空闲列表，保持 next_page_id 之前的页号都可被分配
+                if page_id in self.metadata.free_pages:
+                    self.metadata.free_pages.remove(page_id)
+                elif page_id >= self.metadata.next_page_id:
+                    self.metadata.free_pages.extend(range(self.metadata.next_page_id, page_id))
+                    self.metadata.next_page_id = page_id + 1
+
+                self._record_allocation(page_id, tablespace_name)
+                return True
 
             except Exception as e:
-                raise PageException(f"Failed to allocate page: {e}")
+                raise PageException(f"Failed to reserve page {page_id}: {e}", page_id)
+
+    def _record_allocation(self, page_id: int, tablespace_name: str):
+        """记录页已分配并保存元数据（调用方持有锁）"""
+        # 记录到已分配列表
+        self.metadata.allocated_pages.add(page_id)
+
+        # 记录页的表空间归属
+        self.metadata.page_tablespaces[str(page_id)] = tablespace_name
+
+        # 记录页使用信息
+        self.metadata.page_usage[str(page_id)] = {
+            "allocated_time": time.time(),
+            "access_count": 0,
+            "last_access": None,
+            "tablespace": tablespace_name  # 新增：记录表空间信息
+        }
+
+        # 保存元数据
+        self._save_metadata()
+
+        # 更新统计
+        self.allocation_count += 1
+
+        self.logger.info(f"Page allocated",
+                         page_id=page_id,
+                         tablespace=tablespace_name,
+                         total_allocated=len(self.metadata.allocated_pages))
 
     @handle_storage_exceptions
     @performance_monitor("page_deallocation")
@@ -351,7 +405,7 @@ class PageManager:
             page_id: 页号
 
         Returns:
-            bytes: 页数据（长度为PAGE_SIZE）
+            bytes: 页数据（长度为页所在表空间的页大小）
 
         Raises:
             InvalidPageIdException: 页号无效
@@ -363,38 +417,33 @@ class PageManager:
             raise InvalidPageIdException(page_id)
 
         try:
-            # 确定页所属的表空间和文件
+            # 确定页所属的表空间、文件和页大小
             tablespace_name = self.metadata.page_tablespaces.get(str(page_id), "default")
             data_file_path = self.tablespace_files.get(tablespace_name, str(self.data_file))
+            page_size = self.get_tablespace_page_size(tablespace_name)
 
             self.logger.debug(f"Reading page {page_id} from tablespace '{tablespace_name}', file: {data_file_path}")
 
-            with open(data_file_path, 'rb') as f:
-                # 定位到指定页的位置
-                offset = (page_id - 1) * PAGE_SIZE
-                f.seek(offset)
+            # 读取页数据（页所在位置之后的文件内容不足一页时用0填充）
+            offset = (page_id - 1) * page_size
+            data = self._read_at(self._get_file_handle(data_file_path), page_size, offset)
+            if len(data) < page_size:
+                data += b'\x00' * (page_size - len(data))
 
-                # 读取页数据
-                data = f.read(PAGE_SIZE)
+            # 更新统计和页使用信息
+            self.read_count += 1
+            if str(page_id) in self.metadata.page_usage:
+                usage = self.metadata.page_usage[str(page_id)]
+                usage["access_count"] += 1
+                usage["last_access"] = time.time()
 
-                # 如果读取的数据不足PAGE_SIZE，用0填充
-                if len(data) < PAGE_SIZE:
-                    data += b'\x00' * (PAGE_SIZE - len(data))
+            self.logger.debug(f"Read page from disk",
+                              page_id=page_id,
+                              tablespace=tablespace_name,
+                              data_length=len(data),
+                              file_offset=offset)
 
-                # 更新统计和页使用信息
-                self.read_count += 1
-                if str(page_id) in self.metadata.page_usage:
-                    usage = self.metadata.page_usage[str(page_id)]
-                    usage["access_count"] += 1
-                    usage["last_access"] = time.time()
-
-                self.logger.debug(f"Read page from disk",
-                                  page_id=page_id,
-                                  tablespace=tablespace_name,
-                                  data_length=len(data),
-                                  file_offset=offset)
-
-                return data
+            return data
 
         except FileNotFoundError:
             raise DiskIOException(f"Tablespace file not found: {data_file_path}",
@@ -428,50 +477,119 @@ class PageManager:
             raise PageException(f"Data must be bytes, got {type(data)}", page_id)
 
         try:
-            # 确保数据长度为PAGE_SIZE
-            if len(data) > PAGE_SIZE:
-                data = data[:PAGE_SIZE]
-                self.logger.warning(f"Data truncated to {PAGE_SIZE} bytes for page {page_id}")
-            elif len(data) < PAGE_SIZE:
-                data += b'\x00' * (PAGE_SIZE - len(data))
-
-            # 确定页所属的表空间和文件
+            # 确定页所属的表空间、文件和页大小
             tablespace_name = self.metadata.page_tablespaces.get(str(page_id), "default")
             data_file_path = self.tablespace_files.get(tablespace_name, str(self.data_file))
+            page_size = self.get_tablespace_page_size(tablespace_name)
 
-            self.logger.debug(f"Writing page {page_id} to tablespace '{tablespace_name}', file: {data_file_path}")
-
-            # 确保文件存在且足够大
-            offset = (page_id - 1) * PAGE_SIZE
-            self._extend_file_if_needed(data_file_path, offset + PAGE_SIZE)
+            # 确保数据长度为表空间的页大小
+            if len(data) > page_size:
+                data = data[:page_size]
+                self.logger.warning(f"Data truncated to {page_size} bytes for page {page_id}")
+            elif len(data) < page_size:
+                data += b'\x00' * (page_size - len(data))
 
-            with open(data_file_path, 'r+b') as f:
-                # 定位到指定页的位置
-                f.seek(offset)
+            self.logger.debug(f"Writing page {page_id} to tablespace '{tablespace_name}', file: {data_file_path}")
 
-                # 写入数据
-                f.write(data)
-                f.flush()  # 确保写入磁盘
-                os.fsync(f.fileno())  # 强制同步到磁盘
+            # 写到页所在位置（超出文件末尾时文件自动扩展，中间部分读出为0）；fsync 推迟到 sync()
+            offset = (page_id - 1) * page_size
+            self._write_at(self._get_file_handle(data_file_path, create=True), data, offset)
+            self._unsynced_files.add(data_file_path)
 
-                # 更新统计和页使用信息
-                self.write_count += 1
-                if str(page_id) in self.metadata.page_usage:
-                    usage = self.metadata.page_usage[str(page_id)]
-                    usage["access_count"] += 1
-                    usage["last_access"] = time.time()
+            # 更新统计和页使用信息
+            self.write_count += 1
+            if str(page_id) in self.metadata.page_usage:
+                usage = self.metadata.page_usage[str(page_id)]
+                usage["access_count"] += 1
+                usage["last_access"] = time.time()
 
-                self.logger.debug(f"Wrote page to disk",
-                                  page_id=page_id,
-                                  tablespace=tablespace_name,
-                                  data_length=len(data),
-                                  file_offset=offset)
+            self.logger.debug(f"Wrote page to disk",
+                              page_id=page_id,
+                              tablespace=tablespace_name,
+                              data_length=len(data),
+                              file_offset=offset)
 
         except OSError as e:
             raise DiskIOException(f"Failed to write page {page_id}: {e}",
                                   file_path=data_file_path,
                                   operation="page_write")
 
+    def _get_file_handle(self, file_path: str, create: bool = False) -> int:
+        """获取表空间文件的文件描述符，第一次访问时打开并保持到 close_files()"""
+        fd = self._file_handles.get(file_path)
+        if fd is None:
+            with self._lock:
+                fd = self._file_handles.get(file_path)
+                if fd is None:
+                    flags = os.O_RDWR | getattr(os, 'O_BINARY', 0)
+                    if create:
+                        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+                        flags |= os.O_CREAT
+                    fd = os.open(file_path, flags, 0o644)
+                    self._file_handles[file_path] = fd
+        return fd
+
+    def _read_at(self, fd: int, size: int, offset: int) -> bytes:
+        """从文件的指定偏移读取，文件末尾之后的部分不返回"""
+        if PREAD_AVAILABLE:
+            return os.pread(fd, size, offset)
+        with self._io_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+
+    def _write_at(self, fd: int, data: bytes, offset: int):
+        """把数据完整写到文件的指定偏移"""
+        view = memoryview(data)
+        while view:
+            if PREAD_AVAILABLE:
+                written = os.pwrite(fd, view, offset)
+            else:
+                with self._io_lock:
+                    os.lseek(fd, offset, os.SEEK_SET)
+                    written = os.write(fd, view)
+            view = view[written:]
+            offset += written
+
+    def sync(self) -> int:
+        """
+        把上次同步后写过的表空间文件刷到磁盘（检查点和整体刷盘时调用）
+
+        Returns:
+            int: 同步的文件数
+        """
+        with self._lock:
+            # 换成新集合后再同步，同步期间的写入留到下一次
+            unsynced_files, self._unsynced_files = self._unsynced_files, set()
+            synced = 0
+            for file_path in unsynced_files:
+                fd = self._file_handles.get(file_path)
+                if fd is None:
+                    continue
+                try:
+                    os.fsync(fd)
+                except OSError as e:
+                    self._unsynced_files.update(unsynced_files)
+                    raise DiskIOException(f"Failed to sync file {file_path}: {e}",
+                                          file_path=file_path,
+                                          operation="file_sync")
+                synced += 1
+
+            if synced:
+                self.sync_count += 1
+                self.logger.debug(f"Synced data files", files=synced)
+            return synced
+
+    def close_files(self):
+        """同步并关闭所有打开的表空间文件"""
+        with self._lock:
+            self.sync()
+            for file_path, fd in self._file_handles.items():
+                try:
+                    os.close(fd)
+                except OSError as e:
+                    self.logger.warning(f"Failed to close file {file_path}: {e}")
+            self._file_handles.clear()
+
     def _extend_file(self, target_size: int):
         """
         扩展数据文件到指定大小
@@ -527,6 +645,16 @@ class PageManager:
                                   file_path=file_path,
                                   operation="file_extend")
 
+    def get_tablespace_page_size(self, tablespace_name: str = "default") -> int:
+        """获取表空间的页大小，没有表空间管理器时为默认页大小"""
+        if self.tablespace_manager is None:
+            return PAGE_SIZE
+        return self.tablespace_manager.get_page_size(tablespace_name)
+
+    def get_page_size(self, page_id: int) -> int:
+        """获取页所在表空间的页大小"""
+        return self.get_tablespace_page_size(self.metadata.page_tablespaces.get(str(page_id), "default"))
+
     def get_page_count(self) -> int:
         """获取已分配的页数量"""
         return len(self.metadata.allocated_pages)
@@ -662,12 +790,14 @@ class PageManager:
                 "reads": self.read_count,
                 "writes": self.write_count,
                 "allocations": self.allocation_count,
-                "deallocations": self.deallocation_count
+                "deallocations": self.deallocation_count,
+                "syncs": self.sync_count
             },
             "files": {
                 "data_file": str(self.data_file),
                 "data_file_size": self.data_file.stat().st_size if self.data_file.exists() else 0,
                 "meta_file": str(self.meta_file),
+                "open_files": len(self._file_handles),
                 "last_modification": self.metadata.last_modification
             }
         }
@@ -676,6 +806,7 @@ class PageManager:
         """清理资源"""
         try:
             self._save_metadata()
+            self.close_files()
             self.logger.info("PageManager cleanup completed")
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
@@ -5,12 +5,13 @@
 
 import time
 import threading
-from typing import Optional, Dict, List, Any, Tuple
+from typing import Optional, Dict, List, Any, Tuple, Union
 from contextlib import contextmanager
 
 from .page_manager import PageManager
-from .buffer_pool import BufferPool
-from ..utils.constants import BUFFER_SIZE, DATA_FILE, META_FILE, FLUSH_INTERVAL_SECONDS
+from .buffer_pool import BufferPool, BufferRing
+from .background_writer import BackgroundWriter, BackgroundWriterConfig, Checkpointer
+from ..utils.constants import PAGE_SIZE, BUFFER_SIZE, DATA_FILE, META_FILE, FLUSH_INTERVAL_SECONDS
 from ..utils.exceptions import (
     StorageException, SystemShutdownException, PageException,
     handle_storage_exceptions
@@ -30,16 +31,18 @@ class StorageManager:
                  auto_flush_interval: int = FLUSH_INTERVAL_SECONDS,
                  enable_extent_management: bool = True,
                  enable_wal: bool = True,
-                 enable_concurrency: bool = True):
+                 enable_concurrency: bool = True,
+                 buffer_pool_size: Union[int, str, None] = None):
         """
         初始化存储管理器
 
         Args:
-            buffer_size: 缓存池大小
+            buffer_size: 缓存池大小（帧数）
             data_file: 数据文件路径
             meta_file: 元数据文件路径
-            auto_flush_interval: 自动刷盘间隔（秒）
+            auto_flush_interval: 检查点间隔（秒）；大于0时启动后台写出线程和检查点线程，为0时不做后台写盘
             enable_extent_management: 是否启用区管理功能（实验性）
+            buffer_pool_size: 缓存池字节数（如 "2GB"），指定时忽略 buffer_size
 
         Raises:
             StorageException: 初始化失败
@@ -65,7 +68,8 @@ class StorageManager:
             self.page_manager = PageManager(data_file, meta_file, tablespace_manager=self.tablespace_manager)
             # 新增：设置文件映射更新回调
             self.tablespace_manager._notify_file_mapping_update = self._update_page_manager_files
-            self.buffer_pool = BufferPool(buffer_size)
+            self.buffer_pool = BufferPool(buffer_size, pool_size=buffer_pool_size,
+                                          write_back=self._write_back_page)
             self.auto_flush_interval = auto_flush_interval
 
             # 状态管理
@@ -95,10 +99,11 @@ class StorageManager:
             self._current_table_context = None
             self._context_lock = threading.Lock()  # 线程安全
 
-            # 自动刷盘定时器（可选）
-            self._flush_timer = None
-            if auto_flush_interval > 0:
-                self._start_auto_flush()
+            # 后台写出和检查点线程（在WAL初始化之后启动）
+            self.bgwriter_config = BackgroundWriterConfig()
+            self.bgwriter_config.checkpoint_interval = auto_flush_interval
+            self.background_writer = None
+            self.checkpointer = None
 
             # 事务管理器（在WAL之后初始化）
             self.transaction_manager = TransactionManager(self, wal_enabled=enable_wal)
@@ -152,6 +157,9 @@ class StorageManager:
                 )
                 self.logger.info("WAL enabled for enhanced durability")
 
+            if auto_flush_interval > 0:
+                self._start_background_workers()
+
             self.logger.info("StorageManager initialized successfully",
                              buffer_size=buffer_size,
                              data_file=data_file,
@@ -162,40 +170,28 @@ class StorageManager:
             self.logger.error(f"Failed to initialize StorageManager: {e}")
             raise StorageException(f"StorageManager initialization failed: {e}")
 
-    def _start_auto_flush(self):
-        """启动自动刷盘定时器"""
-
-        def auto_flush():
-            if not self.is_shutdown:
-                try:
-                    self._auto_flush_if_needed()
-                except Exception as e:
-                    self.logger.error(f"Auto flush failed: {e}")
-                finally:
-                    # 重新调度下次刷盘
-                    if not self.is_shutdown:
-                        self._flush_timer = threading.Timer(self.auto_flush_interval, auto_flush)
-                        self._flush_timer.daemon = True
-                        self._flush_timer.start()
-
-        self._flush_timer = threading.Timer(self.auto_flush_interval, auto_flush)
-        self._flush_timer.daemon = True
-        self._flush_timer.start()
-
-        self.logger.debug(f"Auto flush timer started with {self.auto_flush_interval}s interval")
-
-    def _auto_flush_if_needed(self):
-        """根据条件自动刷盘"""
-        current_time = time.time()
-        time_since_last_flush = current_time - self.last_flush_time
-
-        # 检查是否需要刷盘
-        dirty_pages = self.buffer_pool.get_dirty_pages()
-
-        if dirty_pages and time_since_last_flush >= self.auto_flush_interval:
-            with PerformanceTimer(self.logger, "auto_flush"):
-                self.flush_all_pages()
-                self.logger.info(f"Auto flush completed, {len(dirty_pages)} pages flushed")
+    def _start_background_workers(self):
+        """启动后台写出线程和检查点线程"""
+        self.background_writer = BackgroundWriter(self, self.bgwriter_config)
+        self.checkpointer = Checkpointer(self, self.bgwriter_config)
+        self.background_writer.start()
+        self.checkpointer.start()
+
+        self.logger.debug(f"Background writer started",
+                          interval=self.bgwriter_config.interval,
+                          checkpoint_interval=self.bgwriter_config.checkpoint_interval)
+
+    def _stop_background_workers(self):
+        """停止后台写出线程和检查点线程（不能在持有 self._lock 时调用）"""
+        for worker in (self.background_writer, self.checkpointer):
+            if worker is not None:
+                worker.stop()
+
+    def _write_back_page(self, page_id: int, data: bytes):
+        """缓存池淘汰脏页时的写回函数：先刷新还没写出的WAL日志，再把页写入数据文件"""
+        if self.wal_enabled and self.wal_manager:
+            self.wal_manager.flush_pending()
+        self.page_manager.write_page_to_disk(page_id, data)
 
     def _check_shutdown(self):
         """检查系统是否已关闭"""
@@ -218,12 +214,13 @@ class StorageManager:
 
     @handle_storage_exceptions
     @performance_monitor("read_page")
-    def read_page(self, page_id: int) -> bytes:
+    def read_page(self, page_id: int, ring: Optional[BufferRing] = None) -> bytes:
         """
         读取页数据（优先从缓存读取）
 
         Args:
             page_id: 页号
+            ring: 顺序扫描的环形缓冲区；指定时未命中的页通过环放入缓存，也不触发预读
 
         Returns:
             bytes: 页数据
@@ -251,10 +248,13 @@ class StorageManager:
                 data = self.page_manager.read_page_from_disk(page_id)
 
                 # 将数据放入缓存
-                self.buffer_pool.put(page_id, data, is_dirty=False)
+                if ring is None:
+                    self.buffer_pool.put(page_id, data, is_dirty=False)
+                else:
+                    self.buffer_pool.put_ring(page_id, data, ring)
 
             # 预读系统：记录页面访问（新增）
-            if self.enable_preread and self.preread_manager:
+            if ring is None and self.enable_preread and self.preread_manager:
                 try:
                     # 获取当前表上下文
                     current_table = self.get_current_table_context()
@@ -282,18 +282,63 @@ class StorageManager:
             if self.wal_enabled and hasattr(self, 'wal_manager') and self.wal_manager:
                 self.wal_manager.write_page(page_id, data)
 
-            # 确保数据填充到PAGE_SIZE
-            from ..utils.constants import PAGE_SIZE
-            if len(data) < PAGE_SIZE:
-                data = data + b'\x00' * (PAGE_SIZE - len(data))
-            elif len(data) > PAGE_SIZE:
-                data = data[:PAGE_SIZE]
+            # 确保数据填充到页所在表空间的页大小
+            page_size = self.page_manager.get_page_size(page_id)
+            if len(data) < page_size:
+                data = data + b'\x00' * (page_size - len(data))
+            elif len(data) > page_size:
+                data = data[:page_size]
 
             # 写入缓存并标记为脏页
             self.buffer_pool.put(page_id, data, is_dirty=True)
 
             self.logger.debug(f"Page {page_id} written to cache and marked dirty")
 
+    def create_scan_ring(self) -> BufferRing:
+        """创建顺序扫描用的环形缓冲区，扫描时传给 read_page"""
+        return self.buffer_pool.create_ring()
+
+    @handle_storage_exceptions
+    def fetch_page(self, page_id: int) -> memoryview:
+        """
+        读取并固定页，固定期间页不会被淘汰，用完后必须调用 unpin_page
+
+        Args:
+            page_id: 页号
+
+        Returns:
+            memoryview: 缓存中页数据的可写视图
+
+        Raises:
+            SystemShutdownException: 系统已关闭
+            BufferFullException: 缓存中所有页都被固定
+        """
+        self._check_shutdown()
+
+        with self._lock:
+            self.operation_count += 1
+            self.read_count += 1
+            return self.buffer_pool.fetch(page_id, loader=self.page_manager.read_page_from_disk)
+
+    @handle_storage_exceptions
+    def unpin_page(self, page_id: int, dirty: bool = False):
+        """
+        释放 fetch_page 固定的页
+
+        Args:
+            page_id: 页号
+            dirty: 固定期间是否修改了页；修改过的页记入WAL并标记为脏页
+        """
+        self._check_shutdown()
+
+        with self._lock:
+            self.buffer_pool.unpin(page_id, dirty)
+            if dirty:
+                self.write_count += 1
+                if self.wal_enabled and self.wal_manager:
+                    data, _ = self.buffer_pool.peek(page_id)
+                    self.wal_manager.write_page(page_id, data)
+
     def set_table_context(self, table_name: str):
         """
         设置当前表上下文，后续的allocate_page调用将使用此表名进行智能分配
@@ -421,11 +466,12 @@ class StorageManager:
 
         with self._lock:
             # 检查页是否在缓存中且为脏页
-            if page_id in self.buffer_pool.cache:
-                data, is_dirty, _ = self.buffer_pool.cache[page_id]
+            entry = self.buffer_pool.peek(page_id)
+            if entry is not None:
+                data, is_dirty = entry
                 if is_dirty:
-                    # 写入磁盘
-                    self.page_manager.write_page_to_disk(page_id, data)
+                    # 写入磁盘（先刷新WAL）
+                    self._write_back_page(page_id, data)
                     # 清除脏标记
                     self.buffer_pool.clear_dirty_flag(page_id)
                     self.logger.debug(f"Flushed page {page_id} to disk")
@@ -451,9 +497,16 @@ class StorageManager:
         with self._lock:
             dirty_pages = self.buffer_pool.flush_all()
 
+            # 先写日志再写数据页
+            if dirty_pages and self.wal_enabled and self.wal_manager:
+                self.wal_manager.flush_pending()
+
             for page_id, data in dirty_pages.items():
                 self.page_manager.write_page_to_disk(page_id, data)
 
+            # 单页写入不再 fsync，整体刷盘后每个文件同步一次
+            self.page_manager.sync()
+
             self.flush_count += 1
             self.last_flush_time = time.time()
 
@@ -463,6 +516,50 @@ class StorageManager:
 
             return len(dirty_pages)
 
+    def sync_data_files(self) -> int:
+        """
+        把已写出的数据页同步到磁盘（检查点和没有WAL的事务提交时调用）
+
+        Returns:
+            int: 同步的文件数
+        """
+        return self.page_manager.sync()
+
+    @handle_storage_exceptions
+    def resize_buffer_pool(self, pool_size: Union[int, str]) -> int:
+        """
+        在线调整缓存池大小，缩小时被淘汰的脏页写回磁盘
+
+        Args:
+            pool_size: 新的缓存池字节数，可以是整数或 "4GB" 这样的字符串
+
+        Returns:
+            int: 写回的脏页数
+        """
+        self._check_shutdown()
+
+        with self._lock:
+            evicted_dirty = self.buffer_pool.resize(pool_size=pool_size)
+            for page_id, data in evicted_dirty.items():
+                self.page_manager.write_page_to_disk(page_id, data)
+
+            self.logger.info(f"Buffer pool resized",
+                             pool_size_bytes=self.buffer_pool.pool_size,
+                             pages_written=len(evicted_dirty))
+            return len(evicted_dirty)
+
+    def get_background_writer_stats(self) -> dict:
+        """
+        获取后台写出线程和检查点线程的统计信息
+
+        Returns:
+            dict: 统计信息，线程未启动时对应项为None
+        """
+        return {
+            "background_writer": self.background_writer.get_statistics() if self.background_writer else None,
+            "checkpointer": self.checkpointer.get_statistics() if self.checkpointer else None
+        }
+
     def get_cache_stats(self) -> dict:
         """
         获取缓存统计信息
@@ -563,11 +660,14 @@ class StorageManager:
         self._check_shutdown()
 
         if self.buffer_pool.cache:
+            written_back = self.buffer_pool.writeback_count
             evicted = self.buffer_pool._evict_lru()
             if evicted:
                 page_id, data, is_dirty = evicted
                 if is_dirty:
                     self.page_manager.write_page_to_disk(page_id, data)
+                is_dirty = is_dirty or self.buffer_pool.writeback_count > written_back
+                if is_dirty:
                     self.logger.debug(f"Force evicted dirty page {page_id} and wrote to disk")
                 else:
                     self.logger.debug(f"Force evicted clean page {page_id}")
@@ -659,6 +759,9 @@ class StorageManager:
 
         self.logger.info("Starting StorageManager shutdown")
 
+        # 停止后台写出和检查点线程
+        self._stop_background_workers()
+
         # 关闭预读系统
         if self.preread_manager:
             self.preread_manager.shutdown()
@@ -675,11 +778,6 @@ class StorageManager:
 
         try:
             with self._lock:
-                # 停止自动刷盘定时器
-                if self._flush_timer:
-                    self._flush_timer.cancel()
-                    self.logger.debug("Auto flush timer stopped")
-
                 # 刷新所有脏页
                 flushed_pages = self.flush_all_pages()
 
@@ -833,7 +931,8 @@ class StorageManager:
         """详细字符串表示"""
         return self.__str__()
 
-    def create_tablespace(self, name: str, file_path: str = None, size_mb: int = 100) -> bool:
+    def create_tablespace(self, name: str, file_path: str = None, size_mb: int = 100,
+                          page_size: int = PAGE_SIZE) -> bool:
         """
         创建新的表空间
 
@@ -841,12 +940,13 @@ class StorageManager:
             name: 表空间名称
             file_path: 文件路径，如果为None则自动生成
             size_mb: 表空间大小（MB）
+            page_size: 表空间的页大小（字节），创建后不能修改
 
         Returns:
             bool: 创建是否成功
         """
         try:
-            result = self.tablespace_manager.create_tablespace(name, file_path, size_mb)
+            result = self.tablespace_manager.create_tablespace(name, file_path, size_mb, page_size)
             if result:
                 # 更新页管理器的表空间文件映射
                 self.page_manager.tablespace_files = self.tablespace_manager.get_all_tablespace_files()
@@ -856,6 +956,14 @@ class StorageManager:
             self.logger.error(f"Failed to create tablespace '{name}': {e}")
             return False
 
+    def get_tablespace_page_size(self, name: str = "default") -> int:
+        """获取表空间的页大小"""
+        return self.page_manager.get_tablespace_page_size(name)
+
+    def get_page_size(self, page_id: int) -> int:
+        """获取页所在表空间的页大小"""
+        return self.page_manager.get_page_size(page_id)
+
     def list_tablespaces(self) -> List[dict]:
         """列出所有表空间"""
         return self.tablespace_manager.list_tablespaces()
@@ -1107,14 +1215,16 @@ class TableContext:
 # 便捷函数
 def create_storage_manager(buffer_size: int = BUFFER_SIZE,
                            data_dir: str = None,
-                           auto_flush: bool = True) -> StorageManager:
+                           auto_flush: bool = True,
+                           buffer_pool_size: Union[int, str, None] = None) -> StorageManager:
     """
     创建存储管理器实例
 
     Args:
-        buffer_size: 缓存池大小
+        buffer_size: 缓存池大小（帧数）
         data_dir: 数据目录路径
         auto_flush: 是否启用自动刷盘
+        buffer_pool_size: 缓存池字节数（如 "2GB"），指定时忽略 buffer_size
 
     Returns:
         StorageManager: 存储管理器实例
@@ -1133,5 +1243,6 @@ def create_storage_manager(buffer_size: int = BUFFER_SIZE,
         buffer_size=buffer_size,
         data_file=data_file,
         meta_file=meta_file,
-        auto_flush_interval=auto_flush_interval
+        auto_flush_interval=auto_flush_interval,
+        buffer_pool_size=buffer_pool_size
     )
\ No newline at end of file
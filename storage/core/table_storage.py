@@ -10,6 +10,7 @@ import time
 from typing import Dict, List, Optional
 from ..utils.exceptions import StorageException, TableNotFoundException
 from ..utils.logger import get_logger
+from .free_space_map import FreeSpaceMap
 
 
 class TableStorageMetadata:
@@ -18,6 +19,9 @@ class TableStorageMetadata:
     def __init__(self, table_name: str, estimated_record_size: int):
         self.table_name = table_name
         self.pages = []  # 表占用的页号列表
+        self.overflow_pages = set()  # 行外存储的溢出页（不参与顺序扫描）
+        self.free_space_map = FreeSpaceMap()  # 各页的近似空闲空间
+        self._page_positions: Dict[int, int] = {}  # 页号 -> 页在表中的索引
         self.estimated_record_size = estimated_record_size
         self.tablespace_name = "default"  # 新增：表所属的表空间
         self.created_time = time.time()
@@ -30,29 +34,42 @@ class TableStorageMetadata:
 
     def add_page(self, page_id: int):
         """添加页"""
-        if page_id not in self.pages:
+        if page_id not in self._page_positions:
+            self._page_positions[page_id] = len(self.pages)
             self.pages.append(page_id)
             self.total_page_allocations += 1
             self.last_modified = time.time()
 
     def remove_page(self, page_id: int):
         """移除页"""
-        if page_id in self.pages:
+        if page_id in self._page_positions:
             self.pages.remove(page_id)
+            self.free_space_map.remove(page_id)
+            self.reindex_pages()
             self.last_modified = time.time()
 
+    def reindex_pages(self):
+        """页列表变化后重建页号到索引的映射"""
+        self._page_positions = {page_id: index for index, page_id in enumerate(self.pages)}
+
+    def page_index_of(self, page_id: int) -> Optional[int]:
+        """页号在表中的索引，不属于该表时返回None"""
+        return self._page_positions.get(page_id)
+
     def to_dict(self) -> dict:
         """转换为字典格式"""
         return {
             'table_name': self.table_name,
             'pages': self.pages,
+            'overflow_pages': sorted(self.overflow_pages),
             'estimated_record_size': self.estimated_record_size,
             'tablespace_name': self.tablespace_name,  # 新增：保存表空间信息
             'created_time': self.created_time,
             'last_modified': self.last_modified,
             'total_page_allocations': self.total_page_allocations,
             'total_page_reads': self.total_page_reads,
-            'total_page_writes': self.total_page_writes
+            'total_page_writes': self.total_page_writes,
+            'free_space': self.free_space_map.to_dict()
         }
 
     @classmethod
@@ -60,6 +77,10 @@ class TableStorageMetadata:
         """从字典创建实例"""
         metadata = cls(data['table_name'], data.get('estimated_record_size', 1024))
         metadata.pages = data.get('pages', [])
+        metadata.reindex_pages()
+        metadata.overflow_pages = set(data.get('overflow_pages', []))
+        # 旧目录没有FSM，缺失的页在第一次查找空闲空间时从页头补齐
+        metadata.free_space_map = FreeSpaceMap.from_dict(data.get('free_space'))
         metadata.tablespace_name = data.get('tablespace_name', 'default')  # 新增：加载表空间信息
         metadata.created_time = data.get('created_time', time.time())
         metadata.last_modified = data.get('last_modified', time.time())
@@ -81,6 +102,9 @@ class TableStorage:
         self.tables: Dict[str, TableStorageMetadata] = {}
         self.logger = get_logger("table_storage")
 
+        # 普通页写入只改FSM和统计，不立即重写目录，标记后随下一次目录保存或关闭时写出
+        self._catalog_dirty = False
+
         # 确保目录存在
         os.makedirs(os.path.dirname(catalog_file), exist_ok=True)
 
@@ -111,8 +135,8 @@ class TableStorage:
 
             self.logger.info(f"Creating table '{table_name}' in tablespace '{tablespace_name}'")
 
-            # 使用表空间感知的页分配
-            initial_page = self.storage_manager.allocate_page_for_table(table_name)
+            # 在表所属的表空间中分配初始页（页大小由表空间决定）
+            initial_page = self.storage_manager.allocate_page(tablespace_name=tablespace_name, table_name=table_name)
 
             # 创建表存储元数据
             metadata = TableStorageMetadata(table_name, estimated_record_size)
@@ -121,8 +145,9 @@ class TableStorage:
 
             # 初始化页内容（空页）
             from ..utils.serializer import PageSerializer
-            empty_page = PageSerializer.create_empty_page()
+            empty_page = PageSerializer.create_empty_page(self.storage_manager.get_tablespace_page_size(tablespace_name))
             self.storage_manager.write_page(initial_page, empty_page)
+            metadata.free_space_map.update(initial_page, self._page_free_space(empty_page))
 
             self.tables[table_name] = metadata
             self._save_catalog()
@@ -143,15 +168,16 @@ class TableStorage:
         try:
             metadata = self.tables[table_name]
 
-            # 释放所有页
-            for page_id in metadata.pages:
+            # 释放所有页（包括溢出页）
+            for page_id in metadata.pages + sorted(metadata.overflow_pages):
                 self.storage_manager.deallocate_page(page_id)
 
             # 从目录中移除
             del self.tables[table_name]
             self._save_catalog()
 
-            self.logger.info(f"Dropped storage for table '{table_name}', freed {len(metadata.pages)} pages")
+            self.logger.info(f"Dropped storage for table '{table_name}', "
+                             f"freed {len(metadata.pages) + len(metadata.overflow_pages)} pages")
             return True
 
         except Exception as e:
@@ -164,6 +190,12 @@ class TableStorage:
             raise TableNotFoundException(table_name)
         return self.tables[table_name].pages.copy()
 
+    def get_page_size(self, table_name: str) -> int:
+        """获取表的页大小（由表所属的表空间决定）"""
+        if table_name not in self.tables:
+            raise TableNotFoundException(table_name)
+        return self.storage_manager.get_tablespace_page_size(self.tables[table_name].tablespace_name)
+
     def allocate_table_page(self, table_name: str) -> int:
         """为表分配新页"""
         if table_name not in self.tables:
@@ -176,13 +208,18 @@ class TableStorage:
             tablespace_name = getattr(metadata, 'tablespace_name', 'default')
             new_page = self.storage_manager.allocate_page(tablespace_name)
 
+            # 分配器返回表已占用的页时不能写入，否则空页会覆盖已有数据
+            if metadata.page_index_of(new_page) is not None or new_page in metadata.overflow_pages:
+                raise StorageException(f"Allocator returned page {new_page} already owned by table '{table_name}'")
+
             # 初始化新页
             from ..utils.serializer import PageSerializer
-            empty_page = PageSerializer.create_empty_page()
+            empty_page = PageSerializer.create_empty_page(self.storage_manager.get_tablespace_page_size(tablespace_name))
             self.storage_manager.write_page(new_page, empty_page)
 
             # 添加到表的页列表
             metadata.add_page(new_page)
+            metadata.free_space_map.update(new_page, self._page_free_space(empty_page))
             self._save_catalog()
 
             self.logger.debug(
@@ -193,13 +230,69 @@ class TableStorage:
             self.logger.error(f"Failed to allocate page for table '{table_name}': {e}")
             raise StorageException(f"Page allocation failed: {e}")
 
-    def read_table_page(self, table_name: str, page_index: int) -> bytes:
+    def allocate_overflow_page(self, table_name: str) -> int:
+        """为表的行外存储分配一个溢出页（不加入表的页列表，顺序扫描不会读到）"""
+        if table_name not in self.tables:
+            raise TableNotFoundException(table_name)
+
+        try:
+            metadata = self.tables[table_name]
+            new_page = self.storage_manager.allocate_page(getattr(metadata, 'tablespace_name', 'default'))
+            metadata.overflow_pages.add(new_page)
+            metadata.total_page_allocations += 1
+            self._save_catalog()
+            return new_page
+
+        except Exception as e:
+            self.logger.error(f"Failed to allocate overflow page for table '{table_name}': {e}")
+            raise StorageException(f"Overflow page allocation failed: {e}")
+
+    def free_overflow_pages(self, table_name: str, page_ids: List[int]):
+        """释放表的溢出页"""
+        if table_name not in self.tables:
+            raise TableNotFoundException(table_name)
+
+        metadata = self.tables[table_name]
+        for page_id in page_ids:
+            if page_id in metadata.overflow_pages:
+                metadata.overflow_pages.discard(page_id)
+                self.storage_manager.deallocate_page(page_id)
+        metadata.last_modified = time.time()
+        self._save_catalog()
+
+    def read_overflow_page(self, table_name: str, page_id: int) -> bytes:
+        """读取表的溢出页"""
+        self._check_overflow_page(table_name, page_id)
+        self.tables[table_name].total_page_reads += 1
+        return self.storage_manager.read_page(page_id)
+
+    def write_overflow_page(self, table_name: str, page_id: int, data: bytes):
+        """写入表的溢出页"""
+        self._check_overflow_page(table_name, page_id)
+        metadata = self.tables[table_name]
+        metadata.total_page_writes += 1
+        metadata.last_modified = time.time()
+        self.storage_manager.write_page(page_id, data)
+
+    def has_overflow_pages(self, table_name: str) -> bool:
+        """表是否有行外存储的值（没有时扫描不必检查 ToastPointer）"""
+        metadata = self.tables.get(table_name)
+        return bool(metadata and metadata.overflow_pages)
+
+    def _check_overflow_page(self, table_name: str, page_id: int):
+        if table_name not in self.tables:
+            raise TableNotFoundException(table_name)
+        if page_id not in self.tables[table_name].overflow_pages:
+            raise StorageException(f"Page {page_id} is not an overflow page of table '{table_name}'")
+
+    def read_table_page(self, table_name: str, page_index: int, ring=None) -> bytes:
         """
         读取表的指定页
 
         Args:
             table_name: 表名
             page_index: 页在表中的索引（非页号）
+            ring: 顺序扫描的环形缓冲区（StorageManager.create_scan_ring），不指定时按普通读取
         """
         if table_name not in self.tables:
             raise TableNotFoundException(table_name)
@@ -211,6 +304,8 @@ class TableStorage:
         page_id = pages[page_index]
         self.tables[table_name].total_page_reads += 1
 
+        if ring is not None:
+            return self.storage_manager.read_page(page_id, ring=ring)
         return self.storage_manager.read_page(page_id)
 
     def write_table_page(self, table_name: str, page_index: int, data: bytes):
@@ -230,11 +325,68 @@ class TableStorage:
             raise StorageException(f"Page index {page_index} out of range for table '{table_name}'")
 
         page_id = pages[page_index]
-        self.tables[table_name].total_page_writes += 1
-        self.tables[table_name].last_modified = time.time()
+        metadata = self.tables[table_name]
+        metadata.total_page_writes += 1
+        metadata.last_modified = time.time()
 
         self.storage_manager.write_page(page_id, data)
 
+        # 插入、更新、删除都经过这里，顺便根据页头维护FSM
+        metadata.free_space_map.update(page_id, self._page_free_space(data))
+        self._catalog_dirty = True
+
+    def get_page_index(self, table_name: str, page_id: int) -> int:
+        """页号在表中的索引（read_table_page/write_table_page 使用的索引）"""
+        if table_name not in self.tables:
+            raise TableNotFoundException(table_name)
+
+        page_index = self.tables[table_name].page_index_of(page_id)
+        if page_index is None:
+            raise StorageException(f"Page {page_id} does not belong to table '{table_name}'")
+        return page_index
+
+    def find_page_with_free_space(self, table_name: str, needed_bytes: int) -> Optional[int]:
+        """
+        通过FSM查找空闲空间不少于 needed_bytes 的页
+
+        Returns:
+            页号；没有合适的页时返回None（调用方应分配新页）
+        """
+        if table_name not in self.tables:
+            raise TableNotFoundException(table_name)
+
+        metadata = self.tables[table_name]
+        if len(metadata.free_space_map) < len(metadata.pages):
+            self._fill_free_space_map(metadata)
+        return metadata.free_space_map.find_page(needed_bytes)
+
+    def update_free_space(self, table_name: str, page_id: int, free_bytes: int):
+        """用页的实际空闲空间修正FSM（FSM中的值过时时使用）"""
+        if table_name not in self.tables:
+            raise TableNotFoundException(table_name)
+        self.tables[table_name].free_space_map.update(page_id, free_bytes)
+        self._catalog_dirty = True
+
+    @staticmethod
+    def _page_free_space(page_data: bytes) -> int:
+        """从页头读取空闲字节数；不是数据页格式时视为没有空闲空间"""
+        from ..utils.serializer import PageSerializer
+
+        if len(page_data) < PageSerializer.PAGE_HEADER_SIZE:
+            return 0
+        free_space = PageSerializer.get_page_info(page_data)['free_space_size']
+        return min(max(free_space, 0), len(page_data) - PageSerializer.PAGE_HEADER_SIZE)
+
+    def _fill_free_space_map(self, metadata: TableStorageMetadata):
+        """为FSM中缺失的页（旧版本目录）读取页头补齐空闲空间"""
+        missing_pages = [page_id for page_id in metadata.pages if page_id not in metadata.free_space_map]
+        for page_id in missing_pages:
+            metadata.free_space_map.update(page_id, self._page_free_space(self.storage_manager.read_page(page_id)))
+        if missing_pages:
+            self._catalog_dirty = True
+
+        self.logger.debug(f"Filled free space map for {len(missing_pages)} pages of table '{metadata.table_name}'")
+
     def get_table_page_count(self, table_name: str) -> int:
         """获取表的页数量"""
         if table_name not in self.tables:
@@ -260,6 +412,7 @@ class TableStorage:
             return {
                 'total_tables': len(self.tables),
                 'total_pages': sum(len(meta.pages) for meta in self.tables.values()),
+                'total_overflow_pages': sum(len(meta.overflow_pages) for meta in self.tables.values()),
                 'tables': {name: meta.to_dict() for name, meta in self.tables.items()}
             }
 
@@ -278,7 +431,10 @@ class TableStorage:
         valid_pages = [p for p in metadata.pages if p in allocated_pages]
 
         removed_pages = len(metadata.pages) - len(valid_pages)
+        for page_id in set(metadata.pages) - set(valid_pages):
+            metadata.free_space_map.remove(page_id)
         metadata.pages = valid_pages
+        metadata.reindex_pages()
 
         if removed_pages > 0:
             self.logger.info(f"Cleaned up {removed_pages} invalid pages for table '{table_name}'")
@@ -326,10 +482,23 @@ class TableStorage:
                 json.dump(catalog_data, f, indent=2, ensure_ascii=False)
 
             os.replace(temp_file, self.catalog_file)
+            self._catalog_dirty = False
 
         except Exception as e:
             self.logger.error(f"Failed to save table storage catalog: {e}")
 
+    def flush_catalog(self) -> bool:
+        """
+        把页写入累积的FSM变化写回目录
+
+        Returns:
+            bool: 是否写出了目录（没有未保存的变化时返回False）
+        """
+        if not self._catalog_dirty:
+            return False
+        self._save_catalog()
+        return True
+
     def shutdown(self):
         """关闭表存储管理器"""
         try:
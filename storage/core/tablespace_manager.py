@@ -3,7 +3,7 @@ import json
 import time
 from typing import Dict, List, Optional
 from ..utils.exceptions import StorageException
-from ..utils.constants import PAGE_SIZE
+from ..utils.constants import PAGE_SIZE, SUPPORTED_PAGE_SIZES, validate_page_size
 
 
 class TablespaceManager:
@@ -50,17 +50,28 @@ class TablespaceManager:
                 "file_path": default_file,
                 "size_mb": 100,
                 "used_mb": 0,
+                "page_size": PAGE_SIZE,
                 "created_time": time.time(),
                 "is_default": True,
                 "status": "active"
             }
             self._save_metadata()
 
-    def create_tablespace(self, name: str, file_path: str = None, size_mb: int = 100) -> bool:
-        """创建新的表空间"""
+    def create_tablespace(self, name: str, file_path: str = None, size_mb: int = 100,
+                          page_size: int = PAGE_SIZE) -> bool:
+        """
+        创建新的表空间
+
+        页大小在创建时确定并记录在元数据中，之后不能修改：
+        分析型表可以使用较大的页（系统调用更少、B+树扇出更高），OLTP表保持4KB。
+        """
         if name in self.tablespaces:
             raise StorageException(f"Tablespace '{name}' already exists")
 
+        if not validate_page_size(page_size):
+            raise StorageException(f"Invalid page size {page_size} for tablespace '{name}', "
+                                   f"supported sizes: {SUPPORTED_PAGE_SIZES}")
+
         # 如果没有指定文件路径，使用默认路径
         if file_path is None:
             file_path = os.path.join(self.data_dir, f"{name}_tablespace.db")
@@ -71,6 +82,7 @@ class TablespaceManager:
             "file_path": file_path,
             "size_mb": size_mb,
             "used_mb": 0,
+            "page_size": page_size,
             "created_time": time.time(),
             "is_default": False,
             "status": "active"
@@ -103,6 +115,11 @@ class TablespaceManager:
         """获取表空间信息"""
         return self.tablespaces.get(name)
 
+    def get_page_size(self, name: str = "default") -> int:
+        """获取表空间的页大小（旧版本元数据没有记录时为默认页大小）"""
+        tablespace = self.tablespaces.get(name) or self.tablespaces.get("default") or {}
+        return tablespace.get("page_size", PAGE_SIZE)
+
     def list_tablespaces(self) -> List[dict]:
         """列出所有表空间"""
         return list(self.tablespaces.values())
@@ -137,6 +154,13 @@ class TablespaceManager:
 
         return self.tablespaces[name]["file_path"]
 
+    def get_temp_directory(self) -> str:
+        """获取存放排序段等临时文件的目录（位于temp表空间旁，temp不存在时使用数据目录）"""
+        tablespace = self.tablespaces.get("temp")
+        if tablespace is None:
+            return os.path.join(self.data_dir, "temp_files")
+        return os.path.join(os.path.dirname(tablespace["file_path"]) or self.data_dir, "temp_files")
+
     def choose_tablespace_for_table(self, table_name: str) -> str:
         """为表选择合适的表空间（简单策略：使用默认表空间）"""
         # 简单实现：总是返回默认表空间
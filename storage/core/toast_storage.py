@@ -0,0 +1,204 @@
+# storage/core/toast_storage.py
+"""
+行外存储（TOAST）
+
+记录超过表页大小的 1/TOAST_TUPLE_THRESHOLD_RATIO 时，从最长的VARCHAR开始把值移到表的溢出页链中，
+记录里只保留 ToastPointer，直到记录不超过阈值。溢出值先尝试zlib压缩（zlib可选）。
+溢出页与表的数据页在同一表空间，页大小相同。
+
+溢出页格式：页头 <HHI>（格式标记、本页数据字节数、下一页页号，链尾为 OVERFLOW_END_OF_CHAIN）+ 数据。
+溢出页不在表的页列表中，顺序扫描不会读到；只有真正需要这一列的值时才沿链读取。
+
+事务中新建的页链在回滚时释放；事务中不再引用的页链在提交后才释放，回滚恢复的记录仍能读到原值。
+"""
+
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import zlib
+    ZLIB_AVAILABLE = True
+except ImportError:
+    ZLIB_AVAILABLE = False
+
+from ..utils.constants import (PAGE_SIZE, TOAST_TUPLE_THRESHOLD_RATIO, TOAST_MIN_VALUE_SIZE,
+                               TOAST_COMPRESSION_ENABLED, TOAST_COMPRESSION_MIN_SIZE)
+from ..utils.exceptions import StorageException
+from ..utils.logger import get_logger
+from ..utils.serializer import RecordCodec, ToastPointer
+
+# 溢出页页头：格式标记、本页数据字节数、下一页页号
+OVERFLOW_PAGE_HEADER = struct.Struct('<HHI')
+OVERFLOW_PAGE_MAGIC = 0x544F
+OVERFLOW_END_OF_CHAIN = 0xFFFFFFFF
+
+# 默认页大小下每个溢出页可存放的数据字节数
+OVERFLOW_PAGE_CAPACITY = PAGE_SIZE - OVERFLOW_PAGE_HEADER.size
+
+
+class ToastStorage:
+    """按表管理溢出页链：写入、读取和释放行外存储的值"""
+
+    def __init__(self, table_storage, transaction_manager=None,
+                 compression: bool = TOAST_COMPRESSION_ENABLED):
+        self.table_storage = table_storage
+        self.transaction_manager = transaction_manager
+        self.compression = compression and ZLIB_AVAILABLE
+        self.logger = get_logger("toast_storage")
+
+        # 事务中新建的溢出页：事务ID -> [(表名, 页号列表)]（回滚会恢复这些页的内容，不能再沿链查找）
+        self._created: Dict[int, List[Tuple[str, List[int]]]] = {}
+        # 事务中不再引用的页链：事务ID -> [(表名, 指针)]
+        self._released: Dict[int, List[Tuple[str, ToastPointer]]] = {}
+
+        # 统计信息
+        self.values_stored = 0
+        self.values_fetched = 0
+
+    def toast_record(self, table_name: str, codec: RecordCodec, record: Dict[str, Any],
+                     txn_id: Optional[int] = None) -> bytes:
+        """
+        序列化记录，超过阈值时把最长的VARCHAR依次移到溢出页
+
+        已经是 ToastPointer 的值原样保留；不修改传入的 record。
+        """
+        data = codec.encode(record)
+        threshold = self.table_storage.get_page_size(table_name) // TOAST_TUPLE_THRESHOLD_RATIO
+        if len(data) <= threshold:
+            return data
+
+        record = dict(record)
+
+        candidates = []
+        for col_name, max_bytes in codec.varchar_limits.items():
+            value = record.get(col_name)
+            if value is None or type(value) is ToastPointer:
+                continue
+            raw = str(value).encode('utf-8')[:max_bytes]
+            if len(raw) >= TOAST_MIN_VALUE_SIZE:
+                candidates.append((len(raw), col_name, raw))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        for _, col_name, raw in candidates:
+            record[col_name] = self.store(table_name, raw, txn_id)
+            data = codec.encode(record)
+            if len(data) <= threshold:
+                break
+
+        return data
+
+    def store(self, table_name: str, raw: bytes, txn_id: Optional[int] = None) -> ToastPointer:
+        """把值写入新的溢出页链，返回指针"""
+        stored = raw
+        compressed = False
+        if self.compression and len(raw) >= TOAST_COMPRESSION_MIN_SIZE:
+            packed = zlib.compress(raw, 1)
+            if len(packed) < len(raw):
+                stored = packed
+                compressed = True
+
+        page_size = self.table_storage.get_page_size(table_name)
+        capacity = page_size - OVERFLOW_PAGE_HEADER.size
+        chunk_count = max(1, -(-len(stored) // capacity))
+        page_ids = [self.table_storage.allocate_overflow_page(table_name) for _ in range(chunk_count)]
+
+        for i, page_id in enumerate(page_ids):
+            chunk = stored[i * capacity:(i + 1) * capacity]
+            next_page_id = page_ids[i + 1] if i + 1 < len(page_ids) else OVERFLOW_END_OF_CHAIN
+            page_data = OVERFLOW_PAGE_HEADER.pack(OVERFLOW_PAGE_MAGIC, len(chunk), next_page_id) + chunk
+            page_data += b'\x00' * (page_size - len(page_data))
+
+            if txn_id is not None:
+                # 新页的undo为空页，提交时随事务的其他页一起刷盘
+                if not self.transaction_manager.prepare_write(txn_id, page_id):
+                    raise StorageException(f"Failed to acquire write lock on overflow page {page_id}")
+                self.transaction_manager.record_write(txn_id, page_id, page_data)
+            self.table_storage.write_overflow_page(table_name, page_id, page_data)
+
+        if txn_id is not None:
+            self._created.setdefault(txn_id, []).append((table_name, page_ids))
+        pointer = ToastPointer(page_ids[0], len(raw), len(stored), compressed)
+        self.values_stored += 1
+        return pointer
+
+    def fetch(self, table_name: str, pointer: ToastPointer) -> str:
+        """沿页链读回行外存储的值"""
+        stored = b''.join(chunk for _, chunk in self._read_chain(table_name, pointer))
+        if len(stored) != pointer.stored_length:
+            raise StorageException(f"Overflow value at page {pointer.first_page_id} of table '{table_name}' "
+                                   f"is truncated ({len(stored)} of {pointer.stored_length} bytes)")
+
+        if pointer.compressed:
+            if not ZLIB_AVAILABLE:
+                raise StorageException("zlib is required to read compressed overflow values")
+            stored = zlib.decompress(stored)
+
+        self.values_fetched += 1
+        return stored.decode('utf-8', 'replace')
+
+    def detoast_record(self, table_name: str, record: Dict[str, Any],
+                       columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """把记录中的 ToastPointer 替换为原值（原地修改并返回）；指定 columns 时只处理这些列"""
+        for col_name in (list(record) if columns is None else columns):
+            value = record.get(col_name)
+            if type(value) is ToastPointer:
+                record[col_name] = self.fetch(table_name, value)
+        return record
+
+    def detoast_values(self, table_name: str, values: List[Any]):
+        """把一列值中的 ToastPointer 替换为原值（原地修改）"""
+        for i, value in enumerate(values):
+            if type(value) is ToastPointer:
+                values[i] = self.fetch(table_name, value)
+
+    def release(self, table_name: str, pointer: ToastPointer, txn_id: Optional[int] = None):
+        """记录不再引用该值时释放页链；事务中推迟到提交后释放"""
+        if txn_id is not None:
+            self._released.setdefault(txn_id, []).append((table_name, pointer))
+        else:
+            self._free_chain(table_name, pointer)
+
+    def release_record(self, table_name: str, record: Dict[str, Any], txn_id: Optional[int] = None):
+        """释放记录引用的所有页链"""
+        for value in record.values():
+            if type(value) is ToastPointer:
+                self.release(table_name, value, txn_id)
+
+    def end_transaction(self, txn_id: int, committed: bool):
+        """事务结束：提交时释放不再引用的页链，回滚时释放事务中新建的页链"""
+        created = self._created.pop(txn_id, [])
+        released = self._released.pop(txn_id, [])
+        for table_name, chain in (released if committed else created):
+            try:
+                if committed:
+                    self._free_chain(table_name, chain)
+                elif self.table_storage.table_exists(table_name):
+                    self.table_storage.free_overflow_pages(table_name, chain)
+            except Exception as e:
+                self.logger.warning(f"Failed to free overflow pages of table '{table_name}' "
+                                    f"after transaction {txn_id}: {e}")
+
+    def _read_chain(self, table_name: str, pointer: ToastPointer):
+        """依次产出 (页号, 本页数据)"""
+        page_id = pointer.first_page_id
+        while page_id != OVERFLOW_END_OF_CHAIN:
+            page_data = self.table_storage.read_overflow_page(table_name, page_id)
+            magic, length, next_page_id = OVERFLOW_PAGE_HEADER.unpack_from(page_data)
+            if magic != OVERFLOW_PAGE_MAGIC:
+                raise StorageException(f"Page {page_id} of table '{table_name}' is not an overflow page")
+            yield page_id, page_data[OVERFLOW_PAGE_HEADER.size:OVERFLOW_PAGE_HEADER.size + length]
+            page_id = next_page_id
+
+    def _free_chain(self, table_name: str, pointer: ToastPointer):
+        if not self.table_storage.table_exists(table_name):
+            # 表已删除，溢出页随表一起释放
+            return
+        page_ids = [page_id for page_id, _ in self._read_chain(table_name, pointer)]
+        self.table_storage.free_overflow_pages(table_name, page_ids)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            'compression': self.compression,
+            'values_stored': self.values_stored,
+            'values_fetched': self.values_fetched,
+        }
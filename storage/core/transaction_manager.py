@@ -285,6 +285,10 @@ class TransactionManager:
             for page_id in txn.modified_pages:
                 self.storage_manager.flush_page(page_id)
 
+            # 有WAL时由日志保证持久性，数据文件在检查点时同步；没有WAL时提交前同步
+            if not self.wal_enabled and hasattr(self.storage_manager, 'sync_data_files'):
+                self.storage_manager.sync_data_files()
+
             # 标记为已提交
             txn.state = TransactionState.COMMITTED
             txn.end_time = time.time()
@@ -8,7 +8,7 @@ import json
 import time
 import threading
 from pathlib import Path
-from typing import Optional, Dict, List, Set
+from typing import Optional, Dict, List, Set, Callable
 from dataclasses import dataclass, asdict
 
 from .log_record import LogRecord, LogRecordType
@@ -57,7 +57,8 @@ class CheckpointManager:
                  wal_dir: str = "data/wal",
                  checkpoint_interval: int = 1000,  # 每1000条记录做一次检查点
                  checkpoint_timeout: int = 300,  # 每5分钟强制检查点
-                 enable_auto_checkpoint: bool = True):
+                 enable_auto_checkpoint: bool = True,
+                 sync_callback: Optional[Callable[[], int]] = None):
         """
         初始化检查点管理器
 
@@ -67,12 +68,14 @@ class CheckpointManager:
             checkpoint_interval: 检查点间隔（记录数）
             checkpoint_timeout: 检查点超时（秒）
             enable_auto_checkpoint: 是否启用自动检查点
+            sync_callback: 写检查点记录前同步数据文件的回调（数据页写入本身不 fsync）
         """
         self.writer = writer
         self.wal_dir = Path(wal_dir)
         self.checkpoint_interval = checkpoint_interval
         self.checkpoint_timeout = checkpoint_timeout
         self.enable_auto_checkpoint = enable_auto_checkpoint
+        self.sync_callback = sync_callback
 
         # 检查点元数据文件
         self.metadata_file = self.wal_dir / "checkpoint.json"
@@ -251,6 +254,10 @@ class CheckpointManager:
             self.logger.info("Creating checkpoint")
             start_time = time.time()
 
+            # 检查点之前写出的数据页先落盘
+            if self.sync_callback:
+                self.sync_callback()
+
             # 获取当前LSN
             current_lsn = self.writer.total_records_written
 
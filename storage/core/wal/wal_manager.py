@@ -101,7 +101,8 @@ class WALManager:
             self.checkpoint_manager = CheckpointManager(
                 self.writer,
                 str(self.wal_dir),
-                checkpoint_interval=checkpoint_interval
+                checkpoint_interval=checkpoint_interval,
+                sync_callback=self._sync_data_files
             )
 
             # 性能计时器
@@ -375,12 +376,23 @@ class WALManager:
                 len(metadata.dirty_pages)
             )
 
+    def _sync_data_files(self) -> int:
+        """检查点前同步存储管理器已写出的数据文件"""
+        if self.storage_manager is None or not hasattr(self.storage_manager, 'sync_data_files'):
+            return 0
+        return self.storage_manager.sync_data_files()
+
     def flush(self):
         """强制刷新所有待写入的日志"""
         if self.enable_wal and self.writer:
             bytes_flushed = self.writer.flush()
             self.logger.debug(f"Flushed {bytes_flushed} bytes to disk")
 
+    def flush_pending(self):
+        """数据页写回磁盘前调用：批次中还有未写出的日志时先刷新，保证日志先于数据页落盘"""
+        if self.enable_wal and self.writer and not self.writer.batch.is_empty():
+            self.flush()
+
     def _get_next_lsn(self) -> int:
         """获取下一个LSN"""
         with self.lsn_lock:
@@ -0,0 +1,90 @@
+"""
+哈希聚合测试
+测试分组数超过预算时溢出到磁盘分区，结果与全部在内存中聚合一致
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 导入待测试的模块
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from engine.aggregation import Accumulator, HashAggregator
+
+AGGREGATES = [('COUNT', '*'), ('COUNT', 'DISTINCT v'), ('SUM', 'DISTINCT v'), ('SUM', 'v'),
+              ('AVG', 'v'), ('MIN', 'v'), ('MAX', 'v')]
+
+
+class TestHashAggregator(unittest.TestCase):
+    """哈希聚合测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        rng = random.Random(11)
+        # 每个分组的值都有重复，同一分组的行分散在整个输入中
+        self.rows = [{"g": rng.randrange(40), "v": rng.randrange(6)} for _ in range(2000)]
+        self.rows += [{"g": None, "v": 1}, {"g": 5, "v": None}]
+
+    def tearDown(self):
+        """测试后清理"""
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def _aggregate(self, **kwargs):
+        aggregator = HashAggregator(["g"], AGGREGATES, **kwargs)
+        for row in self.rows:
+            aggregator.add_row(row)
+        results = {row["g"]: row for row in aggregator.results()}
+        return aggregator, results
+
+    def test_01_spill_matches_in_memory(self):
+        """测试溢出后的分组结果与不溢出时相同"""
+        print("测试1: 溢出分组")
+
+        in_memory, expected = self._aggregate()
+        self.assertEqual(in_memory.spilled_rows, 0)
+        self.assertEqual(len(expected), 41)
+
+        spill_dir = os.path.join(self.temp_dir, "spill")
+        spilled, results = self._aggregate(max_groups=3, spill_partitions=4, temp_dir=spill_dir)
+        self.assertGreater(spilled.spilled_rows, 0)
+        self.assertEqual(results, expected)
+        # 溢出文件放在指定的临时目录
+        self.assertTrue(os.path.isdir(spill_dir))
+
+        # 分区仍然超出预算时再分区
+        _, results = self._aggregate(max_groups=1, spill_partitions=2, temp_dir=spill_dir)
+        self.assertEqual(results, expected)
+
+        print("✓ 溢出分组正常")
+
+    def test_02_distinct_across_partitions(self):
+        """测试DISTINCT聚合在溢出分区中每个值只计一次"""
+        print("测试2: 溢出分区中的DISTINCT")
+
+        _, results = self._aggregate(max_groups=2, spill_partitions=4, temp_dir=self.temp_dir)
+        for group, row in results.items():
+            values = {r["v"] for r in self.rows if r["g"] == group and r["v"] is not None}
+            self.assertEqual(row["COUNT(DISTINCT v)"], len(values))
+            self.assertEqual(row["SUM(DISTINCT v)"], sum(values))
+            self.assertEqual(row["COUNT(*)"], sum(1 for r in self.rows if r["g"] == group))
+
+        print("✓ 溢出分区中的DISTINCT正常")
+
+    def test_03_accumulator_is_abstract(self):
+        """测试累加器基类不能直接实例化"""
+        print("测试3: 抽象累加器")
+
+        with self.assertRaises(TypeError):
+            Accumulator()
+
+        print("✓ 抽象累加器正常")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,8 +12,8 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from storage.core.buffer_pool import BufferPool
-from storage.utils.exceptions import BufferPoolException
-from storage.utils.constants import PAGE_SIZE
+from storage.utils.exceptions import BufferPoolException, BufferFullException
+from storage.utils.constants import PAGE_SIZE, MAX_CACHE_SIZE
 
 
 class TestBufferPool(unittest.TestCase):
@@ -164,5 +164,261 @@ class TestBufferPool(unittest.TestCase):
         print("✓ 刷新操作正常")
 
 
+    def test_07_pool_size_in_bytes(self):
+        """测试按字节指定缓存池大小"""
+        print("测试7: 按字节指定缓存池大小")
+
+        pool = BufferPool(pool_size="8MB")
+        self.assertEqual(pool.capacity, 8 * 1024 * 1024 // PAGE_SIZE)
+        self.assertGreater(pool.capacity, MAX_CACHE_SIZE)  # 不再受旧的页数上限限制
+        self.assertEqual(pool.get_statistics()['pool_size_bytes'], 8 * 1024 * 1024)
+
+        # 较大的页占用多个帧，不足一帧的数据按原长度返回
+        big_page = bytes(range(256)) * (16384 // 256)
+        pool.put(1, big_page, is_dirty=True)
+        pool.put(2, b"short")
+        self.assertEqual(pool.get(1), big_page)
+        self.assertEqual(pool.get(2), b"short")
+        self.assertEqual(pool.get_statistics()['used_bytes'], 16384 + PAGE_SIZE)
+
+        # 同一页换成不同大小的数据
+        pool.put(1, self.test_data_1)
+        self.assertEqual(pool.get(1), self.test_data_1)
+        self.assertEqual(pool.get_dirty_pages(), {1: self.test_data_1})
+
+        with self.assertRaises(BufferPoolException):
+            BufferPool(pool_size=PAGE_SIZE)
+        with self.assertRaises(BufferPoolException):
+            BufferPool(pool_size="lots")
+
+        print("✓ 按字节指定缓存池大小正常")
+
+    def test_08_resize(self):
+        """测试在线调整缓存池大小"""
+        print("测试8: 在线调整缓存池大小")
+
+        pages = {i: bytes([i]) * PAGE_SIZE for i in range(1, 11)}
+        for page_id, data in pages.items():
+            self.buffer_pool.put(page_id, data, is_dirty=page_id % 2 == 0)
+
+        # 扩大后原有页保持不变，可以放入更多页
+        self.assertEqual(self.buffer_pool.resize(pool_size=20 * PAGE_SIZE), {})
+        self.assertEqual(self.buffer_pool.capacity, 20)
+        self.buffer_pool.put(11, b"\x0b" * PAGE_SIZE)
+        self.assertEqual(self.buffer_pool.get_statistics()['eviction_count'], 0)
+
+        # 缩小时淘汰的脏页交给调用方写回，剩余的页内容不变
+        self.buffer_pool.remove(3)
+        evicted = self.buffer_pool.resize(6)
+        self.assertEqual(self.buffer_pool.capacity, 6)
+        self.assertEqual(self.buffer_pool.get_statistics()['cache_size'], 6)
+        for page_id, data in evicted.items():
+            self.assertEqual(data, pages[page_id])
+            self.assertEqual(page_id % 2, 0)
+        for page_id in range(1, 11):
+            data = self.buffer_pool.get(page_id)
+            if data is not None:
+                self.assertEqual(data, pages[page_id])
+
+        with self.assertRaises(BufferPoolException):
+            self.buffer_pool.resize(2)
+
+        print("✓ 在线调整缓存池大小正常")
+
+
+    def test_09_replacement_policy(self):
+        """测试替换策略只管理帧号，缩小整理帧区后淘汰顺序不变"""
+        print("测试9: 替换策略")
+
+        fifo = BufferPool(capacity=10, policy="FIFO")
+        for page_id in range(1, 11):
+            fifo.put(page_id, bytes([page_id]) * PAGE_SIZE)
+        fifo.get(1)  # FIFO 命中不改变顺序
+        fifo.put(11, b"\x0b" * PAGE_SIZE)
+        self.assertNotIn(1, fifo.cache)
+        self.assertIn(11, fifo.cache)
+
+        with self.assertRaises(BufferPoolException):
+            BufferPool(capacity=10, policy="RANDOM")
+
+        # 多帧页和单帧页混合，整理帧区后页内容、脏标记和LRU顺序保持不变
+        lru = BufferPool(capacity=20, policy="LRU")
+        pages = {}
+        for page_id in range(1, 9):
+            pages[page_id] = bytes([page_id]) * (2 * PAGE_SIZE if page_id % 2 else PAGE_SIZE)
+            lru.put(page_id, pages[page_id], is_dirty=page_id == 7)
+        lru.remove(1)
+        lru.remove(2)
+        lru.get(3)
+        order = lru.get_cache_info()['lru_order']
+        self.assertEqual(order, [4, 5, 6, 7, 8, 3])
+
+        lru.resize(11)
+        self.assertEqual(lru.get_cache_info()['lru_order'], order)
+        self.assertEqual(lru.cache[7][1], True)
+        self.assertEqual(lru.cache[5][0], 2 * PAGE_SIZE)
+        for page_id in order:
+            self.assertEqual(lru.peek(page_id)[0], pages[page_id])
+
+        print("✓ 替换策略正常")
+
+    def test_10_pin_and_write_back(self):
+        """测试固定的页不被淘汰，淘汰的脏页经回调写回"""
+        print("测试10: 页固定和脏页写回")
+
+        written = {}
+        pool = BufferPool(capacity=10, write_back=lambda page_id, data: written.__setitem__(page_id, data))
+        for page_id in range(1, 11):
+            pool.put(page_id, bytes([page_id]) * PAGE_SIZE, is_dirty=page_id % 2 == 0)
+
+        # 通过 fetch 返回的视图直接修改缓存中的页
+        view = pool.fetch(1)
+        view[:5] = b"fetch"
+        pool.unpin(1, dirty=True)
+        self.assertEqual(pool.peek(1), (b"fetch" + b"\x01" * (PAGE_SIZE - 5), True))
+        with self.assertRaises(BufferPoolException):
+            pool.unpin(1)
+
+        # 页1、2被固定，淘汰跳过它们；淘汰的脏页写回后才释放帧
+        pool.fetch(1)
+        pool.fetch(2)
+        for page_id in range(11, 15):
+            pool.put(page_id, bytes([page_id]) * PAGE_SIZE)
+        self.assertIn(1, pool.cache)
+        self.assertIn(2, pool.cache)
+        self.assertEqual(sorted(written), [4, 6])
+        self.assertEqual(written[4], b"\x04" * PAGE_SIZE)
+        stats = pool.get_statistics()
+        self.assertEqual(stats['writeback_count'], 2)
+        self.assertEqual(stats['pinned_pages'], 2)
+
+        # 固定的页不能移出，有固定页时不能调整大小
+        with self.assertRaises(BufferPoolException):
+            pool.remove(1)
+        with self.assertRaises(BufferPoolException):
+            pool.resize(20)
+
+        # 所有页都被固定时无法放入新页
+        for page_id in list(pool.cache):
+            if not pool.is_pinned(page_id):
+                pool.fetch(page_id)
+        with self.assertRaises(BufferFullException):
+            pool.put(99, b"\x63" * PAGE_SIZE)
+        for page_id in list(pool.cache):
+            while pool.is_pinned(page_id):
+                pool.unpin(page_id)
+        pool.put(99, b"\x63" * PAGE_SIZE)
+        self.assertIn(99, pool.cache)
+
+        # 多帧页固定期间修改副本，unpin 时写回各帧
+        pool.resize(20)
+        view = pool.fetch(50, loader=lambda page_id: b"\x32" * (2 * PAGE_SIZE))
+        view[-4:] = b"tail"
+        self.assertEqual(pool.peek(50)[0][-4:], b"\x32" * 4)
+        pool.unpin(50, dirty=True)
+        self.assertEqual(pool.peek(50), (b"\x32" * (2 * PAGE_SIZE - 4) + b"tail", True))
+
+        print("✓ 页固定和脏页写回正常")
+
+    def _hot_misses(self, pool):
+        """顺序扫描100页，每读20页访问一轮热页1-5；返回预热之后热页未命中的次数"""
+        misses = 0
+        for round_no in range(3):
+            for i, page_id in enumerate(range(100, 200)):
+                if i % 20 == 0:
+                    for hot_page in list(range(1, 6)) * 3:
+                        if pool.get(hot_page) is None:
+                            pool.put(hot_page, bytes([hot_page]) * PAGE_SIZE)
+                            misses += round_no > 0
+                if pool.get(page_id) is None:
+                    pool.put(page_id, b"\x00" * PAGE_SIZE)
+        return misses
+
+    def test_11_scan_resistant_policies(self):
+        """测试2Q、LRU-K、CLOCK在顺序扫描中保留热页"""
+        print("测试11: 抗扫描替换策略")
+
+        # LRU 下顺序扫描会不断挤出热页
+        self.assertGreater(self._hot_misses(BufferPool(capacity=20, policy="LRU")), 0)
+
+        names = {"2Q": "TwoQPolicy", "LRU-K": "LRUKPolicy", "CLOCK": "ClockPolicy"}
+        for policy, class_name in names.items():
+            pool = BufferPool(capacity=20, policy=policy)
+            self.assertEqual(self._hot_misses(pool), 0, policy)
+            self.assertEqual(pool.get_statistics()['replacement_policy'], class_name)
+
+            # 固定的页不被淘汰
+            pool.fetch(199)
+            for page_id in range(200, 240):
+                pool.put(page_id, b"\x00" * PAGE_SIZE)
+            self.assertIn(199, pool.cache, policy)
+            pool.unpin(199)
+
+            # 整理帧区后替换策略中的帧与页表一致
+            pool.remove(239)
+            self.assertEqual(len(pool.get_cache_info()['lru_order']), len(pool.cache))
+            pool.resize(19)
+            self.assertEqual(sorted(pool.get_cache_info()['lru_order']),
+                             sorted(pool.cache), policy)
+            for page_id in range(300, 340):
+                pool.put(page_id, b"\x00" * PAGE_SIZE)
+            self.assertEqual(len(pool.cache), 19, policy)
+
+        print("✓ 抗扫描替换策略正常")
+
+    def test_12_scan_ring(self):
+        """测试顺序扫描通过环形缓冲区只占用少量帧"""
+        print("测试12: 顺序扫描环形缓冲区")
+
+        pool = BufferPool(capacity=80, policy="LRU")
+        for page_id in range(1, 11):
+            pool.put(page_id, bytes([page_id]) * PAGE_SIZE)
+
+        ring = pool.create_ring()
+        self.assertEqual(ring.size, 10)  # 不超过缓存池的1/8
+        for page_id in range(100, 200):
+            if pool.get(page_id) is None:
+                pool.put_ring(page_id, b"\x00" * PAGE_SIZE, ring)
+            if page_id == 150:
+                pool.mark_dirty(page_id)
+
+        # 热页都还在，扫描只占用环大小的帧；被修改的页留在缓存中
+        for page_id in range(1, 11):
+            self.assertIn(page_id, pool.cache)
+        self.assertEqual(len(pool.cache), 10 + ring.size + 1)
+        self.assertIn(150, pool.cache)
+        self.assertEqual(ring.reuse_count, 89)
+        self.assertEqual(pool.get_statistics()['eviction_count'], 0)
+
+        print("✓ 顺序扫描环形缓冲区正常")
+
+    def test_13_flush_candidates(self):
+        """测试按淘汰顺序和变脏先后选出提前写出的脏页"""
+        print("测试13: 提前写出的脏页")
+
+        pool = BufferPool(capacity=10, policy="LRU")
+        for page_id in range(1, 9):
+            pool.put(page_id, bytes([page_id]) * PAGE_SIZE, is_dirty=page_id != 2)
+        pool.put(1, b"\x01" * PAGE_SIZE, is_dirty=True)  # 已是脏页，变脏顺序不变
+        pool.mark_dirty(2)  # 最后变脏
+        pool.fetch(3)
+
+        # 淘汰顺序最前的4页是2、4、5、6（固定的3被跳过），按变脏先后返回
+        self.assertEqual(pool.get_flush_candidates(10, scan_depth=4), [4, 5, 6, 2])
+        self.assertEqual(pool.get_flush_candidates(2, scan_depth=4), [4, 5])
+        self.assertEqual(pool.get_flush_candidates(3, oldest=True), [1, 4, 5])
+        self.assertEqual(pool.get_flush_candidates(10, scan_depth=2, oldest=True), [1, 4, 5, 6, 7, 8, 2])
+
+        # 清除脏标记后再变脏排到最后；整理帧区后变脏顺序保持
+        pool.clear_dirty_flag(1)
+        pool.mark_dirty(1)
+        pool.unpin(3)
+        pool.remove(8)
+        pool.resize(8)
+        self.assertEqual(pool.get_flush_candidates(10, oldest=True), [3, 4, 5, 6, 7, 2, 1])
+
+        print("✓ 提前写出的脏页正常")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
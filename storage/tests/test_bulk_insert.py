@@ -0,0 +1,126 @@
+"""
+批量插入测试
+测试跨越大量页的批量插入不会覆盖表已占用的页
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 导入待测试的模块
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from catalog.catalog_manager import CatalogManager
+from engine.storage_engine import StorageEngine
+from storage.core.storage_manager import StorageManager
+from storage.core.table_storage import TableStorage
+from storage.utils.exceptions import StorageException
+
+
+class TestBulkInsert(unittest.TestCase):
+    """批量插入测试类"""
+
+    ROW_COUNT = 20000
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self._open()
+
+    def _open(self):
+        self.storage_manager = StorageManager(
+            buffer_size=64,
+            data_file=os.path.join(self.temp_dir, "test_bulk.db"),
+            meta_file=os.path.join(self.temp_dir, "test_bulk_meta.json"),
+            auto_flush_interval=0
+        )
+        self.table_storage = TableStorage(self.storage_manager, os.path.join(self.temp_dir, "test_bulk_catalog.json"))
+        self.catalog = CatalogManager(os.path.join(self.temp_dir, "test_bulk_system_catalog.json"))
+        self.engine = StorageEngine(self.storage_manager, self.table_storage, self.catalog)
+
+    def _close(self):
+        self.engine.shutdown()
+        self.table_storage.shutdown()
+        if not self.storage_manager.is_shutdown:
+            self.storage_manager.shutdown()
+
+    def tearDown(self):
+        """测试后清理"""
+        self._close()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def test_01_bulk_load_many_pages(self):
+        """测试超过100页的批量插入"""
+        print("测试1: 多页批量插入")
+
+        columns = [("id", "INT", []), ("name", "VARCHAR(50)", [])]
+        self.catalog.create_table("user_data", columns)
+        self.engine.create_table("user_data", [{"name": n, "type": t} for n, t, _ in columns])
+
+        rows = [[i, f"name-{i:06d}"] for i in range(self.ROW_COUNT)]
+        self.assertEqual(self.engine.insert_rows("user_data", rows), self.ROW_COUNT)
+
+        # 表的页号互不相同，且都不是溢出页
+        pages = self.table_storage.get_table_pages("user_data")
+        self.assertGreater(len(pages), 100)
+        self.assertEqual(len(set(pages)), len(pages))
+
+        ids = sorted(row["id"] for row in self.engine.scan_rows("user_data"))
+        self.assertEqual(ids, list(range(self.ROW_COUNT)))
+
+        # 重启后行数不变
+        self._close()
+        self._open()
+        self.assertEqual(sum(1 for _ in self.engine.scan_rows("user_data")), self.ROW_COUNT)
+
+        print("✓ 多页批量插入正常")
+
+    def test_02_reject_owned_page(self):
+        """测试分配器返回表已占用的页时拒绝写入"""
+        print("测试2: 拒绝重复页")
+
+        self.table_storage.create_table_storage("dup_table", 128)
+        first_page = self.table_storage.get_table_pages("dup_table")[0]
+        page_data = self.table_storage.read_table_page("dup_table", 0)
+
+        original_allocate = self.storage_manager.allocate_page
+        self.storage_manager.allocate_page = lambda *args, **kwargs: first_page
+        try:
+            with self.assertRaises(StorageException):
+                self.table_storage.allocate_table_page("dup_table")
+        finally:
+            self.storage_manager.allocate_page = original_allocate
+
+        # 已有页未被覆盖
+        self.assertEqual(self.table_storage.get_table_pages("dup_table"), [first_page])
+        self.assertEqual(self.table_storage.read_table_page("dup_table", 0), page_data)
+
+        print("✓ 拒绝重复页正常")
+
+    def test_03_new_page_must_be_appended(self):
+        """测试新页没有追加到表末尾时插入报错而不是覆盖已有页"""
+        print("测试3: 新页必须追加")
+
+        columns = [("id", "INT", []), ("name", "VARCHAR(50)", [])]
+        self.catalog.create_table("user_data", columns)
+        self.engine.create_table("user_data", [{"name": n, "type": t} for n, t, _ in columns])
+        self.engine.insert_rows("user_data", [[1, "first"]])
+        first_page = self.table_storage.get_table_pages("user_data")[0]
+
+        # 模拟返回已有页的分配器，页放满后的插入必须失败
+        self.table_storage.allocate_table_page = lambda table_name: first_page
+        with self.assertRaises(StorageException):
+            self.engine.insert_rows("user_data", [[i, "x" * 40] for i in range(2, 2000)])
+        with self.assertRaises(StorageException):
+            self.engine.insert_row("user_data", [2000, "x" * 40])
+
+        self.assertEqual([row["id"] for row in self.engine.scan_rows("user_data")], [1])
+
+        print("✓ 新页必须追加正常")
+
+
+if __name__ == "__main__":
+    unittest.main()
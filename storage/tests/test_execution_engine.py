@@ -0,0 +1,650 @@
+"""
+执行引擎测试
+测试事务中的 DELETE 可以回滚、查询只读取用到的行外存储列、流水线按需拉取行、跟踪随级别开关、
+批处理与逐行结果一致、多行 INSERT，以及SQL级别的连接、分组溢出和 LIMIT/OFFSET
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+# 导入待测试的模块
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from catalog.catalog_manager import CatalogManager
+from engine.execution_engine import ExecutionEngine
+from engine.storage_engine import StorageEngine
+from sql_compiler.codegen.operators import (FilterOp, SeqScanOp, ProjectOp, GroupByOp, OrderByOp, JoinOp,
+                                            SortMergeJoinOp, LimitOp, TopNOp, InsertOp)
+from sql_compiler.exceptions.compiler_errors import SemanticError
+from sql_compiler.codegen.plan_generator import PlanGenerator
+from sql_compiler.lexer.lexical_analyzer import LexicalAnalyzer
+from sql_compiler.parser.ast_nodes import BinaryExpr, IdentifierExpr, LiteralExpr, InsertStmt
+from sql_compiler.parser.syntax_analyzer import SyntaxAnalyzer
+from sql_compiler.semantic.semantic_analyzer import SemanticAnalyzer
+from storage.core.storage_manager import StorageManager
+from storage.core.table_storage import TableStorage
+from storage.utils.serializer import ToastPointer
+
+
+class ExecutionEngineTestCase(unittest.TestCase):
+    """执行引擎测试基类：临时目录中的存储、catalog 和执行引擎"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage_manager = StorageManager(
+            buffer_size=16,
+            data_file=os.path.join(self.temp_dir, "test_dml.db"),
+            meta_file=os.path.join(self.temp_dir, "test_dml_meta.json"),
+            auto_flush_interval=0
+        )
+        self.table_storage = TableStorage(self.storage_manager, os.path.join(self.temp_dir, "test_dml_catalog.json"))
+        self.catalog = CatalogManager(os.path.join(self.temp_dir, "test_dml_system_catalog.json"))
+        self.storage_engine = StorageEngine(self.storage_manager, self.table_storage, self.catalog)
+        self.engine = ExecutionEngine(self.storage_engine, self.catalog)
+        self.engine.set_transaction_manager(self.storage_engine.transaction_manager)
+
+    def tearDown(self):
+        """测试后清理"""
+        self.storage_engine.shutdown()
+        self.table_storage.shutdown()
+        if not self.storage_manager.is_shutdown:
+            self.storage_manager.shutdown()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    @staticmethod
+    def _parse(sql):
+        """词法和语法分析一条SQL"""
+        return SyntaxAnalyzer(LexicalAnalyzer(sql).tokenize()).parse()
+
+    def _plan(self, sql, optimize=True):
+        """编译一条SQL：词法、语法、语义分析后生成执行计划"""
+        ast = self._parse(sql)
+        SemanticAnalyzer(self.catalog).analyze(ast)
+        return PlanGenerator(enable_optimization=optimize, silent_mode=True,
+                             catalog_manager=self.catalog).generate(ast)
+
+    def _sql(self, sql, optimize=True):
+        """编译并执行一条SQL，语句自动开始的事务在执行后提交"""
+        result = self.engine.execute_plan(self._plan(sql, optimize))
+        if self.engine.current_transaction_id is not None:
+            self.engine.commit_transaction()
+        return result
+
+
+class TestExecutionEngineDML(ExecutionEngineTestCase):
+    """执行引擎DML测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        columns = [("id", "INT", []), ("name", "VARCHAR(20)", [])]
+        self.catalog.create_table("items", columns)
+        self.storage_engine.create_table("items", [{"name": n, "type": t} for n, t, _ in columns])
+        self.storage_engine.insert_rows("items", [[i, f"item-{i}"] for i in range(10)])
+
+    def _ids(self):
+        return sorted(row["id"] for row in self.storage_engine.scan_rows("items"))
+
+    def test_01_delete_rollback(self):
+        """测试事务中的DELETE回滚后行恢复"""
+        print("测试1: DELETE 回滚")
+
+        self.engine.begin_transaction()
+        plan = FilterOp(BinaryExpr(IdentifierExpr("id"), '<', LiteralExpr(5)), [SeqScanOp("items")])
+        self.assertEqual(self.engine.execute_delete("items", plan), "5 rows deleted")
+        self.assertEqual(self._ids(), [5, 6, 7, 8, 9])
+
+        self.engine.rollback_transaction()
+        self.assertEqual(self._ids(), list(range(10)))
+
+        print("✓ DELETE 回滚正常")
+
+    def _create_docs(self):
+        columns = [("id", "INT", []), ("title", "VARCHAR(20)", []), ("body", "VARCHAR(20000)", [])]
+        self.catalog.create_table("docs", columns)
+        self.storage_engine.create_table("docs", [{"name": n, "type": t} for n, t, _ in columns])
+        self.bodies = {i: ''.join(chr(ord('a') + (i * 7 + j * j) % 26) for j in range(6000)) for i in range(5)}
+        self.storage_engine.insert_rows("docs", [[i, f"doc-{i}", body] for i, body in self.bodies.items()])
+        self.assertTrue(self.table_storage.has_overflow_pages("docs"))
+
+    def _fetched(self, plan):
+        """执行计划，返回 (结果行, 沿溢出页链读取的值个数)"""
+        before = self.storage_engine.toast_storage.values_fetched
+        rows = self.engine.execute_plan(plan)
+        return rows, self.storage_engine.toast_storage.values_fetched - before
+
+    def test_02_fetch_only_used_toast_columns(self):
+        """测试查询只读取用到的行外存储列"""
+        print("测试2: 只读取用到的行外存储列")
+        self._create_docs()
+
+        for batch_mode in (False, True):
+            self.engine.set_batch_mode(batch_mode)
+
+            # 投影、过滤、排序、分组和连接都不读取 body 的溢出页
+            where = BinaryExpr(IdentifierExpr("id"), '<', LiteralExpr(3))
+            plans = [
+                ProjectOp(["id", "title"], [SeqScanOp("docs")]),
+                ProjectOp(["id"], [OrderByOp([("title", "DESC")], [FilterOp(where, [SeqScanOp("docs")])])]),
+                ProjectOp(["title", "COUNT(*)"], [GroupByOp(["title"], None, [SeqScanOp("docs")],
+                                                            [("COUNT", "*")])]),
+                ProjectOp(["left_table.id", "right_table.name"], [JoinOp("INNER", BinaryExpr(
+                    IdentifierExpr("id", "docs"), '=', IdentifierExpr("id", "items")),
+                    [SeqScanOp("docs"), SeqScanOp("items")])]),
+            ]
+            for plan in plans:
+                rows, fetched = self._fetched(plan)
+                self.assertTrue(rows)
+                self.assertEqual(fetched, 0)
+                for row in rows:
+                    self.assertFalse(any(isinstance(value, ToastPointer) for value in row.values()))
+
+            # 用到 body 的查询只读取满足条件的行所需的值
+            rows, fetched = self._fetched(ProjectOp(["id", "body"], [FilterOp(where, [SeqScanOp("docs")])]))
+            self.assertEqual({row["id"]: row["body"] for row in rows}, {i: self.bodies[i] for i in range(3)})
+            self.assertEqual(fetched, 5)
+
+            # SELECT * 读取所有列
+            rows, fetched = self._fetched(SeqScanOp("docs"))
+            self.assertEqual({row["id"]: row["body"] for row in rows}, self.bodies)
+            self.assertEqual(fetched, 5)
+
+        # UPDATE 不读取未用到的列，未修改的行外存储值保持不变
+        self.engine.set_batch_mode(False)
+        before = self.storage_engine.toast_storage.values_fetched
+        self.assertEqual(self.engine.execute_update("docs", [("title", LiteralExpr("renamed"))],
+                                                    FilterOp(BinaryExpr(IdentifierExpr("id"), '=', LiteralExpr(1)),
+                                                             [SeqScanOp("docs")])),
+                         "1 rows updated")
+        self.assertEqual(self.storage_engine.toast_storage.values_fetched, before)
+        rows = {row["id"]: row for row in self.storage_engine.scan_rows("docs")}
+        self.assertEqual(rows[1]["title"], "renamed")
+        self.assertEqual(rows[1]["body"], self.bodies[1])
+
+        print("✓ 只读取用到的行外存储列正常")
+
+
+class TestPipelineExecution(ExecutionEngineTestCase):
+    """迭代器流水线测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        columns = [("id", "INT", []), ("pad", "VARCHAR(100)", [])]
+        self.catalog.create_table("wide", columns)
+        self.storage_engine.create_table("wide", [{"name": n, "type": t} for n, t, _ in columns])
+        self.storage_engine.insert_rows("wide", [[i, f"{i:0>100}"] for i in range(1000)])
+        self.page_count = self.table_storage.get_table_page_count("wide")
+        self.assertGreater(self.page_count, 10)
+
+        # 记录扫描读取的页
+        self.pages_read = []
+        read_table_page = self.table_storage.read_table_page
+
+        def record_read(table_name, page_index, ring=None):
+            self.pages_read.append(page_index)
+            return read_table_page(table_name, page_index, ring)
+
+        self.table_storage.read_table_page = record_read
+
+    def test_01_limit_stops_pulling(self):
+        """测试LIMIT够数后不再向扫描拉取行，后面的页不会被读取"""
+        print("测试1: LIMIT 提前停止拉取")
+
+        rows = self._sql("SELECT id FROM wide;")
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(len(self.pages_read), self.page_count)
+
+        for sql, expected in (("SELECT id FROM wide LIMIT 3;", [0, 1, 2]),
+                              ("SELECT id FROM wide WHERE id > 4 LIMIT 2 OFFSET 1;", [6, 7])):
+            self.pages_read.clear()
+            self.assertEqual([row["id"] for row in self._sql(sql)], expected)
+            self.assertEqual(self.pages_read, [0])
+
+        print("✓ LIMIT 提前停止拉取正常")
+
+    def test_02_streaming_pulls_on_demand(self):
+        """测试流式模式下行按需拉取：只读取已经消费的行所在的页"""
+        print("测试2: 流式按需拉取")
+
+        self.engine.set_streaming_mode(True)
+        rows = self.engine.execute_plan(self._plan("SELECT id FROM wide WHERE id >= 0;"))
+        self.assertEqual(self.pages_read, [])
+
+        self.assertEqual(next(rows)["id"], 0)
+        self.assertEqual(self.pages_read, [0])
+
+        consumed = [row["id"] for row in rows]
+        self.assertEqual(consumed, list(range(1, 1000)))
+        self.assertEqual(self.pages_read, list(range(self.page_count)))
+
+        print("✓ 流式按需拉取正常")
+
+
+class TestTracing(ExecutionEngineTestCase):
+    """会话跟踪测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        self._sql("CREATE TABLE points (id INT, score INT);")
+
+    def _run(self):
+        """执行一次写入和查询，返回期间新增的 (执行器事件数, 存储事件数, 回显的跟踪行)"""
+        before = (len(self.engine.execute_show_trace("executor")), len(self.engine.execute_show_trace("storage")))
+        # 编译阶段的输出与跟踪无关，只捕获执行时的输出
+        plans = [self._plan("INSERT INTO points VALUES (1, 10), (2, 20);"),
+                 self._plan("SELECT id FROM points WHERE score > 5;")]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for plan in plans:
+                self.engine.execute_plan(plan)
+                if self.engine.current_transaction_id is not None:
+                    self.engine.commit_transaction()
+        return (len(self.engine.execute_show_trace("executor")) - before[0],
+                len(self.engine.execute_show_trace("storage")) - before[1],
+                [line for line in output.getvalue().splitlines() if line.startswith("TRACE [")])
+
+    def test_01_trace_follows_level(self):
+        """测试跟踪事件随组件级别出现和消失"""
+        print("测试1: 跟踪级别")
+
+        # 默认关闭：没有事件
+        self.assertEqual(self._run(), (0, 0, []))
+
+        self._sql("SET TRACE executor=debug;")
+        executor_events, storage_events, _ = self._run()
+        self.assertGreater(executor_events, 0)
+        self.assertEqual(storage_events, 0)
+        self.assertTrue(all(event["component"] == "executor" and event["level"] == "debug"
+                            for event in self._sql("SHOW TRACE;")))
+
+        # 存储层只有 debug 级别的事件，info 级别下不记录
+        self._sql("SET TRACE executor=off, storage=info;")
+        self.assertEqual(self._run(), (0, 0, []))
+
+        self._sql("SET TRACE storage=debug;")
+        executor_events, storage_events, _ = self._run()
+        self.assertEqual(executor_events, 0)
+        self.assertGreater(storage_events, 0)
+
+        self._sql("SET TRACE all=off;")
+        self.assertEqual(self._run(), (0, 0, []))
+
+        print("✓ 跟踪级别正常")
+
+    def test_02_echo_follows_level(self):
+        """测试回显只输出已开启组件的事件"""
+        print("测试2: 跟踪回显")
+
+        self._sql("SET TRACE echo=on;")
+        self.assertEqual(self._run(), (0, 0, []))
+
+        self._sql("SET TRACE executor=debug;")
+        executor_events, _, echoed = self._run()
+        self.assertGreater(executor_events, 0)
+        self.assertEqual(len(echoed), executor_events)
+        self.assertTrue(all(line.startswith("TRACE [executor:debug]") for line in echoed))
+
+        self._sql("SET TRACE executor=off;")
+        self.assertEqual(self._run(), (0, 0, []))
+
+        print("✓ 跟踪回显正常")
+
+
+class TestBatchExecution(ExecutionEngineTestCase):
+    """批处理与逐行执行一致性测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        self._sql("CREATE TABLE readings (id INT, sensor VARCHAR(10), grade INT, amount INT);")
+        # 超过一个批的行数；grade 和 sensor 中有NULL，使这些列不能使用数值数组
+        rows = [[i, f"s{i % 7}", i % 11, i * 37 % 1000] for i in range(2500)]
+        rows += [[2500 + i, None if i % 2 else "s1", None, i] for i in range(30)]
+        self.storage_engine.insert_rows("readings", rows)
+
+    def _both_modes(self, sql, ordered=False):
+        """逐行和批处理两种模式执行同一条SQL，返回逐行模式的结果"""
+        results = []
+        for batch_mode in (False, True):
+            self.engine.set_batch_mode(batch_mode)
+            rows = self._sql(sql)
+            if not ordered:
+                rows = sorted(rows, key=lambda row: sorted((key, repr(value)) for key, value in row.items()))
+            results.append(rows)
+        self.assertEqual(results[1], results[0], sql)
+        return results[0]
+
+    def test_01_scan_filter_project(self):
+        """测试扫描、过滤和投影在两种模式下结果相同，包括NULL列上的比较"""
+        print("测试1: 扫描、过滤和投影")
+
+        self.assertEqual(len(self._both_modes("SELECT * FROM readings;")), 2530)
+        self.assertEqual(len(self._both_modes("SELECT id, sensor FROM readings WHERE grade > 5;")),
+                         sum(1 for i in range(2500) if i % 11 > 5))
+        # NULL 不满足比较
+        self.assertEqual(len(self._both_modes("SELECT id FROM readings WHERE grade = 0 OR grade <> 0;")), 2500)
+        for sql in ("SELECT id FROM readings WHERE sensor = 's1';",
+                    "SELECT id, amount FROM readings WHERE amount >= 600 AND grade < 3;",
+                    "SELECT id FROM readings WHERE 10 < grade;",
+                    "SELECT sensor, grade FROM readings WHERE id < 20 OR sensor = 's3';",
+                    "SELECT id FROM readings WHERE grade = 99;"):
+            self._both_modes(sql)
+
+        print("✓ 扫描、过滤和投影正常")
+
+    def test_02_aggregates(self):
+        """测试分组和不分组的聚合在两种模式下结果相同，NULL不参与聚合"""
+        print("测试2: 聚合")
+
+        rows = self._both_modes("SELECT sensor, COUNT(*), COUNT(grade), SUM(grade), MIN(amount), MAX(amount) "
+                                "FROM readings GROUP BY sensor;")
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(sum(row["COUNT(*)"] for row in rows), 2530)
+        self.assertEqual(sum(row["COUNT(grade)"] for row in rows), 2500)
+
+        self._both_modes("SELECT grade, AVG(amount) FROM readings WHERE id >= 100 GROUP BY grade;")
+        self._both_modes("SELECT sensor, SUM(amount) FROM readings GROUP BY sensor HAVING SUM(amount) > 178000;")
+
+        # SQL 不会为没有 GROUP BY 的聚合生成分组算子，直接构造不分组的聚合计划
+        aggregates = [("COUNT", "*"), ("SUM", "grade"), ("MAX", "grade"), ("AVG", "amount")]
+        results = []
+        for batch_mode in (False, True):
+            self.engine.set_batch_mode(batch_mode)
+            results.append(self.engine.execute_plan(GroupByOp([], None, [SeqScanOp("readings")], aggregates)))
+        self.assertEqual(results[1], results[0])
+        self.assertEqual(results[0][0]["COUNT(*)"], 2530)
+        self.assertEqual(results[0][0]["MAX(grade)"], 10)
+
+        print("✓ 聚合正常")
+
+    def test_03_row_operators_above_batches(self):
+        """测试批处理子树之上的逐行算子（排序、LIMIT）结果相同"""
+        print("测试3: 批处理之上的逐行算子")
+
+        rows = self._both_modes("SELECT id, grade FROM readings WHERE grade > 8 ORDER BY id DESC LIMIT 5 OFFSET 2;",
+                                ordered=True)
+        self.assertEqual([row["id"] for row in rows], [2485, 2484, 2474, 2473, 2463])
+        self._both_modes("SELECT sensor, COUNT(*) FROM readings GROUP BY sensor ORDER BY sensor;", ordered=True)
+
+        print("✓ 批处理之上的逐行算子正常")
+
+
+class TestJoinExecution(ExecutionEngineTestCase):
+    """SQL级别的连接测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        self._sql("CREATE TABLE users (id INT, name VARCHAR(20));")
+        self._sql("CREATE TABLE orders (oid INT, user_id INT, amount INT);")
+        self._sql("INSERT INTO users VALUES (1, 'ann'), (2, 'bob'), (3, 'cat');")
+        self._sql("INSERT INTO orders VALUES (10, 1, 5), (11, 1, 7), (12, 3, 9), (14, 4, 2);")
+        # SQL 中不能写 NULL 字面量，NULL 连接键直接写入存储
+        self.storage_engine.insert_rows("orders", [[13, None, 1]])
+        self.engine.execute_set_trace([("executor", "debug")])
+
+    def _build_sides(self):
+        events = self.engine.execute_show_trace("executor")
+        return [event["message"] for event in events if event["message"].startswith("HashJoin - build side")]
+
+    def test_01_equi_join_without_aliases(self):
+        """测试没有别名的等值连接按 表名.列名 解析连接键并使用哈希连接"""
+        print("测试1: 无别名等值连接")
+
+        rows = self._sql("SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id;")
+        self.assertEqual(sorted((row["users.name"], row["orders.amount"]) for row in rows),
+                         [("ann", 5), ("ann", 7), ("cat", 9)])
+        self.assertEqual(len(self._build_sides()), 1)
+
+        print("✓ 无别名等值连接正常")
+
+    def test_02_build_on_smaller_side(self):
+        """测试哈希表建在较小的一侧，两种连接顺序结果相同"""
+        print("测试2: 在较小的一侧建哈希表")
+
+        self._sql("INSERT INTO orders VALUES " +
+                  ", ".join(f"({100 + i}, {i % 3 + 1}, {i})" for i in range(30)) + ";")
+
+        # 关闭优化保持SQL中的连接顺序：小表分别在左侧和右侧
+        users_first = self._sql("SELECT users.name, orders.oid FROM users JOIN orders "
+                                "ON users.id = orders.user_id;", optimize=False)
+        orders_first = self._sql("SELECT users.name, orders.oid FROM orders JOIN users "
+                                 "ON orders.user_id = users.id;", optimize=False)
+
+        self.assertEqual(self._build_sides(), ["HashJoin - build side: left, 3 rows",
+                                               "HashJoin - build side: right, 3 rows"])
+        expected = sorted((row["users.name"], row["orders.oid"]) for row in users_first)
+        self.assertEqual(len(expected), 33)
+        self.assertEqual(sorted((row["users.name"], row["orders.oid"]) for row in orders_first), expected)
+
+        print("✓ 在较小的一侧建哈希表正常")
+
+    def test_03_left_join_null_and_missing_keys(self):
+        """测试LEFT JOIN中NULL键和没有匹配的键用NULL补齐"""
+        print("测试3: LEFT JOIN 的NULL键和缺失键")
+
+        for optimize in (True, False):
+            rows = self._sql("SELECT orders.oid, users.name FROM orders LEFT JOIN users "
+                             "ON orders.user_id = users.id;", optimize=optimize)
+            self.assertEqual(sorted((row["orders.oid"], row["users.name"]) for row in rows),
+                             [(10, "ann"), (11, "ann"), (12, "cat"), (13, None), (14, None)])
+
+            # 左侧较小时保留没有订单的用户
+            rows = self._sql("SELECT users.name, orders.oid FROM users LEFT JOIN orders "
+                             "ON users.id = orders.user_id;", optimize=optimize)
+            self.assertEqual(sorted((row["users.name"], row["orders.oid"] or 0) for row in rows),
+                             [("ann", 10), ("ann", 11), ("bob", 0), ("cat", 12)])
+
+        print("✓ LEFT JOIN 的NULL键和缺失键正常")
+
+    def test_04_merge_join_input_ordered_on_other_column(self):
+        """测试输入按其他列排序时排序合并连接仍然先按连接键排序"""
+        print("测试4: 按其他列有序的归并输入")
+
+        self._sql("INSERT INTO users VALUES (4, 'abe');")
+        on_condition = BinaryExpr(IdentifierExpr("id", "users"), '=', IdentifierExpr("user_id", "orders"))
+        expected = [(10, "ann"), (11, "ann"), (12, "cat"), (14, "abe")]
+
+        # 按 name 升序、按 id 降序的输入都不是按连接键升序排列
+        for order_columns in ([("name", "ASC")], [("users.id", "DESC")], [("name", "ASC"), ("id", "ASC")]):
+            users = OrderByOp(order_columns, [SeqScanOp("users")])
+            self.assertFalse(self.engine._is_ordered_on(users, ["id"]))
+
+            plan = SortMergeJoinOp("INNER", on_condition, [users, SeqScanOp("orders")])
+            rows = self.engine.execute_plan(plan)
+            self.assertEqual(sorted((row["right_table.oid"], row["left_table.name"]) for row in rows), expected)
+
+        # 按连接键升序的输入跳过排序，结果相同
+        users = OrderByOp([("users.id", "ASC")], [SeqScanOp("users")])
+        self.assertTrue(self.engine._is_ordered_on(users, ["id"]))
+        rows = self.engine.execute_plan(SortMergeJoinOp("INNER", on_condition, [users, SeqScanOp("orders")]))
+        self.assertEqual(sorted((row["right_table.oid"], row["left_table.name"]) for row in rows), expected)
+
+        print("✓ 按其他列有序的归并输入正常")
+
+
+class TestGroupByExecution(ExecutionEngineTestCase):
+    """分组聚合执行测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        self._sql("CREATE TABLE sales (region INT, item INT, amount INT);")
+        self._sql("INSERT INTO sales VALUES " +
+                  ", ".join(f"({i % 9}, {i % 4}, {i})" for i in range(90)) + ";")
+
+    def _group_by(self):
+        aggregates = [("COUNT", "*"), ("COUNT", "DISTINCT item"), ("SUM", "DISTINCT item"), ("SUM", "amount")]
+        plan = GroupByOp(["region"], None, [SeqScanOp("sales")], aggregates)
+        return sorted(self.engine.execute_plan(plan), key=lambda row: row["region"])
+
+    def test_01_spill_matches_in_memory(self):
+        """测试分组数超过预算时溢出到临时表空间目录，结果与不溢出时相同"""
+        print("测试1: 分组溢出")
+
+        expected = self._group_by()
+        self.assertEqual(len(expected), 9)
+        for row in expected:
+            self.assertEqual(row["COUNT(*)"], 10)
+            self.assertEqual(row["COUNT(DISTINCT item)"], 4)
+            self.assertEqual(row["SUM(DISTINCT item)"], 6)
+
+        self.engine.aggregate_max_groups = 2
+        self.engine.execute_set_trace([("executor", "debug")])
+        for batch_mode in (False, True):
+            self.engine.set_batch_mode(batch_mode)
+            self.assertEqual(self._group_by(), expected)
+        self.assertIn("GroupBy - Groups in memory: 2, spilled rows: 70",
+                      [event["message"] for event in self.engine.execute_show_trace("executor")])
+        self.assertTrue(os.path.isdir(self.storage_engine.get_temp_directory()))
+
+        print("✓ 分组溢出正常")
+
+
+class TestInsertExecution(ExecutionEngineTestCase):
+    """多行 INSERT 测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        self._sql("CREATE TABLE pets (id INT, name VARCHAR(20));")
+        self._sql("INSERT INTO pets VALUES (1, 'rex');")
+
+    def _pets(self):
+        return [(row["id"], row["name"]) for row in self.storage_engine.scan_rows("pets")]
+
+    def test_01_parse_multi_row_values(self):
+        """测试多行 VALUES 解析为一条带所有行的 INSERT，按顺序写入"""
+        print("测试1: 多行 VALUES")
+
+        stmt = self._parse("INSERT INTO pets VALUES (2, 'tom'), (3, 'kit'), (4, 'bo');")
+        self.assertIsInstance(stmt, InsertStmt)
+        self.assertEqual([[value.value for value in row] for row in stmt.rows],
+                         [[2, "tom"], [3, "kit"], [4, "bo"]])
+        self.assertIs(stmt.values, stmt.rows[0])
+        self.assertEqual(len(stmt.to_dict()["rows"]), 3)
+
+        stmt = self._parse("INSERT INTO pets (name, id) VALUES ('ann', 5), ('ben', 6);")
+        self.assertEqual(stmt.columns, ["name", "id"])
+        self.assertEqual(len(stmt.rows), 2)
+
+        self.assertEqual(self._sql("INSERT INTO pets VALUES (2, 'tom'), (3, 'kit'), (4, 'bo');"), "3 rows inserted")
+        self.assertEqual(self._sql("INSERT INTO pets (name, id) VALUES ('ann', 5), ('ben', 6);"), "2 rows inserted")
+        self.assertEqual(self._pets(), [(1, "rex"), (2, "tom"), (3, "kit"), (4, "bo"), (5, "ann"), (6, "ben")])
+
+        print("✓ 多行 VALUES 正常")
+
+    def test_02_reject_mismatched_second_row(self):
+        """测试第二行的值个数或类型不匹配时整条语句被拒绝，不写入任何行"""
+        print("测试2: 第二行不匹配")
+
+        for sql in ("INSERT INTO pets VALUES (2, 'tom'), (3, 'kit', 9);",
+                    "INSERT INTO pets VALUES (2, 'tom'), (3);",
+                    "INSERT INTO pets VALUES (2, 'tom'), ('three', 'kit');",
+                    "INSERT INTO pets VALUES (2, 'tom'), (3, 4);",
+                    "INSERT INTO pets (name, id) VALUES ('tom', 2), (3, 'kit');"):
+            with self.assertRaises(SemanticError, msg=sql):
+                self._sql(sql)
+            self.assertEqual(self._pets(), [(1, "rex")])
+
+        # 绕过语义分析直接执行时，执行引擎在写入前检查所有行
+        rows = [[LiteralExpr(2), LiteralExpr("tom")], [LiteralExpr("three"), LiteralExpr("kit")]]
+        with self.assertRaises(SemanticError):
+            self.engine.execute_plan(InsertOp("pets", None, rows[0], rows))
+        if self.engine.current_transaction_id is not None:
+            self.engine.rollback_transaction()
+        self.assertEqual(self._pets(), [(1, "rex")])
+
+        print("✓ 第二行不匹配正常")
+
+
+class TestLimitExecution(ExecutionEngineTestCase):
+    """LIMIT/OFFSET 测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        super().setUp()
+        self._sql("CREATE TABLE nums (id INT, grp INT);")
+        self._sql("INSERT INTO nums VALUES " + ", ".join(f"({i}, {i % 3})" for i in range(20)) + ";")
+
+    @staticmethod
+    def _operators(plan):
+        """计划树中所有算子的类型"""
+        types = [type(plan)]
+        for child in plan.children:
+            types.extend(TestLimitExecution._operators(child))
+        return types
+
+    def _ids(self, sql):
+        """逐行和批处理两种模式执行，结果相同时返回 id 列表"""
+        results = []
+        for batch_mode in (False, True):
+            self.engine.set_batch_mode(batch_mode)
+            results.append([row["id"] for row in self._sql(sql)])
+        self.assertEqual(results[0], results[1])
+        return results[0]
+
+    def test_01_parse_limit_offset(self):
+        """测试解析 LIMIT n 和 LIMIT n OFFSET m"""
+        print("测试1: 解析LIMIT/OFFSET")
+
+        stmt = self._parse("SELECT id FROM nums LIMIT 5;")
+        self.assertEqual((stmt.limit, stmt.offset), (5, None))
+
+        stmt = self._parse("SELECT id FROM nums ORDER BY id LIMIT 5 OFFSET 2;")
+        self.assertEqual((stmt.limit, stmt.offset), (5, 2))
+
+        print("✓ 解析LIMIT/OFFSET正常")
+
+    def test_02_sort_limit_fused_into_top_n(self):
+        """测试 ORDER BY + LIMIT 融合为 TopNOp，没有 ORDER BY 时保留 LimitOp"""
+        print("测试2: 融合为Top-N")
+
+        sql = "SELECT id FROM nums ORDER BY id DESC LIMIT 3 OFFSET 2;"
+        operators = self._operators(self._plan(sql))
+        self.assertIn(TopNOp, operators)
+        self.assertNotIn(OrderByOp, operators)
+        self.assertNotIn(LimitOp, operators)
+        self.assertEqual(self._ids(sql), [17, 16, 15])
+
+        sql = "SELECT id FROM nums LIMIT 3 OFFSET 2;"
+        operators = self._operators(self._plan(sql))
+        self.assertIn(LimitOp, operators)
+        self.assertNotIn(TopNOp, operators)
+        self.assertEqual(self._ids(sql), [2, 3, 4])
+
+        print("✓ 融合为Top-N正常")
+
+    def test_03_offset_past_end(self):
+        """测试 OFFSET 超过行数时没有结果"""
+        print("测试3: OFFSET 超过行数")
+
+        self.assertEqual(self._ids("SELECT id FROM nums LIMIT 5 OFFSET 20;"), [])
+        self.assertEqual(self._ids("SELECT id FROM nums ORDER BY id LIMIT 5 OFFSET 50;"), [])
+        # 只剩部分行时返回剩下的行
+        self.assertEqual(self._ids("SELECT id FROM nums ORDER BY id LIMIT 5 OFFSET 18;"), [18, 19])
+
+        print("✓ OFFSET 超过行数正常")
+
+    def test_04_limit_zero(self):
+        """测试 LIMIT 0 没有结果"""
+        print("测试4: LIMIT 0")
+
+        self.assertEqual(self._ids("SELECT id FROM nums LIMIT 0;"), [])
+        self.assertEqual(self._ids("SELECT id FROM nums ORDER BY id LIMIT 0;"), [])
+        self.assertEqual(self._ids("SELECT id FROM nums WHERE grp = 1 LIMIT 0 OFFSET 2;"), [])
+
+        print("✓ LIMIT 0 正常")
+
+
+if __name__ == "__main__":
+    unittest.main()
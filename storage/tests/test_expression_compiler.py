@@ -0,0 +1,188 @@
+"""
+表达式编译器测试
+用逐行解释执行的参考实现对照编译后的闭包：NULL、混合类型的比较和算术、AND/OR/NOT 以及 IN
+"""
+
+import itertools
+import os
+import sys
+import unittest
+
+# 导入待测试的模块
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from engine.expression_compiler import ExpressionCompiler
+from sql_compiler.parser.ast_nodes import BinaryExpr, IdentifierExpr, InExpr, LiteralExpr, ValueListExpr
+
+VALUES = [None, 0, 1, 2, 1.0, 2.5, True, False, 'a', 'b', '1', '']
+COMPARISONS = ['=', '!=', '<>', '>', '>=', '<', '<=']
+ARITHMETIC = ['+', '-', '*', '/']
+
+
+def _not(operand):
+    """NOT 条件的字典形式（语法分析器不生成单独的 NOT 节点类）"""
+    return {"type": "UnaryExpr", "operator": "NOT", "operand": operand.to_dict()}
+
+
+def _interpret_value(row, expr):
+    """参考实现：按表达式字典逐行求值（与编译前的解释器相同）"""
+    expr_type = expr.get('type')
+    if expr_type == 'IdentifierExpr':
+        if expr.get('table_name'):
+            full_column_name = f"{expr['table_name']}.{expr['name']}"
+            if full_column_name in row:
+                return row[full_column_name]
+        return row.get(expr['name'])
+    if expr_type == 'LiteralExpr':
+        return expr.get('value')
+    if expr_type == 'ValueListExpr':
+        return [_interpret_value(row, value) for value in expr.get('values', [])]
+    if expr_type == 'BinaryExpr':
+        left = _interpret_value(row, expr['left'])
+        right = _interpret_value(row, expr['right'])
+        if left is None or right is None:
+            return None
+        operator = expr['operator']
+        if operator == '+':
+            return left + right
+        if operator == '-':
+            return left - right
+        if operator == '*':
+            return left * right
+        if operator == '/':
+            return left / right if right != 0 else None
+    return None
+
+
+def _interpret_condition(row, condition):
+    """参考实现：按条件字典逐行求真值"""
+    condition_type = condition.get('type')
+    if condition_type == 'BinaryExpr':
+        operator = condition['operator']
+        if operator in ('AND', 'OR'):
+            left = _interpret_condition(row, condition['left'])
+            right = _interpret_condition(row, condition['right'])
+            return left and right if operator == 'AND' else left or right
+
+        left = _interpret_value(row, condition['left'])
+        right = _interpret_value(row, condition['right'])
+        if left is None or right is None:
+            return False
+        if operator == '=':
+            return left == right
+        if operator in ('!=', '<>'):
+            return left != right
+        if operator == '>':
+            return left > right
+        if operator == '>=':
+            return left >= right
+        if operator == '<':
+            return left < right
+        if operator == '<=':
+            return left <= right
+        return True
+    if condition_type == 'IdentifierExpr':
+        return bool(row[condition['name']]) if condition['name'] in row else False
+    if condition_type == 'LiteralExpr':
+        return bool(condition.get('value'))
+    if condition_type == 'UnaryExpr' and condition.get('operator') == 'NOT':
+        return not _interpret_condition(row, condition['operand'])
+    if condition_type == 'InExpr':
+        left = _interpret_value(row, condition['left_expr'])
+        right = _interpret_value(row, condition['right_expr'])
+        if isinstance(right, list):
+            result = left in right
+        elif isinstance(right, (str, int, float, bool)):
+            result = left == right
+        else:
+            return False
+        return not result if condition.get('is_not') else result
+    return True
+
+
+class TestExpressionCompiler(unittest.TestCase):
+    """表达式编译器测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        # 这些表达式不含函数和子查询，不需要回调执行引擎
+        self.compiler = ExpressionCompiler(None)
+        self.rows = [{"x": x, "y": y} for x, y in itertools.product(VALUES, repeat=2)]
+        self.rows.append({"x": 1})
+
+    def _evaluate(self, evaluate, *args):
+        """求值结果；混合类型无法比较时记录异常类型"""
+        try:
+            return evaluate(*args)
+        except TypeError:
+            return TypeError
+
+    def _assert_matches(self, condition):
+        predicate = self.compiler.compile_condition(condition)
+        condition_dict = condition if isinstance(condition, dict) else condition.to_dict()
+        for row in self.rows:
+            expected = self._evaluate(_interpret_condition, row, condition_dict)
+            actual = self._evaluate(predicate, row)
+            if expected is not TypeError:
+                expected, actual = bool(expected), actual if actual is TypeError else bool(actual)
+            self.assertEqual(actual, expected, f"{condition_dict} on {row}")
+
+    def test_01_comparisons(self):
+        """测试NULL和混合类型的比较：NULL不满足任何比较，无法比较的类型同样报错"""
+        print("测试1: 比较运算")
+
+        for operator in COMPARISONS:
+            self._assert_matches(BinaryExpr(IdentifierExpr("x"), operator, IdentifierExpr("y")))
+            for value in VALUES:
+                self._assert_matches(BinaryExpr(IdentifierExpr("x"), operator, LiteralExpr(value)))
+
+        print("✓ 比较运算正常")
+
+    def test_02_arithmetic(self):
+        """测试算术表达式：NULL参与运算结果为NULL，除零为NULL"""
+        print("测试2: 算术运算")
+
+        for operator in ARITHMETIC:
+            expr = BinaryExpr(IdentifierExpr("x"), operator, IdentifierExpr("y"))
+            value = self.compiler.compile_expression(expr)
+            for row in self.rows:
+                self.assertEqual(self._evaluate(value, row), self._evaluate(_interpret_value, row, expr.to_dict()))
+
+            for comparison in ('>', '='):
+                self._assert_matches(BinaryExpr(expr, comparison, LiteralExpr(1)))
+
+        print("✓ 算术运算正常")
+
+    def test_03_logical_and_identifiers(self):
+        """测试 AND/OR/NOT 与单独的列和字面值作为条件"""
+        print("测试3: 逻辑运算")
+
+        x_positive = BinaryExpr(IdentifierExpr("x"), '>', LiteralExpr(0))
+        y_null = BinaryExpr(IdentifierExpr("y"), '=', LiteralExpr(None))
+        y_null_or_not_x = {"type": "BinaryExpr", "operator": "OR",
+                           "left": y_null.to_dict(), "right": _not(IdentifierExpr("x"))}
+        for condition in (BinaryExpr(x_positive, 'AND', IdentifierExpr("y")), y_null_or_not_x,
+                          _not(BinaryExpr(IdentifierExpr("x"), '=', IdentifierExpr("y"))),
+                          IdentifierExpr("y"), LiteralExpr(0), LiteralExpr('a')):
+            self._assert_matches(condition)
+
+        print("✓ 逻辑运算正常")
+
+    def test_04_in_lists(self):
+        """测试 IN / NOT IN：NULL和混合类型的成员判断"""
+        print("测试4: IN 列表")
+
+        for is_not in (False, True):
+            for values in ([1, 'a', None], [1.0, False], ['1', ''], []):
+                value_list = ValueListExpr([LiteralExpr(value) for value in values])
+                self._assert_matches(InExpr(IdentifierExpr("x"), value_list, is_not))
+            # 右侧引用列时逐行求值
+            self._assert_matches(InExpr(IdentifierExpr("x"), ValueListExpr([IdentifierExpr("y"), LiteralExpr(2)]),
+                                        is_not))
+            self._assert_matches(InExpr(IdentifierExpr("x"), LiteralExpr(1), is_not))
+
+        print("✓ IN 列表正常")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+外部排序测试
+测试超过 work_mem 时分段排序再归并：相同键保持输入顺序、混合升降序、NULL的位置和段文件的清理
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 导入待测试的模块
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from engine.execution_engine import ExecutionEngine
+from engine.external_sort import ExternalSorter
+
+
+class TestExternalSorter(unittest.TestCase):
+    """外部排序测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        rng = random.Random(3)
+        names = ["ann", "bob", "cat", "dan", None]
+        scores = [1, 2, 3, None]
+        self.rows = [{"seq": i, "name": rng.choice(names), "score": rng.choice(scores)} for i in range(600)]
+
+    def tearDown(self):
+        """测试后清理"""
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def _sorter(self, order_columns, **kwargs):
+        """使用与 ORDER BY 相同的排序键，记录写出的段文件"""
+        sorter = ExternalSorter(ExecutionEngine._make_sort_key(order_columns), temp_dir=self.temp_dir, **kwargs)
+        runs = []
+        write_run = sorter._write_run
+
+        def record_run(rows):
+            run = write_run(rows)
+            runs.append(run)
+            return run
+
+        sorter._write_run = record_run
+        return sorter, runs
+
+    @staticmethod
+    def _expected(rows, order_columns):
+        """逐列稳定排序得到的期望顺序：NULL无论升序降序都在最后"""
+        expected = list(rows)
+        for column, direction in reversed(order_columns):
+            # reverse=True 同样保持相同键的原顺序
+            present = sorted((row for row in expected if row[column] is not None),
+                             key=lambda row: row[column], reverse=direction == 'DESC')
+            expected = present + [row for row in expected if row[column] is None]
+        return expected
+
+    def test_01_multiple_runs(self):
+        """测试很小的 work_mem 写出多个段，结果与内存排序相同"""
+        print("测试1: 多段外部排序")
+
+        order_columns = [("name", "ASC"), ("score", "DESC")]
+        sorter, runs = self._sorter(order_columns, work_mem=4096, max_fanin=4)
+        result = list(sorter.sort(self.rows))
+
+        self.assertGreater(sorter.runs_written, 4)
+        self.assertGreater(sorter.merge_passes, 0)
+        self.assertEqual(result, self._expected(self.rows, order_columns))
+
+        print("✓ 多段外部排序正常")
+
+    def test_02_stable_ties_and_nulls(self):
+        """测试相同键保持输入顺序，NULL在升序和降序时都排在最后"""
+        print("测试2: 相同键与NULL")
+
+        for order_columns in ([("score", "ASC")], [("score", "DESC")], [("name", "DESC"), ("score", "ASC")]):
+            sorter, _ = self._sorter(order_columns, work_mem=4096)
+            result = list(sorter.sort(self.rows))
+            self.assertGreater(sorter.runs_written, 1)
+            self.assertEqual(result, self._expected(self.rows, order_columns))
+
+            # 相同键内 seq 递增
+            key = ExecutionEngine._make_sort_key(order_columns)
+            for previous, row in zip(result, result[1:]):
+                if key(previous) == key(row):
+                    self.assertLess(previous["seq"], row["seq"])
+
+            # NULL在最后
+            first_column = order_columns[0][0]
+            nulls = [row[first_column] is None for row in result]
+            self.assertEqual(nulls, sorted(nulls))
+
+        print("✓ 相同键与NULL正常")
+
+    def test_03_run_files_removed(self):
+        """测试排序结束或提前停止读取后段文件都被关闭，临时目录中没有残留"""
+        print("测试3: 段文件清理")
+
+        sorter, runs = self._sorter([("seq", "DESC")], work_mem=4096)
+        self.assertEqual([row["seq"] for row in sorter.sort(self.rows)], list(range(599, -1, -1)))
+        self.assertTrue(runs)
+        self.assertTrue(all(run.closed for run in runs))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+        # 只读取前几行就停止
+        sorter, runs = self._sorter([("seq", "ASC")], work_mem=4096)
+        rows = sorter.sort(self.rows)
+        self.assertEqual([next(rows)["seq"] for _ in range(3)], [0, 1, 2])
+        rows.close()
+        self.assertTrue(runs)
+        self.assertTrue(all(run.closed for run in runs))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+        print("✓ 段文件清理正常")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -162,6 +162,33 @@ class TestPageManager(unittest.TestCase):
 
         print("✓ 元数据持久化正常")
 
+    def test_07_file_handles_and_sync(self):
+        """测试文件描述符复用和延迟同步"""
+        print("测试7: 文件描述符和同步")
+
+        pages = [self.page_manager.allocate_page() for _ in range(3)]
+        for i, page_id in enumerate(pages):
+            self.page_manager.write_page_to_disk(page_id, bytes([i + 1]) * PAGE_SIZE)
+
+        # 同一文件只打开一次，写入后等待同步
+        self.assertEqual(self.page_manager.get_statistics()["files"]["open_files"], 1)
+        self.assertEqual(self.page_manager.sync(), 1)
+        self.assertEqual(self.page_manager.sync(), 0)
+
+        # 文件中的内容与写入一致，未写过的位置读出为0
+        with open(self.data_file, 'rb') as f:
+            content = f.read()
+        self.assertEqual(content[(pages[1] - 1) * PAGE_SIZE], 2)
+        self.assertEqual(self.page_manager.read_page_from_disk(pages[2]), b'\x03' * PAGE_SIZE)
+        self.assertEqual(self.page_manager.read_page_from_disk(pages[2] + 5), b'\x00' * PAGE_SIZE)
+
+        # 关闭后再次访问时重新打开
+        self.page_manager.close_files()
+        self.assertEqual(self.page_manager.get_statistics()["files"]["open_files"], 0)
+        self.assertEqual(self.page_manager.read_page_from_disk(pages[0]), b'\x01' * PAGE_SIZE)
+
+        print("✓ 文件描述符和同步正常")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -6,6 +6,7 @@
 import unittest
 import sys
 import os
+import struct
 
 # 导入待测试的模块
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
@@ -310,6 +311,128 @@ class TestPageSerializer(unittest.TestCase):
 
         print("✓ 边界情况和错误处理正常")
 
+    def test_11_slot_addressed_updates(self):
+        """测试按槽位号替换和移除数据块"""
+        print("测试11: 按槽位号更新")
+
+        page = PageSerializer.create_empty_page()
+        for data in (self.test_data_1, self.test_data_2, self.test_data_3):
+            page, success = PageSerializer.add_data_to_page(page, data)
+            self.assertTrue(success)
+
+        # 替换和移除都不改变其他数据块的槽位号
+        new_page, success = PageSerializer.update_data_blocks_in_page(page, {0: None, 2: b"replaced"})
+        self.assertTrue(success)
+        self.assertEqual(PageSerializer.get_data_blocks_from_page(new_page), [self.test_data_2, b"replaced"])
+        self.assertIsNone(PageSerializer.get_data_block(new_page, 0))
+        self.assertEqual(PageSerializer.get_data_block(new_page, 2), b"replaced")
+
+        # 无效槽位号或替换后放不下时页不变
+        self.assertEqual(PageSerializer.update_data_blocks_in_page(page, {3: None}), (page, False))
+        self.assertEqual(PageSerializer.update_data_blocks_in_page(page, {1: b"X" * PAGE_SIZE}), (page, False))
+
+        # 记录与槽位号一起返回，已删除的记录不返回但占用槽位号
+        records = [{"id": i, "name": f"n{i}", "value": i * 10} for i in range(1, 4)]
+        page = PageSerializer.create_empty_page()
+        for record in records:
+            page, _ = PageSerializer.add_record_to_page(page, RecordSerializer.serialize_record(record, self.test_schema))
+        page, _ = PageSerializer.update_data_blocks_in_page(page, {1: b"\x01"})
+        slots = PageSerializer.get_records_with_slots_from_page(page, self.test_schema)
+        self.assertEqual([slot for slot, _ in slots], [0, 2])
+        self.assertEqual(slots[1][1]["name"], "n3")
+
+        print("✓ 按槽位号更新正常")
+
+    def test_12_tombstones_and_compaction(self):
+        """测试墓碑删除、槽位复用和页整理"""
+        print("测试12: 墓碑删除和页整理")
+
+        page = PageSerializer.create_empty_page()
+        for data in (self.test_data_1, self.test_data_2, self.test_data_3):
+            page, _ = PageSerializer.add_data_to_page(page, data)
+        free_before = PageSerializer.get_page_info(page)['free_space_size']
+
+        # 删除中间的数据块：只打墓碑，其余槽位号不变，碎片计入空闲空间
+        page, success = PageSerializer.remove_data_from_page(page, 1)
+        self.assertTrue(success)
+        info = PageSerializer.get_page_info(page)
+        self.assertEqual(info['record_count'], 2)
+        self.assertEqual(info['slot_count'], 3)
+        self.assertEqual(info['dead_space'], len(self.test_data_2))
+        self.assertEqual(info['free_space_size'], free_before + len(self.test_data_2))
+        self.assertEqual([slot for slot, _, _ in PageSerializer.get_slot_offsets(page)], [0, 2])
+        self.assertEqual(PageSerializer.get_data_block(page, 2), self.test_data_3)
+
+        # 重复删除失败；新插入复用墓碑槽位
+        self.assertFalse(PageSerializer.remove_data_from_page(page, 1)[1])
+        page, _ = PageSerializer.add_data_to_page(page, b"reused")
+        self.assertEqual(PageSerializer.get_data_block(page, 1), b"reused")
+        self.assertEqual(PageSerializer.get_page_info(page)['slot_count'], 3)
+
+        # 整理后碎片清零，数据和槽位号不变
+        compacted = PageSerializer.compact_page(page)
+        self.assertEqual(PageSerializer.get_page_info(compacted)['dead_space'], 0)
+        self.assertEqual(PageSerializer.get_slot_offsets(compacted)[0][0], 0)
+        self.assertEqual(PageSerializer.get_data_blocks_from_page(compacted),
+                         PageSerializer.get_data_blocks_from_page(page))
+
+        # 碎片超过阈值时删除会立即整理
+        page = PageSerializer.create_empty_page()
+        big_block = b"B" * 600
+        for _ in range(4):
+            page, _ = PageSerializer.add_data_to_page(page, big_block)
+        page, _ = PageSerializer.remove_data_from_page(page, 0)
+        self.assertEqual(PageSerializer.get_page_info(page)['dead_space'], 600)
+        page, _ = PageSerializer.remove_data_from_page(page, 1)
+        self.assertEqual(PageSerializer.get_page_info(page)['dead_space'], 0)
+        self.assertEqual([slot for slot, _, _ in PageSerializer.get_slot_offsets(page)], [2, 3])
+
+        # 碎片和连续空间合起来放得下时，插入会先整理再写入
+        page = PageSerializer.create_empty_page()
+        while True:
+            page, success = PageSerializer.add_data_to_page(page, big_block)
+            if not success:
+                break
+        page, _ = PageSerializer.remove_data_from_page(page, 2)
+        page, success = PageSerializer.add_data_to_page(page, b"C" * 500)
+        self.assertTrue(success)
+        self.assertEqual(PageSerializer.get_data_block(page, 2), b"C" * 500)
+
+        print("✓ 墓碑删除和页整理正常")
+
+    def test_13_v1_page_compatibility(self):
+        """测试读取和修改旧格式（v1）页"""
+        print("测试13: v1 页兼容")
+
+        # 手工构造 v1 页：页头 + 偏移表 + 紧跟的数据
+        blocks = [self.test_data_1, self.test_data_2, self.test_data_3]
+        offset = 16 + 4 * len(blocks)
+        offsets = []
+        for block in blocks:
+            offsets.append(offset)
+            offset += len(block)
+        v1_page = struct.pack('<IIII', len(blocks), offset, 7, 0) + struct.pack(f'<{len(blocks)}I', *offsets)
+        v1_page += b"".join(blocks)
+        v1_page += b"\x00" * (PAGE_SIZE - len(v1_page))
+
+        self.assertFalse(PageSerializer.is_slotted_page(v1_page))
+        info = PageSerializer.get_page_info(v1_page)
+        self.assertEqual(info['version'], 1)
+        self.assertEqual(info['record_count'], 3)
+        self.assertEqual(info['next_page_id'], 7)
+        self.assertEqual(PageSerializer.get_data_blocks_from_page(v1_page), blocks)
+        self.assertEqual(PageSerializer.get_data_block(v1_page, 1), self.test_data_2)
+
+        # 第一次修改时转换为 v2，槽位号与原数据块索引一致
+        page, success = PageSerializer.remove_data_from_page(v1_page, 0)
+        self.assertTrue(success)
+        self.assertTrue(PageSerializer.is_slotted_page(page))
+        self.assertEqual(PageSerializer.get_page_info(page)['next_page_id'], 7)
+        self.assertEqual([slot for slot, _, _ in PageSerializer.get_slot_offsets(page)], [1, 2])
+        self.assertEqual(PageSerializer.get_data_blocks_from_page(page), blocks[1:])
+
+        print("✓ v1 页兼容正常")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
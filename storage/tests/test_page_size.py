@@ -0,0 +1,157 @@
+"""
+表空间页大小测试
+测试页大小随表空间记录，页读写、空页、FSM、行外存储和B+树节点都按表空间的页大小处理
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 导入待测试的模块
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storage.core.storage_manager import StorageManager
+from storage.core.table_storage import TableStorage
+from storage.core.tablespace_manager import TablespaceManager
+from storage.core.toast_storage import ToastStorage, OVERFLOW_PAGE_HEADER
+from storage.core.btree.btree_node import BTreeNode
+from storage.utils.serializer import PageSerializer, RecordSerializer
+from storage.utils.constants import PAGE_SIZE
+from storage.utils.exceptions import StorageException
+
+
+class TestPageSize(unittest.TestCase):
+    """表空间页大小测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.temp_dir, "test_page_size.db")
+        self.meta_file = os.path.join(self.temp_dir, "test_page_size_meta.json")
+        self.catalog_file = os.path.join(self.temp_dir, "test_page_size_catalog.json")
+        self._open()
+
+    def _open(self):
+        self.storage_manager = StorageManager(
+            buffer_size=10,
+            data_file=self.data_file,
+            meta_file=self.meta_file,
+            auto_flush_interval=0
+        )
+        self.table_storage = TableStorage(self.storage_manager, self.catalog_file)
+
+    def _close(self):
+        self.table_storage.shutdown()
+        if not self.storage_manager.is_shutdown:
+            self.storage_manager.shutdown()
+
+    def tearDown(self):
+        """测试后清理"""
+        self._close()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def test_01_tablespace_metadata(self):
+        """测试页大小记录在表空间元数据中"""
+        print("测试1: 表空间页大小元数据")
+
+        manager = TablespaceManager(os.path.join(self.temp_dir, "ts"))
+        self.assertEqual(manager.get_page_size("default"), PAGE_SIZE)
+
+        self.assertTrue(manager.create_tablespace("analytics", size_mb=1, page_size=16384))
+        self.assertEqual(manager.get_tablespace_info("analytics")["page_size"], 16384)
+        self.assertEqual(manager.get_page_size("analytics"), 16384)
+
+        # 不支持的页大小
+        with self.assertRaises(StorageException):
+            manager.create_tablespace("odd", size_mb=1, page_size=5000)
+        with self.assertRaises(StorageException):
+            manager.create_tablespace("huge", size_mb=1, page_size=65536)
+
+        # 旧版本元数据没有页大小时使用默认值
+        with open(manager.metadata_file, 'r') as f:
+            tablespaces = json.load(f)
+        del tablespaces["analytics"]["page_size"]
+        with open(manager.metadata_file, 'w') as f:
+            json.dump(tablespaces, f)
+        self.assertEqual(TablespaceManager(os.path.join(self.temp_dir, "ts")).get_page_size("analytics"), PAGE_SIZE)
+
+        print("✓ 表空间页大小元数据正常")
+
+    def test_02_table_pages(self):
+        """测试表的页按所在表空间的页大小读写"""
+        print("测试2: 表页大小")
+
+        self.assertTrue(self.storage_manager.create_tablespace("analytics", size_mb=1, page_size=16384))
+        self.assertTrue(self.table_storage.create_table_storage("facts", 128, tablespace_name="analytics"))
+        self.assertTrue(self.table_storage.create_table_storage("orders", 128, tablespace_name="default"))
+        self.assertEqual(self.table_storage.get_page_size("facts"), 16384)
+        self.assertEqual(self.table_storage.get_page_size("orders"), PAGE_SIZE)
+
+        # 大页中放得下超过默认页大小的数据，FSM能找到这样的页
+        page_id = self.table_storage.find_page_with_free_space("facts", 10000)
+        self.assertIsNotNone(page_id)
+        self.assertIsNone(self.table_storage.find_page_with_free_space("orders", 10000))
+
+        page_data = self.table_storage.read_table_page("facts", 0)
+        self.assertEqual(len(page_data), 16384)
+        blocks = [bytes([i]) * 3000 for i in range(5)]
+        page_data, added = PageSerializer.add_data_blocks_to_page(page_data, blocks, 0)
+        self.assertEqual(added, 5)
+        self.table_storage.write_table_page("facts", 0, page_data)
+        self.storage_manager.flush_all_pages()
+
+        # 重新打开后从文件中按表空间的页大小读回
+        self._close()
+        self._open()
+        page_data = self.table_storage.read_table_page("facts", 0)
+        self.assertEqual(len(page_data), 16384)
+        self.assertEqual(PageSerializer.get_data_blocks_from_page(page_data), blocks)
+        self.assertEqual(len(self.table_storage.read_table_page("orders", 0)), PAGE_SIZE)
+
+        print("✓ 表页大小正常")
+
+    def test_03_toast_and_btree(self):
+        """测试行外存储阈值和B+树节点随页大小变化"""
+        print("测试3: 行外存储和B+树")
+
+        self.assertTrue(self.storage_manager.create_tablespace("analytics", size_mb=1, page_size=16384))
+        self.assertTrue(self.table_storage.create_table_storage("facts", 128, tablespace_name="analytics"))
+        self.assertTrue(self.table_storage.create_table_storage("orders", 128, tablespace_name="default"))
+
+        toast = ToastStorage(self.table_storage)
+        codec = RecordSerializer.get_codec([("id", "INT", None), ("body", "VARCHAR", 20000)])
+        record = {"id": 1, "body": "x" * 2000}
+
+        # 2000字节的值在4KB页的表中移到溢出页，在16KB页的表中留在记录里
+        self.assertEqual(toast.toast_record("facts", codec, record), codec.encode(record))
+        self.assertFalse(self.table_storage.has_overflow_pages("facts"))
+        toast.toast_record("orders", codec, record)
+        self.assertTrue(self.table_storage.has_overflow_pages("orders"))
+
+        # 溢出页按表的页大小切分
+        toast.compression = False
+        pointer = toast.store("facts", b"y" * 12000)
+        self.assertEqual(len(self.table_storage.tables["facts"].overflow_pages), 1)
+        self.assertEqual(toast.fetch("facts", pointer), "y" * 12000)
+        self.assertEqual(len(self.table_storage.read_overflow_page("facts", pointer.first_page_id)), 16384)
+        self.assertGreater(12000, PAGE_SIZE - OVERFLOW_PAGE_HEADER.size)
+
+        # B+树节点按页大小序列化，页越大阶数越高
+        node = BTreeNode(1, is_leaf=True, order=BTreeNode.order_for_page_size(16384))
+        node.keys = list(range(node.order + 1))
+        node.values = [(k, 0) for k in node.keys]
+        page_data = node.serialize(16384)
+        self.assertEqual(len(page_data), 16384)
+        self.assertEqual(BTreeNode.deserialize(page_data, node.order).keys, node.keys)
+        self.assertEqual(BTreeNode.order_for_page_size(PAGE_SIZE), BTreeNode.DEFAULT_ORDER)
+        self.assertEqual(BTreeNode.order_for_page_size(16384), 4 * BTreeNode.DEFAULT_ORDER)
+
+        print("✓ 行外存储和B+树正常")
+
+
+if __name__ == "__main__":
+    unittest.main()
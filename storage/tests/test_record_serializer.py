@@ -4,14 +4,16 @@
 """
 
 import unittest
+import struct
 import sys
 import os
 
 # 导入待测试的模块
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from storage.utils.serializer import RecordSerializer, DataType
+from storage.utils.serializer import RecordSerializer, RecordCodec, DataType
 from storage.utils.exceptions import SerializationException
+from storage.utils.constants import RECORD_STATUS_COMPACT
 
 
 class TestRecordSerializer(unittest.TestCase):
@@ -41,12 +43,12 @@ class TestRecordSerializer(unittest.TestCase):
 
         # 测试简单模式
         size = RecordSerializer.calculate_record_size(self.simple_schema)
-        expected_size = 1 + 4 + (2 + 50) + 4  # 状态标志 + INT + VARCHAR(50) + INT
+        expected_size = 1 + 1 + 4 + (2 + 50) + 4  # 状态标志 + NULL位图 + INT + VARCHAR(50) + INT
         self.assertEqual(size, expected_size)
 
         # 测试复杂模式
         complex_size = RecordSerializer.calculate_record_size(self.complex_schema)
-        expected_complex = 1 + 4 + (2 + 20) + (2 + 100) + 4 + 1 + 8  # 各字段大小之和
+        expected_complex = 1 + 1 + 4 + (2 + 20) + (2 + 100) + 4 + 1 + 8  # 各字段大小之和
         self.assertEqual(complex_size, expected_complex)
 
         print(f"✓ 简单模式大小: {size}, 复杂模式大小: {complex_size}")
@@ -146,12 +148,11 @@ class TestRecordSerializer(unittest.TestCase):
         """测试VARCHAR边界情况"""
         print("测试5: VARCHAR边界情况")
 
-        # 注意：当前实现中，空字符串会被当作NULL处理
+        # 空字符串与NULL区分（NULL记录在位图中）
         record_empty = {"id": 1, "name": "", "age": 25}
         serialized = RecordSerializer.serialize_record(record_empty, self.simple_schema)
         deserialized = RecordSerializer.deserialize_record(serialized, self.simple_schema)
-        # 修改期望值：空字符串被当作NULL处理
-        self.assertIsNone(deserialized["name"])  # 而不是 self.assertEqual(deserialized["name"], "")
+        self.assertEqual(deserialized["name"], "")
 
         # 测试非空字符串（这个应该正常）
         record_single = {"id": 1, "name": "A", "age": 25}
@@ -187,11 +188,6 @@ class TestRecordSerializer(unittest.TestCase):
         """测试数值类型边界情况"""
         print("测试6: 数值类型边界情况")
 
-        # 注意：当前实现的限制
-        # - 数值0会被当作NULL
-        # - 布尔值False会被当作NULL
-        # 所以我们只测试非零值和True
-
         edge_cases = [
             {"user_id": 1, "score": 0.1, "is_active": True},  # 使用True代替False
             {"user_id": 2147483647, "score": 999999.99, "is_active": True},  # 大数值
@@ -213,7 +209,7 @@ class TestRecordSerializer(unittest.TestCase):
             self.assertAlmostEqual(deserialized["score"], record["score"], places=1)
             self.assertEqual(deserialized["is_active"], record["is_active"])
 
-        # 单独测试边界值（当前实现下会变成NULL）
+        # 单独测试零值：NULL由位图表示，0、0.0、False 都按原值读回
         boundary_record = {
             "user_id": 0, "username": "zero_user", "email": "zero@test.com",
             "score": 0.0, "is_active": False, "created_at": 0
@@ -221,13 +217,12 @@ class TestRecordSerializer(unittest.TestCase):
         serialized = RecordSerializer.serialize_record(boundary_record, self.complex_schema)
         deserialized = RecordSerializer.deserialize_record(serialized, self.complex_schema)
 
-        # 在当前实现下，这些值会被当作NULL
-        self.assertIsNone(deserialized["user_id"])  # 0 -> NULL
-        self.assertIsNone(deserialized["score"])  # 0.0 -> NULL
-        self.assertIsNone(deserialized["is_active"])  # False -> NULL
-        self.assertIsNone(deserialized["created_at"])  # 0 -> NULL
+        self.assertEqual(deserialized["user_id"], 0)
+        self.assertEqual(deserialized["score"], 0.0)
+        self.assertIs(deserialized["is_active"], False)
+        self.assertEqual(deserialized["created_at"], 0)
 
-        print("✓ 数值类型边界情况处理正常（注意当前实现限制：0和False被当作NULL）")
+        print("✓ 数值类型边界情况处理正常")
 
     def test_07_invalid_schema(self):
         """测试无效模式处理"""
@@ -278,6 +273,109 @@ class TestRecordSerializer(unittest.TestCase):
 
         print("✓ 损坏数据处理正常")
 
+    def test_09_precompiled_codec(self):
+        """测试预编译编解码器与逐列解码结果一致"""
+        print("测试9: 预编译编解码器")
+
+        codec = RecordSerializer.get_codec(self.complex_schema)
+        self.assertIs(RecordSerializer.get_codec(list(self.complex_schema)), codec)
+        self.assertEqual(codec.max_record_size, RecordSerializer.calculate_record_size(self.complex_schema))
+
+        records = [
+            {"user_id": 7, "username": "alice", "email": "a@example.com", "score": 1.5,
+             "is_active": True, "created_at": 1700000000},
+            {"user_id": None, "username": None, "email": "", "score": -0.0, "is_active": False, "created_at": None},
+            {"user_id": -1, "username": "x" * 30, "email": "中文", "score": 0.0, "is_active": None,
+             "created_at": 0},
+        ]
+        for record in records:
+            data = codec.encode(record)
+            self.assertEqual(codec.decode(data), RecordSerializer._deserialize_by_column(data, self.complex_schema))
+
+        # 不定长VARCHAR
+        mixed_schema = [("id", "INT", None), ("note", "VARCHAR", None), ("age", "INT", None)]
+        mixed_codec = RecordCodec(mixed_schema)
+        for record in ({"id": 3, "note": "hello", "age": 40}, {"id": 0, "note": None, "age": 40}):
+            data = mixed_codec.encode(record)
+            self.assertEqual(mixed_codec.decode(data), record)
+
+        # 可以直接在更大的缓冲区上按偏移解码
+        data = mixed_codec.encode({"id": 3, "note": "hello", "age": 40})
+        page = b"\xff" * 5 + data + b"\xff" * 5
+        self.assertEqual(mixed_codec.decode(memoryview(page), 5, len(data)), {"id": 3, "note": "hello", "age": 40})
+
+        # 截断的记录与逐列解码结果一致
+        truncated = codec.encode(records[0])[:10]
+        self.assertEqual(codec.decode(truncated),
+                         RecordSerializer._deserialize_by_column(truncated, self.complex_schema))
+
+        print("✓ 预编译编解码器正常")
+
+    def test_10_null_bitmap(self):
+        """测试NULL位图记录格式"""
+        print("测试10: NULL位图")
+
+        # NULL列不占空间
+        full = RecordSerializer.serialize_record({"id": 1, "name": "abc", "age": 2}, self.simple_schema)
+        sparse = RecordSerializer.serialize_record({"id": 1, "name": None, "age": None}, self.simple_schema)
+        self.assertEqual(len(full) - len(sparse), (2 + 3) + 4)
+        self.assertEqual(sparse[0], RECORD_STATUS_COMPACT)
+        self.assertEqual(sparse[1], 0b110)
+
+        # 超过64列时位图为定长字节串
+        wide_schema = [(f"c{i}", "INT", None) for i in range(70)]
+        wide_record = {f"c{i}": (None if i % 3 == 0 else i) for i in range(70)}
+        data = RecordSerializer.serialize_record(wide_record, wide_schema)
+        self.assertEqual(RecordSerializer.deserialize_record(data, wide_schema), wide_record)
+
+        # 旧格式（v1）记录仍可读取：全零字节和长度为0的VARCHAR为NULL
+        v1_record = struct.pack('<Bi', 0, 0) + struct.pack('<H', 3) + b"bob".ljust(50, b"\x00") + struct.pack('<i', 9)
+        self.assertEqual(RecordSerializer.deserialize_record(v1_record, self.simple_schema),
+                         {"id": None, "name": "bob", "age": 9})
+        v1_record = struct.pack('<Bi', 0, 5) + struct.pack('<H', 0) + b"\x00" * 50 + struct.pack('<i', 0)
+        self.assertEqual(RecordSerializer.deserialize_record(v1_record, self.simple_schema),
+                         {"id": 5, "name": None, "age": None})
+
+        # 已删除记录
+        self.assertIsNone(RecordSerializer.deserialize_record(b"\x01", self.simple_schema))
+
+        print("✓ NULL位图正常")
+
+    def test_11_compact_varchar(self):
+        """测试紧凑格式：VARCHAR只保存实际字节"""
+        print("测试11: 紧凑VARCHAR")
+
+        schema = [("id", "INT", None), ("a", "VARCHAR", 255), ("b", "VARCHAR", 255), ("c", "VARCHAR", None)]
+        record = {"id": 1, "a": "ok", "b": "", "c": "中文"}
+        data = RecordSerializer.serialize_record(record, schema)
+        # 状态 + 位图 + INT + 3个结束偏移 + 实际字节
+        self.assertEqual(len(data), 1 + 1 + 4 + 3 * 2 + 2 + 0 + 6)
+        self.assertEqual(data[0], RECORD_STATUS_COMPACT)
+        self.assertEqual(RecordSerializer.deserialize_record(data, schema), record)
+
+        # NULL的VARCHAR不占偏移数组
+        sparse = {"id": None, "a": None, "b": "x", "c": None}
+        self.assertEqual(len(RecordSerializer.serialize_record(sparse, schema)), 1 + 1 + 2 + 1)
+        self.assertEqual(RecordSerializer.deserialize_record(RecordSerializer.serialize_record(sparse, schema), schema),
+                         sparse)
+
+        # 超长字符串按声明长度截断
+        data = RecordSerializer.serialize_record({"id": 2, "a": "y" * 300, "b": None, "c": None}, schema)
+        self.assertEqual(RecordSerializer.deserialize_record(data, schema)["a"], "y" * 255)
+
+        # 按列解码与整行解码一致
+        codec = RecordSerializer.get_codec(schema)
+        data = codec.encode(record)
+        page = b"\xff" * 3 + data + b"\xff" * 3
+        columns = [[] for _ in schema]
+        self.assertTrue(codec.decode_columns(memoryview(page), 3, len(data), columns))
+        self.assertEqual(columns, [[1], ["ok"], [""], ["中文"]])
+
+        # 截断到VARCHAR数据区的记录无法解码
+        self.assertIsNone(RecordSerializer.deserialize_record(data[:-1], schema))
+
+        print("✓ 紧凑VARCHAR正常")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -292,5 +292,81 @@ class TestStorageManager(unittest.TestCase):
 
         print("✓ 关闭行为正常")
 
+    def test_10_eviction_write_back_and_pin(self):
+        """测试淘汰的脏页写回磁盘，固定的页不被淘汰"""
+        print("测试10: 脏页写回和页固定")
+
+        page_ids = [self.storage_manager.allocate_page() for _ in range(15)]
+        for i, page_id in enumerate(page_ids):
+            self.storage_manager.write_page(page_id, bytes([i + 1]) * PAGE_SIZE)
+
+        # 缓存只有10页，先写的页已被淘汰，读回时从磁盘读出写入的数据
+        stats = self.storage_manager.get_cache_stats()
+        self.assertEqual(stats['writeback_count'], 5)
+        self.assertNotIn(page_ids[0], self.storage_manager.buffer_pool.cache)
+        self.assertEqual(self.storage_manager.read_page(page_ids[0]), b"\x01" * PAGE_SIZE)
+
+        # 固定的页在其他页大量读写时仍留在缓存中，修改在释放后可读到
+        view = self.storage_manager.fetch_page(page_ids[1])
+        for page_id in page_ids[2:]:
+            self.storage_manager.read_page(page_id)
+        self.assertIn(page_ids[1], self.storage_manager.buffer_pool.cache)
+        view[:4] = b"pin!"
+        self.storage_manager.unpin_page(page_ids[1], dirty=True)
+        self.assertEqual(self.storage_manager.read_page(page_ids[1])[:5], b"pin!\x02")
+
+        self.storage_manager.flush_all_pages()
+        self.assertEqual(self.storage_manager.page_manager.read_page_from_disk(page_ids[1])[:4], b"pin!")
+
+        print("✓ 脏页写回和页固定正常")
+
+    def test_11_background_writer(self):
+        """测试后台写出淘汰端的脏页，检查点分批写出所有脏页"""
+        print("测试11: 后台写出和检查点")
+
+        from storage.core.background_writer import BackgroundWriter, Checkpointer
+
+        # auto_flush_interval=0 时不启动后台线程
+        self.assertIsNone(self.storage_manager.get_background_writer_stats()["background_writer"])
+
+        writer = BackgroundWriter(self.storage_manager)
+        writer.config.lru_multiplier = 0.5
+        writer.config.dirty_ratio_target = 1.0
+        page_ids = [self.storage_manager.allocate_page() for _ in range(8)]
+        for i, page_id in enumerate(page_ids):
+            self.storage_manager.write_page(page_id, bytes([i + 1]) * PAGE_SIZE)
+
+        # 放入8页，淘汰端的4页先写出，按变脏先后
+        self.assertEqual(writer.run_round(), 4)
+        self.assertEqual(self.storage_manager.get_cache_stats()['dirty_pages'], 4)
+        self.assertEqual(self.storage_manager.page_manager.read_page_from_disk(page_ids[0]), b"\x01" * PAGE_SIZE)
+        self.assertEqual(self.storage_manager.page_manager.read_page_from_disk(page_ids[4]), b"\x00" * PAGE_SIZE)
+
+        # 没有新放入的页时不写；脏页比例超过目标时写出最早变脏的页
+        self.assertEqual(writer.run_round(), 0)
+        writer.config.dirty_ratio_target = 0.2
+        writer.config.max_pages_per_round = 2
+        self.assertEqual(writer.run_round(), 2)
+        self.assertEqual(writer.get_statistics()['aged_pages_written'], 2)
+
+        # 固定的页不写出；检查点分批写出其余脏页
+        self.storage_manager.fetch_page(page_ids[7])
+        checkpointer = Checkpointer(self.storage_manager, writer.config)
+        writer.config.interval = 0.01
+        self.assertEqual(checkpointer.checkpoint(), 1)
+        self.assertEqual(self.storage_manager.buffer_pool.get_dirty_pages().keys(), {page_ids[7]})
+        self.storage_manager.unpin_page(page_ids[7])
+        self.assertEqual(checkpointer.checkpoint(), 1)
+        self.assertEqual(self.storage_manager.get_cache_stats()['dirty_pages'], 0)
+
+        # 后台线程启动后在关闭时停止
+        self.storage_manager._start_background_workers()
+        self.assertTrue(self.storage_manager.background_writer.is_alive())
+        self.storage_manager.shutdown()
+        self.assertFalse(self.storage_manager.background_writer.is_alive())
+        self.assertFalse(self.storage_manager.checkpointer.is_alive())
+
+        print("✓ 后台写出和检查点正常")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
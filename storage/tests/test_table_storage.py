@@ -296,6 +296,49 @@ class TestTableStorage(unittest.TestCase):
             new_table_storage.shutdown()
             new_storage_manager.shutdown()
 
+    def test_09_free_space_map(self):
+        """测试空闲空间映射"""
+        print("测试9: 空闲空间映射")
+
+        from storage.utils.serializer import PageSerializer
+
+        self.table_storage.create_table_storage("fsm_table", 128)
+        self.table_storage.allocate_table_page("fsm_table")
+        first_page, second_page = self.table_storage.get_table_pages("fsm_table")
+
+        # 新页整页空闲，任何一页都可以
+        self.assertIn(self.table_storage.find_page_with_free_space("fsm_table", 100), (first_page, second_page))
+        self.assertIsNone(self.table_storage.find_page_with_free_space("fsm_table", PAGE_SIZE))
+
+        # 把第一页写到只剩少量空间，之后的查找应选择第二页
+        page_data, success = PageSerializer.add_data_to_page(PageSerializer.create_empty_page(),
+                                                             b"x" * (PAGE_SIZE - 200))
+        self.assertTrue(success)
+        self.table_storage.write_table_page("fsm_table", 0, page_data)
+        self.assertEqual(self.table_storage.find_page_with_free_space("fsm_table", 1000), second_page)
+        self.assertIn(self.table_storage.find_page_with_free_space("fsm_table", 100), (first_page, second_page))
+
+        # 页号和页索引可以互相转换
+        self.assertEqual(self.table_storage.get_page_index("fsm_table", second_page), 1)
+        with self.assertRaises(StorageException):
+            self.table_storage.get_page_index("fsm_table", 999999)
+
+        # 页写入带来的FSM变化标记为未保存，flush_catalog 把它写回目录
+        self.assertTrue(self.table_storage.flush_catalog())
+        self.assertFalse(self.table_storage.flush_catalog())
+        flushed = TableStorage(self.storage_manager, self.catalog_file)
+        self.assertEqual(flushed.find_page_with_free_space("fsm_table", 1000), second_page)
+
+        # FSM 随目录一起保存和加载
+        self.table_storage.write_table_page("fsm_table", 1, page_data)
+        self.table_storage.write_table_page("fsm_table", 0, PageSerializer.create_empty_page())
+        self.table_storage.shutdown()
+        reloaded = TableStorage(self.storage_manager, self.catalog_file)
+        self.assertEqual(reloaded.find_page_with_free_space("fsm_table", 1000), first_page)
+        self.assertEqual(reloaded.get_page_index("fsm_table", second_page), 1)
+
+        print("✓ 空闲空间映射正常")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
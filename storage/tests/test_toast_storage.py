@@ -0,0 +1,139 @@
+"""
+行外存储测试
+测试溢出页链的写入、读取、释放和记录中的指针
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 导入待测试的模块
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from storage.core.storage_manager import StorageManager
+from storage.core.table_storage import TableStorage
+from storage.core.toast_storage import ToastStorage, OVERFLOW_PAGE_CAPACITY
+from storage.utils.serializer import RecordSerializer, ToastPointer
+from storage.utils.constants import TOAST_TUPLE_THRESHOLD, RECORD_STATUS_COMPACT_TOAST
+
+
+class TestToastStorage(unittest.TestCase):
+    """行外存储测试类"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage_manager = StorageManager(
+            buffer_size=10,
+            data_file=os.path.join(self.temp_dir, "test_toast.db"),
+            meta_file=os.path.join(self.temp_dir, "test_toast_meta.json"),
+            auto_flush_interval=0
+        )
+        self.table_storage = TableStorage(self.storage_manager, os.path.join(self.temp_dir, "test_toast_catalog.json"))
+        self.table_storage.create_table_storage("docs", 128)
+        self.toast = ToastStorage(self.table_storage)
+
+        self.schema = [("id", "INT", None), ("title", "VARCHAR", 50), ("body", "VARCHAR", 20000)]
+        self.codec = RecordSerializer.get_codec(self.schema)
+
+        rng = random.Random(7)
+        self.random_text = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(10000))
+
+    def tearDown(self):
+        """测试后清理"""
+        self.table_storage.shutdown()
+        if not self.storage_manager.is_shutdown:
+            self.storage_manager.shutdown()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+
+    def test_01_store_and_fetch(self):
+        """测试溢出页链的写入和读取"""
+        print("测试1: 溢出页链读写")
+
+        # 重复内容压缩后只占一页
+        pointer = self.toast.store("docs", b"a" * 6000)
+        self.assertTrue(pointer.compressed)
+        self.assertLess(pointer.stored_length, OVERFLOW_PAGE_CAPACITY)
+        self.assertEqual(self.toast.fetch("docs", pointer), "a" * 6000)
+
+        # 压缩效果不够时跨多页存储
+        raw = self.random_text.encode('utf-8')
+        pointer = self.toast.store("docs", raw)
+        self.assertGreater(pointer.stored_length, OVERFLOW_PAGE_CAPACITY)
+        self.assertEqual(self.toast.fetch("docs", pointer), self.random_text)
+
+        # 溢出页不在表的页列表中，不参与顺序扫描
+        self.assertEqual(self.table_storage.get_table_page_count("docs"), 1)
+        self.assertTrue(self.table_storage.has_overflow_pages("docs"))
+
+        print("✓ 溢出页链读写正常")
+
+    def test_02_toast_record(self):
+        """测试记录超过阈值时移出最长的VARCHAR"""
+        print("测试2: 记录行外存储")
+
+        small = {"id": 1, "title": "small", "body": "tiny"}
+        self.assertEqual(self.toast.toast_record("docs", self.codec, small), self.codec.encode(small))
+        self.assertFalse(self.table_storage.has_overflow_pages("docs"))
+
+        record = {"id": 2, "title": "big", "body": self.random_text}
+        data = self.toast.toast_record("docs", self.codec, record)
+        self.assertLessEqual(len(data), TOAST_TUPLE_THRESHOLD)
+        self.assertEqual(data[0], RECORD_STATUS_COMPACT_TOAST)
+        self.assertEqual(record["body"], self.random_text)  # 传入的记录不被修改
+
+        decoded = self.codec.decode(data)
+        self.assertEqual(decoded["title"], "big")
+        self.assertIsInstance(decoded["body"], ToastPointer)
+        self.assertEqual(self.toast.detoast_record("docs", decoded), record)
+
+        # 按列解码也得到指针
+        columns = [[] for _ in self.schema]
+        self.assertTrue(self.codec.decode_columns(data, 0, len(data), columns))
+        self.assertIsInstance(columns[2][0], ToastPointer)
+        self.toast.detoast_values("docs", columns[2])
+        self.assertEqual(columns[2], [self.random_text])
+
+        # 已经是指针的值原样保留
+        self.assertEqual(self.toast.toast_record("docs", self.codec, self.codec.decode(data)), data)
+
+        print("✓ 记录行外存储正常")
+
+    def test_03_release(self):
+        """测试释放溢出页链"""
+        print("测试3: 释放溢出页")
+
+        pointer = self.toast.store("docs", self.random_text.encode('utf-8'))
+        self.toast.release("docs", pointer)
+        self.assertFalse(self.table_storage.has_overflow_pages("docs"))
+
+        # 删除表时溢出页一起释放
+        self.toast.store("docs", b"b" * 5000)
+        self.assertTrue(self.table_storage.drop_table_storage("docs"))
+
+        print("✓ 释放溢出页正常")
+
+    def test_04_transaction_end(self):
+        """测试事务中的页链在提交或回滚后释放"""
+        print("测试4: 事务结束时释放")
+
+        # 事务中不再引用的页链在提交后才释放
+        pointer = self.toast.store("docs", b"c" * 5000)
+        self.toast.release("docs", pointer, txn_id=1)
+        self.assertTrue(self.table_storage.has_overflow_pages("docs"))
+        self.toast.end_transaction(1, committed=False)
+        self.assertEqual(self.toast.fetch("docs", pointer), "c" * 5000)
+
+        self.toast.release("docs", pointer, txn_id=2)
+        self.toast.end_transaction(2, committed=True)
+        self.assertFalse(self.table_storage.has_overflow_pages("docs"))
+
+        print("✓ 事务结束时释放正常")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,9 +26,9 @@ from .serializer import (
 
 # 常量
 from .constants import (
-    PAGE_SIZE, BUFFER_SIZE, DATA_FILE, META_FILE, CATALOG_FILE,
+    PAGE_SIZE, SUPPORTED_PAGE_SIZES, BUFFER_SIZE, DATA_FILE, META_FILE, CATALOG_FILE,
     MAX_RECORD_SIZE, MAX_VARCHAR_LENGTH, SUPPORTED_DATA_TYPES,
-    ensure_directories, get_system_info
+    ensure_directories, get_system_info, parse_size
 )
 
 __all__ = [
@@ -68,6 +68,7 @@ __all__ = [
 
     # 常量
     'PAGE_SIZE',
+    'SUPPORTED_PAGE_SIZES',
     'BUFFER_SIZE',
     'DATA_FILE',
     'META_FILE',
@@ -76,5 +77,6 @@ __all__ = [
     'MAX_VARCHAR_LENGTH',
     'SUPPORTED_DATA_TYPES',
     'ensure_directories',
-    'get_system_info'
+    'get_system_info',
+    'parse_size'
 ]
\ No newline at end of file
@@ -6,16 +6,22 @@
 import os
 
 # ==================== 页管理相关常量 ====================
-PAGE_SIZE = 4096  # 页大小：4KB
+PAGE_SIZE = 4096  # 默认页大小：4KB（创建表空间时未指定页大小时使用）
+SUPPORTED_PAGE_SIZES = (4096, 8192, 16384, 32768)  # 表空间可选的页大小（页内偏移为2字节，最大32KB）
 PAGE_HEADER_SIZE = 16  # 页头大小：16字节
+PAGE_FORMAT_V1 = 1  # 旧页格式：偏移表之后紧跟数据，每次修改重建整页
+PAGE_FORMAT_V2 = 2  # 槽页格式：槽位目录从页头向后增长，元组数据从页尾向前增长
+PAGE_FORMAT_MAGIC = 0x5053  # v2 页头中的格式标记（v1 页头的保留字段为0）
+PAGE_COMPACTION_THRESHOLD = 0.25  # 删除产生的碎片超过页大小的该比例时立即整理
 MAX_PAGES = 1000000  # 最大页数限制
 DEFAULT_PAGE_ALLOCATION = 10  # 默认预分配页数
 
 # ==================== 缓存相关常量 ====================
-BUFFER_SIZE = 100  # 缓存池大小：最多缓存100页
+BUFFER_SIZE = 100  # 缓存池大小：最多缓存100页（未按字节指定缓存池大小时使用）
 DEFAULT_CACHE_SIZE = 50  # 默认缓存大小
-MAX_CACHE_SIZE = 1000  # 最大缓存大小
-MIN_CACHE_SIZE = 5  # 最小缓存大小
+MAX_CACHE_SIZE = 1000  # 旧版缓存池的页数上限（缓存池大小已不受此限制，仅保留兼容）
+MIN_CACHE_SIZE = 5  # 最小缓存大小（帧数）
+BUFFER_FRAME_SIZE = SUPPORTED_PAGE_SIZES[0]  # 缓存池帧大小：最小的页大小，较大的页占用多个帧
 
 # 缓存替换策略
 CACHE_POLICY_LRU = "LRU"  # 最近最少使用
@@ -56,8 +62,17 @@ DEFAULT_VARCHAR_LENGTH = 255  # VARCHAR默认长度
 RECORD_HEADER_SIZE = 1  # 记录头大小：1字节
 
 # 记录状态标志
-RECORD_STATUS_NORMAL = 0  # 正常记录
+RECORD_STATUS_NORMAL = 0  # 正常记录（v1 格式：全零字节表示NULL）
 RECORD_STATUS_DELETED = 1  # 已删除记录
+RECORD_STATUS_COMPACT = 3  # 正常记录（紧凑格式：带NULL位图，NULL列不占空间，VARCHAR只存实际字节，用偏移数组定位）
+RECORD_STATUS_COMPACT_TOAST = 4  # 紧凑格式且含行外存储的VARCHAR（结束偏移最高位为1的列只存溢出页指针）
+
+# 行外存储（TOAST）
+TOAST_TUPLE_THRESHOLD_RATIO = 4  # 记录超过页大小的 1/4 时从最长的VARCHAR开始移到溢出页
+TOAST_TUPLE_THRESHOLD = PAGE_SIZE // TOAST_TUPLE_THRESHOLD_RATIO  # 默认页大小下的阈值
+TOAST_MIN_VALUE_SIZE = 64  # 短于该字节数的值不移出记录
+TOAST_COMPRESSION_ENABLED = True  # 溢出值先尝试zlib压缩（zlib不可用时跳过）
+TOAST_COMPRESSION_MIN_SIZE = 256  # 短于该字节数的溢出值不压缩
 
 # ==================== 表管理常量 ====================
 MAX_TABLE_NAME_LENGTH = 64  # 表名最大长度
@@ -77,7 +92,11 @@ SYSTEM_TABLES = {
 # 性能相关
 DEFAULT_SCAN_BATCH_SIZE = 100  # 默认扫描批次大小
 MAX_CONCURRENT_OPERATIONS = 50  # 最大并发操作数
-FLUSH_INTERVAL_SECONDS = 30  # 自动刷盘间隔
+FLUSH_INTERVAL_SECONDS = 30  # 自动刷盘间隔（后台检查点线程的间隔）
+BGWRITER_INTERVAL_SECONDS = 0.2  # 后台写出线程两轮之间的间隔
+BGWRITER_MAX_PAGES = 100  # 后台写出线程每轮最多写出的页数
+BGWRITER_LRU_MULTIPLIER = 2.0  # 上一轮新放入缓存的页数乘以此系数，估计淘汰端需要提前写出的页数
+BGWRITER_DIRTY_RATIO = 0.3  # 脏页超过缓存的30%时，额外写出最早变脏的页
 
 # 内存限制
 MAX_MEMORY_USAGE_MB = 512  # 最大内存使用：512MB
@@ -184,12 +203,36 @@ def ensure_directories():
 
 def validate_page_size(size: int) -> bool:
     """验证页大小是否有效"""
-    return size > 0 and size % 512 == 0  # 必须是512的倍数
+    return size in SUPPORTED_PAGE_SIZES
 
 
 def validate_buffer_size(size: int) -> bool:
-    """验证缓存大小是否有效"""
-    return MIN_CACHE_SIZE <= size <= MAX_CACHE_SIZE
+    """验证缓存大小（帧数）是否有效"""
+    return size >= MIN_CACHE_SIZE
+
+
+def parse_size(size) -> int:
+    """
+    解析字节数，支持整数或带单位的字符串（如 "512MB"、"2GB"，按1024进位）
+
+    Raises:
+        ValueError: 格式无效
+    """
+    if isinstance(size, int):
+        return size
+
+    text = str(size).strip().upper()
+    if text.endswith('B'):
+        text = text[:-1]
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    multiplier = 1
+    if text and text[-1] in units:
+        multiplier = units[text[-1]]
+        text = text[:-1]
+    try:
+        return int(float(text.strip()) * multiplier)
+    except ValueError:
+        raise ValueError(f"Invalid size: {size!r}")
 
 
 def get_system_info() -> dict:
@@ -222,6 +265,9 @@ assert MAX_RECORD_SIZE < PAGE_SIZE, "Max record size must be less than page size
 CACHE_STRATEGY_LRU = "LRU"
 CACHE_STRATEGY_FIFO = "FIFO"
 CACHE_STRATEGY_ADAPTIVE = "ADAPTIVE"
+CACHE_STRATEGY_2Q = "2Q"
+CACHE_STRATEGY_LRU_K = "LRU-K"
+CACHE_STRATEGY_CLOCK = "CLOCK"
 
 # 默认策略
 DEFAULT_CACHE_STRATEGY = CACHE_STRATEGY_ADAPTIVE
@@ -233,4 +279,15 @@ ADAPTIVE_DECISION_THRESHOLD = 3  # 连续3次建议才切换
 
 # 访问模式阈值
 REPEAT_ACCESS_THRESHOLD = 0.4  # 重复访问率阈值40%
-SEQUENTIAL_ACCESS_THRESHOLD = 0.6  # 顺序访问率阈值60%
\ No newline at end of file
+SEQUENTIAL_ACCESS_THRESHOLD = 0.6  # 顺序访问率阈值60%
+
+# 抗扫描替换策略参数
+TWO_Q_IN_RATIO = 0.25  # 2Q：首次访问队列A1in占容量的比例
+TWO_Q_OUT_RATIO = 0.5  # 2Q：只记页号的A1out队列长度占容量的比例
+LRU_K = 2  # LRU-K：按倒数第K次访问排序
+CLOCK_MAX_USAGE = 5  # CLOCK：帧使用计数的上限
+
+# 顺序扫描的环形缓冲区
+SCAN_RING_SIZE = 64  # 环形缓冲区最多占用的页数（默认页大小下256KB）
+SCAN_RING_POOL_RATIO = 8  # 环形缓冲区不超过缓存池帧数的1/8
+SCAN_RING_THRESHOLD = 0.25  # 表的页数超过缓存池帧数的这个比例时，顺序扫描使用环形缓冲区
\ No newline at end of file
@@ -3,11 +3,14 @@
 包含页序列化器和记录序列化器
 """
 
+import math
 import struct
 import json
 from typing import List, Tuple, Any, Dict, Optional
 from enum import Enum
 from .exceptions import SerializationException
+from .constants import (PAGE_SIZE, PAGE_FORMAT_V1, PAGE_FORMAT_V2, PAGE_FORMAT_MAGIC, PAGE_COMPACTION_THRESHOLD,
+                        RECORD_STATUS_DELETED, RECORD_STATUS_COMPACT, RECORD_STATUS_COMPACT_TOAST)
 
 
 class DataType(Enum):
@@ -20,7 +23,16 @@ class DataType(Enum):
 
 
 class RecordSerializer:
-    """记录序列化器 - 处理记录级别的序列化和反序列化"""
+    """记录序列化器 - 处理记录级别的序列化和反序列化
+
+    记录格式（状态字节之后）：
+        紧凑（状态字节 RECORD_STATUS_COMPACT）：NULL位图 + 各非NULL定长列 + VARCHAR结束偏移数组 +
+            VARCHAR实际字节；NULL列不占空间，VARCHAR不填充到声明长度
+        v1（状态字节 RECORD_STATUS_NORMAL，旧数据）：所有列依次排列，全零字节或长度为0的VARCHAR表示NULL
+    含行外存储值的紧凑记录状态字节为 RECORD_STATUS_COMPACT_TOAST，这些VARCHAR只保存 ToastPointer。
+    位图第 i 位为1表示第 i 列为NULL，0、0.0、FALSE 和空字符串都按原值保存。
+    新记录一律写成紧凑格式；旧格式记录仍可读取，被 UPDATE 重写时自然转换为紧凑格式。
+    """
 
     # 数据类型格式映射 (struct format, fixed_size)
     TYPE_FORMATS = {
@@ -30,10 +42,42 @@ class RecordSerializer:
         DataType.DATE: ('Q', 8),  # 64位无符号整数(时间戳)
     }
 
+    # 按列数选择的NULL位图格式（不超过64列时用一个整数字段，解码时一次读出）
+    NULL_BITMAP_FORMATS = ((8, 'B'), (16, 'H'), (32, 'I'), (64, 'Q'))
+
+    # 按 schema 缓存的预编译编解码器
+    _codecs: Dict[tuple, 'RecordCodec'] = {}
+    MAX_CACHED_CODECS = 256
+
+    @staticmethod
+    def get_codec(schema: List[Tuple[str, str, Optional[int]]]) -> 'RecordCodec':
+        """获取 schema 对应的预编译编解码器（按 schema 内容缓存）"""
+        try:
+            key = tuple(schema)
+            codec = RecordSerializer._codecs.get(key)
+        except TypeError:  # schema 中的列定义不可哈希
+            return RecordCodec(schema)
+
+        if codec is None:
+            if len(RecordSerializer._codecs) >= RecordSerializer.MAX_CACHED_CODECS:
+                RecordSerializer._codecs.clear()
+            codec = RecordSerializer._codecs[key] = RecordCodec(schema)
+        return codec
+
+    @staticmethod
+    def get_null_bitmap_format(column_count: int) -> str:
+        """NULL位图的 struct 格式：不超过64列时为一个整数，否则为定长字节串"""
+        if column_count == 0:
+            return ''
+        for max_columns, format_char in RecordSerializer.NULL_BITMAP_FORMATS:
+            if column_count <= max_columns:
+                return format_char
+        return f'{(column_count + 7) // 8}s'
+
     @staticmethod
     def calculate_record_size(schema: List[Tuple[str, str, Optional[int]]]) -> int:
         """
-        计算记录的固定大小
+        计算记录的最大大小（所有列都非NULL时）
 
         Args:
             schema: 表模式 [(column_name, data_type, length), ...]
@@ -48,9 +92,9 @@ class RecordSerializer:
                 dtype = DataType(data_type.upper())
 
                 if dtype == DataType.VARCHAR:
-                    # VARCHAR: 2字节长度 + 实际字符串长度(最大)
+                    # VARCHAR: 2字节结束偏移 + 实际字符串长度(最大)
                     max_length = length if length else 255
-                    total_size += 2 + max_length  # 2字节存储实际长度
+                    total_size += 2 + max_length
                 else:
                     # 固定长度类型
                     _, size = RecordSerializer.TYPE_FORMATS[dtype]
@@ -59,13 +103,13 @@ class RecordSerializer:
             except (ValueError, KeyError):
                 raise SerializationException(f"Unsupported data type: {data_type}")
 
-        # 添加记录头信息：1字节状态标志
-        return total_size + 1
+        # 添加记录头信息：1字节状态标志 + NULL位图
+        return total_size + 1 + struct.calcsize('<' + RecordSerializer.get_null_bitmap_format(len(schema)))
 
     @staticmethod
     def serialize_record(record: Dict[str, Any], schema: List[Tuple[str, str, Optional[int]]]) -> bytes:
         """
-        序列化记录为字节流
+        序列化记录为字节流（紧凑格式）
 
         Args:
             record: 记录数据字典
@@ -74,65 +118,12 @@ class RecordSerializer:
         Returns:
             bytes: 序列化后的字节流
         """
-        try:
-            buffer = bytearray()
-
-            # 记录状态标志：0=正常，1=已删除
-            buffer.append(0)
-
-            for col_name, data_type, length in schema:
-                value = record.get(col_name)
-                dtype = DataType(data_type.upper())
-
-                if value is None:
-                    # NULL值处理
-                    if dtype == DataType.VARCHAR:
-                        buffer.extend(struct.pack('<H', 0))  # 长度为0表示NULL
-                        if length:  # 如果是定长VARCHAR，还需要填充
-                            buffer.extend(b'\x00' * length)
-                    else:
-                        # 固定长度类型的NULL值用0填充
-                        _, size = RecordSerializer.TYPE_FORMATS[dtype]
-                        buffer.extend(b'\x00' * size)
-                else:
-                    # 序列化非NULL值
-                    if dtype == DataType.VARCHAR:
-                        # VARCHAR处理
-                        str_value = str(value)
-                        str_bytes = str_value.encode('utf-8')
-
-                        max_length = length if length else 255
-                        if len(str_bytes) > max_length:
-                            str_bytes = str_bytes[:max_length]
-
-                        # 2字节长度 + 字符串内容
-                        buffer.extend(struct.pack('<H', len(str_bytes)))
-                        buffer.extend(str_bytes)
-
-                        # 如果有最大长度限制，用0填充到固定大小
-                        if length:
-                            padding = max_length - len(str_bytes)
-                            buffer.extend(b'\x00' * padding)
-
-                    elif dtype == DataType.INT:
-                        buffer.extend(struct.pack('<i', int(value)))
-                    elif dtype == DataType.FLOAT:
-                        buffer.extend(struct.pack('<f', float(value)))
-                    elif dtype == DataType.BOOLEAN:
-                        buffer.extend(struct.pack('<?', bool(value)))
-                    elif dtype == DataType.DATE:
-                        # 假设传入的是时间戳
-                        buffer.extend(struct.pack('<Q', int(value)))
-
-            return bytes(buffer)
-
-        except Exception as e:
-            raise SerializationException(f"Failed to serialize record: {e}", data_type="record")
+        return RecordSerializer.get_codec(schema).encode(record)
 
     @staticmethod
     def deserialize_record(data: bytes, schema: List[Tuple[str, str, Optional[int]]]) -> Optional[Dict[str, Any]]:
         """
-        反序列化字节流为记录
+        反序列化字节流为记录（紧凑、v1 格式均可）
 
         Args:
             data: 字节流数据
@@ -141,112 +132,453 @@ class RecordSerializer:
         Returns:
             Dict[str, Any]: 记录数据字典，如果记录已删除返回None
         """
+        return RecordSerializer.get_codec(schema).decode(data)
+
+    @staticmethod
+    def _deserialize_by_column(data, schema: List[Tuple[str, str, Optional[int]]]) -> Optional[Dict[str, Any]]:
+        """逐列反序列化，用于不完整的记录（数据不足时后面的列为NULL或缺失）"""
         try:
             if len(data) == 0:
                 return None
 
-            offset = 0
-
             # 读取记录状态标志
-            if offset >= len(data):
-                return None
-            status = data[offset]
-            offset += 1
-
-            if status == 1:  # 已删除记录
+            status = data[0]
+            if status == RECORD_STATUS_DELETED:
                 return None
+            if status == RECORD_STATUS_COMPACT or status == RECORD_STATUS_COMPACT_TOAST:
+                # 紧凑记录不完整时无法定位VARCHAR数据区，由编解码器整体处理
+                return RecordSerializer.get_codec(schema).decode(data)
 
             record = {}
+            RecordSerializer._deserialize_columns(data, 1, schema, record)
+            return record
 
-            for col_name, data_type, length in schema:
-                if offset >= len(data):
+        except Exception as e:
+            raise SerializationException(f"Failed to deserialize record: {e}", data_type="record")
+
+    @staticmethod
+    def _deserialize_columns(data, offset: int, schema: List[Tuple[str, str, Optional[int]]],
+                             record: Dict[str, Any]) -> int:
+        """
+        从 offset 开始按 schema 顺序解码 v1 格式的各列写入 record，返回结束位置；数据不完整时提前结束
+
+        全零字节或长度为0的VARCHAR为NULL。
+        """
+        end = len(data)
+        for col_name, data_type, length in schema:
+            if offset >= end:
+                break
+
+            dtype = DataType(data_type.upper())
+
+            if dtype == DataType.VARCHAR:
+                # 读取VARCHAR
+                if offset + 2 > end:
+                    record[col_name] = None
+                    break
+
+                str_length = struct.unpack_from('<H', data, offset)[0]
+                offset += 2
+
+                if str_length == 0:
+                    record[col_name] = None
+                    if length:  # 跳过填充
+                        offset += length
+                    continue
+
+                if offset + str_length > end:
+                    record[col_name] = None
+                    break
+                record[col_name] = str(data[offset:offset + str_length], 'utf-8', 'replace')
+                # 定长VARCHAR跳过整个定长区域，变长VARCHAR只跳过实际字符串
+                offset += length if length else str_length
+
+            else:
+                # 固定长度类型
+                format_char, size = RecordSerializer.TYPE_FORMATS[dtype]
+
+                if offset + size > end:
+                    record[col_name] = None
                     break
 
+                value = struct.unpack_from('<' + format_char, data, offset)[0]
+                offset += size
+                record[col_name] = None if _is_zero_bytes_value(value) else value
+
+        return offset
+
+
+class ToastPointer:
+    """
+    行外存储的VARCHAR值在记录中的指针：溢出页链的首页号、原始字节数、链中存储的字节数和是否压缩
+
+    解码含行外存储值的记录时，这些列的值为 ToastPointer，由存储引擎按需取回原值。
+    """
+
+    __slots__ = ('first_page_id', 'raw_length', 'stored_length', 'compressed')
+
+    STRUCT = struct.Struct('<IIIB')
+
+    def __init__(self, first_page_id: int, raw_length: int, stored_length: int, compressed: bool = False):
+        self.first_page_id = first_page_id
+        self.raw_length = raw_length
+        self.stored_length = stored_length
+        self.compressed = compressed
+
+    def to_bytes(self) -> bytes:
+        return self.STRUCT.pack(self.first_page_id, self.raw_length, self.stored_length, self.compressed)
+
+    @classmethod
+    def from_bytes(cls, data, offset: int = 0) -> 'ToastPointer':
+        first_page_id, raw_length, stored_length, compressed = cls.STRUCT.unpack_from(data, offset)
+        return cls(first_page_id, raw_length, stored_length, bool(compressed))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ToastPointer) and self.first_page_id == other.first_page_id \
+            and self.raw_length == other.raw_length and self.stored_length == other.stored_length \
+            and self.compressed == other.compressed
+
+    def __hash__(self) -> int:
+        return hash((self.first_page_id, self.raw_length, self.stored_length, self.compressed))
+
+    def __repr__(self) -> str:
+        return (f"ToastPointer(page={self.first_page_id}, raw={self.raw_length}, "
+                f"stored={self.stored_length}, compressed={self.compressed})")
+
+
+class RecordCodec:
+    """
+    按表模式预编译的记录编解码器
+
+    新记录写成紧凑格式（RECORD_STATUS_COMPACT）：
+        状态字节 + NULL位图 + 各非NULL定长列 + 各非NULL VARCHAR的结束偏移(2字节) + VARCHAR的实际字节
+    VARCHAR不再填充到声明长度，结束偏移相对于记录末尾的VARCHAR数据区，第 k 个VARCHAR
+    占 [end[k-1], end[k])。值为 ToastPointer 的VARCHAR只保存指针，结束偏移的最高位置1，
+    记录的状态字节为 RECORD_STATUS_COMPACT_TOAST。偏移数组之前的部分对给定的位图取值是定长的，按位图取值预编译成一个
+    struct.Struct，用 pack / unpack_from 一次完成，NULL列不参与解包；实际出现的位图取值通常很少，
+    每种取值的布局编译一次后缓存。
+
+    旧格式 RECORD_STATUS_NORMAL（v1）仍可读取：所有列依次排列，全零字节或长度为0的VARCHAR为NULL。
+
+    解码直接在调用方传入的缓冲区上进行（通常是整页的 memoryview），不切出数据块。
+    """
+
+    # 非NULL值写入前的类型转换
+    _CONVERTERS = {
+        DataType.INT: int,
+        DataType.FLOAT: float,
+        DataType.BOOLEAN: bool,
+        DataType.DATE: int,
+    }
+
+    # 每个编解码器最多缓存的位图布局数
+    MAX_CACHED_LAYOUTS = 256
+
+    # 结束偏移中标记行外存储值的最高位
+    TOAST_OFFSET_FLAG = 0x8000
+
+    def __init__(self, schema: List[Tuple[str, str, Optional[int]]]):
+        self.schema = list(schema)
+
+        # (列名, 数据类型, VARCHAR最大字节数, 定长列或定长VARCHAR的struct格式；不定长VARCHAR为None)
+        self._columns = []
+        for col_name, data_type, length in self.schema:
+            try:
                 dtype = DataType(data_type.upper())
+            except ValueError:
+                raise SerializationException(f"Unsupported data type: {data_type}")
 
-                if dtype == DataType.VARCHAR:
-                    # 读取VARCHAR
-                    if offset + 2 > len(data):
-                        record[col_name] = None
-                        break
-
-                    str_length = struct.unpack('<H', data[offset:offset + 2])[0]
-                    offset += 2
-
-                    if str_length == 0:
-                        record[col_name] = None
-                        if length:  # 跳过填充
-                            offset += length
+            if dtype == DataType.VARCHAR:
+                self._columns.append((col_name, dtype, length if length else 255, f'H{length}s' if length else None))
+            else:
+                self._columns.append((col_name, dtype, None, RecordSerializer.TYPE_FORMATS[dtype][0]))
+
+        self._bitmap_format = RecordSerializer.get_null_bitmap_format(len(self.schema))
+        self._bitmap_struct = struct.Struct('<' + self._bitmap_format)
+        self._bitmap_is_bytes = self._bitmap_format.endswith('s')
+        self._compact_layouts: Dict[int, tuple] = {}
+
+        # v1（旧格式）记录布局：所有列依次排列，到第一个不定长VARCHAR为止
+        fmt = '<B'
+        self._v1_columns = []  # (列名, 在解包结果中的位置, 是否VARCHAR)
+        position = 1
+        split = len(self._columns)
+        for i, (col_name, dtype, _, col_format) in enumerate(self._columns):
+            if col_format is None:
+                split = i
+                break
+            fmt += col_format
+            is_varchar = dtype == DataType.VARCHAR
+            self._v1_columns.append((col_name, position, is_varchar))
+            position += 2 if is_varchar else 1
+        self._v1_prefix = struct.Struct(fmt)
+        self._v1_suffix_schema = self.schema[split:]
+
+    @property
+    def varchar_limits(self) -> Dict[str, int]:
+        """VARCHAR列名 -> 最大字节数（超出部分写入时截断）"""
+        return {col_name: max_bytes for col_name, dtype, max_bytes, _ in self._columns if dtype == DataType.VARCHAR}
+
+    @property
+    def max_record_size(self) -> int:
+        """所有列都非NULL且VARCHAR都取最大长度时的记录大小"""
+        header = self._get_compact_layout(0)[0]
+        return header.size + sum(max_bytes for _, dtype, max_bytes, _ in self._columns if dtype == DataType.VARCHAR)
+
+    def _get_compact_layout(self, null_mask: int) -> tuple:
+        """
+        紧凑格式下位图取值对应的布局：(头部struct.Struct, 列计划, 最后一个结束偏移在解包结果中的位置)
+
+        列计划为 [(列名, 值或结束偏移在解包结果中的位置，NULL为-1, 起始偏移的位置)]，
+        定长列的起始偏移位置为None，第一个VARCHAR从数据区起点开始，起始偏移位置为-1。
+        """
+        layout = self._compact_layouts.get(null_mask)
+        if layout is not None:
+            return layout
+
+        fixed_format = ''
+        fixed_columns = []
+        varchar_columns = []
+        for i, (col_name, dtype, _, col_format) in enumerate(self._columns):
+            if null_mask >> i & 1:
+                continue
+            if dtype == DataType.VARCHAR:
+                varchar_columns.append(col_name)
+            else:
+                fixed_format += col_format
+                fixed_columns.append(col_name)
+
+        position = 2 if self._bitmap_format else 1
+        locations = {}
+        for col_name in fixed_columns:
+            locations[col_name] = (position, None)
+            position += 1
+        for k, col_name in enumerate(varchar_columns):
+            locations[col_name] = (position, position - 1 if k else -1)
+            position += 1
+
+        plan = [(col_name,) + locations.get(col_name, (-1, None)) for col_name, _, _, _ in self._columns]
+        header = struct.Struct('<B' + self._bitmap_format + fixed_format + 'H' * len(varchar_columns))
+        layout = (header, plan, position - 1 if varchar_columns else None)
+        if len(self._compact_layouts) < self.MAX_CACHED_LAYOUTS:
+            self._compact_layouts[null_mask] = layout
+        return layout
+
+    def _read_null_mask(self, data, offset: int) -> int:
+        if not self._bitmap_format:
+            return 0
+        null_mask = self._bitmap_struct.unpack_from(data, offset + 1)[0]
+        return int.from_bytes(null_mask, 'little') if self._bitmap_is_bytes else null_mask
+
+    def encode(self, record: Dict[str, Any]) -> bytes:
+        """序列化记录（紧凑格式），等价于 RecordSerializer.serialize_record"""
+        try:
+            null_mask = 0
+            values = []
+            strings = []
+            ends = []
+            end = 0
+            status = RECORD_STATUS_COMPACT
+            for i, (col_name, dtype, max_bytes, _) in enumerate(self._columns):
+                value = record.get(col_name)
+                if value is None:
+                    null_mask |= 1 << i
+                elif dtype == DataType.VARCHAR:
+                    if type(value) is ToastPointer:
+                        str_bytes = value.to_bytes()
+                        end += len(str_bytes)
+                        ends.append(end | self.TOAST_OFFSET_FLAG)
+                        status = RECORD_STATUS_COMPACT_TOAST
                     else:
-                        if length:
-                            # 定长VARCHAR：读取实际字符串，然后跳过剩余的填充空间
-                            if offset + str_length > len(data):
-                                record[col_name] = None
-                                break
-                            str_bytes = data[offset:offset + str_length]
-                            try:
-                                record[col_name] = str_bytes.decode('utf-8')
-                            except UnicodeDecodeError:
-                                record[col_name] = str_bytes.decode('utf-8', errors='replace')
-                            offset += length  # 跳过整个定长区域
-                        else:
-                            # 变长VARCHAR：只读取实际字符串长度
-                            if offset + str_length > len(data):
-                                record[col_name] = None
-                                break
-                            str_bytes = data[offset:offset + str_length]
-                            try:
-                                record[col_name] = str_bytes.decode('utf-8')
-                            except UnicodeDecodeError:
-                                record[col_name] = str_bytes.decode('utf-8', errors='replace')
-                            offset += str_length
+                        str_bytes = str(value).encode('utf-8')[:max_bytes]
+                        end += len(str_bytes)
+                        ends.append(end)
+                    strings.append(str_bytes)
+                else:
+                    values.append(self._CONVERTERS[dtype](value))
+
+            header = self._get_compact_layout(null_mask)[0]
+            if not self._bitmap_format:
+                data = header.pack(status, *values, *ends)
+            else:
+                bitmap = null_mask.to_bytes(self._bitmap_struct.size, 'little') if self._bitmap_is_bytes else null_mask
+                data = header.pack(status, bitmap, *values, *ends)
+            return data + b''.join(strings) if strings else data
 
+        except Exception as e:
+            raise SerializationException(f"Failed to serialize record: {e}", data_type="record")
+
+    def decode(self, data, offset: int = 0, size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        反序列化 data[offset:offset + size] 中的记录，等价于 RecordSerializer.deserialize_record
+
+        data 可以是整页的 bytes 或 memoryview，不必先切出数据块。
+        不完整的紧凑记录无法定位VARCHAR数据区，返回None。
+        """
+        if size is None:
+            size = len(data) - offset
+        if size <= 0:
+            return None
+
+        status = data[offset]
+        if status == RECORD_STATUS_COMPACT:
+            return self._decode_compact(data, offset, size)
+        if status == RECORD_STATUS_COMPACT_TOAST:
+            return self._decode_compact_toast(data, offset, size)
+        if status == RECORD_STATUS_DELETED:
+            return None
+        return self._decode_v1(data, offset, size)
+
+    def _unpack_compact(self, data, offset: int, size: int) -> Optional[tuple]:
+        """解包紧凑记录的定长部分，返回 (解包结果, 列计划, VARCHAR数据区起点)；记录不完整时返回None"""
+        if size < self._bitmap_struct.size + 1:
+            return None
+        header, plan, last_end = self._get_compact_layout(self._read_null_mask(data, offset))
+        if size < header.size:
+            return None
+        fields = header.unpack_from(data, offset)
+        if last_end is not None and header.size + (fields[last_end] & ~self.TOAST_OFFSET_FLAG) > size:
+            return None
+        return fields, plan, offset + header.size
+
+    def _decode_compact(self, data, offset: int, size: int) -> Optional[Dict[str, Any]]:
+        try:
+            unpacked = self._unpack_compact(data, offset, size)
+            if unpacked is None:
+                return None
+            fields, plan, base = unpacked
+
+            record = {}
+            for col_name, position, start in plan:
+                if position < 0:
+                    record[col_name] = None
+                elif start is None:
+                    record[col_name] = fields[position]
                 else:
-                    # 固定长度类型
-                    format_char, size = RecordSerializer.TYPE_FORMATS[dtype]
+                    record[col_name] = str(data[base + (fields[start] if start >= 0 else 0):base + fields[position]],
+                                           'utf-8', 'replace')
+            return record
 
-                    if offset + size > len(data):
-                        record[col_name] = None
-                        break
+        except Exception as e:
+            raise SerializationException(f"Failed to deserialize record: {e}", data_type="record")
 
-                    value_bytes = data[offset:offset + size]
-                    offset += size
+    def _decode_compact_toast(self, data, offset: int, size: int) -> Optional[Dict[str, Any]]:
+        """解码含行外存储值的紧凑记录：结束偏移最高位为1的VARCHAR解码为 ToastPointer"""
+        try:
+            unpacked = self._unpack_compact(data, offset, size)
+            if unpacked is None:
+                return None
+            fields, plan, base = unpacked
 
-                    if value_bytes == b'\x00' * size:
-                        record[col_name] = None
+            flag = self.TOAST_OFFSET_FLAG
+            record = {}
+            for col_name, position, start in plan:
+                if position < 0:
+                    record[col_name] = None
+                elif start is None:
+                    record[col_name] = fields[position]
+                else:
+                    begin = base + (fields[start] & ~flag if start >= 0 else 0)
+                    end = fields[position]
+                    if end & flag:
+                        record[col_name] = ToastPointer.from_bytes(data, begin)
                     else:
-                        try:
-                            value = struct.unpack('<' + format_char, value_bytes)[0]
+                        record[col_name] = str(data[begin:base + end], 'utf-8', 'replace')
+            return record
 
-                            if dtype == DataType.DATE:
-                                record[col_name] = value  # 保持时间戳格式
-                            else:
-                                record[col_name] = value
-                        except struct.error:
-                            record[col_name] = None
+        except Exception as e:
+            raise SerializationException(f"Failed to deserialize record: {e}", data_type="record")
+
+    def _decode_v1(self, data, offset: int, size: int) -> Dict[str, Any]:
+        """解码旧格式记录：全零字节或长度为0的VARCHAR为NULL"""
+        if size < self._v1_prefix.size:
+            return RecordSerializer._deserialize_by_column(data[offset:offset + size], self.schema)
+
+        try:
+            fields = self._v1_prefix.unpack_from(data, offset)
+            record = {}
+            for col_name, position, is_varchar in self._v1_columns:
+                value = fields[position]
+                if is_varchar:
+                    # 长度为0表示NULL；字符串取定长字节串的前 value 个字节
+                    record[col_name] = fields[position + 1][:value].decode('utf-8', 'replace') if value else None
+                elif value == 0 and _is_zero_bytes_value(value):
+                    record[col_name] = None
+                else:
+                    record[col_name] = value
 
+            if self._v1_suffix_schema:
+                RecordSerializer._deserialize_columns(data[offset:offset + size], self._v1_prefix.size,
+                                                      self._v1_suffix_schema, record)
             return record
 
         except Exception as e:
             raise SerializationException(f"Failed to deserialize record: {e}", data_type="record")
 
+    def decode_columns(self, data, offset: int, size: int, column_lists: List[List[Any]]) -> bool:
+        """把 data[offset:offset + size] 中的记录按列追加到 column_lists（按 schema 顺序），记录已删除时返回False"""
+        if size > 0 and data[offset] == RECORD_STATUS_COMPACT:
+            unpacked = self._unpack_compact(data, offset, size)
+            if unpacked is not None:
+                fields, plan, base = unpacked
+                for (_, position, start), values in zip(plan, column_lists):
+                    if position < 0:
+                        values.append(None)
+                    elif start is None:
+                        values.append(fields[position])
+                    else:
+                        values.append(str(data[base + (fields[start] if start >= 0 else 0):base + fields[position]],
+                                          'utf-8', 'replace'))
+                return True
+
+        record = self.decode(data, offset, size)
+        if record is None:
+            return False
+        for (col_name, _, _), values in zip(self.schema, column_lists):
+            values.append(record.get(col_name))
+        return True
+
+
+def _is_zero_bytes_value(value: Any) -> bool:
+    """v1 记录中定长列解出的值是否来自全零字节（NULL）：等于0且不是 -0.0"""
+    return value == 0 and not (isinstance(value, float) and math.copysign(1.0, value) < 0)
+
 
 class PageSerializer:
-    """页序列化器 - 负责页级数据的组织和管理"""
+    """页序列化器 - 负责页级数据的组织和管理
 
-    PAGE_HEADER_SIZE = 16  # 页头大小：记录数(4) + 空闲空间起始(4) + 下一页ID(4) + 保留(4)
+    新页使用 v2 槽页格式：
+        页头(16) = 槽位数(2) + 有效记录数(2) + 数据区起点(2) + 碎片字节数(2) + 下一页ID(4) + 格式标记(2) + 版本(2)
+        槽位目录紧跟页头向后增长，每个槽位 = 偏移(2) + 长度(2)，长度最高位为墓碑标记
+        元组数据从页尾向前增长，两者之间是连续空闲空间
+    插入只写入新元组和一个槽位；删除只给槽位打墓碑，槽位号保持不变，墓碑槽位可被后续插入复用。
+    碎片超过 PAGE_COMPACTION_THRESHOLD 或插入需要连续空间时才整理页。
 
-    @staticmethod
-    def create_empty_page() -> bytes:
-        """创建空页"""
-        from .constants import PAGE_SIZE
+    v1 页（记录数(4) + 空闲空间起始(4) + 下一页ID(4) + 保留(4)，偏移表之后紧跟数据）仍可读取，
+    第一次修改时转换为 v2，槽位号与原来的数据块索引一致。
+    """
 
-        # 页头：记录数(0) + 空闲空间起始位置(PAGE_HEADER_SIZE) + 下一页ID(0) + 保留(0)
-        header = struct.pack('<IIII', 0, PageSerializer.PAGE_HEADER_SIZE, 0, 0)
+    PAGE_HEADER_SIZE = 16  # 页头大小
+    SLOT_SIZE = 4  # 每个槽位（v1 偏移表项）的大小
+    TOMBSTONE_FLAG = 0x8000  # 槽位长度中的墓碑标记
+
+    _V1_HEADER = struct.Struct('<IIII')
+    _V2_HEADER = struct.Struct('<HHHHIHH')
+    _V2_MARKER = struct.pack('<HH', PAGE_FORMAT_MAGIC, PAGE_FORMAT_V2)
+    _SLOT = struct.Struct('<HH')
+
+    @staticmethod
+    def create_empty_page(page_size: int = PAGE_SIZE) -> bytes:
+        """创建空页（v2 格式），页大小取自页所在的表空间"""
+        header = PageSerializer._V2_HEADER.pack(0, 0, page_size, 0, 0, PAGE_FORMAT_MAGIC, PAGE_FORMAT_V2)
 
         # 填充剩余空间为0
-        remaining = PAGE_SIZE - len(header)
-        return header + b'\x00' * remaining
+        return header + b'\x00' * (page_size - len(header))
+
+    @staticmethod
+    def is_slotted_page(page_data: bytes) -> bool:
+        """页是否为 v2 槽页格式"""
+        return page_data[12:16] == PageSerializer._V2_MARKER
 
     @staticmethod
     def get_page_info(page_data: bytes) -> Dict[str, int]:
@@ -254,118 +586,138 @@ class PageSerializer:
         if len(page_data) < PageSerializer.PAGE_HEADER_SIZE:
             raise SerializationException("Invalid page data: too short")
 
-        record_count, free_space_start, next_page_id, reserved = struct.unpack('<IIII', page_data[:16])
+        if PageSerializer.is_slotted_page(page_data):
+            slot_count, live_count, data_start, dead_bytes, next_page_id, _, version = \
+                PageSerializer._V2_HEADER.unpack_from(page_data)
+            contiguous_free = data_start - (PageSerializer.PAGE_HEADER_SIZE + slot_count * PageSerializer.SLOT_SIZE)
+            free_space_size = contiguous_free + dead_bytes
+
+            return {
+                'record_count': live_count,                             # 页中有效记录数量
+                'free_space_start': len(page_data) - free_space_size,   # 按 v1 紧凑布局折算的空闲空间起始位置
+                'next_page_id': next_page_id,                           # 链表中的下一页ID
+                'reserved': 0,                                          # 保留字段
+                'free_space_size': free_space_size,                     # 可用空闲空间大小（含可整理回收的碎片）
+                'version': version,                                     # 页格式版本
+                'slot_count': slot_count,                               # 槽位数（含墓碑）
+                'data_start': data_start,                               # 元组数据区起点
+                'contiguous_free_space': contiguous_free,               # 槽位目录与数据区之间的连续空闲空间
+                'dead_space': dead_bytes                                # 删除和更新留下的碎片
+            }
+
+        record_count, free_space_start, next_page_id, reserved = PageSerializer._V1_HEADER.unpack_from(page_data)
+        free_space_size = len(page_data) - free_space_start
 
         return {
             'record_count': record_count,           # 页中记录数量
             'free_space_start': free_space_start,   # 空闲空间起始位置
             'next_page_id': next_page_id,           # 链表中的下一页ID
             'reserved': reserved,                   # 保留字段
-            'free_space_size': len(page_data) - free_space_start  # 可用空闲空间大小
+            'free_space_size': free_space_size,     # 可用空闲空间大小
+            'version': PAGE_FORMAT_V1,
+            'slot_count': record_count,
+            'data_start': PageSerializer.PAGE_HEADER_SIZE + record_count * PageSerializer.SLOT_SIZE,
+            'contiguous_free_space': free_space_size,
+            'dead_space': 0
         }
 
     @staticmethod
     def add_data_to_page(page_data: bytes, data_block: bytes) -> Tuple[bytes, bool]:
-        """向页中添加一个数据块"""
-        from .constants import PAGE_SIZE
-
+        """向页中添加一个数据块（优先复用墓碑槽位）"""
         try:
-            page_info = PageSerializer.get_page_info(page_data)
-
-            # 计算空间需求
-            current_offset_table_size = page_info['record_count'] * 4
-            new_offset_table_size = (page_info['record_count'] + 1) * 4
-
-            # 计算新数据块的位置
-            current_data_start = PageSerializer.PAGE_HEADER_SIZE + current_offset_table_size
-            current_data_end = page_info['free_space_start']
-            current_data_size = current_data_end - current_data_start
-
-            new_data_start = PageSerializer.PAGE_HEADER_SIZE + new_offset_table_size
-            new_record_offset = new_data_start + current_data_size
-
-            # 检查空间是否足够
-            total_needed = new_offset_table_size + current_data_size + len(data_block)
-            available_space = PAGE_SIZE - PageSerializer.PAGE_HEADER_SIZE
-
-            if total_needed > available_space:
+            page = _SlottedPage(page_data)
+            if page.insert(data_block) is None:
                 return page_data, False  # 空间不足
+            return page.to_bytes(), True
 
-            # 构建新页
-            new_page = bytearray(PAGE_SIZE)
-
-            # 1. 复制并更新页头
-            new_record_count = page_info['record_count'] + 1
-            new_free_space_start = new_record_offset + len(data_block)
-
-            struct.pack_into('<IIII', new_page, 0,
-                           new_record_count,
-                           new_free_space_start,
-                           page_info['next_page_id'],
-                           page_info['reserved'])
-
-            # 2. 重建偏移表
-            offset_adjustment = new_data_start - current_data_start
-
-            # 复制现有偏移并调整
-            for i in range(page_info['record_count']):
-                old_offset_pos = PageSerializer.PAGE_HEADER_SIZE + (i * 4)
-                old_offset = struct.unpack('<I', page_data[old_offset_pos:old_offset_pos + 4])[0]
-                new_offset = old_offset + offset_adjustment
-                struct.pack_into('<I', new_page, old_offset_pos, new_offset)
+        except Exception as e:
+            raise SerializationException(f"Failed to add data to page: {e}")
 
-            # 添加新记录的偏移
-            new_offset_pos = PageSerializer.PAGE_HEADER_SIZE + (page_info['record_count'] * 4)
-            struct.pack_into('<I', new_page, new_offset_pos, new_record_offset)
+    @staticmethod
+    def add_data_blocks_to_page(page_data: bytes, data_blocks: List[bytes], start: int = 0) -> Tuple[bytes, int]:
+        """
+        从 data_blocks[start] 开始，把尽可能多的数据块一次性加入页（批量插入使用）
 
-            # 3. 复制现有数据
-            if current_data_size > 0:
-                old_data = page_data[current_data_start:current_data_end]
-                new_page[new_data_start:new_data_start + current_data_size] = old_data
+        结果与逐个调用 add_data_to_page 相同，但整页只复制一次。
 
-            # 4. 添加新数据块
-            new_page[new_record_offset:new_record_offset + len(data_block)] = data_block
+        Returns:
+            Tuple[bytes, int]: (新页数据, 加入的数据块数)
+        """
+        try:
+            page = _SlottedPage(page_data)
+            end = start
+            while end < len(data_blocks) and page.insert(data_blocks[end]) is not None:
+                end += 1
 
-            return bytes(new_page), True
+            if end == start:
+                return page_data, 0
+            return page.to_bytes(), end - start
 
         except Exception as e:
-            raise SerializationException(f"Failed to add data to page: {e}")
+            raise SerializationException(f"Failed to add data blocks to page: {e}")
 
     @staticmethod
-    def get_data_blocks_from_page(page_data: bytes) -> List[bytes]:
-        """从页中提取所有数据块"""
+    def get_slot_offsets(page_data: bytes) -> List[Tuple[int, int, int]]:
+        """获取页中每个有效数据块的 (槽位号, 偏移, 大小)，不复制数据"""
         try:
-            page_info = PageSerializer.get_page_info(page_data)
-            data_blocks = []
+            if PageSerializer.is_slotted_page(page_data):
+                slot_count = struct.unpack_from('<H', page_data, 0)[0]
+                fields = struct.unpack_from(f'<{slot_count * 2}H', page_data, PageSerializer.PAGE_HEADER_SIZE)
+                tombstone = PageSerializer.TOMBSTONE_FLAG
+                return [(slot, fields[2 * slot], fields[2 * slot + 1]) for slot in range(slot_count)
+                        if not fields[2 * slot + 1] & tombstone]
 
-            # 读取每个数据块的偏移量和内容
-            for i in range(page_info['record_count']):
-                offset_position = PageSerializer.PAGE_HEADER_SIZE + (i * 4)
+            return [(slot, offset, size)
+                    for slot, (offset, size) in enumerate(PageSerializer._get_v1_block_offsets(page_data))]
 
-                if offset_position + 4 > len(page_data):
-                    break
+        except Exception as e:
+            raise SerializationException(f"Failed to get data blocks from page: {e}")
 
-                data_offset = struct.unpack('<I', page_data[offset_position:offset_position + 4])[0]
+    @staticmethod
+    def get_data_block_offsets(page_data: bytes) -> List[Tuple[int, int]]:
+        """获取页中每个有效数据块的 (偏移, 大小)，按槽位号顺序，不复制数据"""
+        return [(offset, size) for _, offset, size in PageSerializer.get_slot_offsets(page_data)]
 
-                # 计算数据块大小
-                if i + 1 < page_info['record_count']:
-                    # 不是最后一个，大小 = 下一个偏移 - 当前偏移
-                    next_offset_position = PageSerializer.PAGE_HEADER_SIZE + ((i + 1) * 4)
-                    next_data_offset = struct.unpack('<I', page_data[next_offset_position:next_offset_position + 4])[0]
-                    data_size = next_data_offset - data_offset
-                else:
-                    # 最后一个，大小 = 空闲空间开始 - 当前偏移
-                    data_size = page_info['free_space_start'] - data_offset
+    @staticmethod
+    def _get_v1_block_offsets(page_data: bytes) -> List[Tuple[int, int]]:
+        """v1 页：由偏移表和空闲空间起始位置推算每个数据块的 (偏移, 大小)"""
+        record_count, free_space_start, _, _ = PageSerializer._V1_HEADER.unpack_from(page_data)
+        record_count = min(record_count, (len(page_data) - PageSerializer.PAGE_HEADER_SIZE) // PageSerializer.SLOT_SIZE)
+        offsets = struct.unpack_from(f'<{record_count}I', page_data, PageSerializer.PAGE_HEADER_SIZE)
+
+        block_offsets = []
+        for i, data_offset in enumerate(offsets):
+            # 数据块大小 = 下一个偏移（最后一个为空闲空间起始） - 当前偏移
+            data_end = offsets[i + 1] if i + 1 < record_count else free_space_start
+            data_size = data_end - data_offset
+            if data_offset + data_size <= len(page_data) and data_size > 0:
+                block_offsets.append((data_offset, data_size))
+        return block_offsets
 
-                # 提取数据块
-                if data_offset + data_size <= len(page_data) and data_size > 0:
-                    data_block = page_data[data_offset:data_offset + data_size]
-                    data_blocks.append(data_block)
+    @staticmethod
+    def get_data_blocks_from_page(page_data: bytes) -> List[bytes]:
+        """从页中提取所有有效数据块"""
+        return [page_data[offset:offset + size]
+                for offset, size in PageSerializer.get_data_block_offsets(page_data)]
 
-            return data_blocks
+    @staticmethod
+    def get_data_block(page_data: bytes, slot: int) -> Optional[bytes]:
+        """按槽位号读取数据块，槽位无效或已删除时返回None"""
+        if PageSerializer.is_slotted_page(page_data):
+            slot_count = struct.unpack_from('<H', page_data, 0)[0]
+            if not 0 <= slot < slot_count:
+                return None
+            offset, length = PageSerializer._SLOT.unpack_from(
+                page_data, PageSerializer.PAGE_HEADER_SIZE + slot * PageSerializer.SLOT_SIZE)
+            if length & PageSerializer.TOMBSTONE_FLAG:
+                return None
+            return page_data[offset:offset + length]
 
-        except Exception as e:
-            raise SerializationException(f"Failed to get data blocks from page: {e}")
+        block_offsets = PageSerializer._get_v1_block_offsets(page_data)
+        if not 0 <= slot < len(block_offsets):
+            return None
+        offset, size = block_offsets[slot]
+        return page_data[offset:offset + size]
 
     @staticmethod
     def get_records_from_page(page_data: bytes, schema: List[Tuple[str, str, Optional[int]]]) -> List[Dict[str, Any]]:
@@ -380,11 +732,12 @@ class PageSerializer:
             List[Dict[str, Any]]: 记录列表
         """
         try:
-            data_blocks = PageSerializer.get_data_blocks_from_page(page_data)
+            codec = RecordSerializer.get_codec(schema)
+            page_view = memoryview(page_data)
             records = []
 
-            for data_block in data_blocks:
-                record = RecordSerializer.deserialize_record(data_block, schema)
+            for offset, size in PageSerializer.get_data_block_offsets(page_data):
+                record = codec.decode(page_view, offset, size)
                 if record is not None:  # 跳过已删除的记录
                     records.append(record)
 
@@ -393,6 +746,59 @@ class PageSerializer:
         except Exception as e:
             raise SerializationException(f"Failed to get records from page: {e}")
 
+    @staticmethod
+    def get_records_with_slots_from_page(page_data: bytes, schema: List[Tuple[str, str, Optional[int]]]
+                                         ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        从页中获取所有记录及其槽位号
+
+        Returns:
+            List[Tuple[int, Dict[str, Any]]]: (槽位号, 记录) 列表
+        """
+        try:
+            codec = RecordSerializer.get_codec(schema)
+            page_view = memoryview(page_data)
+            records = []
+            for slot, offset, size in PageSerializer.get_slot_offsets(page_data):
+                record = codec.decode(page_view, offset, size)
+                if record is not None:
+                    records.append((slot, record))
+            return records
+
+        except Exception as e:
+            raise SerializationException(f"Failed to get records from page: {e}")
+
+    @staticmethod
+    def get_columns_from_page(page_data: bytes, schema: List[Tuple[str, str, Optional[int]]],
+                              columns: Dict[str, List[Any]]) -> int:
+        """
+        把页中的记录按列解码，追加到 columns 的各列列表中（批处理执行使用）
+
+        用预编译的 RecordCodec 直接在页缓冲区上解码，NULL 的判定与 deserialize_record 一致。
+
+        Args:
+            page_data: 页数据
+            schema: 表模式
+            columns: 列名 -> 值列表，按 schema 顺序
+
+        Returns:
+            int: 追加的记录数
+        """
+        try:
+            codec = RecordSerializer.get_codec(schema)
+            column_lists = [columns[col_name] for col_name, _, _ in schema]
+            count = 0
+
+            page_view = memoryview(page_data)
+            for offset, size in PageSerializer.get_data_block_offsets(page_data):
+                if codec.decode_columns(page_view, offset, size, column_lists):
+                    count += 1
+
+            return count
+
+        except Exception as e:
+            raise SerializationException(f"Failed to get columns from page: {e}")
+
     @staticmethod
     def add_record_to_page(page_data: bytes, record_data: bytes) -> Tuple[bytes, bool]:
         """向页中添加记录（兼容接口）"""
@@ -400,70 +806,232 @@ class PageSerializer:
 
     @staticmethod
     def remove_data_from_page(page_data: bytes, block_index: int) -> Tuple[bytes, bool]:
-        """从页中移除指定索引的数据块"""
+        """删除指定槽位号的数据块：槽位标记为墓碑，其他槽位号不变"""
         try:
-            page_info = PageSerializer.get_page_info(page_data)
-
-            if block_index >= page_info['record_count'] or block_index < 0:
+            page = _SlottedPage(page_data)
+            if not page.delete(block_index):
                 return page_data, False
 
-            # 获取所有数据块
-            data_blocks = PageSerializer.get_data_blocks_from_page(page_data)
+            page.compact_if_fragmented()
+            return page.to_bytes(), True
+
+        except Exception as e:
+            raise SerializationException(f"Failed to remove data from page: {e}")
+
+    @staticmethod
+    def update_data_blocks_in_page(page_data: bytes, changes: Dict[int, Optional[bytes]]) -> Tuple[bytes, bool]:
+        """
+        按槽位号一次性替换或删除（值为None）多个数据块
+
+        替换的数据块保持原槽位号，删除的槽位标记为墓碑，所有槽位号都不变。
+
+        Returns:
+            Tuple[bytes, bool]: (新页数据, 是否成功)；槽位号无效或替换后放不下时返回原页和False
+        """
+        try:
+            page = _SlottedPage(page_data)
 
-            # 移除指定索引的数据块
-            if block_index < len(data_blocks):
-                data_blocks.pop(block_index)
+            # 先删除再替换，删除释放的空间可供更长的新版本使用
+            for slot, data_block in changes.items():
+                if data_block is None and not page.delete(slot):
+                    return page_data, False
+            for slot, data_block in changes.items():
+                if data_block is not None and not page.replace(slot, data_block):
+                    return page_data, False
 
-            # 重建页面
-            return PageSerializer._rebuild_page_with_blocks(data_blocks, page_info['next_page_id'])
+            page.compact_if_fragmented()
+            return page.to_bytes(), True
 
         except Exception as e:
-            raise SerializationException(f"Failed to remove data from page: {e}")
+            raise SerializationException(f"Failed to update data blocks in page: {e}")
+
+    @staticmethod
+    def compact_page(page_data: bytes) -> bytes:
+        """整理页，回收删除和更新留下的碎片（槽位号不变）"""
+        page = _SlottedPage(page_data)
+        page.compact()
+        return page.to_bytes()
 
     @staticmethod
     def get_page_utilization(page_data: bytes) -> Dict[str, float]:
         """获取页面空间利用率统计"""
-        from .constants import PAGE_SIZE
-
+        page_size = len(page_data)
         page_info = PageSerializer.get_page_info(page_data)
 
         header_size = PageSerializer.PAGE_HEADER_SIZE
-        offset_table_size = page_info['record_count'] * 4
-        data_size = page_info['free_space_start'] - (header_size + offset_table_size)
-        free_space = PAGE_SIZE - page_info['free_space_start']
+        offset_table_size = page_info['slot_count'] * PageSerializer.SLOT_SIZE
+        free_space = page_info['free_space_size']
+        data_size = page_size - header_size - offset_table_size - free_space
 
         return {
-            'total_size': PAGE_SIZE,
+            'total_size': page_size,
             'header_size': header_size,
             'offset_table_size': offset_table_size,
             'data_size': data_size,
             'free_space': free_space,
-            'utilization_ratio': (PAGE_SIZE - free_space) / PAGE_SIZE,
-            'data_ratio': data_size / PAGE_SIZE,
-            'overhead_ratio': (header_size + offset_table_size) / PAGE_SIZE
+            'utilization_ratio': (page_size - free_space) / page_size,
+            'data_ratio': data_size / page_size,
+            'overhead_ratio': (header_size + offset_table_size) / page_size
         }
 
     @staticmethod
-    def _rebuild_page_with_blocks(data_blocks: List[bytes], next_page_id: int = 0) -> Tuple[bytes, bool]:
+    def _rebuild_page_with_blocks(data_blocks: List[bytes], next_page_id: int = 0,
+                                  page_size: int = PAGE_SIZE) -> Tuple[bytes, bool]:
         """使用给定的数据块重建页面"""
-        from .constants import PAGE_SIZE
-
-        # 从空页开始
-        new_page = PageSerializer.create_empty_page()
-
-        # 设置next_page_id
-        if next_page_id != 0:
-            struct.pack_into('<I', new_page, 8, next_page_id)  # 第3个32位字段
+        page = _SlottedPage(PageSerializer.create_empty_page(page_size))
+        page.next_page_id = next_page_id
 
-        # 逐个添加数据块
-        current_page = new_page
         for data_block in data_blocks:
-            current_page, success = PageSerializer.add_data_to_page(current_page, data_block)
-            if not success:
+            if page.insert(data_block) is None:
                 # 页空间不足，无法添加所有数据块
-                return current_page, False
+                return page.to_bytes(), False
+
+        return page.to_bytes(), True
+
+
+class _SlottedPage:
+    """bytearray 上可就地修改的 v2 页，v1 页在构造时转换"""
+
+    __slots__ = ('buffer', 'slot_count', 'live_count', 'data_start', 'dead_bytes', 'next_page_id')
+
+    def __init__(self, page_data: bytes):
+        if PageSerializer.is_slotted_page(page_data):
+            self.buffer = bytearray(page_data)
+            (self.slot_count, self.live_count, self.data_start, self.dead_bytes,
+             self.next_page_id, _, _) = PageSerializer._V2_HEADER.unpack_from(page_data)
+            return
+
+        # v1 页：按原顺序把数据块搬到 v2 布局，两种格式每块的开销相同，一定放得下
+        page_info = PageSerializer.get_page_info(page_data)
+        self.buffer = bytearray(len(page_data))
+        self.slot_count = self.live_count = self.dead_bytes = 0
+        self.data_start = len(page_data)
+        self.next_page_id = page_info['next_page_id']
+        for offset, size in PageSerializer._get_v1_block_offsets(page_data):
+            self.insert(page_data[offset:offset + size])
+
+    def contiguous_free_space(self) -> int:
+        return self.data_start - (PageSerializer.PAGE_HEADER_SIZE + self.slot_count * PageSerializer.SLOT_SIZE)
+
+    def free_space(self) -> int:
+        return self.contiguous_free_space() + self.dead_bytes
+
+    def _get_slot(self, slot: int) -> Tuple[int, int]:
+        return PageSerializer._SLOT.unpack_from(self.buffer, PageSerializer.PAGE_HEADER_SIZE + slot * PageSerializer.SLOT_SIZE)
+
+    def _set_slot(self, slot: int, offset: int, length: int):
+        PageSerializer._SLOT.pack_into(self.buffer, PageSerializer.PAGE_HEADER_SIZE + slot * PageSerializer.SLOT_SIZE,
+                                       offset, length)
+
+    def _live_slot(self, slot: int) -> Optional[Tuple[int, int]]:
+        if not 0 <= slot < self.slot_count:
+            return None
+        offset, length = self._get_slot(slot)
+        return None if length & PageSerializer.TOMBSTONE_FLAG else (offset, length)
+
+    def _find_free_slot(self) -> Optional[int]:
+        if self.live_count == self.slot_count:
+            return None
+        for slot in range(self.slot_count):
+            if self._get_slot(slot)[1] & PageSerializer.TOMBSTONE_FLAG:
+                return slot
+        return None
+
+    def _write_tuple(self, data_block: bytes) -> int:
+        """把元组写到数据区前端（调用方保证连续空间足够），返回偏移"""
+        offset = self.data_start - len(data_block)
+        self.buffer[offset:self.data_start] = data_block
+        self.data_start = offset
+        return offset
+
+    def insert(self, data_block: bytes) -> Optional[int]:
+        """插入元组，返回槽位号；空间不足时返回None"""
+        length = len(data_block)
+        if length >= PageSerializer.TOMBSTONE_FLAG:
+            return None
+
+        slot = self._find_free_slot()
+        needed = length if slot is not None else length + PageSerializer.SLOT_SIZE
+        if needed > self.free_space():
+            return None
+        if needed > self.contiguous_free_space():
+            self.compact()
+
+        if slot is None:
+            slot = self.slot_count
+            self.slot_count += 1
+        self._set_slot(slot, self._write_tuple(data_block), length)
+        self.live_count += 1
+        return slot
+
+    def delete(self, slot: int) -> bool:
+        """把槽位标记为墓碑；元组位于数据区前端时直接回收，否则计入碎片"""
+        entry = self._live_slot(slot)
+        if entry is None:
+            return False
+
+        offset, length = entry
+        self._release(offset, length)
+        self._set_slot(slot, 0, PageSerializer.TOMBSTONE_FLAG)
+        self.live_count -= 1
+        return True
+
+    def replace(self, slot: int, data_block: bytes) -> bool:
+        """替换元组，槽位号不变；放不下时返回False且页不变"""
+        entry = self._live_slot(slot)
+        length = len(data_block)
+        if entry is None or length >= PageSerializer.TOMBSTONE_FLAG:
+            return False
+
+        offset, old_length = entry
+        if length <= old_length:
+            # 就地写在旧空间的尾部，多出的前部空间被释放
+            new_offset = offset + old_length - length
+            self.buffer[new_offset:new_offset + length] = data_block
+            self._release(offset, old_length - length)
+            self._set_slot(slot, new_offset, length)
+            return True
+
+        if length > self.free_space() + old_length:
+            return False
 
-        return current_page, True
+        # 更长的新版本：旧空间释放后写入连续空闲区（必要时先整理，整理时旧版本已不占空间）
+        self._release(offset, old_length)
+        self._set_slot(slot, 0, PageSerializer.TOMBSTONE_FLAG)
+        if length > self.contiguous_free_space():
+            self.compact()
+        self._set_slot(slot, self._write_tuple(data_block), length)
+        return True
+
+    def _release(self, offset: int, length: int):
+        if offset == self.data_start:
+            self.data_start += length
+        else:
+            self.dead_bytes += length
+
+    def compact(self):
+        """把有效元组紧凑地移到页尾，槽位号不变"""
+        live_tuples = []
+        for slot in range(self.slot_count):
+            offset, length = self._get_slot(slot)
+            if not length & PageSerializer.TOMBSTONE_FLAG:
+                live_tuples.append((slot, bytes(self.buffer[offset:offset + length])))
+
+        directory_end = PageSerializer.PAGE_HEADER_SIZE + self.slot_count * PageSerializer.SLOT_SIZE
+        self.buffer[directory_end:] = bytes(len(self.buffer) - directory_end)
+        self.data_start = len(self.buffer)
+        for slot, data_block in live_tuples:
+            self._set_slot(slot, self._write_tuple(data_block), len(data_block))
+        self.dead_bytes = 0
+
+    def compact_if_fragmented(self):
+        if self.dead_bytes > len(self.buffer) * PAGE_COMPACTION_THRESHOLD:
+            self.compact()
+
+    def to_bytes(self) -> bytes:
+        PageSerializer._V2_HEADER.pack_into(self.buffer, 0, self.slot_count, self.live_count, self.data_start,
+                                            self.dead_bytes, self.next_page_id, PAGE_FORMAT_MAGIC, PAGE_FORMAT_V2)
+        return bytes(self.buffer)
 
 
 class SchemaSerializer: